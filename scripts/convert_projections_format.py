@@ -1,64 +1,153 @@
+"""
+Convert the climate projection pickles (`<Catchment>_Projections.pkl`) of a
+directory into the partitioned Parquet format read by HOLMES
+(`<Catchment>_Projections/`, see `holmes.data.write_projection_partitions`).
+
+Each (model, horizon) block of a pickle is written as soon as it is built, and
+pickles whose content didn't change since their last conversion are skipped.
+The pickles are converted in parallel, one per process.
+
+Usage:
+    python scripts/convert_projections_format.py [directory] [--workers N]
+        [--force]
+"""
+
+import argparse
+import hashlib
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from typing import Any
 
 import pandas as pd
 import polars as pl
 
+from holmes import data
 from holmes.utils import paths
 
 
-def main() -> None:
-    for path in paths.data_dir.glob("*_Projections.pkl"):
-        convert_projection_format(path)
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    sources = sorted(args.directory.glob("*_Projections.pkl"))
+    if not sources:
+        print(f"No projection pickle found in {args.directory}.")
+        return
 
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for path, converted in zip(
+            sources,
+            executor.map(
+                convert_projection_format, sources, repeat(args.force)
+            ),
+        ):
+            print(f"{'Converted' if converted else 'Skipped'} {path.name}")
 
-def convert_projection_format(path: Path) -> None:
-    data = pd.read_pickle(path)
-    dataframes: list[pl.DataFrame] = []
-    for model, model_values in data.items():
-        for horizon, horizon_values in model_values.items():
-            dates = (
-                pl.from_pandas(horizon_values["Date"])
-                .rename("date")
-                .dt.date()
-                .to_frame()
-            )
-            dataframes.append(
-                pl.concat(
-                    [
-                        pl.concat(
-                            [
-                                dates,
-                                pl.from_pandas(values)
-                                .rename(
-                                    {
-                                        "P": "precipitation",
-                                        "T": "temperature",
-                                    }
-                                )
-                                .with_columns(
-                                    pl.lit(
-                                        f"{int(key.split('_')[1].replace('memb', '')):02d}"
-                                    ).alias("member"),
-                                    pl.lit(
-                                        "REF"
-                                        if horizon == "REF"
-                                        else "RCP"
-                                        + key.split("_")[0][1]
-                                        + ".5"
-                                    ).alias("scenario"),
-                                    pl.lit(model).alias("model"),
-                                    pl.lit(horizon).alias("horizon"),
-                                ),
-                            ],
-                            how="horizontal",
-                        )
-                        for key, values in horizon_values.items()
-                        if key != "Date"
-                    ]
-                )
+
+def convert_projection_format(path: Path, force: bool = False) -> bool:
+    """
+    Convert a projection pickle into partitions next to it, unless they were
+    already converted from the same content.
+
+    Returns
+    -------
+    bool
+        If the pickle was converted
+    """
+    directory = path.with_suffix("")
+    source_hash = hash_file(path)
+    if not force and (
+        data.read_projection_source_hash(directory) == source_hash
+    ):
+        return False
+    data.write_projection_partitions(
+        directory, _read_blocks(path), source_hash=source_hash
+    )
+    return True
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of the file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert climate projection pickles to partitioned "
+        "Parquet files."
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        type=Path,
+        default=paths.data_dir,
+        help="directory with the *_Projections.pkl files "
+        "(default: the HOLMES data directory)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of pickles converted at once (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="convert pickles even if their content didn't change",
+    )
+    return parser.parse_args(argv)
+
+
+def _read_blocks(path: Path) -> Iterator[pl.DataFrame]:
+    projections = pd.read_pickle(path)
+    # blocks are removed from the pickle once converted to release their
+    # memory along the way
+    while projections:
+        model, model_values = projections.popitem()
+        while model_values:
+            horizon, horizon_values = model_values.popitem()
+            yield _convert_block(model, horizon, horizon_values)
+
+
+def _convert_block(
+    model: str, horizon: str, horizon_values: dict[str, Any]
+) -> pl.DataFrame:
+    dates = (
+        pl.from_pandas(horizon_values.pop("Date"))
+        .rename("date")
+        .dt.date()
+        .to_frame()
+    )
+    return pl.concat(
+        [
+            pl.concat(
+                [
+                    dates,
+                    pl.from_pandas(values)
+                    .rename({"P": "precipitation", "T": "temperature"})
+                    .with_columns(
+                        pl.lit(
+                            int(key.split("_")[1].replace("memb", "")),
+                            dtype=pl.Int64,
+                        ).alias("member"),
+                        pl.lit(
+                            "REF"
+                            if horizon == "REF"
+                            else "RCP" + key.split("_")[0][1] + ".5"
+                        ).alias("scenario"),
+                        pl.lit(str(model)).alias("model"),
+                        pl.lit(str(horizon)).alias("horizon"),
+                    ),
+                ],
+                how="horizontal",
             )
-    _data = pl.concat(dataframes)
-    _data.write_csv(path.parent / (path.stem + ".csv"))
+            for key, values in horizon_values.items()
+        ]
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+//! Wall-clock time of one SCE-UA step as a function of the number of threads.
+//!
+//! Run with `cargo bench --bench sce`. The sequential mode is measured once as
+//! a baseline, the parallel mode once per thread count.
+
+use criterion::{criterion_group, criterion_main, BenchmarkId, Criterion};
+use holmes_rs::calibration::sce::Sce;
+use holmes_rs::calibration::utils::{Objective, Transformation};
+
+#[path = "../tests/common/helpers.rs"]
+#[allow(dead_code)]
+mod helpers;
+
+const N_TIMESTEPS: usize = 10 * 365;
+const N_COMPLEXES: usize = 25;
+
+fn new_sce(parallel: bool) -> Sce {
+    Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        N_COMPLEXES,
+        10,
+        0.0, // never converge, every step does the full amount of work
+        0.0,
+        usize::MAX,
+        42,
+    )
+    .unwrap()
+    .with_parallel(parallel)
+}
+
+fn thread_counts() -> Vec<usize> {
+    let available = std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1);
+    let mut counts: Vec<usize> = [1, 2, 4, 8, 16, 32]
+        .into_iter()
+        .filter(|&n| n < available)
+        .collect();
+    counts.push(available);
+    counts
+}
+
+fn bench_sce_step(c: &mut Criterion) {
+    let precip = helpers::generate_precipitation(N_TIMESTEPS, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(N_TIMESTEPS, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, N_TIMESTEPS);
+    let obs = helpers::generate_precipitation(N_TIMESTEPS, 3.0, 0.5, 99);
+
+    let mut group = c.benchmark_group("sce_step");
+    group.sample_size(10);
+
+    let mut run = |id: BenchmarkId, parallel: bool, n_threads: usize| {
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(n_threads)
+            .build()
+            .unwrap();
+        let mut sce = new_sce(parallel);
+        pool.install(|| {
+            sce.init(
+                precip.view(),
+                None,
+                pet.view(),
+                doy.view(),
+                None,
+                None,
+                obs.view(),
+                365,
+            )
+        })
+        .unwrap();
+        group.bench_function(id, |b| {
+            b.iter(|| {
+                pool.install(|| {
+                    sce.step(
+                        precip.view(),
+                        None,
+                        pet.view(),
+                        doy.view(),
+                        None,
+                        None,
+                        obs.view(),
+                        365,
+                    )
+                })
+                .unwrap()
+            })
+        });
+    };
+
+    run(BenchmarkId::new("sequential", 1), false, 1);
+    for n_threads in thread_counts() {
+        run(BenchmarkId::new("parallel", n_threads), true, n_threads);
+    }
+
+    group.finish();
+}
+
+criterion_group!(benches, bench_sce_step);
+criterion_main!(benches);
@@ -0,0 +1,216 @@
+//! Time of a single model simulation on the bundled Baskatong series, with
+//! and without the forcing validation, and of the PET of a single series and
+//! of an ensemble.
+//!
+//! Run with `cargo bench --bench simulate`. The `checked` entries use the
+//! public `simulate` functions, the `unchecked` ones the kernels used by the
+//! calibration once the forcings have been validated. The `hydro_evaluations`
+//! group reports the evaluations per second of each model, as seen by a
+//! calibration: a new parameter set each time, written into the same buffer.
+
+use criterion::{
+    criterion_group, criterion_main, BenchmarkId, Criterion, Throughput,
+};
+use holmes_rs::hydro::{
+    bucket, cequeau, gr4j, HydroInit, HydroSimulate, HydroSimulateInto,
+};
+use holmes_rs::pet::oudin;
+use holmes_rs::snow::{cemaneige, SnowSimulate};
+use ndarray::{array, Array1, Array2};
+use std::path::Path;
+
+struct Forcings {
+    precipitation: Array1<f64>,
+    temperature: Array1<f64>,
+    pet: Array1<f64>,
+    day_of_year: Array1<usize>,
+}
+
+fn read_baskatong() -> Forcings {
+    let path = Path::new(env!("CARGO_MANIFEST_DIR"))
+        .join("../holmes/data/Baskatong_Observations.csv");
+    let mut reader = csv::Reader::from_path(path).unwrap();
+    let (mut precipitation, mut temperature, mut pet, mut day_of_year) =
+        (vec![], vec![], vec![], vec![]);
+    for (i, record) in reader.records().enumerate() {
+        let record = record.unwrap();
+        precipitation.push(record[1].parse::<f64>().unwrap());
+        pet.push(record[2].parse::<f64>().unwrap());
+        temperature.push(record[4].parse::<f64>().unwrap());
+        day_of_year.push(i % 365 + 1);
+    }
+    Forcings {
+        precipitation: Array1::from_vec(precipitation),
+        temperature: Array1::from_vec(temperature),
+        pet: Array1::from_vec(pet),
+        day_of_year: Array1::from_vec(day_of_year),
+    }
+}
+
+fn bench_hydro(c: &mut Criterion) {
+    let forcings = read_baskatong();
+    let models: [(&str, HydroInit, HydroSimulate, HydroSimulate); 3] = [
+        ("gr4j", gr4j::init, gr4j::simulate, gr4j::simulate_unchecked),
+        (
+            "bucket",
+            bucket::init,
+            bucket::simulate,
+            bucket::simulate_unchecked,
+        ),
+        (
+            "cequeau",
+            cequeau::init,
+            cequeau::simulate,
+            cequeau::simulate_unchecked,
+        ),
+    ];
+
+    let mut group = c.benchmark_group("hydro_simulate");
+    for (name, init, simulate, simulate_unchecked) in models {
+        let (params, _) = init();
+        for (mode, simulate) in
+            [("checked", simulate), ("unchecked", simulate_unchecked)]
+        {
+            group.bench_function(BenchmarkId::new(mode, name), |b| {
+                b.iter(|| {
+                    simulate(
+                        params.view(),
+                        forcings.precipitation.view(),
+                        forcings.pet.view(),
+                    )
+                    .unwrap()
+                })
+            });
+        }
+    }
+    group.finish();
+}
+
+fn bench_evaluations(c: &mut Criterion) {
+    let forcings = read_baskatong();
+    let models: [(&str, HydroInit, HydroSimulateInto); 3] = [
+        ("gr4j", gr4j::init, gr4j::simulate_unchecked_into),
+        ("bucket", bucket::init, bucket::simulate_unchecked_into),
+        ("cequeau", cequeau::init, cequeau::simulate_unchecked_into),
+    ];
+    let n_sets = 64;
+
+    let mut group = c.benchmark_group("hydro_evaluations");
+    group.throughput(Throughput::Elements(1));
+    for (name, init, simulate) in models {
+        let (_, bounds) = init();
+        // parameter sets spread between the bounds, so that the unit
+        // hydrograph lengths vary as they would during a calibration
+        let params =
+            Array2::from_shape_fn((n_sets, bounds.nrows()), |(i, j)| {
+                let fraction = ((i * (j + 3)) % n_sets) as f64 / n_sets as f64;
+                bounds[[j, 0]] + fraction * (bounds[[j, 1]] - bounds[[j, 0]])
+            });
+        let mut out = vec![0.0; forcings.precipitation.len()];
+        let mut i = 0;
+        group.bench_function(name, |b| {
+            b.iter(|| {
+                simulate(
+                    params.row(i % n_sets),
+                    forcings.precipitation.view(),
+                    forcings.pet.view(),
+                    &mut out,
+                )
+                .unwrap();
+                i += 1;
+            })
+        });
+    }
+    group.finish();
+}
+
+fn bench_snow(c: &mut Criterion) {
+    let forcings = read_baskatong();
+    let (params, _) = cemaneige::init();
+    let elevation_layers = array![204.0, 359.0, 408.0, 445.0, 771.0];
+
+    let models: [(&str, SnowSimulate); 2] = [
+        ("checked", cemaneige::simulate),
+        ("unchecked", cemaneige::simulate_unchecked),
+    ];
+
+    let mut group = c.benchmark_group("snow_simulate");
+    for (mode, simulate) in models {
+        group.bench_function(BenchmarkId::new(mode, "cemaneige"), |b| {
+            b.iter(|| {
+                simulate(
+                    params.view(),
+                    forcings.precipitation.view(),
+                    forcings.temperature.view(),
+                    forcings.day_of_year.view(),
+                    elevation_layers.view(),
+                    408.0,
+                )
+                .unwrap()
+            })
+        });
+    }
+
+    // (ctg, kf, qnbv) sets spread between the bounds
+    let (_, bounds) = cemaneige::init();
+    let n_sets = 64;
+    let batch_params = Array2::from_shape_fn((n_sets, 3), |(i, j)| {
+        let fraction = ((i * (j + 3)) % n_sets) as f64 / n_sets as f64;
+        bounds[[j, 0]] + fraction * (bounds[[j, 1]] - bounds[[j, 0]])
+    });
+    group.bench_function(BenchmarkId::new("batch", n_sets), |b| {
+        b.iter(|| {
+            cemaneige::simulate_batch(
+                batch_params.view(),
+                forcings.precipitation.view(),
+                forcings.temperature.view(),
+                forcings.day_of_year.view(),
+                elevation_layers.view(),
+                408.0,
+            )
+            .unwrap()
+        })
+    });
+    group.finish();
+}
+
+fn bench_pet(c: &mut Criterion) {
+    let forcings = read_baskatong();
+    let n_members = 50;
+    let temperature = Array2::from_shape_fn(
+        (n_members, forcings.temperature.len()),
+        |(i, t)| forcings.temperature[t] + i as f64 * 0.1,
+    );
+
+    let mut group = c.benchmark_group("pet_simulate");
+    group.bench_function("oudin", |b| {
+        b.iter(|| {
+            oudin::simulate(
+                forcings.temperature.view(),
+                forcings.day_of_year.view(),
+                46.5,
+            )
+            .unwrap()
+        })
+    });
+    group.bench_function(BenchmarkId::new("oudin_batch", n_members), |b| {
+        b.iter(|| {
+            oudin::simulate_batch(
+                temperature.view(),
+                forcings.day_of_year.view(),
+                46.5,
+            )
+            .unwrap()
+        })
+    });
+    group.finish();
+}
+
+criterion_group!(
+    benches,
+    bench_hydro,
+    bench_evaluations,
+    bench_snow,
+    bench_pet
+);
+criterion_main!(benches);
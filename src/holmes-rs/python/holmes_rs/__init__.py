@@ -4,6 +4,7 @@ from .holmes_rs import (
     hydro,
     metrics,
     pet,
+    projection,
     snow,
     HolmesError,
     HolmesNumericalError,
@@ -16,6 +17,7 @@ __all__ = [
     "hydro",
     "metrics",
     "pet",
+    "projection",
     "snow",
     "HolmesError",
     "HolmesNumericalError",
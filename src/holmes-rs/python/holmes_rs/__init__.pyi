@@ -1,4 +1,4 @@
-from . import calibration, hydro, metrics, pet, snow
+from . import calibration, hydro, metrics, pet, projection, snow
 
 __version__: str
 
@@ -23,6 +23,7 @@ __all__ = [
     "hydro",
     "metrics",
     "pet",
+    "projection",
     "snow",
     "HolmesError",
     "HolmesNumericalError",
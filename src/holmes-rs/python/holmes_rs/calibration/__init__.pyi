@@ -1,5 +1,6 @@
-from . import sce
+from . import islands, sce
 
 __all__ = [
+    "islands",
     "sce",
 ]
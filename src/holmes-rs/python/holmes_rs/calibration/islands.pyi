@@ -0,0 +1,71 @@
+from typing import final
+
+import numpy as np
+import numpy.typing as npt
+
+@final
+class Islands:
+    def __new__(
+        cls,
+        hydro_model: str,
+        snow_model: str | None,
+        objective: str,
+        transformation: str,
+        n_complexes: int,
+        k_stop: int,
+        p_convergence_threshold: float,
+        geometric_range_threshold: float,
+        max_evaluations: int,
+        seed: int,
+        n_islands: int,
+        migration_interval: int = 5,
+        n_migrants: int = 1,
+        spin_up_iterations: int = 0,
+        spin_up_tolerance: float = 1e-3,
+        cache_size: int = 0,
+        fixed_params: dict[int, float] | None = None,
+        snow_cache_size: int = 0,
+    ) -> Islands: ...
+    def init(
+        self,
+        precipitation: npt.NDArray[np.float64],
+        temperature: npt.NDArray[np.float64] | None,
+        pet: npt.NDArray[np.float64],
+        day_of_year: npt.NDArray[np.uintp],
+        elevation_layers: npt.NDArray[np.float64] | None,
+        median_elevation: float | None,
+        observations: npt.NDArray[np.float64],
+        warmup_steps: int,
+    ) -> None: ...
+    def step(
+        self,
+        precipitation: npt.NDArray[np.float64],
+        temperature: npt.NDArray[np.float64] | None,
+        pet: npt.NDArray[np.float64],
+        day_of_year: npt.NDArray[np.uintp],
+        elevation_layers: npt.NDArray[np.float64] | None,
+        median_elevation: float | None,
+        observations: npt.NDArray[np.float64],
+        warmup_steps: int,
+    ) -> tuple[
+        bool,
+        npt.NDArray[np.float64],
+        npt.NDArray[np.float64],
+        npt.NDArray[np.float64],
+    ]: ...
+    def island_results(
+        self,
+    ) -> list[
+        tuple[
+            bool,
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64],
+            npt.NDArray[np.float64],
+        ]
+        | None
+    ]: ...
+    def cache_info(self) -> dict[str, int]: ...
+    def snow_cache_info(self) -> dict[str, int]: ...
+    def checkpoint(self) -> bytes: ...
+    @staticmethod
+    def from_checkpoint(data: bytes) -> Islands: ...
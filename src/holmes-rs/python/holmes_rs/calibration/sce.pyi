@@ -17,6 +17,12 @@ class Sce:
         geometric_range_threshold: float,
         max_evaluations: int,
         seed: int,
+        parallel: bool = False,
+        spin_up_iterations: int = 0,
+        spin_up_tolerance: float = 1e-3,
+        cache_size: int = 0,
+        fixed_params: dict[int, float] | None = None,
+        snow_cache_size: int = 0,
     ) -> Sce: ...
     def init(
         self,
@@ -45,3 +51,8 @@ class Sce:
         npt.NDArray[np.float64],
         npt.NDArray[np.float64],
     ]: ...
+    def cache_info(self) -> dict[str, int]: ...
+    def snow_cache_info(self) -> dict[str, int]: ...
+    def checkpoint(self) -> bytes: ...
+    @staticmethod
+    def from_checkpoint(data: bytes) -> Sce: ...
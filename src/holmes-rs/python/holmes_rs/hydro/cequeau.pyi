@@ -10,3 +10,17 @@ def simulate(
     precipitation: npt.NDArray[np.float64],
     pet: npt.NDArray[np.float64],
 ) -> npt.NDArray[np.float64]: ...
+def simulate_batch(
+    params: npt.NDArray[np.float64],
+    precipitation: npt.NDArray[np.float64],
+    pet: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]: ...
+def simulate_with_state(
+    params: npt.NDArray[np.float64],
+    precipitation: npt.NDArray[np.float64],
+    pet: npt.NDArray[np.float64],
+    state: npt.NDArray[np.float64] | None = None,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]: ...
+def initial_state(
+    params: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]: ...
@@ -13,3 +13,8 @@ def calculate_kge(
     observations: npt.NDArray[np.float64],
     simulations: npt.NDArray[np.float64],
 ) -> float: ...
+def evaluate_all(
+    observations: npt.NDArray[np.float64],
+    simulations: npt.NDArray[np.float64],
+    warmup_steps: int,
+) -> dict[str, float]: ...
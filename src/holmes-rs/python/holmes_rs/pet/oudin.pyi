@@ -6,3 +6,8 @@ def simulate(
     day_of_year: npt.NDArray[np.uintp],
     latitude: float,
 ) -> npt.NDArray[np.float64]: ...
+def simulate_batch(
+    temperature: npt.NDArray[np.float64],
+    day_of_year: npt.NDArray[np.uintp],
+    latitude: float,
+) -> npt.NDArray[np.float64]: ...
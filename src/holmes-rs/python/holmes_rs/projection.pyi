@@ -0,0 +1,15 @@
+import numpy as np
+import numpy.typing as npt
+
+def simulate(
+    hydro_model: str,
+    hydro_params: npt.NDArray[np.float64],
+    precipitation: npt.NDArray[np.float64],
+    temperature: npt.NDArray[np.float64],
+    day_of_year: npt.NDArray[np.uintp],
+    latitude: float,
+    snow_model: str | None = None,
+    snow_params: npt.NDArray[np.float64] | None = None,
+    elevation_layers: npt.NDArray[np.float64] | None = None,
+    median_elevation: float | None = None,
+) -> npt.NDArray[np.float64]: ...
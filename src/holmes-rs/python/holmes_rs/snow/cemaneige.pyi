@@ -12,3 +12,23 @@ def simulate(
     elevation_layers: npt.NDArray[np.float64],
     median_elevation: float,
 ) -> npt.NDArray[np.float64]: ...
+def simulate_batch(
+    params: npt.NDArray[np.float64],
+    precipitation: npt.NDArray[np.float64],
+    temperature: npt.NDArray[np.float64],
+    day_of_year: npt.NDArray[np.uintp],
+    elevation_layers: npt.NDArray[np.float64],
+    median_elevation: float,
+) -> npt.NDArray[np.float64]: ...
+def simulate_with_state(
+    params: npt.NDArray[np.float64],
+    precipitation: npt.NDArray[np.float64],
+    temperature: npt.NDArray[np.float64],
+    day_of_year: npt.NDArray[np.uintp],
+    elevation_layers: npt.NDArray[np.float64],
+    median_elevation: float,
+    state: npt.NDArray[np.float64] | None = None,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]: ...
+def initial_state(
+    elevation_layers: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]: ...
@@ -0,0 +1,223 @@
+//! Compact binary encoding of a calibration checkpoint.
+//!
+//! Values are written one after the other in little-endian order, with the
+//! length of strings and arrays before their content, after a magic number
+//! and a format version.
+
+use ndarray::{Array1, Array2};
+
+use crate::calibration::utils::CalibrationError;
+
+const MAGIC: &[u8; 8] = b"HOLMESCK";
+
+/// Format version, bumped whenever the layout of a checkpoint changes so
+/// that older checkpoints are refused instead of misread.
+///
+/// 1. initial layout
+/// 2. SCE-UA evaluation cache capacity
+/// 3. fixed parameters and snow output cache capacity
+/// 4. cache capacities in bytes instead of entries
+pub const VERSION: u8 = 4;
+
+pub struct CheckpointWriter {
+    bytes: Vec<u8>,
+}
+
+impl CheckpointWriter {
+    pub fn new() -> Self {
+        let mut bytes = MAGIC.to_vec();
+        bytes.push(VERSION);
+        CheckpointWriter { bytes }
+    }
+
+    pub fn finish(self) -> Vec<u8> {
+        self.bytes
+    }
+
+    pub fn write_u8(&mut self, value: u8) {
+        self.bytes.push(value);
+    }
+
+    pub fn write_bool(&mut self, value: bool) {
+        self.write_u8(value as u8);
+    }
+
+    pub fn write_u64(&mut self, value: u64) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn write_u128(&mut self, value: u128) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn write_usize(&mut self, value: usize) {
+        self.write_u64(value as u64);
+    }
+
+    pub fn write_f64(&mut self, value: f64) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn write_bytes(&mut self, value: &[u8]) {
+        self.write_usize(value.len());
+        self.bytes.extend_from_slice(value);
+    }
+
+    pub fn write_str(&mut self, value: &str) {
+        self.write_bytes(value.as_bytes());
+    }
+
+    pub fn write_option_str(&mut self, value: Option<&str>) {
+        self.write_bool(value.is_some());
+        if let Some(value) = value {
+            self.write_str(value);
+        }
+    }
+
+    pub fn write_array1(&mut self, value: &Array1<f64>) {
+        self.write_usize(value.len());
+        value.iter().for_each(|&x| self.write_f64(x));
+    }
+
+    pub fn write_array2(&mut self, value: &Array2<f64>) {
+        self.write_usize(value.nrows());
+        self.write_usize(value.ncols());
+        // iterates in logical order whatever the memory layout
+        value.iter().for_each(|&x| self.write_f64(x));
+    }
+}
+
+impl Default for CheckpointWriter {
+    fn default() -> Self {
+        Self::new()
+    }
+}
+
+pub struct CheckpointReader<'a> {
+    bytes: &'a [u8],
+    position: usize,
+}
+
+impl<'a> CheckpointReader<'a> {
+    /// Checks the magic number and version before reading the values.
+    pub fn new(bytes: &'a [u8]) -> Result<Self, CalibrationError> {
+        let mut reader = CheckpointReader { bytes, position: 0 };
+        if reader.take(MAGIC.len())? != MAGIC {
+            return Err(invalid("not a HOLMES checkpoint"));
+        }
+        let version = reader.read_u8()?;
+        if version != VERSION {
+            return Err(invalid(&format!(
+                "unsupported version {version} (expected {VERSION})"
+            )));
+        }
+        Ok(reader)
+    }
+
+    /// Checks that every byte was read.
+    pub fn finish(self) -> Result<(), CalibrationError> {
+        if self.position != self.bytes.len() {
+            return Err(invalid(&format!(
+                "{} unexpected trailing bytes",
+                self.bytes.len() - self.position
+            )));
+        }
+        Ok(())
+    }
+
+    pub fn read_u8(&mut self) -> Result<u8, CalibrationError> {
+        Ok(self.take(1)?[0])
+    }
+
+    pub fn read_bool(&mut self) -> Result<bool, CalibrationError> {
+        match self.read_u8()? {
+            0 => Ok(false),
+            1 => Ok(true),
+            value => Err(invalid(&format!("invalid boolean {value}"))),
+        }
+    }
+
+    pub fn read_u64(&mut self) -> Result<u64, CalibrationError> {
+        Ok(u64::from_le_bytes(self.take_array()?))
+    }
+
+    pub fn read_u128(&mut self) -> Result<u128, CalibrationError> {
+        Ok(u128::from_le_bytes(self.take_array()?))
+    }
+
+    pub fn read_usize(&mut self) -> Result<usize, CalibrationError> {
+        usize::try_from(self.read_u64()?)
+            .map_err(|_| invalid("length too large"))
+    }
+
+    pub fn read_f64(&mut self) -> Result<f64, CalibrationError> {
+        Ok(f64::from_le_bytes(self.take_array()?))
+    }
+
+    pub fn read_bytes(&mut self) -> Result<&'a [u8], CalibrationError> {
+        let len = self.read_usize()?;
+        self.take(len)
+    }
+
+    pub fn read_str(&mut self) -> Result<String, CalibrationError> {
+        String::from_utf8(self.read_bytes()?.to_vec())
+            .map_err(|_| invalid("invalid string"))
+    }
+
+    pub fn read_option_str(
+        &mut self,
+    ) -> Result<Option<String>, CalibrationError> {
+        if self.read_bool()? {
+            Ok(Some(self.read_str()?))
+        } else {
+            Ok(None)
+        }
+    }
+
+    pub fn read_array1(&mut self) -> Result<Array1<f64>, CalibrationError> {
+        let len = self.read_usize()?;
+        self.read_f64s(len).map(Array1::from_vec)
+    }
+
+    pub fn read_array2(&mut self) -> Result<Array2<f64>, CalibrationError> {
+        let nrows = self.read_usize()?;
+        let ncols = self.read_usize()?;
+        let len = nrows
+            .checked_mul(ncols)
+            .ok_or_else(|| invalid("array too large"))?;
+        let values = self.read_f64s(len)?;
+        Array2::from_shape_vec((nrows, ncols), values)
+            .map_err(|e| invalid(&e.to_string()))
+    }
+
+    fn read_f64s(&mut self, len: usize) -> Result<Vec<f64>, CalibrationError> {
+        // checked before allocating, so a corrupted length fails cleanly
+        if len > (self.bytes.len() - self.position) / 8 {
+            return Err(invalid("unexpected end of data"));
+        }
+        (0..len).map(|_| self.read_f64()).collect()
+    }
+
+    fn take(&mut self, len: usize) -> Result<&'a [u8], CalibrationError> {
+        let end = self
+            .position
+            .checked_add(len)
+            .filter(|&end| end <= self.bytes.len())
+            .ok_or_else(|| invalid("unexpected end of data"))?;
+        let bytes = &self.bytes[self.position..end];
+        self.position = end;
+        Ok(bytes)
+    }
+
+    fn take_array<const N: usize>(
+        &mut self,
+    ) -> Result<[u8; N], CalibrationError> {
+        let mut array = [0; N];
+        array.copy_from_slice(self.take(N)?);
+        Ok(array)
+    }
+}
+
+fn invalid(detail: &str) -> CalibrationError {
+    CalibrationError::InvalidCheckpoint(detail.to_string())
+}
@@ -0,0 +1,572 @@
+//! Island-model calibration: several SCE-UA populations with different
+//! seeds evolve in parallel and regularly share their best points.
+
+#![allow(clippy::too_many_arguments)]
+#![allow(clippy::type_complexity)]
+
+use ndarray::{Array1, ArrayView1};
+use numpy::{PyArray1, PyReadonlyArray1, ToPyArray};
+use pyo3::prelude::*;
+use pyo3::types::PyBytes;
+use rayon::prelude::*;
+use std::collections::HashMap;
+use std::str::FromStr;
+
+use crate::calibration::checkpoint::{CheckpointReader, CheckpointWriter};
+use crate::calibration::sce::Sce;
+use crate::calibration::utils::{
+    CacheInfo, CalibrationError, Objective, SpinUp, Transformation, MEGABYTE,
+};
+
+/// Result of the last step of an island: whether it converged, its best
+/// parameters, their simulation and their objectives (rmse, nse, kge).
+pub type IslandResult = (bool, Array1<f64>, Array1<f64>, Array1<f64>);
+
+#[pyclass(module = "hydro_rs.calibration.islands")]
+pub struct Islands {
+    islands: Vec<Sce>,
+    objective: Objective,
+    // number of steps between migrations, 0 never migrating
+    migration_interval: usize,
+    n_migrants: usize,
+    n_steps: usize,
+    // result of the last step of each island, None before its first step
+    results: Vec<Option<IslandResult>>,
+}
+
+impl Islands {
+    /// Creates `n_islands` SCE-UA calibrations with the given settings,
+    /// island `i` being seeded with `seed + i`. Every `migration_interval`
+    /// steps, the `n_migrants` best points of each island replace the worst
+    /// points of the next one, in a ring.
+    pub fn new(
+        hydro_model: &str,
+        snow_model: Option<&str>,
+        objective: Objective,
+        transformation: Transformation,
+        n_complexes: usize,
+        k_stop: usize,
+        p_convergence_threshold: f64,
+        geometric_range_threshold: f64,
+        max_evaluations: usize,
+        seed: u64,
+        n_islands: usize,
+        migration_interval: usize,
+        n_migrants: usize,
+    ) -> Result<Self, CalibrationError> {
+        if n_islands == 0 {
+            return Err(CalibrationError::NoIslands);
+        }
+        let islands = (0..n_islands)
+            .map(|i| {
+                Sce::new(
+                    hydro_model,
+                    snow_model,
+                    objective,
+                    transformation,
+                    n_complexes,
+                    k_stop,
+                    p_convergence_threshold,
+                    geometric_range_threshold,
+                    max_evaluations,
+                    seed.wrapping_add(i as u64),
+                )
+            })
+            .collect::<Result<Vec<_>, _>>()?;
+        let population_size = islands[0].population_size();
+        if n_migrants >= population_size {
+            return Err(CalibrationError::TooManyMigrants(
+                n_migrants,
+                population_size,
+            ));
+        }
+        Ok(Islands {
+            islands,
+            objective,
+            migration_interval,
+            n_migrants,
+            n_steps: 0,
+            results: vec![None; n_islands],
+        })
+    }
+
+    /// See `Sce::with_spin_up`.
+    pub fn with_spin_up(mut self, spin_up: Option<SpinUp>) -> Self {
+        self.islands = self
+            .islands
+            .into_iter()
+            .map(|island| island.with_spin_up(spin_up))
+            .collect();
+        self
+    }
+
+    /// Gives each island its own evaluation cache (see `Sce::with_cache`).
+    pub fn with_cache(mut self, capacity: usize) -> Self {
+        self.islands = self
+            .islands
+            .into_iter()
+            .map(|island| island.with_cache(capacity))
+            .collect();
+        self
+    }
+
+    /// Fixes the same parameters on every island (see
+    /// `Sce::with_fixed_params`).
+    pub fn with_fixed_params(
+        mut self,
+        fixed: &[(usize, f64)],
+    ) -> Result<Self, CalibrationError> {
+        self.islands = self
+            .islands
+            .into_iter()
+            .map(|island| island.with_fixed_params(fixed))
+            .collect::<Result<Vec<_>, _>>()?;
+        // the population shrinks with the number of calibrated parameters
+        let population_size = self.islands[0].population_size();
+        if self.n_migrants >= population_size {
+            return Err(CalibrationError::TooManyMigrants(
+                self.n_migrants,
+                population_size,
+            ));
+        }
+        Ok(self)
+    }
+
+    /// Gives each island its own snow output cache (see
+    /// `Sce::with_snow_cache`).
+    pub fn with_snow_cache(mut self, capacity: usize) -> Self {
+        self.islands = self
+            .islands
+            .into_iter()
+            .map(|island| island.with_snow_cache(capacity))
+            .collect();
+        self
+    }
+
+    /// Hits, misses, entries, bytes and capacity summed over the islands'
+    /// caches.
+    pub fn cache_info(&self) -> CacheInfo {
+        sum_cache_info(self.islands.iter().map(Sce::cache_info))
+    }
+
+    /// Hits, misses, entries, bytes and capacity summed over the islands'
+    /// snow output caches.
+    pub fn snow_cache_info(&self) -> CacheInfo {
+        sum_cache_info(self.islands.iter().map(Sce::snow_cache_info))
+    }
+
+    /// Results of the last step of each island.
+    pub fn island_results(&self) -> &[Option<IslandResult>] {
+        &self.results
+    }
+
+    /// Serializes the settings and the checkpoint of every island (see
+    /// `Sce::checkpoint`). The last results aren't included, islands
+    /// computing them again on the next step.
+    pub fn checkpoint(&self) -> Vec<u8> {
+        let mut writer = CheckpointWriter::new();
+        writer.write_usize(self.migration_interval);
+        writer.write_usize(self.n_migrants);
+        writer.write_usize(self.n_steps);
+        writer.write_usize(self.islands.len());
+        for island in &self.islands {
+            writer.write_bytes(&island.checkpoint());
+        }
+        writer.finish()
+    }
+
+    /// Restores islands serialized by `checkpoint`.
+    pub fn from_checkpoint(bytes: &[u8]) -> Result<Self, CalibrationError> {
+        let mut reader = CheckpointReader::new(bytes)?;
+        let migration_interval = reader.read_usize()?;
+        let n_migrants = reader.read_usize()?;
+        let n_steps = reader.read_usize()?;
+        let n_islands = reader.read_usize()?;
+        // checked before allocating, each island taking at least a byte
+        if n_islands == 0 || n_islands > bytes.len() {
+            return Err(CalibrationError::InvalidCheckpoint(format!(
+                "invalid number of islands {n_islands}"
+            )));
+        }
+        let islands = (0..n_islands)
+            .map(|_| Sce::from_checkpoint(reader.read_bytes()?))
+            .collect::<Result<Vec<_>, _>>()?;
+        reader.finish()?;
+
+        let objective = islands[0].objective();
+        if islands.iter().any(|island| {
+            island.objective() != objective
+                || island.population_size() <= n_migrants
+        }) {
+            return Err(CalibrationError::InvalidCheckpoint(
+                "islands don't share the same settings".to_string(),
+            ));
+        }
+        Ok(Islands {
+            islands,
+            objective,
+            migration_interval,
+            n_migrants,
+            n_steps,
+            results: vec![None; n_islands],
+        })
+    }
+
+    /// Evaluates the initial population of every island in parallel.
+    pub fn init(
+        &mut self,
+        precipitation: ArrayView1<f64>,
+        temperature: Option<ArrayView1<f64>>,
+        pet: ArrayView1<f64>,
+        day_of_year: ArrayView1<usize>,
+        elevation_bands: Option<ArrayView1<f64>>,
+        median_elevation: Option<f64>,
+        observations: ArrayView1<f64>,
+        warmup_steps: usize,
+    ) -> Result<(), CalibrationError> {
+        self.islands.par_iter_mut().try_for_each(|island| {
+            island.init(
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                observations,
+                warmup_steps,
+            )
+        })?;
+        self.n_steps = 0;
+        self.results.iter_mut().for_each(|result| *result = None);
+        Ok(())
+    }
+
+    /// Steps every island that hasn't converged in parallel, migrates the
+    /// best points every `migration_interval` steps and returns the result
+    /// of the best island, done once every island is.
+    pub fn step(
+        &mut self,
+        precipitation: ArrayView1<f64>,
+        temperature: Option<ArrayView1<f64>>,
+        pet: ArrayView1<f64>,
+        day_of_year: ArrayView1<usize>,
+        elevation_bands: Option<ArrayView1<f64>>,
+        median_elevation: Option<f64>,
+        observations: ArrayView1<f64>,
+        warmup_steps: usize,
+    ) -> Result<IslandResult, CalibrationError> {
+        self.islands
+            .par_iter_mut()
+            .zip(self.results.par_iter_mut())
+            // converged islands keep their last result
+            .filter(|(island, result)| !island.is_done() || result.is_none())
+            .try_for_each(|(island, result)| {
+                *result = Some(island.step(
+                    precipitation,
+                    temperature,
+                    pet,
+                    day_of_year,
+                    elevation_bands,
+                    median_elevation,
+                    observations,
+                    warmup_steps,
+                )?);
+                Ok::<_, CalibrationError>(())
+            })?;
+        self.n_steps += 1;
+
+        if self.migration_interval > 0
+            && self.n_steps % self.migration_interval == 0
+        {
+            self.migrate();
+        }
+
+        let done = self.islands.iter().all(Sce::is_done);
+        let (_, params, simulation, objectives) = self.best_result().clone();
+        Ok((done, params, simulation, objectives))
+    }
+
+    /// Sends the best points of each island to the next one, in a ring.
+    /// Converged islands send their points but don't receive any, so that
+    /// their result stays final.
+    fn migrate(&mut self) {
+        let n_islands = self.islands.len();
+        if n_islands < 2 {
+            return;
+        }
+        let migrants: Vec<_> = self
+            .islands
+            .iter()
+            .map(|island| island.best_points(self.n_migrants))
+            .collect();
+        for (i, (points, objectives)) in migrants.iter().enumerate() {
+            let island = &mut self.islands[(i + 1) % n_islands];
+            if !island.is_done() {
+                island.receive_migrants(points.view(), objectives.view());
+            }
+        }
+    }
+
+    fn best_result(&self) -> &IslandResult {
+        let (objective_idx, is_minimization) = match self.objective {
+            Objective::Rmse => (0, true),
+            Objective::Nse => (1, false),
+            Objective::Kge => (2, false),
+        };
+        let score = |objectives: &Array1<f64>| {
+            let objective = objectives[objective_idx];
+            match (objective.is_nan(), is_minimization) {
+                (true, _) => f64::NEG_INFINITY,
+                (false, true) => -objective,
+                (false, false) => objective,
+            }
+        };
+        // every island has a result after a step
+        self.results
+            .iter()
+            .flatten()
+            .max_by(|a, b| score(&a.3).total_cmp(&score(&b.3)))
+            .unwrap()
+    }
+}
+
+fn sum_cache_info(infos: impl Iterator<Item = CacheInfo>) -> CacheInfo {
+    infos.fold(CacheInfo::default(), |total, info| CacheInfo {
+        hits: total.hits + info.hits,
+        misses: total.misses + info.misses,
+        entries: total.entries + info.entries,
+        size: total.size + info.size,
+        capacity: total.capacity + info.capacity,
+    })
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pymethods]
+impl Islands {
+    #[new]
+    #[pyo3(signature = (
+        hydro_model,
+        snow_model,
+        objective,
+        transformation,
+        n_complexes,
+        k_stop,
+        p_convergence_threshold,
+        geometric_range_threshold,
+        max_evaluations,
+        seed,
+        n_islands,
+        migration_interval=5,
+        n_migrants=1,
+        spin_up_iterations=0,
+        spin_up_tolerance=1e-3,
+        cache_size=0,
+        fixed_params=None,
+        snow_cache_size=0,
+    ))]
+    pub fn py_new(
+        hydro_model: &str,
+        snow_model: Option<&str>,
+        objective: &str,
+        transformation: &str,
+        n_complexes: usize,
+        k_stop: usize,
+        p_convergence_threshold: f64,
+        geometric_range_threshold: f64,
+        max_evaluations: usize,
+        seed: u64,
+        n_islands: usize,
+        migration_interval: usize,
+        n_migrants: usize,
+        spin_up_iterations: usize,
+        spin_up_tolerance: f64,
+        cache_size: usize,
+        fixed_params: Option<HashMap<usize, f64>>,
+        snow_cache_size: usize,
+    ) -> PyResult<Self> {
+        let objective = Objective::from_str(objective)
+            .map_err(pyo3::exceptions::PyValueError::new_err)?;
+        let transformation = Transformation::from_str(transformation)
+            .map_err(pyo3::exceptions::PyValueError::new_err)?;
+        let mut islands = Islands::new(
+            hydro_model,
+            snow_model,
+            objective,
+            transformation,
+            n_complexes,
+            k_stop,
+            p_convergence_threshold,
+            geometric_range_threshold,
+            max_evaluations,
+            seed,
+            n_islands,
+            migration_interval,
+            n_migrants,
+        )?;
+        if let Some(fixed_params) = fixed_params {
+            islands = islands.with_fixed_params(
+                &fixed_params.into_iter().collect::<Vec<_>>(),
+            )?;
+        }
+        Ok(islands
+            .with_spin_up((spin_up_iterations > 0).then_some(SpinUp {
+                tolerance: spin_up_tolerance,
+                max_iterations: spin_up_iterations,
+            }))
+            .with_cache(cache_size.saturating_mul(MEGABYTE))
+            .with_snow_cache(snow_cache_size.saturating_mul(MEGABYTE)))
+    }
+
+    #[pyo3(name = "init")]
+    pub fn py_init(
+        &mut self,
+        py: Python<'_>,
+        precipitation: PyReadonlyArray1<f64>,
+        temperature: Option<PyReadonlyArray1<f64>>,
+        pet: PyReadonlyArray1<f64>,
+        day_of_year: PyReadonlyArray1<usize>,
+        elevation_bands: Option<PyReadonlyArray1<f64>>,
+        median_elevation: Option<f64>,
+        observations: PyReadonlyArray1<'_, f64>,
+        warmup_steps: usize,
+    ) -> PyResult<()> {
+        let precipitation = precipitation.as_array();
+        let temperature = temperature.as_ref().map(|t| t.as_array());
+        let pet = pet.as_array();
+        let day_of_year = day_of_year.as_array();
+        let elevation_bands = elevation_bands.as_ref().map(|e| e.as_array());
+        let observations = observations.as_array();
+        py.detach(|| {
+            self.init(
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                observations,
+                warmup_steps,
+            )
+        })
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e.to_string()))
+    }
+
+    #[pyo3(name = "step")]
+    pub fn py_step<'py>(
+        &mut self,
+        py: Python<'py>,
+        precipitation: PyReadonlyArray1<f64>,
+        temperature: Option<PyReadonlyArray1<f64>>,
+        pet: PyReadonlyArray1<f64>,
+        day_of_year: PyReadonlyArray1<usize>,
+        elevation_bands: Option<PyReadonlyArray1<f64>>,
+        median_elevation: Option<f64>,
+        observations: PyReadonlyArray1<'_, f64>,
+        warmup_steps: usize,
+    ) -> PyResult<(
+        bool,
+        Bound<'py, PyArray1<f64>>,
+        Bound<'py, PyArray1<f64>>,
+        Bound<'py, PyArray1<f64>>,
+    )> {
+        let precipitation = precipitation.as_array();
+        let temperature = temperature.as_ref().map(|t| t.as_array());
+        let pet = pet.as_array();
+        let day_of_year = day_of_year.as_array();
+        let elevation_bands = elevation_bands.as_ref().map(|e| e.as_array());
+        let observations = observations.as_array();
+        let (done, best_params, simulation, objectives) = py
+            .detach(|| {
+                self.step(
+                    precipitation,
+                    temperature,
+                    pet,
+                    day_of_year,
+                    elevation_bands,
+                    median_elevation,
+                    observations,
+                    warmup_steps,
+                )
+            })
+            .map_err(|e| {
+                pyo3::exceptions::PyValueError::new_err(e.to_string())
+            })?;
+        Ok((
+            done,
+            best_params.to_pyarray(py),
+            simulation.to_pyarray(py),
+            objectives.to_pyarray(py),
+        ))
+    }
+
+    #[pyo3(name = "island_results")]
+    pub fn py_island_results<'py>(
+        &self,
+        py: Python<'py>,
+    ) -> Vec<
+        Option<(
+            bool,
+            Bound<'py, PyArray1<f64>>,
+            Bound<'py, PyArray1<f64>>,
+            Bound<'py, PyArray1<f64>>,
+        )>,
+    > {
+        self.island_results()
+            .iter()
+            .map(|result| {
+                result.as_ref().map(
+                    |(done, params, simulation, objectives)| {
+                        (
+                            *done,
+                            params.to_pyarray(py),
+                            simulation.to_pyarray(py),
+                            objectives.to_pyarray(py),
+                        )
+                    },
+                )
+            })
+            .collect()
+    }
+
+    #[pyo3(name = "cache_info")]
+    pub fn py_cache_info(&self) -> HashMap<&'static str, usize> {
+        let info = self.cache_info();
+        HashMap::from([
+            ("hits", info.hits),
+            ("misses", info.misses),
+            ("entries", info.entries),
+            ("size", info.size),
+            ("capacity", info.capacity),
+        ])
+    }
+
+    #[pyo3(name = "snow_cache_info")]
+    pub fn py_snow_cache_info(&self) -> HashMap<&'static str, usize> {
+        let info = self.snow_cache_info();
+        HashMap::from([
+            ("hits", info.hits),
+            ("misses", info.misses),
+            ("entries", info.entries),
+            ("size", info.size),
+            ("capacity", info.capacity),
+        ])
+    }
+
+    #[pyo3(name = "checkpoint")]
+    pub fn py_checkpoint<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        PyBytes::new(py, &self.checkpoint())
+    }
+
+    #[staticmethod]
+    #[pyo3(name = "from_checkpoint")]
+    pub fn py_from_checkpoint(data: &[u8]) -> PyResult<Self> {
+        Ok(Islands::from_checkpoint(data)?)
+    }
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
+    let m = PyModule::new(py, "islands")?;
+    m.add_class::<Islands>()?;
+    Ok(m)
+}
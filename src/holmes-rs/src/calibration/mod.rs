@@ -1,3 +1,5 @@
+pub mod checkpoint;
+pub mod islands;
 pub mod sce;
 pub mod utils;
 
@@ -7,6 +9,12 @@ use pyo3::prelude::*;
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "calibration")?;
+    register_submodule(
+        py,
+        &m,
+        &islands::make_module(py)?,
+        "holmes_rs.calibration",
+    )?;
     register_submodule(
         py,
         &m,
@@ -6,20 +6,29 @@ use ndarray_rand::rand_distr::Uniform;
 use ndarray_rand::RandomExt;
 use numpy::{PyArray1, PyReadonlyArray1, ToPyArray};
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 use rand::{Rng, SeedableRng};
 use rand_chacha::ChaCha8Rng;
 use rayon::prelude::*;
+use std::collections::HashMap;
 use std::str::FromStr;
+use std::sync::Arc;
 
+use crate::calibration::checkpoint::{CheckpointReader, CheckpointWriter};
 use crate::calibration::utils::{
-    compose_simulate, CalibrationError, CalibrationParams, Objective,
-    Simulate, Transformation,
+    cache_simulate, compose_simulate, compose_snow_cached_simulate,
+    compose_spin_up_simulate, fingerprint_forcings, fix_params, insert_fixed,
+    run_simulate, validate_forcings, CacheInfo, CalibrationError,
+    CalibrationParams, Climatology, EvaluationCache, Objective,
+    PreparedObservations, Simulate, SnowGrid, SpinUp, StatefulModels,
+    Transformation, MEGABYTE, SNOW_GRID_STEPS,
 };
-use crate::hydro;
-use crate::metrics::{calculate_kge, calculate_nse, calculate_rmse};
-use crate::snow;
+use crate::hydro::{self, HydroSimulateInto};
+use crate::snow::{self, SnowSimulate};
 
 struct SceParams {
+    pub hydro_model: String,
+    pub snow_model: Option<String>,
     pub population: Array2<f64>,
     pub objectives: Array2<f64>,
     pub criteria: Array1<f64>,
@@ -32,6 +41,24 @@ struct SceParams {
     pub p_convergence_threshold: f64,
     pub geometric_range_threshold: f64,
     pub max_evaluations: usize,
+    pub parallel: bool,
+    pub with_snow: bool,
+    // fingerprint of the last validated forcings
+    pub forcings: Option<u64>,
+    // transformed observations of the last init or step
+    pub observations: Option<PreparedObservations>,
+    pub spin_up: Option<SpinUp>,
+    pub stateful_models: StatefulModels,
+    // length of the forcings and warmup the simulations were spun up for
+    pub spun_up_for: Option<(usize, usize)>,
+    pub cache: Option<Arc<EvaluationCache>>,
+    pub hydro_simulate: HydroSimulateInto,
+    pub snow_simulate: Option<SnowSimulate>,
+    // bounds of all the models' parameters, fixed ones included
+    pub model_bounds: Array2<f64>,
+    // (index, value) of the parameters left out of the calibration, sorted
+    pub fixed_params: Vec<(usize, f64)>,
+    pub snow_cache: Option<Arc<EvaluationCache>>,
 }
 
 #[pyclass(module = "hydro_rs.calibration.sce")]
@@ -54,99 +81,437 @@ impl Sce {
         max_evaluations: usize,
         seed: u64,
     ) -> Result<Self, CalibrationError> {
-        let (simulate, params, bounds): (Simulate, Array1<f64>, Array2<f64>) =
-            if let Some(snow_model) = snow_model {
-                let (snow_init, snow_simulate) = snow::get_model(snow_model)?;
-                let (hydro_init, hydro_simulate) =
-                    hydro::get_model(hydro_model)?;
-
-                let (snow_defaults, snow_bounds) = snow_init();
-                let (hydro_defaults, hydro_bounds) = hydro_init();
-                let n_snow_params = snow_defaults.len();
-                let simulate = compose_simulate(
-                    Some(snow_simulate),
-                    hydro_simulate,
-                    n_snow_params,
-                );
-                (
-                    simulate,
-                    ndarray::concatenate(
-                        Axis(0),
-                        &[snow_defaults.view(), hydro_defaults.view()],
-                    )
-                    .unwrap(),
-                    ndarray::concatenate(
-                        Axis(0),
-                        &[snow_bounds.view(), hydro_bounds.view()],
-                    )
-                    .unwrap(),
+        let snow_simulate =
+            snow_model.map(snow::get_unchecked_model).transpose()?;
+        let hydro_simulate = hydro::get_unchecked_into_model(hydro_model)?;
+        let (hydro_init, _) = hydro::get_model(hydro_model)?;
+        let (_, hydro_bounds) = hydro_init();
+        let model_bounds = match snow_model {
+            Some(snow_model) => {
+                let (snow_init, _) = snow::get_model(snow_model)?;
+                let (_, snow_bounds) = snow_init();
+                ndarray::concatenate(
+                    Axis(0),
+                    &[snow_bounds.view(), hydro_bounds.view()],
                 )
-            } else {
-                let (hydro_init, hydro_simulate) =
-                    hydro::get_model(hydro_model)?;
-                let (defaults, bounds) = hydro_init();
-                let simulate = compose_simulate(None, hydro_simulate, 0);
-                (simulate, defaults, bounds)
-            };
-
-        let n_params = params.len();
-        let n_per_complex = 2 * n_params + 1;
-        let n_simplex = n_params + 1;
-        let population_size = n_complexes * n_per_complex;
-        let n_evolution_steps = 2 * n_params + 1;
-
-        let lower_bounds: Array1<f64> = bounds.column(0).to_owned();
-        let upper_bounds: Array1<f64> = bounds.column(1).to_owned();
-
-        let mut rng = ChaCha8Rng::seed_from_u64(seed);
-
-        let population = generate_initial_population(
-            population_size,
-            &lower_bounds,
-            &upper_bounds,
-            &mut rng,
-        );
-        let objectives: Array2<f64> =
-            Array2::from_shape_fn((population_size, 3), |(_, j)| {
-                if j == 0 {
-                    f64::INFINITY
-                } else {
-                    f64::NEG_INFINITY
-                }
-            });
-
-        let criteria: Array1<f64> = Array1::from_vec(vec![]);
-        let params = population.row(0).to_owned();
+                .unwrap()
+            }
+            None => hydro_bounds,
+        };
+        // the snow parameters come first
+        let n_snow_params = model_bounds.nrows() - hydro_init().0.len();
+        let stateful_models =
+            StatefulModels::new(hydro_model, snow_model, n_snow_params)?;
 
         let calibration_params = CalibrationParams {
-            params,
-            simulate,
-            lower_bounds,
-            upper_bounds,
+            params: Array1::zeros(0),
+            simulate: compose_simulate(
+                snow_simulate,
+                hydro_simulate,
+                n_snow_params,
+            ),
+            lower_bounds: model_bounds.column(0).to_owned(),
+            upper_bounds: model_bounds.column(1).to_owned(),
             objective,
             transformation,
-            rng,
+            rng: ChaCha8Rng::seed_from_u64(seed),
             done: false,
         };
         let sce_params = SceParams {
-            population,
-            objectives,
-            criteria,
+            hydro_model: hydro_model.to_string(),
+            snow_model: snow_model.map(str::to_string),
+            population: Array2::zeros((0, 0)),
+            objectives: Array2::zeros((0, 3)),
+            criteria: Array1::from_vec(vec![]),
             n_calls: 0,
             n_complexes,
-            n_per_complex,
-            n_simplex,
-            n_evolution_steps,
+            n_per_complex: 0,
+            n_simplex: 0,
+            n_evolution_steps: 0,
             k_stop,
             p_convergence_threshold,
             geometric_range_threshold,
             max_evaluations,
+            parallel: false,
+            with_snow: snow_model.is_some(),
+            forcings: None,
+            observations: None,
+            spin_up: None,
+            stateful_models,
+            spun_up_for: None,
+            cache: None,
+            hydro_simulate,
+            snow_simulate,
+            model_bounds,
+            fixed_params: vec![],
+            snow_cache: None,
         };
 
-        Ok(Sce {
+        let mut sce = Sce {
             calibration_params,
             sce_params,
-        })
+        };
+        sce.size_population();
+        Ok(sce)
+    }
+
+    /// Evolve the complexes concurrently on the rayon thread pool.
+    ///
+    /// Each complex then draws from its own random stream, derived from the
+    /// main generator at every step, so results are reproducible for a given
+    /// seed whatever the number of threads. They differ from the sequential
+    /// mode, where all complexes share a single stream.
+    pub fn with_parallel(mut self, parallel: bool) -> Self {
+        self.sce_params.parallel = parallel;
+        self
+    }
+
+    /// Spin the models up on the climatology of the warmup instead of
+    /// simulating it for every candidate (see `SpinUp`). The objectives are
+    /// still computed on the days after the warmup.
+    pub fn with_spin_up(mut self, spin_up: Option<SpinUp>) -> Self {
+        self.sce_params.spin_up = spin_up;
+        self
+    }
+
+    /// Keep up to `capacity` bytes of simulations, so that candidates the
+    /// evolution revisits are simulated once (see `EvaluationCache`). A
+    /// capacity of 0 disables the cache.
+    pub fn with_cache(mut self, capacity: usize) -> Self {
+        self.sce_params.cache = (capacity > 0).then(|| {
+            Arc::new(EvaluationCache::new(
+                capacity,
+                self.calibration_params.lower_bounds.clone(),
+                self.calibration_params.upper_bounds.clone(),
+            ))
+        });
+        self.rebuild_simulate();
+        self
+    }
+
+    /// Calibrates only the parameters not in `fixed`, (index, value) pairs
+    /// on the parameters of the models, which keep their value. The
+    /// parameters returned by `step` include the fixed ones, while the
+    /// population, checkpoints and migrants hold only the free ones.
+    pub fn with_fixed_params(
+        mut self,
+        fixed: &[(usize, f64)],
+    ) -> Result<Self, CalibrationError> {
+        let n_params = self.sce_params.model_bounds.nrows();
+        let mut fixed = fixed.to_vec();
+        fixed.sort_by_key(|&(index, _)| index);
+        if let Some(&(index, _)) = fixed.last().filter(|p| p.0 >= n_params) {
+            return Err(CalibrationError::InvalidFixedParams(format!(
+                "index {index} is beyond the {n_params} parameters"
+            )));
+        }
+        if fixed.windows(2).any(|pair| pair[0].0 == pair[1].0) {
+            return Err(CalibrationError::InvalidFixedParams(
+                "a parameter is fixed more than once".to_string(),
+            ));
+        }
+        if fixed.len() == n_params {
+            return Err(CalibrationError::InvalidFixedParams(
+                "at least one parameter must be calibrated".to_string(),
+            ));
+        }
+
+        let free: Vec<usize> = (0..n_params)
+            .filter(|&i| fixed.iter().all(|&(index, _)| index != i))
+            .collect();
+        let bounds = &self.sce_params.model_bounds;
+        self.calibration_params.lower_bounds =
+            free.iter().map(|&i| bounds[[i, 0]]).collect();
+        self.calibration_params.upper_bounds =
+            free.iter().map(|&i| bounds[[i, 1]]).collect();
+        self.sce_params.fixed_params = fixed;
+        self.size_population();
+
+        // the evaluation cache is keyed on the free parameters
+        let capacity =
+            self.sce_params.cache.as_ref().map_or(0, |c| c.capacity());
+        Ok(self.with_cache(capacity))
+    }
+
+    /// Keep up to `capacity` bytes of the snow model's outputs, keyed on the
+    /// snow parameters, so that candidates sharing their snow parameters only run the
+    /// hydro model (see `compose_snow_cached_simulate`). As the evolution
+    /// moves every parameter at once, the calibrated snow parameters are
+    /// then searched on a `SnowGrid`, trading their resolution for shared
+    /// snow outputs, more and more common as the population contracts. It
+    /// has no effect without a snow model, or with a spin-up, which runs
+    /// both models together. A capacity of 0 disables the cache.
+    pub fn with_snow_cache(mut self, capacity: usize) -> Self {
+        let n_snow_params = self.sce_params.stateful_models.n_snow_params;
+        self.sce_params.snow_cache =
+            (capacity > 0 && self.sce_params.with_snow).then(|| {
+                let bounds = self
+                    .sce_params
+                    .model_bounds
+                    .slice(s![..n_snow_params, ..]);
+                Arc::new(EvaluationCache::new(
+                    capacity,
+                    bounds.column(0).to_owned(),
+                    bounds.column(1).to_owned(),
+                ))
+            });
+        self.rebuild_simulate();
+        self
+    }
+
+    /// Hits, misses, entries and bytes of the evaluation cache, all 0
+    /// without one.
+    pub fn cache_info(&self) -> CacheInfo {
+        self.sce_params
+            .cache
+            .as_ref()
+            .map(|cache| cache.info())
+            .unwrap_or_default()
+    }
+
+    /// Hits, misses, entries and bytes of the snow output cache, all 0
+    /// without one.
+    pub fn snow_cache_info(&self) -> CacheInfo {
+        self.sce_params
+            .snow_cache
+            .as_ref()
+            .map(|cache| cache.info())
+            .unwrap_or_default()
+    }
+
+    /// Whether the calibration converged or exhausted its evaluations.
+    pub fn is_done(&self) -> bool {
+        self.calibration_params.done
+    }
+
+    pub fn objective(&self) -> Objective {
+        self.calibration_params.objective
+    }
+
+    pub fn population_size(&self) -> usize {
+        self.sce_params.population.nrows()
+    }
+
+    /// Copies of the `n` best points of the population, which is kept
+    /// sorted, and of their objectives.
+    pub fn best_points(&self, n: usize) -> (Array2<f64>, Array2<f64>) {
+        (
+            self.sce_params.population.slice(s![..n, ..]).to_owned(),
+            self.sce_params.objectives.slice(s![..n, ..]).to_owned(),
+        )
+    }
+
+    /// Replaces the worst points of the population with `points`, whose
+    /// `objectives` were computed on the same forcings and observations by
+    /// another calibration.
+    pub fn receive_migrants(
+        &mut self,
+        points: ArrayView2<f64>,
+        objectives: ArrayView2<f64>,
+    ) {
+        let (objective_idx, is_minimization) =
+            match self.calibration_params.objective {
+                Objective::Rmse => (0, true),
+                Objective::Nse => (1, false),
+                Objective::Kge => (2, false),
+            };
+        let start = self.population_size() - points.nrows();
+        self.sce_params
+            .population
+            .slice_mut(s![start.., ..])
+            .assign(&points);
+        self.sce_params
+            .objectives
+            .slice_mut(s![start.., ..])
+            .assign(&objectives);
+        sort_population(
+            &mut self.sce_params.population,
+            &mut self.sce_params.objectives,
+            objective_idx,
+            is_minimization,
+        );
+        self.calibration_params.params =
+            self.sce_params.population.row(0).to_owned();
+    }
+
+    /// Serializes the run (options, population, objectives, criteria
+    /// history, number of evaluations and random generator state) so that
+    /// `from_checkpoint` can continue it. The forcings and observations
+    /// aren't included and must be given again to the following steps.
+    pub fn checkpoint(&self) -> Vec<u8> {
+        let sce = &self.sce_params;
+        let calibration = &self.calibration_params;
+        let mut writer = CheckpointWriter::new();
+
+        writer.write_str(&sce.hydro_model);
+        writer.write_option_str(sce.snow_model.as_deref());
+        writer.write_u8(match calibration.objective {
+            Objective::Rmse => 0,
+            Objective::Nse => 1,
+            Objective::Kge => 2,
+        });
+        writer.write_u8(match calibration.transformation {
+            Transformation::Log => 0,
+            Transformation::Sqrt => 1,
+            Transformation::None => 2,
+        });
+        writer.write_usize(sce.n_complexes);
+        writer.write_usize(sce.k_stop);
+        writer.write_f64(sce.p_convergence_threshold);
+        writer.write_f64(sce.geometric_range_threshold);
+        writer.write_usize(sce.max_evaluations);
+        writer.write_bool(sce.parallel);
+        writer.write_bool(sce.spin_up.is_some());
+        if let Some(spin_up) = sce.spin_up {
+            writer.write_f64(spin_up.tolerance);
+            writer.write_usize(spin_up.max_iterations);
+        }
+        writer.write_usize(sce.cache.as_ref().map_or(0, |c| c.capacity()));
+        writer.write_usize(sce.fixed_params.len());
+        for &(index, value) in &sce.fixed_params {
+            writer.write_usize(index);
+            writer.write_f64(value);
+        }
+        writer
+            .write_usize(sce.snow_cache.as_ref().map_or(0, |c| c.capacity()));
+
+        writer.write_usize(sce.n_calls);
+        writer.write_bool(calibration.done);
+        writer.write_array1(&calibration.params);
+        writer.write_array2(&sce.population);
+        writer.write_array2(&sce.objectives);
+        writer.write_array1(&sce.criteria);
+        writer.write_bytes(&calibration.rng.get_seed());
+        writer.write_u64(calibration.rng.get_stream());
+        writer.write_u128(calibration.rng.get_word_pos());
+
+        writer.finish()
+    }
+
+    /// Restores a run saved by `checkpoint`. The next `step` continues it
+    /// exactly as the saved run would have, without calling `init` again.
+    pub fn from_checkpoint(bytes: &[u8]) -> Result<Self, CalibrationError> {
+        let mut reader = CheckpointReader::new(bytes)?;
+
+        let hydro_model = reader.read_str()?;
+        let snow_model = reader.read_option_str()?;
+        let objective = match reader.read_u8()? {
+            0 => Objective::Rmse,
+            1 => Objective::Nse,
+            2 => Objective::Kge,
+            value => {
+                return Err(CalibrationError::InvalidCheckpoint(format!(
+                    "unknown objective {value}"
+                )))
+            }
+        };
+        let transformation = match reader.read_u8()? {
+            0 => Transformation::Log,
+            1 => Transformation::Sqrt,
+            2 => Transformation::None,
+            value => {
+                return Err(CalibrationError::InvalidCheckpoint(format!(
+                    "unknown transformation {value}"
+                )))
+            }
+        };
+        let n_complexes = reader.read_usize()?;
+        let k_stop = reader.read_usize()?;
+        let p_convergence_threshold = reader.read_f64()?;
+        let geometric_range_threshold = reader.read_f64()?;
+        let max_evaluations = reader.read_usize()?;
+        let parallel = reader.read_bool()?;
+        let spin_up = if reader.read_bool()? {
+            Some(SpinUp {
+                tolerance: reader.read_f64()?,
+                max_iterations: reader.read_usize()?,
+            })
+        } else {
+            None
+        };
+        let cache_capacity = reader.read_usize()?;
+        let n_fixed = reader.read_usize()?;
+        // checked before allocating, each parameter taking 16 bytes
+        if n_fixed > bytes.len() / 16 {
+            return Err(CalibrationError::InvalidCheckpoint(format!(
+                "invalid number of fixed parameters {n_fixed}"
+            )));
+        }
+        let fixed_params = (0..n_fixed)
+            .map(|_| Ok((reader.read_usize()?, reader.read_f64()?)))
+            .collect::<Result<Vec<_>, CalibrationError>>()?;
+        let snow_cache_capacity = reader.read_usize()?;
+
+        let n_calls = reader.read_usize()?;
+        let done = reader.read_bool()?;
+        let params = reader.read_array1()?;
+        let population = reader.read_array2()?;
+        let objectives = reader.read_array2()?;
+        let criteria = reader.read_array1()?;
+        let seed: [u8; 32] =
+            reader.read_bytes()?.try_into().map_err(|_| {
+                CalibrationError::InvalidCheckpoint(
+                    "invalid random generator seed".to_string(),
+                )
+            })?;
+        let stream = reader.read_u64()?;
+        let word_pos = reader.read_u128()?;
+        reader.finish()?;
+
+        // checked before `Sce::new` allocates a population for
+        // `n_complexes`, which must then be the one read
+        let (n_points, n_params) = population.dim();
+        if n_complexes == 0
+            || n_params == 0
+            || Some(n_points) != n_complexes.checked_mul(2 * n_params + 1)
+            || objectives.dim() != (n_points, 3)
+            || params.len() != n_params
+        {
+            return Err(CalibrationError::InvalidCheckpoint(
+                "population doesn't match the number of complexes".to_string(),
+            ));
+        }
+
+        // the population of this empty run is replaced, so its seed doesn't
+        // matter
+        let mut sce = Sce::new(
+            &hydro_model,
+            snow_model.as_deref(),
+            objective,
+            transformation,
+            n_complexes,
+            k_stop,
+            p_convergence_threshold,
+            geometric_range_threshold,
+            max_evaluations,
+            0,
+        )?
+        .with_fixed_params(&fixed_params)
+        .map_err(|err| CalibrationError::InvalidCheckpoint(err.to_string()))?
+        .with_parallel(parallel)
+        .with_spin_up(spin_up)
+        .with_cache(cache_capacity)
+        .with_snow_cache(snow_cache_capacity);
+
+        if population.dim() != sce.sce_params.population.dim() {
+            return Err(CalibrationError::InvalidCheckpoint(
+                "population doesn't match the models".to_string(),
+            ));
+        }
+
+        let mut rng = ChaCha8Rng::from_seed(seed);
+        rng.set_stream(stream);
+        rng.set_word_pos(word_pos);
+
+        sce.sce_params.n_calls = n_calls;
+        sce.sce_params.population = population;
+        sce.sce_params.objectives = objectives;
+        sce.sce_params.criteria = criteria;
+        sce.calibration_params.done = done;
+        sce.calibration_params.params = params;
+        sce.calibration_params.rng = rng;
+
+        Ok(sce)
     }
 
     pub fn init(
@@ -160,18 +525,56 @@ impl Sce {
         observations: ArrayView1<f64>,
         warmup_steps: usize,
     ) -> Result<(), CalibrationError> {
+        validate_forcings(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_bands,
+            median_elevation,
+            self.sce_params.with_snow,
+        )?;
+        self.sce_params.forcings = Some(fingerprint_forcings(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_bands,
+            median_elevation,
+        ));
+        self.sce_params.spun_up_for = None;
+        self.clear_caches();
+        self.prepare_spin_up(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            warmup_steps,
+        );
+        let prepared = PreparedObservations::new(
+            observations,
+            self.calibration_params.transformation,
+            warmup_steps,
+        )?;
+
         let objective_idx = match self.calibration_params.objective {
             Objective::Rmse => 0,
             Objective::Nse => 1,
             Objective::Kge => 2,
         };
 
-        let population = generate_initial_population(
+        let snow_grid = self.snow_grid();
+        let mut population = generate_initial_population(
             self.sce_params.population.nrows(),
             &self.calibration_params.lower_bounds,
             &self.calibration_params.upper_bounds,
             &mut self.calibration_params.rng,
         );
+        if let Some(snow_grid) = &snow_grid {
+            for row in population.rows_mut() {
+                snow_grid.snap(row);
+            }
+        }
 
         let (population, objectives) = evaluate_initial_population(
             &self.calibration_params.simulate,
@@ -181,11 +584,9 @@ impl Sce {
             day_of_year,
             elevation_bands,
             median_elevation,
-            observations,
-            warmup_steps,
+            &prepared,
             population,
             self.calibration_params.objective,
-            self.calibration_params.transformation,
         )?;
 
         self.sce_params.criteria =
@@ -193,6 +594,7 @@ impl Sce {
         self.calibration_params.params = population.row(0).to_owned();
         self.sce_params.population = population;
         self.sce_params.objectives = objectives;
+        self.sce_params.observations = Some(prepared);
 
         Ok(())
     }
@@ -209,8 +611,25 @@ impl Sce {
         warmup_steps: usize,
     ) -> Result<(bool, Array1<f64>, Array1<f64>, Array1<f64>), CalibrationError>
     {
+        self.check_forcings(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_bands,
+            median_elevation,
+        )?;
+        self.prepare_spin_up(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            warmup_steps,
+        );
+
         if self.calibration_params.done {
-            let best_simulation = (self.calibration_params.simulate)(
+            let best_simulation = run_simulate(
+                &self.calibration_params.simulate,
                 self.calibration_params.params.view(),
                 precipitation,
                 temperature,
@@ -221,7 +640,7 @@ impl Sce {
             )?;
             return Ok((
                 true,
-                self.calibration_params.params.clone(),
+                self.params(),
                 best_simulation,
                 self.sce_params.objectives.row(0).to_owned(),
             ));
@@ -234,6 +653,9 @@ impl Sce {
                 Objective::Kge => (2, false),
             };
 
+        let prepared = self.take_observations(observations, warmup_steps)?;
+        let snow_grid = self.snow_grid();
+
         let (mut complexes, mut complex_objectives) = partition_into_complexes(
             std::mem::take(&mut self.sce_params.population),
             std::mem::take(&mut self.sce_params.objectives),
@@ -252,16 +674,15 @@ impl Sce {
             day_of_year,
             elevation_bands,
             median_elevation,
-            observations,
-            warmup_steps,
+            &prepared,
+            snow_grid.as_ref(),
             objective_idx,
             is_minimization,
-            self.calibration_params.transformation,
             self.sce_params.n_calls,
-            self.sce_params.n_complexes,
             self.sce_params.n_per_complex,
             self.sce_params.n_simplex,
             self.sce_params.n_evolution_steps,
+            self.sce_params.parallel,
             &mut self.calibration_params.rng,
         )?;
 
@@ -278,6 +699,7 @@ impl Sce {
             population.view(),
             self.calibration_params.lower_bounds.view(),
             self.calibration_params.upper_bounds.view(),
+            snow_grid.as_ref(),
         );
 
         self.sce_params
@@ -326,7 +748,8 @@ impl Sce {
         self.calibration_params.params = population.row(0).to_owned();
         self.sce_params.n_calls = n_calls;
 
-        let best_simulation = (self.calibration_params.simulate)(
+        let best_simulation = run_simulate(
+            &self.calibration_params.simulate,
             self.calibration_params.params.view(),
             precipitation,
             temperature,
@@ -339,20 +762,256 @@ impl Sce {
 
         self.sce_params.population = population;
         self.sce_params.objectives = objectives;
+        self.sce_params.observations = Some(prepared);
 
         Ok((
             self.calibration_params.done,
-            self.calibration_params.params.clone(),
+            self.params(),
             best_simulation,
             best_objectives,
         ))
     }
+
+    /// The forcings are fully validated by `init`, after which the models
+    /// run without checking them. Later steps are expected to receive the
+    /// same forcings, which their fingerprint confirms; other forcings are
+    /// validated again, and the caches and spin-up built on the previous
+    /// ones dropped.
+    fn check_forcings(
+        &mut self,
+        precipitation: ArrayView1<f64>,
+        temperature: Option<ArrayView1<f64>>,
+        pet: ArrayView1<f64>,
+        day_of_year: ArrayView1<usize>,
+        elevation_bands: Option<ArrayView1<f64>>,
+        median_elevation: Option<f64>,
+    ) -> Result<(), CalibrationError> {
+        let fingerprint = fingerprint_forcings(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_bands,
+            median_elevation,
+        );
+        if self.sce_params.forcings != Some(fingerprint) {
+            validate_forcings(
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                self.sce_params.with_snow,
+            )?;
+            self.sce_params.forcings = Some(fingerprint);
+            self.sce_params.spun_up_for = None;
+            self.clear_caches();
+        }
+        Ok(())
+    }
+
+    /// With a spin-up, the simulation function is built on the climatology
+    /// of the forcings by `init`, and built again by the following steps
+    /// only if the forcings or the warmup changed. A warmup shorter than
+    /// `MIN_SPIN_UP_WARMUP` is simulated instead.
+    fn prepare_spin_up(
+        &mut self,
+        precipitation: ArrayView1<f64>,
+        temperature: Option<ArrayView1<f64>>,
+        pet: ArrayView1<f64>,
+        day_of_year: ArrayView1<usize>,
+        warmup_steps: usize,
+    ) {
+        if let Some(spin_up) = self.sce_params.spin_up {
+            let key = (precipitation.len(), warmup_steps);
+            if self.sce_params.spun_up_for == Some(key) {
+                return;
+            }
+            match Climatology::new(
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                warmup_steps,
+            ) {
+                Some(climatology) => {
+                    let simulate = compose_spin_up_simulate(
+                        self.sce_params.stateful_models,
+                        spin_up,
+                        climatology,
+                        warmup_steps,
+                    );
+                    self.set_simulate(simulate);
+                    self.sce_params.spun_up_for = Some(key);
+                }
+                // back to simulating the warmup
+                None if self.sce_params.spun_up_for.is_some() => {
+                    self.rebuild_simulate();
+                }
+                None => {}
+            }
+        }
+    }
+
+    /// Uses `simulate`, taking the fixed parameters, through the evaluation
+    /// cache if there is one, whose simulations of the previous function are
+    /// dropped.
+    fn set_simulate(&mut self, simulate: Simulate) {
+        let simulate = if self.sce_params.fixed_params.is_empty() {
+            simulate
+        } else {
+            fix_params(simulate, self.sce_params.fixed_params.clone())
+        };
+        self.calibration_params.simulate = match &self.sce_params.cache {
+            Some(cache) => {
+                cache.clear();
+                cache_simulate(simulate, Arc::clone(cache))
+            }
+            None => simulate,
+        };
+    }
+
+    /// Chains the models again, through the snow output cache if there is
+    /// one, after a change of the caches or fixed parameters. A spin-up
+    /// builds its own function on the next `init` or `step`.
+    fn rebuild_simulate(&mut self) {
+        let sce = &self.sce_params;
+        let n_snow_params = sce.stateful_models.n_snow_params;
+        let simulate = match (sce.snow_simulate, &sce.snow_cache) {
+            (Some(snow_simulate), Some(snow_cache)) => {
+                compose_snow_cached_simulate(
+                    snow_simulate,
+                    sce.hydro_simulate,
+                    n_snow_params,
+                    Arc::clone(snow_cache),
+                )
+            }
+            (snow_simulate, _) => compose_simulate(
+                snow_simulate,
+                sce.hydro_simulate,
+                n_snow_params,
+            ),
+        };
+        self.set_simulate(simulate);
+        self.sce_params.spun_up_for = None;
+    }
+
+    /// Grid of the calibrated snow parameters, used with a snow output
+    /// cache unless a spin-up bypasses it.
+    fn snow_grid(&self) -> Option<SnowGrid> {
+        let sce = &self.sce_params;
+        if sce.snow_cache.is_none() || sce.spin_up.is_some() {
+            return None;
+        }
+        let n_snow_params = sce.stateful_models.n_snow_params;
+        let n_fixed = sce
+            .fixed_params
+            .iter()
+            .filter(|&&(index, _)| index < n_snow_params)
+            .count();
+        let n_free = n_snow_params - n_fixed;
+        (n_free > 0).then(|| {
+            SnowGrid::new(
+                self.calibration_params
+                    .lower_bounds
+                    .slice(s![..n_free])
+                    .to_owned(),
+                self.calibration_params
+                    .upper_bounds
+                    .slice(s![..n_free])
+                    .to_owned(),
+            )
+        })
+    }
+
+    fn clear_caches(&self) {
+        for cache in [&self.sce_params.cache, &self.sce_params.snow_cache]
+            .into_iter()
+            .flatten()
+        {
+            cache.clear();
+        }
+    }
+
+    /// Best parameters, fixed ones included.
+    fn params(&self) -> Array1<f64> {
+        insert_fixed(
+            self.calibration_params.params.view(),
+            &self.sce_params.fixed_params,
+        )
+    }
+
+    /// Sizes the complexes for the number of calibrated parameters and draws
+    /// a population, which `init` replaces.
+    fn size_population(&mut self) {
+        let calibration = &mut self.calibration_params;
+        let sce = &mut self.sce_params;
+        let n_params = calibration.lower_bounds.len();
+        sce.n_per_complex = 2 * n_params + 1;
+        sce.n_simplex = n_params + 1;
+        sce.n_evolution_steps = 2 * n_params + 1;
+        let population_size = sce.n_complexes * sce.n_per_complex;
+
+        sce.population = generate_initial_population(
+            population_size,
+            &calibration.lower_bounds,
+            &calibration.upper_bounds,
+            &mut calibration.rng,
+        );
+        sce.objectives =
+            Array2::from_shape_fn((population_size, 3), |(_, j)| {
+                if j == 0 {
+                    f64::INFINITY
+                } else {
+                    f64::NEG_INFINITY
+                }
+            });
+        calibration.params = sce.population.row(0).to_owned();
+    }
+
+    /// The observations are transformed once by `init` and reused by the
+    /// following steps, unless their values or the warmup changed.
+    fn take_observations(
+        &mut self,
+        observations: ArrayView1<f64>,
+        warmup_steps: usize,
+    ) -> Result<PreparedObservations, CalibrationError> {
+        match self.sce_params.observations.take() {
+            Some(prepared) if prepared.matches(observations, warmup_steps) => {
+                Ok(prepared)
+            }
+            _ => PreparedObservations::new(
+                observations,
+                self.calibration_params.transformation,
+                warmup_steps,
+            ),
+        }
+    }
 }
 
 #[cfg_attr(coverage_nightly, coverage(off))]
 #[pymethods]
 impl Sce {
     #[new]
+    #[pyo3(signature = (
+        hydro_model,
+        snow_model,
+        objective,
+        transformation,
+        n_complexes,
+        k_stop,
+        p_convergence_threshold,
+        geometric_range_threshold,
+        max_evaluations,
+        seed,
+        parallel=false,
+        spin_up_iterations=0,
+        spin_up_tolerance=1e-3,
+        cache_size=0,
+        fixed_params=None,
+        snow_cache_size=0,
+    ))]
     pub fn py_new(
         hydro_model: &str,
         snow_model: Option<&str>,
@@ -364,12 +1023,18 @@ impl Sce {
         geometric_range_threshold: f64,
         max_evaluations: usize,
         seed: u64,
+        parallel: bool,
+        spin_up_iterations: usize,
+        spin_up_tolerance: f64,
+        cache_size: usize,
+        fixed_params: Option<HashMap<usize, f64>>,
+        snow_cache_size: usize,
     ) -> PyResult<Self> {
         let objective = Objective::from_str(objective)
             .map_err(pyo3::exceptions::PyValueError::new_err)?;
         let transformation = Transformation::from_str(transformation)
             .map_err(pyo3::exceptions::PyValueError::new_err)?;
-        Sce::new(
+        let mut sce = Sce::new(
             hydro_model,
             snow_model,
             objective,
@@ -381,12 +1046,26 @@ impl Sce {
             max_evaluations,
             seed,
         )
-        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e.to_string()))
+        .map_err(|e| pyo3::exceptions::PyValueError::new_err(e.to_string()))?;
+        if let Some(fixed_params) = fixed_params {
+            sce = sce.with_fixed_params(
+                &fixed_params.into_iter().collect::<Vec<_>>(),
+            )?;
+        }
+        Ok(sce
+            .with_parallel(parallel)
+            .with_spin_up((spin_up_iterations > 0).then_some(SpinUp {
+                tolerance: spin_up_tolerance,
+                max_iterations: spin_up_iterations,
+            }))
+            .with_cache(cache_size.saturating_mul(MEGABYTE))
+            .with_snow_cache(snow_cache_size.saturating_mul(MEGABYTE)))
     }
 
     #[pyo3(name = "init")]
     pub fn py_init(
         &mut self,
+        py: Python<'_>,
         precipitation: PyReadonlyArray1<f64>,
         temperature: Option<PyReadonlyArray1<f64>>,
         pet: PyReadonlyArray1<f64>,
@@ -396,16 +1075,26 @@ impl Sce {
         observations: PyReadonlyArray1<'_, f64>,
         warmup_steps: usize,
     ) -> PyResult<()> {
-        self.init(
-            precipitation.as_array(),
-            temperature.as_ref().map(|t| t.as_array()),
-            pet.as_array(),
-            day_of_year.as_array(),
-            elevation_bands.as_ref().map(|e| e.as_array()),
-            median_elevation,
-            observations.as_array(),
-            warmup_steps,
-        )
+        let precipitation = precipitation.as_array();
+        let temperature = temperature.as_ref().map(|t| t.as_array());
+        let pet = pet.as_array();
+        let day_of_year = day_of_year.as_array();
+        let elevation_bands = elevation_bands.as_ref().map(|e| e.as_array());
+        let observations = observations.as_array();
+        // the population evaluation is pure rust, so other python threads
+        // can run while it happens
+        py.detach(|| {
+            self.init(
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                observations,
+                warmup_steps,
+            )
+        })
         .map_err(|e| pyo3::exceptions::PyValueError::new_err(e.to_string()))
     }
 
@@ -427,17 +1116,25 @@ impl Sce {
         Bound<'py, PyArray1<f64>>,
         Bound<'py, PyArray1<f64>>,
     )> {
-        let (done, best_params, simulation, objectives) = self
-            .step(
-                precipitation.as_array(),
-                temperature.as_ref().map(|t| t.as_array()),
-                pet.as_array(),
-                day_of_year.as_array(),
-                elevation_bands.as_ref().map(|e| e.as_array()),
-                median_elevation,
-                observations.as_array(),
-                warmup_steps,
-            )
+        let precipitation = precipitation.as_array();
+        let temperature = temperature.as_ref().map(|t| t.as_array());
+        let pet = pet.as_array();
+        let day_of_year = day_of_year.as_array();
+        let elevation_bands = elevation_bands.as_ref().map(|e| e.as_array());
+        let observations = observations.as_array();
+        let (done, best_params, simulation, objectives) = py
+            .detach(|| {
+                self.step(
+                    precipitation,
+                    temperature,
+                    pet,
+                    day_of_year,
+                    elevation_bands,
+                    median_elevation,
+                    observations,
+                    warmup_steps,
+                )
+            })
             .map_err(|e| {
                 pyo3::exceptions::PyValueError::new_err(e.to_string())
             })?;
@@ -448,6 +1145,41 @@ impl Sce {
             objectives.to_pyarray(py),
         ))
     }
+
+    #[pyo3(name = "checkpoint")]
+    pub fn py_checkpoint<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        PyBytes::new(py, &self.checkpoint())
+    }
+
+    #[pyo3(name = "cache_info")]
+    pub fn py_cache_info(&self) -> HashMap<&'static str, usize> {
+        let info = self.cache_info();
+        HashMap::from([
+            ("hits", info.hits),
+            ("misses", info.misses),
+            ("entries", info.entries),
+            ("size", info.size),
+            ("capacity", info.capacity),
+        ])
+    }
+
+    #[pyo3(name = "snow_cache_info")]
+    pub fn py_snow_cache_info(&self) -> HashMap<&'static str, usize> {
+        let info = self.snow_cache_info();
+        HashMap::from([
+            ("hits", info.hits),
+            ("misses", info.misses),
+            ("entries", info.entries),
+            ("size", info.size),
+            ("capacity", info.capacity),
+        ])
+    }
+
+    #[staticmethod]
+    #[pyo3(name = "from_checkpoint")]
+    pub fn py_from_checkpoint(data: &[u8]) -> PyResult<Self> {
+        Ok(Sce::from_checkpoint(data)?)
+    }
 }
 
 fn generate_initial_population(
@@ -487,11 +1219,9 @@ fn evaluate_initial_population(
     day_of_year: ArrayView1<usize>,
     elevation_bands: Option<ArrayView1<f64>>,
     median_elevation: Option<f64>,
-    observations: ArrayView1<f64>,
-    warmup_steps: usize,
+    observations: &PreparedObservations,
     mut population: Array2<f64>,
     objective: Objective,
-    transformation: Transformation,
 ) -> Result<(Array2<f64>, Array2<f64>), CalibrationError> {
     let n_population = population.nrows();
     let mut objectives = Array2::<f64>::zeros((n_population, 3));
@@ -499,24 +1229,26 @@ fn evaluate_initial_population(
     let results: Vec<Result<Array1<f64>, CalibrationError>> = (0
         ..n_population)
         .into_par_iter()
-        .map(|i| {
-            let params = population.row(i);
-            let simulation = simulate(
-                params,
-                precipitation,
-                temperature,
-                pet,
-                day_of_year,
-                elevation_bands,
-                median_elevation,
-            )?;
-            evaluate_simulation(
-                observations,
-                simulation.view(),
-                transformation,
-                warmup_steps,
-            )
-        })
+        // one simulation buffer per thread, reused by its evaluations
+        .map_init(
+            || vec![0.0; precipitation.len()],
+            |simulation, i| {
+                simulate(
+                    population.row(i),
+                    precipitation,
+                    temperature,
+                    pet,
+                    day_of_year,
+                    elevation_bands,
+                    median_elevation,
+                    &mut simulation[..],
+                )?;
+                evaluate_simulation(
+                    observations,
+                    ArrayView1::from(&simulation[..]),
+                )
+            },
+        )
         .collect();
     for (i, result) in results.into_iter().enumerate() {
         objectives.row_mut(i).assign(&result?);
@@ -539,31 +1271,10 @@ fn evaluate_initial_population(
 }
 
 fn evaluate_simulation(
-    observations: ArrayView1<f64>,
-    simulations: ArrayView1<f64>,
-    transformation: Transformation,
-    warmup_steps: usize,
+    observations: &PreparedObservations,
+    simulation: ArrayView1<f64>,
 ) -> Result<Array1<f64>, CalibrationError> {
-    let observations = observations.slice(s![warmup_steps..]);
-    let simulations = simulations.slice(s![warmup_steps..]);
-    let (observations, simulations) = match transformation {
-        Transformation::Log => (
-            observations.mapv(|x| x.max(1e-5).ln()),
-            simulations.mapv(|x| x.max(1e-5).ln()),
-        ),
-        Transformation::Sqrt => (
-            observations.mapv(|x| x.sqrt()),
-            simulations.mapv(|x| x.sqrt()),
-        ),
-        Transformation::None => {
-            (observations.to_owned(), simulations.to_owned())
-        }
-    };
-    Ok(Array1::from_vec(vec![
-        calculate_rmse(observations.view(), simulations.view())?,
-        calculate_nse(observations.view(), simulations.view())?,
-        calculate_kge(observations.view(), simulations.view())?,
-    ]))
+    Ok(Array1::from_iter(observations.evaluate(simulation)?))
 }
 
 pub fn sort_population(
@@ -605,6 +1316,7 @@ fn compute_normalized_geometric_range(
     population: ArrayView2<f64>,
     lower_bounds: ArrayView1<f64>,
     upper_bounds: ArrayView1<f64>,
+    snow_grid: Option<&SnowGrid>,
 ) -> f64 {
     let bounds = upper_bounds.to_owned() - lower_bounds;
     let maxs = population
@@ -612,7 +1324,13 @@ fn compute_normalized_geometric_range(
     let mins =
         population.fold_axis(Axis(0), f64::INFINITY, |&acc, &x| acc.min(x));
     let ranges = maxs - mins;
-    let normalised_ranges = ranges / bounds;
+    let mut normalised_ranges = ranges / bounds;
+    if let Some(snow_grid) = snow_grid {
+        // snow parameters on a single grid point still span one step
+        normalised_ranges
+            .slice_mut(s![..snow_grid.n_params()])
+            .mapv_inplace(|x| x.max(1.0 / SNOW_GRID_STEPS));
+    }
     normalised_ranges
         .mapv(|x| x.max(1e-10).ln())
         .mean()
@@ -652,31 +1370,59 @@ fn evolve_complexes(
     day_of_year: ArrayView1<usize>,
     elevation_bands: Option<ArrayView1<f64>>,
     median_elevation: Option<f64>,
-    observations: ArrayView1<f64>,
-    warmup_steps: usize,
+    observations: &PreparedObservations,
+    snow_grid: Option<&SnowGrid>,
     objective_idx: usize,
     is_minimization: bool,
-    transformation: Transformation,
-    mut n_calls: usize,
-    n_complexes: usize,
+    n_calls: usize,
     n_per_complex: usize,
     n_simplex: usize,
     n_evolution_steps: usize,
+    parallel: bool,
     rng: &mut ChaCha8Rng,
 ) -> Result<usize, CalibrationError> {
-    for igs in 0..n_complexes {
-        let cx = &mut complexes[igs];
-        let cf = &mut complex_objectives[igs];
-
-        for _ in 0..n_evolution_steps {
-            let simplex_indices =
-                select_simplex_indices(n_per_complex, n_simplex, rng);
-            let mut s = cx.select(Axis(0), &simplex_indices);
-            let mut sf = cf.select(Axis(0), &simplex_indices);
-
-            let (snew, fnew, calls_made) = evolve_complex_step(
-                s.view(),
-                sf.view(),
+    if parallel {
+        // one stream per complex, seeded from the main generator so that the
+        // outcome doesn't depend on the number of threads
+        let step_seed: u64 = rng.random();
+        let calls = complexes
+            .par_iter_mut()
+            .zip(complex_objectives.par_iter_mut())
+            .enumerate()
+            .map(|(igs, (cx, cf))| {
+                let mut complex_rng = ChaCha8Rng::seed_from_u64(step_seed);
+                complex_rng.set_stream(igs as u64);
+                evolve_complex(
+                    cx,
+                    cf,
+                    lower_bounds,
+                    upper_bounds,
+                    simulate,
+                    precipitation,
+                    temperature,
+                    pet,
+                    day_of_year,
+                    elevation_bands,
+                    median_elevation,
+                    observations,
+                    snow_grid,
+                    objective_idx,
+                    is_minimization,
+                    n_per_complex,
+                    n_simplex,
+                    n_evolution_steps,
+                    &mut complex_rng,
+                )
+            })
+            .collect::<Result<Vec<usize>, CalibrationError>>()?;
+        Ok(n_calls + calls.iter().sum::<usize>())
+    } else {
+        let mut n_calls = n_calls;
+        for (cx, cf) in complexes.iter_mut().zip(complex_objectives.iter_mut())
+        {
+            n_calls += evolve_complex(
+                cx,
+                cf,
                 lower_bounds,
                 upper_bounds,
                 simulate,
@@ -687,28 +1433,84 @@ fn evolve_complexes(
                 elevation_bands,
                 median_elevation,
                 observations,
-                warmup_steps,
+                snow_grid,
                 objective_idx,
                 is_minimization,
-                transformation,
+                n_per_complex,
+                n_simplex,
+                n_evolution_steps,
                 rng,
             )?;
-            n_calls += calls_made;
-
-            // replace worst point in simplex
-            let last_s_idx = s.nrows() - 1;
-            let last_sf_idx = sf.nrows() - 1;
-            s.row_mut(last_s_idx).assign(&snew);
-            sf.row_mut(last_sf_idx).assign(&fnew);
-
-            // reintegrate simplex into complex
-            for (idx, j) in simplex_indices.iter().zip(0..s.nrows()) {
-                cx.row_mut(*idx).assign(&s.row(j));
-                cf.row_mut(*idx).assign(&sf.row(j));
-            }
+        }
+        Ok(n_calls)
+    }
+}
 
-            sort_population(cx, cf, objective_idx, is_minimization);
+fn evolve_complex(
+    cx: &mut Array2<f64>,
+    cf: &mut Array2<f64>,
+    lower_bounds: ArrayView1<f64>,
+    upper_bounds: ArrayView1<f64>,
+    simulate: &Simulate,
+    precipitation: ArrayView1<f64>,
+    temperature: Option<ArrayView1<f64>>,
+    pet: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_bands: Option<ArrayView1<f64>>,
+    median_elevation: Option<f64>,
+    observations: &PreparedObservations,
+    snow_grid: Option<&SnowGrid>,
+    objective_idx: usize,
+    is_minimization: bool,
+    n_per_complex: usize,
+    n_simplex: usize,
+    n_evolution_steps: usize,
+    rng: &mut ChaCha8Rng,
+) -> Result<usize, CalibrationError> {
+    let mut n_calls = 0;
+    // reused by the evaluations of the complex
+    let mut simulation = vec![0.0; precipitation.len()];
+
+    for _ in 0..n_evolution_steps {
+        let simplex_indices =
+            select_simplex_indices(n_per_complex, n_simplex, rng);
+        let mut s = cx.select(Axis(0), &simplex_indices);
+        let mut sf = cf.select(Axis(0), &simplex_indices);
+
+        let (snew, fnew, calls_made) = evolve_complex_step(
+            s.view(),
+            sf.view(),
+            lower_bounds,
+            upper_bounds,
+            simulate,
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_bands,
+            median_elevation,
+            observations,
+            snow_grid,
+            objective_idx,
+            is_minimization,
+            rng,
+            &mut simulation,
+        )?;
+        n_calls += calls_made;
+
+        // replace worst point in simplex
+        let last_s_idx = s.nrows() - 1;
+        let last_sf_idx = sf.nrows() - 1;
+        s.row_mut(last_s_idx).assign(&snew);
+        sf.row_mut(last_sf_idx).assign(&fnew);
+
+        // reintegrate simplex into complex
+        for (idx, j) in simplex_indices.iter().zip(0..s.nrows()) {
+            cx.row_mut(*idx).assign(&s.row(j));
+            cf.row_mut(*idx).assign(&sf.row(j));
         }
+
+        sort_population(cx, cf, objective_idx, is_minimization);
     }
     Ok(n_calls)
 }
@@ -725,12 +1527,12 @@ fn evolve_complex_step(
     day_of_year: ArrayView1<usize>,
     elevation_bands: Option<ArrayView1<f64>>,
     median_elevation: Option<f64>,
-    observations: ArrayView1<f64>,
-    warmup_steps: usize,
+    observations: &PreparedObservations,
+    snow_grid: Option<&SnowGrid>,
     objective_idx: usize,
     is_minimization: bool,
-    transformation: Transformation,
     rng: &mut ChaCha8Rng,
+    simulation: &mut [f64],
 ) -> Result<(Array1<f64>, Array1<f64>, usize), CalibrationError> {
     let alpha = 1.0;
     let beta = 0.5;
@@ -773,9 +1575,13 @@ fn evolve_complex_step(
         );
         snew = &random_values * &range + lower_bounds;
     }
+    // the point kept is the one evaluated
+    if let Some(snow_grid) = snow_grid {
+        snow_grid.snap(snew.view_mut());
+    }
 
     // evaluate reflection point
-    let simulation = simulate(
+    simulate(
         snew.view(),
         precipitation,
         temperature,
@@ -783,19 +1589,19 @@ fn evolve_complex_step(
         day_of_year,
         elevation_bands,
         median_elevation,
+        &mut simulation[..],
     )?;
-    let mut fnew = evaluate_simulation(
-        observations,
-        simulation.view(),
-        transformation,
-        warmup_steps,
-    )?;
+    let mut fnew =
+        evaluate_simulation(observations, ArrayView1::from(&simulation[..]))?;
     calls += 1;
 
     // if reflection failed (worse than worst), try contraction
     if is_worse(fnew[objective_idx], fw) {
         snew = sw.to_owned() + beta * (&ce - &sw);
-        let simulation = simulate(
+        if let Some(snow_grid) = snow_grid {
+            snow_grid.snap(snew.view_mut());
+        }
+        simulate(
             snew.view(),
             precipitation,
             temperature,
@@ -803,12 +1609,11 @@ fn evolve_complex_step(
             day_of_year,
             elevation_bands,
             median_elevation,
+            &mut simulation[..],
         )?;
         fnew = evaluate_simulation(
             observations,
-            simulation.view(),
-            transformation,
-            warmup_steps,
+            ArrayView1::from(&simulation[..]),
         )?;
         calls += 1;
 
@@ -820,7 +1625,10 @@ fn evolve_complex_step(
                 rng,
             );
             snew = &random_values * &range + lower_bounds;
-            let simulation = simulate(
+            if let Some(snow_grid) = snow_grid {
+                snow_grid.snap(snew.view_mut());
+            }
+            simulate(
                 snew.view(),
                 precipitation,
                 temperature,
@@ -828,12 +1636,11 @@ fn evolve_complex_step(
                 day_of_year,
                 elevation_bands,
                 median_elevation,
+                &mut simulation[..],
             )?;
             fnew = evaluate_simulation(
                 observations,
-                simulation.view(),
-                transformation,
-                warmup_steps,
+                ArrayView1::from(&simulation[..]),
             )?;
             calls += 1;
         }
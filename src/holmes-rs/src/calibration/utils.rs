@@ -1,14 +1,28 @@
-use ndarray::{s, Array1, ArrayView1};
+use ndarray::{s, Array1, ArrayView1, ArrayViewMut1};
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
 use rand_chacha::ChaCha8Rng;
+use std::collections::hash_map::DefaultHasher;
+use std::collections::HashMap;
+use std::hash::{Hash, Hasher};
 use std::str::FromStr;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::{Arc, Mutex};
 use thiserror::Error;
 
-use crate::hydro::{HydroError, HydroSimulate};
-use crate::metrics::MetricsError;
-use crate::snow::{SnowError, SnowSimulate};
+use crate::hydro::{
+    self, HydroError, HydroInitialState, HydroSimulateInto,
+    HydroSimulateWithState,
+};
+use crate::metrics::{calculate_rmse_nse_kge, MetricsError, ObservationStats};
+use crate::snow::{
+    self, SnowError, SnowInitialState, SnowSimulate, SnowSimulateWithState,
+};
 
+/// Simulation function of a calibration, writing the streamflow into a
+/// caller-provided buffer of the forcings' length, so that evaluations can
+/// reuse the same buffer instead of allocating one each (see
+/// `run_simulate` for one-off simulations).
 pub type Simulate = Box<
     dyn Fn(
             ArrayView1<f64>,         // params
@@ -18,7 +32,8 @@ pub type Simulate = Box<
             ArrayView1<usize>,       // day_of_year
             Option<ArrayView1<f64>>, // elevation_bands (optional - only needed for snow)
             Option<f64>, // median_elevation (optional - only needed for snow)
-        ) -> Result<Array1<f64>, CalibrationError>
+            &mut [f64],  // streamflow
+        ) -> Result<(), CalibrationError>
         + Sync
         + Send,
 >;
@@ -34,7 +49,7 @@ pub struct CalibrationParams {
     pub done: bool,
 }
 
-#[derive(Debug, Clone, Copy)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum Objective {
     Rmse,
     Nse,
@@ -80,6 +95,73 @@ impl FromStr for Transformation {
     }
 }
 
+impl Transformation {
+    pub fn apply(self, value: f64) -> f64 {
+        match self {
+            Self::Log => value.max(1e-5).ln(),
+            Self::Sqrt => value.sqrt(),
+            Self::None => value,
+        }
+    }
+}
+
+/// Observations prepared once per calibration: the warmup is removed, the
+/// transformation applied and the summary statistics computed, so that each
+/// evaluation is a single pass over the simulation.
+pub struct PreparedObservations {
+    values: Array1<f64>,
+    stats: ObservationStats,
+    transformation: Transformation,
+    warmup_steps: usize,
+    // hash of the observations' values
+    fingerprint: u64,
+}
+
+impl PreparedObservations {
+    pub fn new(
+        observations: ArrayView1<f64>,
+        transformation: Transformation,
+        warmup_steps: usize,
+    ) -> Result<Self, CalibrationError> {
+        let values = observations
+            .slice(s![warmup_steps..])
+            .mapv(|x| transformation.apply(x));
+        let stats = ObservationStats::new(values.view())?;
+        Ok(Self {
+            values,
+            stats,
+            transformation,
+            warmup_steps,
+            fingerprint: fingerprint_observations(observations),
+        })
+    }
+
+    /// Whether these were prepared from the same observations, compared by
+    /// a hash of their values, and with the same warmup.
+    pub fn matches(
+        &self,
+        observations: ArrayView1<f64>,
+        warmup_steps: usize,
+    ) -> bool {
+        self.warmup_steps == warmup_steps
+            && self.fingerprint == fingerprint_observations(observations)
+    }
+
+    /// RMSE, NSE and KGE of the simulation, which includes the warmup.
+    pub fn evaluate(
+        &self,
+        simulation: ArrayView1<f64>,
+    ) -> Result<[f64; 3], CalibrationError> {
+        let transformation = self.transformation;
+        Ok(calculate_rmse_nse_kge(
+            self.values.view(),
+            &self.stats,
+            simulation.slice(s![self.warmup_steps..]),
+            |x| transformation.apply(x),
+        )?)
+    }
+}
+
 #[derive(Error, Debug)]
 pub enum CalibrationError {
     #[error(
@@ -90,6 +172,14 @@ pub enum CalibrationError {
     ParamsMismatch(usize, usize),
     #[error("snow model requires temperature, elevation_bands, and median_elevation")]
     MissingSnowParams,
+    #[error("invalid checkpoint: {0}")]
+    InvalidCheckpoint(String),
+    #[error("at least one island is required")]
+    NoIslands,
+    #[error("{0} migrants must be fewer than the {1} points of a population")]
+    TooManyMigrants(usize, usize),
+    #[error("invalid fixed parameters: {0}")]
+    InvalidFixedParams(String),
     #[error(transparent)]
     Metrics(#[from] MetricsError),
     #[error(transparent)]
@@ -132,9 +222,103 @@ pub fn check_lengths(
     }
 }
 
+/// Validates the forcings once for a whole calibration, so that the
+/// simulations can then use the unchecked model kernels.
+pub fn validate_forcings(
+    precipitation: ArrayView1<f64>,
+    temperature: Option<ArrayView1<f64>>,
+    pet: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_bands: Option<ArrayView1<f64>>,
+    median_elevation: Option<f64>,
+    with_snow: bool,
+) -> Result<(), CalibrationError> {
+    check_lengths(precipitation, temperature, pet, day_of_year)?;
+    if with_snow {
+        let temperature =
+            temperature.ok_or(CalibrationError::MissingSnowParams)?;
+        let elevation_bands =
+            elevation_bands.ok_or(CalibrationError::MissingSnowParams)?;
+        median_elevation.ok_or(CalibrationError::MissingSnowParams)?;
+        snow::utils::validate_forcings(
+            precipitation,
+            temperature,
+            day_of_year,
+            elevation_bands,
+        )?;
+    }
+    hydro::utils::validate_forcings(precipitation, pet)?;
+    Ok(())
+}
+
+/// Hash of the forcings' values, telling whether a calibration step gets
+/// the forcings its calibration validated. It takes a single pass over them,
+/// negligible next to the simulations of a step.
+pub fn fingerprint_forcings(
+    precipitation: ArrayView1<f64>,
+    temperature: Option<ArrayView1<f64>>,
+    pet: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_bands: Option<ArrayView1<f64>>,
+    median_elevation: Option<f64>,
+) -> u64 {
+    let mut hasher = DefaultHasher::new();
+    hash_values(&mut hasher, Some(precipitation));
+    hash_values(&mut hasher, temperature);
+    hash_values(&mut hasher, Some(pet));
+    day_of_year.len().hash(&mut hasher);
+    day_of_year.iter().for_each(|day| day.hash(&mut hasher));
+    hash_values(&mut hasher, elevation_bands);
+    median_elevation.map(f64::to_bits).hash(&mut hasher);
+    hasher.finish()
+}
+
+fn fingerprint_observations(observations: ArrayView1<f64>) -> u64 {
+    let mut hasher = DefaultHasher::new();
+    hash_values(&mut hasher, Some(observations));
+    hasher.finish()
+}
+
+fn hash_values(hasher: &mut DefaultHasher, values: Option<ArrayView1<f64>>) {
+    values.map(|values| values.len()).hash(hasher);
+    if let Some(values) = values {
+        values.iter().for_each(|value| value.to_bits().hash(hasher));
+    }
+}
+
+/// Runs `simulate` into a new array, for one-off simulations such as that of
+/// the best parameters.
+pub fn run_simulate(
+    simulate: &Simulate,
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    temperature: Option<ArrayView1<f64>>,
+    pet: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_bands: Option<ArrayView1<f64>>,
+    median_elevation: Option<f64>,
+) -> Result<Array1<f64>, CalibrationError> {
+    let mut simulation = Array1::zeros(precipitation.len());
+    simulate(
+        params,
+        precipitation,
+        temperature,
+        pet,
+        day_of_year,
+        elevation_bands,
+        median_elevation,
+        simulation.as_slice_mut().unwrap(),
+    )?;
+    Ok(simulation)
+}
+
+/// Chains the snow and hydro models into a single simulation function.
+/// No forcing validation happens per call: they must have been checked with
+/// `validate_forcings` beforehand. The hydro model writes straight into the
+/// caller's buffer.
 pub fn compose_simulate(
     snow_simulate: Option<SnowSimulate>,
-    hydro_simulate: HydroSimulate,
+    hydro_simulate: HydroSimulateInto,
     n_snow_params: usize,
 ) -> Simulate {
     Box::new(
@@ -144,8 +328,8 @@ pub fn compose_simulate(
               pet,
               day_of_year,
               elevation_bands,
-              median_elevation| {
-            check_lengths(precipitation, temperature, pet, day_of_year)?;
+              median_elevation,
+              out| {
             if let Some(snow_simulate) = snow_simulate {
                 // Snow model requires temperature, elevation_bands, and median_elevation
                 let temperature =
@@ -172,13 +356,716 @@ pub fn compose_simulate(
                     hydro_params,
                     effective_precipitation.view(),
                     pet,
+                    out,
                 )
                 .map_err(CalibrationError::Hydro)
             } else {
                 // No snow model - snow params are not needed
-                hydro_simulate(params, precipitation, pet)
+                hydro_simulate(params, precipitation, pet, out)
                     .map_err(CalibrationError::Hydro)
             }
         },
     )
 }
+
+/// Chains the snow and hydro models like `compose_simulate`, keeping the
+/// snow model's output for the snow parameters in `cache`, so that
+/// candidates differing only by their hydro parameters run the hydro model
+/// alone. The snow parameters are keyed on the cache's grid like any
+/// evaluation (see `EvaluationCache`); SCE-UA restricts them to a
+/// `SnowGrid` so that such candidates are common.
+pub fn compose_snow_cached_simulate(
+    snow_simulate: SnowSimulate,
+    hydro_simulate: HydroSimulateInto,
+    n_snow_params: usize,
+    cache: Arc<EvaluationCache>,
+) -> Simulate {
+    Box::new(
+        move |params,
+              precipitation,
+              temperature,
+              pet,
+              day_of_year,
+              elevation_bands,
+              median_elevation,
+              out| {
+            let temperature =
+                temperature.ok_or(CalibrationError::MissingSnowParams)?;
+            let elevation_bands =
+                elevation_bands.ok_or(CalibrationError::MissingSnowParams)?;
+            let median_elevation =
+                median_elevation.ok_or(CalibrationError::MissingSnowParams)?;
+
+            let key = cache.key(params.slice(s![..n_snow_params]));
+            let effective_precipitation = match cache.get(&key) {
+                Some(effective_precipitation) => effective_precipitation,
+                None => {
+                    let effective_precipitation = Arc::new(
+                        snow_simulate(
+                            cache.snap(&key).view(),
+                            precipitation,
+                            temperature,
+                            day_of_year,
+                            elevation_bands,
+                            median_elevation,
+                        )
+                        .map_err(CalibrationError::Snow)?,
+                    );
+                    cache.insert(key, Arc::clone(&effective_precipitation));
+                    effective_precipitation
+                }
+            };
+
+            hydro_simulate(
+                params.slice(s![n_snow_params..]),
+                effective_precipitation.view(),
+                pet,
+                out,
+            )
+            .map_err(CalibrationError::Hydro)
+        },
+    )
+}
+
+/// Number of steps of the grid the calibrated snow parameters are
+/// restricted to when the snow model's output is cached.
+pub const SNOW_GRID_STEPS: f64 = 100.0;
+
+/// Grid of `SNOW_GRID_STEPS` steps over the bounds of the snow parameters,
+/// which come first among the calibrated parameters. Candidates are snapped
+/// to it before being evaluated and the search keeps the snapped points, so
+/// that the snow parameters of the population take few distinct values and
+/// their snow outputs are reused (see `compose_snow_cached_simulate`).
+pub struct SnowGrid {
+    lower_bounds: Array1<f64>,
+    upper_bounds: Array1<f64>,
+}
+
+impl SnowGrid {
+    pub fn new(lower_bounds: Array1<f64>, upper_bounds: Array1<f64>) -> Self {
+        SnowGrid {
+            lower_bounds,
+            upper_bounds,
+        }
+    }
+
+    pub fn n_params(&self) -> usize {
+        self.lower_bounds.len()
+    }
+
+    /// Snaps the snow parameters at the start of `params` to the grid,
+    /// leaving the others as they are.
+    pub fn snap(&self, mut params: ArrayViewMut1<f64>) {
+        for ((param, &lower), &upper) in params
+            .iter_mut()
+            .zip(self.lower_bounds.iter())
+            .zip(self.upper_bounds.iter())
+        {
+            let step = (upper - lower) / SNOW_GRID_STEPS;
+            if step > 0.0 {
+                *param = (lower + ((*param - lower) / step).round() * step)
+                    .clamp(lower, upper);
+            }
+        }
+    }
+}
+
+/// Inserts the `fixed` parameters, as (index, value) pairs sorted by index,
+/// among the `free` ones.
+pub fn insert_fixed(
+    free: ArrayView1<f64>,
+    fixed: &[(usize, f64)],
+) -> Array1<f64> {
+    let mut params = free.to_vec();
+    // each fixed parameter is inserted after those with a lower index
+    for &(index, value) in fixed {
+        params.insert(index, value);
+    }
+    Array1::from_vec(params)
+}
+
+/// Wraps a simulation function so that it takes only the free parameters,
+/// the `fixed` ones (see `insert_fixed`) being inserted before each call.
+pub fn fix_params(simulate: Simulate, fixed: Vec<(usize, f64)>) -> Simulate {
+    Box::new(
+        move |params,
+              precipitation,
+              temperature,
+              pet,
+              day_of_year,
+              elevation_bands,
+              median_elevation,
+              out| {
+            simulate(
+                insert_fixed(params, &fixed).view(),
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                out,
+            )
+        },
+    )
+}
+
+/// Spin-up replacing the explicit warmup simulation: a climatological year
+/// is repeated from the initial state until every state variable changes by
+/// less than `tolerance` (relative to its magnitude, or absolutely below 1)
+/// between two years, or for at most `max_iterations` years. The scored
+/// period is then simulated from the spun-up state. The climatological year
+/// is built on the warmup, which must last `MIN_SPIN_UP_WARMUP` days.
+#[derive(Debug, Clone, Copy)]
+pub struct SpinUp {
+    pub tolerance: f64,
+    pub max_iterations: usize,
+}
+
+/// Stateful snow and hydro models of a calibration, used for the spin-up.
+#[derive(Clone, Copy)]
+pub struct StatefulModels {
+    pub snow: Option<(SnowInitialState, SnowSimulateWithState)>,
+    pub hydro: (HydroInitialState, HydroSimulateWithState),
+    pub n_snow_params: usize,
+}
+
+impl StatefulModels {
+    pub fn new(
+        hydro_model: &str,
+        snow_model: Option<&str>,
+        n_snow_params: usize,
+    ) -> Result<Self, CalibrationError> {
+        Ok(Self {
+            snow: snow_model.map(snow::get_stateful_model).transpose()?,
+            hydro: hydro::get_stateful_model(hydro_model)?,
+            n_snow_params,
+        })
+    }
+}
+
+/// Shortest warmup, in days, on which a spin-up climatology is built. With a
+/// shorter warmup, calibrations simulate it instead of spinning up.
+pub const MIN_SPIN_UP_WARMUP: usize = 365;
+
+/// Mean forcings of each day of year, ordered so that the year ends on the
+/// day before the scored period starts.
+pub struct Climatology {
+    pub precipitation: Array1<f64>,
+    pub temperature: Option<Array1<f64>>,
+    pub pet: Array1<f64>,
+    pub day_of_year: Array1<usize>,
+}
+
+impl Climatology {
+    /// Climatology of the warmup period, or `None` if the warmup is shorter
+    /// than `MIN_SPIN_UP_WARMUP`, as averaging later days would leak the
+    /// scored period into the spin-up, or longer than the forcings. The
+    /// 366th day of leap years is counted with the 365th.
+    pub fn new(
+        precipitation: ArrayView1<f64>,
+        temperature: Option<ArrayView1<f64>>,
+        pet: ArrayView1<f64>,
+        day_of_year: ArrayView1<usize>,
+        warmup_steps: usize,
+    ) -> Option<Self> {
+        if warmup_steps < MIN_SPIN_UP_WARMUP
+            || warmup_steps > day_of_year.len()
+        {
+            return None;
+        }
+        let mut counts = [0usize; 365];
+        let mut sums = [[0.0f64; 3]; 365];
+        for i in 0..warmup_steps {
+            let day = day_of_year[i].clamp(1, 365) - 1;
+            counts[day] += 1;
+            sums[day][0] += precipitation[i];
+            sums[day][1] += temperature.map_or(0.0, |t| t[i]);
+            sums[day][2] += pet[i];
+        }
+
+        let first_day = day_of_year
+            .get(warmup_steps)
+            .or(day_of_year.get(0))
+            .map_or(0, |&day| day.clamp(1, 365) - 1);
+        let days: Vec<usize> = (0..365)
+            .map(|i| (first_day + i) % 365)
+            .filter(|&day| counts[day] > 0)
+            .collect();
+        let mean = |j: usize| -> Array1<f64> {
+            days.iter()
+                .map(|&day| sums[day][j] / counts[day] as f64)
+                .collect()
+        };
+        Some(Self {
+            precipitation: mean(0),
+            temperature: temperature.map(|_| mean(1)),
+            pet: mean(2),
+            day_of_year: days.iter().map(|&day| day + 1).collect(),
+        })
+    }
+}
+
+/// Chains the stateful snow and hydro models into a simulation function
+/// spinning the models up on `climatology` instead of simulating the first
+/// `warmup_steps` days. Only the days after the warmup are simulated; the
+/// warmup days of the returned series, which keeps the length of the
+/// forcings, are NaN.
+pub fn compose_spin_up_simulate(
+    models: StatefulModels,
+    spin_up: SpinUp,
+    climatology: Climatology,
+    warmup_steps: usize,
+) -> Simulate {
+    Box::new(
+        move |params,
+              precipitation,
+              temperature,
+              pet,
+              day_of_year,
+              elevation_bands,
+              median_elevation,
+              out| {
+            hydro::utils::validate_output_buffer(out, precipitation.len())?;
+            let (hydro_initial_state, hydro_simulate) = models.hydro;
+            let snow_params = params.slice(s![..models.n_snow_params]);
+            let hydro_params = params.slice(s![models.n_snow_params..]);
+
+            let snow = match models.snow {
+                Some((snow_initial_state, snow_simulate)) => {
+                    // Snow model requires temperature, elevation_bands, and median_elevation
+                    let temperature = temperature
+                        .ok_or(CalibrationError::MissingSnowParams)?;
+                    let elevation_bands = elevation_bands
+                        .ok_or(CalibrationError::MissingSnowParams)?;
+                    let median_elevation = median_elevation
+                        .ok_or(CalibrationError::MissingSnowParams)?;
+                    let climatology_temperature = climatology
+                        .temperature
+                        .as_ref()
+                        .ok_or(CalibrationError::MissingSnowParams)?;
+                    Some((
+                        snow_simulate,
+                        temperature,
+                        climatology_temperature.view(),
+                        elevation_bands,
+                        median_elevation,
+                        snow_initial_state(elevation_bands),
+                    ))
+                }
+                None => None,
+            };
+            let mut snow_state = snow.as_ref().map(|snow| snow.5.clone());
+            let mut hydro_state = hydro_initial_state(hydro_params)
+                .map_err(CalibrationError::Hydro)?;
+
+            for _ in 0..spin_up.max_iterations {
+                let mut converged = true;
+                let effective_precipitation = match (&snow, &mut snow_state) {
+                    (
+                        Some((
+                            snow_simulate,
+                            _,
+                            temperature,
+                            elevation_bands,
+                            median_elevation,
+                            _,
+                        )),
+                        Some(state),
+                    ) => {
+                        let (effective_precipitation, new_state) =
+                            snow_simulate(
+                                snow_params,
+                                climatology.precipitation.view(),
+                                *temperature,
+                                climatology.day_of_year.view(),
+                                *elevation_bands,
+                                *median_elevation,
+                                Some(state.view()),
+                            )
+                            .map_err(CalibrationError::Snow)?;
+                        converged &= has_converged(
+                            state.view(),
+                            new_state.view(),
+                            spin_up.tolerance,
+                        );
+                        *state = new_state;
+                        Some(effective_precipitation)
+                    }
+                    _ => None,
+                };
+                let (_, new_state) = hydro_simulate(
+                    hydro_params,
+                    effective_precipitation
+                        .as_ref()
+                        .map_or(climatology.precipitation.view(), |p| {
+                            p.view()
+                        }),
+                    climatology.pet.view(),
+                    Some(hydro_state.view()),
+                )
+                .map_err(CalibrationError::Hydro)?;
+                converged &= has_converged(
+                    hydro_state.view(),
+                    new_state.view(),
+                    spin_up.tolerance,
+                );
+                hydro_state = new_state;
+                if converged {
+                    break;
+                }
+            }
+
+            let warmup_steps = warmup_steps.min(precipitation.len());
+            let precipitation = precipitation.slice(s![warmup_steps..]);
+            let effective_precipitation = match (&snow, &snow_state) {
+                (
+                    Some((
+                        snow_simulate,
+                        temperature,
+                        _,
+                        elevation_bands,
+                        median_elevation,
+                        _,
+                    )),
+                    Some(state),
+                ) => Some(
+                    snow_simulate(
+                        snow_params,
+                        precipitation,
+                        temperature.slice(s![warmup_steps..]),
+                        day_of_year.slice(s![warmup_steps..]),
+                        *elevation_bands,
+                        *median_elevation,
+                        Some(state.view()),
+                    )
+                    .map_err(CalibrationError::Snow)?
+                    .0,
+                ),
+                _ => None,
+            };
+            let (streamflow, _) = hydro_simulate(
+                hydro_params,
+                effective_precipitation
+                    .as_ref()
+                    .map_or(precipitation, |p| p.view()),
+                pet.slice(s![warmup_steps..]),
+                Some(hydro_state.view()),
+            )
+            .map_err(CalibrationError::Hydro)?;
+
+            let mut simulation = ArrayViewMut1::from(out);
+            simulation.slice_mut(s![..warmup_steps]).fill(f64::NAN);
+            simulation.slice_mut(s![warmup_steps..]).assign(&streamflow);
+            Ok(())
+        },
+    )
+}
+
+/// Resolution of the evaluation cache keys, relative to the range of each
+/// parameter's bounds.
+pub const CACHE_RESOLUTION: f64 = 1e-9;
+
+/// Bytes in a megabyte, the unit of the cache sizes of the Python bindings.
+pub const MEGABYTE: usize = 1 << 20;
+
+/// Cache of the simulations of a calibration, keyed on the parameters
+/// quantized on a grid of `CACHE_RESOLUTION` times their bounds' range, so
+/// that points the evolution revisits, such as contractions landing back on
+/// a parent or migrants already evaluated on their new island, aren't
+/// simulated again. The least recently used simulations are evicted once
+/// the entries take more than `capacity` bytes (see `entry_bytes`).
+///
+/// Simulations run on the parameters snapped to the grid, so that a cached
+/// result doesn't depend on which of the points sharing a key was simulated
+/// first, keeping parallel calibrations reproducible. The cache must be
+/// cleared when the forcings or the simulation function change.
+pub struct EvaluationCache {
+    capacity: usize,
+    lower_bounds: Array1<f64>,
+    upper_bounds: Array1<f64>,
+    steps: Array1<f64>,
+    entries: Mutex<CacheEntries>,
+    hits: AtomicUsize,
+    misses: AtomicUsize,
+}
+
+/// Hits, misses, number of simulations and bytes used of an
+/// `EvaluationCache`, whose `capacity` is in bytes.
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct CacheInfo {
+    pub hits: usize,
+    pub misses: usize,
+    pub entries: usize,
+    pub size: usize,
+    pub capacity: usize,
+}
+
+/// Bytes counted for a cached simulation: its values and the key, stored
+/// both in the index and with the simulation.
+pub fn entry_bytes(key: &[i64], simulation: &Array1<f64>) -> usize {
+    simulation.len() * std::mem::size_of::<f64>()
+        + 2 * key.len() * std::mem::size_of::<i64>()
+}
+
+const NIL: usize = usize::MAX;
+
+struct CacheNode {
+    key: Vec<i64>,
+    simulation: Arc<Array1<f64>>,
+    bytes: usize,
+    prev: usize,
+    next: usize,
+}
+
+/// Least recently used list of the simulations, as a doubly linked list in
+/// a vector indexed by key, so that lookups, insertions and evictions take
+/// constant time under the lock.
+struct CacheEntries {
+    index: HashMap<Vec<i64>, usize>,
+    nodes: Vec<CacheNode>,
+    // most and least recently used nodes
+    head: usize,
+    tail: usize,
+    bytes: usize,
+}
+
+impl CacheEntries {
+    fn new() -> Self {
+        CacheEntries {
+            index: HashMap::new(),
+            nodes: Vec::new(),
+            head: NIL,
+            tail: NIL,
+            bytes: 0,
+        }
+    }
+
+    fn unlink(&mut self, i: usize) {
+        let (prev, next) = (self.nodes[i].prev, self.nodes[i].next);
+        if prev == NIL {
+            self.head = next;
+        } else {
+            self.nodes[prev].next = next;
+        }
+        if next == NIL {
+            self.tail = prev;
+        } else {
+            self.nodes[next].prev = prev;
+        }
+    }
+
+    fn push_front(&mut self, i: usize) {
+        self.nodes[i].prev = NIL;
+        self.nodes[i].next = self.head;
+        if self.head == NIL {
+            self.tail = i;
+        } else {
+            self.nodes[self.head].prev = i;
+        }
+        self.head = i;
+    }
+
+    fn touch(&mut self, i: usize) {
+        if self.head != i {
+            self.unlink(i);
+            self.push_front(i);
+        }
+    }
+
+    fn insert(
+        &mut self,
+        key: Vec<i64>,
+        simulation: Arc<Array1<f64>>,
+        bytes: usize,
+    ) {
+        let i = self.nodes.len();
+        self.nodes.push(CacheNode {
+            key: key.clone(),
+            simulation,
+            bytes,
+            prev: NIL,
+            next: NIL,
+        });
+        self.index.insert(key, i);
+        self.push_front(i);
+        self.bytes += bytes;
+    }
+
+    fn remove(&mut self, i: usize) {
+        self.unlink(i);
+        let node = self.nodes.swap_remove(i);
+        self.index.remove(&node.key);
+        self.bytes -= node.bytes;
+        if i < self.nodes.len() {
+            // the last node moved into the freed slot
+            let (prev, next) = (self.nodes[i].prev, self.nodes[i].next);
+            if prev == NIL {
+                self.head = i;
+            } else {
+                self.nodes[prev].next = i;
+            }
+            if next == NIL {
+                self.tail = i;
+            } else {
+                self.nodes[next].prev = i;
+            }
+            if let Some(index) = self.index.get_mut(&self.nodes[i].key) {
+                *index = i;
+            }
+        }
+    }
+}
+
+impl EvaluationCache {
+    /// Cache of at most `capacity` bytes of simulations.
+    pub fn new(
+        capacity: usize,
+        lower_bounds: Array1<f64>,
+        upper_bounds: Array1<f64>,
+    ) -> Self {
+        let steps = (&upper_bounds - &lower_bounds)
+            .mapv(|range| (range * CACHE_RESOLUTION).max(f64::MIN_POSITIVE));
+        EvaluationCache {
+            capacity,
+            lower_bounds,
+            upper_bounds,
+            steps,
+            entries: Mutex::new(CacheEntries::new()),
+            hits: AtomicUsize::new(0),
+            misses: AtomicUsize::new(0),
+        }
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.capacity
+    }
+
+    /// Index of each parameter on the grid.
+    pub fn key(&self, params: ArrayView1<f64>) -> Vec<i64> {
+        params
+            .iter()
+            .zip(self.lower_bounds.iter().zip(self.steps.iter()))
+            .map(|(&param, (&lower, &step))| {
+                ((param - lower) / step).round() as i64
+            })
+            .collect()
+    }
+
+    /// Parameters at a grid point, within the bounds.
+    pub fn snap(&self, key: &[i64]) -> Array1<f64> {
+        key.iter()
+            .zip(self.lower_bounds.iter())
+            .zip(self.upper_bounds.iter().zip(self.steps.iter()))
+            .map(|((&index, &lower), (&upper, &step))| {
+                (lower + index as f64 * step).clamp(lower, upper)
+            })
+            .collect()
+    }
+
+    /// Shared simulation of a key, copied by the caller outside the lock.
+    pub fn get(&self, key: &[i64]) -> Option<Arc<Array1<f64>>> {
+        let mut entries = self.lock();
+        match entries.index.get(key).copied() {
+            Some(i) => {
+                entries.touch(i);
+                self.hits.fetch_add(1, Ordering::Relaxed);
+                Some(Arc::clone(&entries.nodes[i].simulation))
+            }
+            None => {
+                self.misses.fetch_add(1, Ordering::Relaxed);
+                None
+            }
+        }
+    }
+
+    /// Keeps a simulation, evicting the least recently used ones beyond the
+    /// capacity. Simulations larger than the capacity aren't kept.
+    pub fn insert(&self, key: Vec<i64>, simulation: Arc<Array1<f64>>) {
+        let bytes = entry_bytes(&key, &simulation);
+        if bytes > self.capacity {
+            return;
+        }
+        let mut entries = self.lock();
+        if let Some(&i) = entries.index.get(&key) {
+            // another thread simulated the same grid point
+            entries.touch(i);
+            return;
+        }
+        while entries.bytes + bytes > self.capacity {
+            let tail = entries.tail;
+            entries.remove(tail);
+        }
+        entries.insert(key, simulation, bytes);
+    }
+
+    /// Removes the simulations, keeping the hit and miss counts.
+    pub fn clear(&self) {
+        *self.lock() = CacheEntries::new();
+    }
+
+    pub fn info(&self) -> CacheInfo {
+        let entries = self.lock();
+        CacheInfo {
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            entries: entries.nodes.len(),
+            size: entries.bytes,
+            capacity: self.capacity,
+        }
+    }
+
+    fn lock(&self) -> std::sync::MutexGuard<'_, CacheEntries> {
+        // the entries stay consistent even if a thread panicked with the lock
+        self.entries.lock().unwrap_or_else(|e| e.into_inner())
+    }
+}
+
+/// Wraps a simulation function with an evaluation cache (see
+/// `EvaluationCache`).
+pub fn cache_simulate(
+    simulate: Simulate,
+    cache: Arc<EvaluationCache>,
+) -> Simulate {
+    Box::new(
+        move |params,
+              precipitation,
+              temperature,
+              pet,
+              day_of_year,
+              elevation_bands,
+              median_elevation,
+              out| {
+            hydro::utils::validate_output_buffer(out, precipitation.len())?;
+            let key = cache.key(params);
+            if let Some(simulation) = cache.get(&key) {
+                ArrayViewMut1::from(out).assign(&*simulation);
+                return Ok(());
+            }
+            simulate(
+                cache.snap(&key).view(),
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_bands,
+                median_elevation,
+                &mut *out,
+            )?;
+            cache.insert(key, Arc::new(Array1::from(out.to_vec())));
+            Ok(())
+        },
+    )
+}
+
+fn has_converged(
+    state: ArrayView1<f64>,
+    new_state: ArrayView1<f64>,
+    tolerance: f64,
+) -> bool {
+    state.len() == new_state.len()
+        && state
+            .iter()
+            .zip(new_state.iter())
+            .all(|(&a, &b)| (b - a).abs() <= tolerance * a.abs().max(1.0))
+}
@@ -1,9 +1,12 @@
 use crate::hydro::utils::{
-    check_lengths, validate_inputs_finite, validate_non_negative,
-    validate_output, validate_parameter, HydroError,
+    self, validate_forcings, validate_output, validate_output_buffer,
+    validate_parameter, validate_state, HydroError, HydrographBuffer,
+    HydrographWeights, MAX_HYDROGRAPH_LENGTH,
+};
+use ndarray::{array, Array1, Array2, ArrayView1, ArrayView2, Axis};
+use numpy::{
+    PyArray1, PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray,
 };
-use ndarray::{array, Array1, Array2, ArrayView1, Axis, Zip};
-use numpy::{PyArray1, PyArray2, PyReadonlyArray1, ToPyArray};
 use pyo3::prelude::*;
 
 pub const param_names: &[&str] = &["x1", "x2", "x3", "x4", "x5", "x6"];
@@ -45,6 +48,75 @@ pub fn simulate(
     precipitation: ArrayView1<f64>,
     pet: ArrayView1<f64>,
 ) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate`, but starting from `state` if given (see
+/// `initial_state`), and also returning the state after the last time step
+/// so that a later simulation can continue from it.
+pub fn simulate_with_state(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: Option<ArrayView1<f64>>,
+) -> Result<(Array1<f64>, Array1<f64>), HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    let mut state = match state {
+        Some(state) => State::from_array(params, state)?,
+        None => State::new(params),
+    };
+    let streamflow = run_to_array(params, precipitation, pet, &mut state)?;
+    Ok((streamflow, state.to_array()))
+}
+
+/// State at the start of a simulation: the soil, slow routing and fast
+/// routing reservoirs, followed by the content of the routing delay
+/// (ceil(x4) values).
+pub fn initial_state(
+    params: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    Ok(State::new(validate_params(params)?).to_array())
+}
+
+/// Same as `simulate`, but assumes the forcings were already checked with
+/// `validate_forcings`. Only the parameters and the output are validated.
+pub fn simulate_unchecked(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate_unchecked`, but writing the streamflow into `out`,
+/// which must have the length of the forcings. Nothing is allocated, so it
+/// can be called repeatedly with the same buffer.
+pub fn simulate_unchecked_into(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    out: &mut [f64],
+) -> Result<(), HydroError> {
+    let params = validate_params(params)?;
+    validate_output_buffer(out, precipitation.len())?;
+    run(params, precipitation, pet, &mut State::new(params), out)
+}
+
+pub fn simulate_batch(
+    params: ArrayView2<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array2<f64>, HydroError> {
+    utils::simulate_batch(params, precipitation, pet, 6, |params, out| {
+        simulate_unchecked_into(params, precipitation, pet, out)
+    })
+}
+
+fn validate_params(params: ArrayView1<f64>) -> Result<[f64; 6], HydroError> {
     let [x1, x2, x3, x4, x5, x6]: [f64; 6] = params
         .as_slice()
         .and_then(|s| s.try_into().ok())
@@ -54,53 +126,94 @@ pub fn simulate(
         let (name, lower, upper) = BOUNDS[i];
         validate_parameter(param_value, name, lower, upper)?;
     }
+    Ok([x1, x2, x3, x4, x5, x6])
+}
+
+struct State {
+    s: f64,
+    r: f64,
+    t: f64,
+    hy: HydrographBuffer,
+}
+
+impl State {
+    fn new(params: [f64; 6]) -> Self {
+        let x1 = params[0];
+        let x4 = params[3];
+        // initialization of the reservoir state
+        State {
+            s: x1 * 0.5,
+            r: 10.0,
+            t: 5.0,
+            hy: HydrographBuffer::zeros(x4.ceil() as usize),
+        }
+    }
 
-    check_lengths(precipitation, pet)?;
-    validate_inputs_finite(precipitation, "precipitation")?;
-    validate_inputs_finite(pet, "pet")?;
-    validate_non_negative(precipitation, "precipitation")?;
-    validate_non_negative(pet, "pet")?;
+    fn from_array(
+        params: [f64; 6],
+        state: ArrayView1<f64>,
+    ) -> Result<Self, HydroError> {
+        let n = params[3].ceil() as usize;
+        validate_state(state, 3 + n)?;
+        let state = state.to_vec();
+        Ok(State {
+            s: state[0],
+            r: state[1],
+            t: state[2],
+            hy: HydrographBuffer::from_slice(&state[3..]),
+        })
+    }
 
+    fn to_array(&self) -> Array1<f64> {
+        [self.s, self.r, self.t]
+            .into_iter()
+            .chain(self.hy.iter())
+            .collect()
+    }
+}
+
+fn run_to_array(
+    params: [f64; 6],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+) -> Result<Array1<f64>, HydroError> {
     let mut streamflow: Vec<f64> = vec![0.0; precipitation.len()];
+    run(params, precipitation, pet, state, &mut streamflow)?;
+    Ok(Array1::from_vec(streamflow))
+}
 
-    let (mut s, mut r, mut t, mut dl, mut hy) = initialize_state(x1, x4);
+fn run(
+    params: [f64; 6],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+    streamflow: &mut [f64],
+) -> Result<(), HydroError> {
+    let [x1, x2, x3, x4, x5, x6] = params;
 
-    Zip::indexed(&precipitation)
-        .and(&pet)
-        .for_each(|i, &precip_t, &pet_t| {
-            streamflow[i] = run_step(
-                precip_t, pet_t, x1, x2, x3, x5, x6, &mut s, &mut r, &mut t,
-                &mut dl, &mut hy,
+    let State { s, r, t, hy } = state;
+    let dl = delay_weights(x4);
+
+    precipitation
+        .iter()
+        .zip(pet.iter())
+        .zip(streamflow.iter_mut())
+        .for_each(|((&precip_t, &pet_t), streamflow_t)| {
+            *streamflow_t = run_step(
+                precip_t, pet_t, x1, x2, x3, x5, x6, s, r, t, &dl, hy,
             );
         });
 
-    let result = Array1::from_vec(streamflow);
-
-    validate_output(result.view(), "Bucket simulation")?;
-
-    Ok(result)
+    validate_output(ArrayView1::from(&*streamflow), "Bucket simulation")
 }
 
-fn initialize_state(
-    x1: f64,
-    x4: f64,
-) -> (f64, f64, f64, Array1<f64>, Array1<f64>) {
-    // initialization of the reservoir state
-    let s = x1 * 0.5;
-    let r = 10.0;
-    let t = 5.0;
-
-    // array of ints from 0 to the routing delay
+fn delay_weights(x4: f64) -> HydrographWeights {
     let n = x4.ceil() as usize;
-    let k = Array1::from_iter(0..n);
-
-    let mut dl = Array1::zeros(x4.ceil() as usize);
-    dl[n - 2] = 1.0 / (x4 - k[n - 1] as f64 + 1.0);
+    let mut dl = [0.0; MAX_HYDROGRAPH_LENGTH];
+    dl[n - 2] = 1.0 / (x4 - (n - 1) as f64 + 1.0);
     dl[n - 1] = 1.0 - dl[n - 2];
-
-    let hy = Array1::zeros(x4.ceil() as usize);
-
-    (s, r, t, dl, hy)
+    dl
 }
 
 #[allow(clippy::too_many_arguments)]
@@ -115,8 +228,8 @@ fn run_step(
     s: &mut f64,
     r: &mut f64,
     t: &mut f64,
-    dl: &mut Array1<f64>,
-    hy: &mut Array1<f64>,
+    dl: &HydrographWeights,
+    hy: &mut HydrographBuffer,
 ) -> f64 {
     // slow flow precipitation
     let p_s = (1.0 - x5) * p;
@@ -145,13 +258,7 @@ fn run_step(
     *t -= q_t;
 
     // total flow calculation
-    let n = hy.len();
-    for i in 0..n - 1 {
-        hy[i] = hy[i + 1] + dl[i] * (q_t + q_r);
-    }
-    hy[n - 1] = dl[n - 1] * (q_t + q_r);
-
-    hy[0].max(0.0) // simulated streamflow
+    hy.push(q_t + q_r, dl).max(0.0) // simulated streamflow
 }
 
 #[cfg_attr(coverage_nightly, coverage(off))]
@@ -178,6 +285,55 @@ pub fn py_simulate<'py>(
     Ok(simulation.to_pyarray(py))
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(
+    name = "simulate_with_state",
+    signature = (params, precipitation, pet, state=None)
+)]
+pub fn py_simulate_with_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+    state: Option<PyReadonlyArray1<f64>>,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, Bound<'py, PyArray1<f64>>)> {
+    let (simulation, state) = simulate_with_state(
+        params.as_array(),
+        precipitation.as_array(),
+        pet.as_array(),
+        state.as_ref().map(|state| state.as_array()),
+    )?;
+    Ok((simulation.to_pyarray(py), state.to_pyarray(py)))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "initial_state")]
+pub fn py_initial_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    Ok(initial_state(params.as_array())?.to_pyarray(py))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "simulate_batch")]
+pub fn py_simulate_batch<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray2<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let params = params.as_array();
+    let precipitation = precipitation.as_array();
+    let pet = pet.as_array();
+    let simulations =
+        py.detach(|| simulate_batch(params, precipitation, pet))?;
+    Ok(simulations.to_pyarray(py))
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "bucket")?;
@@ -185,5 +341,8 @@ pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     m.add("param_descriptions", param_descriptions)?;
     m.add_function(wrap_pyfunction!(py_init, &m)?)?;
     m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_batch, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_with_state, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_initial_state, &m)?)?;
     Ok(m)
 }
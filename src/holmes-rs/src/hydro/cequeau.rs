@@ -1,9 +1,12 @@
 use crate::hydro::utils::{
-    check_lengths, validate_inputs_finite, validate_non_negative,
-    validate_output, validate_parameter, HydroError,
+    self, validate_forcings, validate_output, validate_output_buffer,
+    validate_parameter, validate_state, HydroError, HydrographBuffer,
+    HydrographWeights, MAX_HYDROGRAPH_LENGTH,
+};
+use ndarray::{array, Array1, Array2, ArrayView1, ArrayView2, Axis};
+use numpy::{
+    PyArray1, PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray,
 };
-use ndarray::{array, Array1, Array2, ArrayView1, Axis, Zip};
-use numpy::{PyArray1, PyArray2, PyReadonlyArray1, ToPyArray};
 use pyo3::prelude::*;
 
 pub const param_names: &[&str] =
@@ -54,6 +57,74 @@ pub fn simulate(
     precipitation: ArrayView1<f64>,
     pet: ArrayView1<f64>,
 ) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate`, but starting from `state` if given (see
+/// `initial_state`), and also returning the state after the last time step
+/// so that a later simulation can continue from it.
+pub fn simulate_with_state(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: Option<ArrayView1<f64>>,
+) -> Result<(Array1<f64>, Array1<f64>), HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    let mut state = match state {
+        Some(state) => State::from_array(params, state)?,
+        None => State::new(params),
+    };
+    let streamflow = run_to_array(params, precipitation, pet, &mut state)?;
+    Ok((streamflow, state.to_array()))
+}
+
+/// State at the start of a simulation: the surface and groundwater stores,
+/// followed by the content of the routing delay (ceil(x6) + 1 values).
+pub fn initial_state(
+    params: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    Ok(State::new(validate_params(params)?).to_array())
+}
+
+/// Same as `simulate`, but assumes the forcings were already checked with
+/// `validate_forcings`. Only the parameters and the output are validated.
+pub fn simulate_unchecked(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate_unchecked`, but writing the streamflow into `out`,
+/// which must have the length of the forcings. Nothing is allocated, so it
+/// can be called repeatedly with the same buffer.
+pub fn simulate_unchecked_into(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    out: &mut [f64],
+) -> Result<(), HydroError> {
+    let params = validate_params(params)?;
+    validate_output_buffer(out, precipitation.len())?;
+    run(params, precipitation, pet, &mut State::new(params), out)
+}
+
+pub fn simulate_batch(
+    params: ArrayView2<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array2<f64>, HydroError> {
+    utils::simulate_batch(params, precipitation, pet, 9, |params, out| {
+        simulate_unchecked_into(params, precipitation, pet, out)
+    })
+}
+
+fn validate_params(params: ArrayView1<f64>) -> Result<[f64; 9], HydroError> {
     let [x1, x2, x3, x4, x5, x6, x7, x8, x9]: [f64; 9] = params
         .as_slice()
         .and_then(|s| s.try_into().ok())
@@ -65,25 +136,83 @@ pub fn simulate(
         let (name, lower, upper) = BOUNDS[i];
         validate_parameter(param_value, name, lower, upper)?;
     }
+    Ok([x1, x2, x3, x4, x5, x6, x7, x8, x9])
+}
+
+struct State {
+    surface_store: f64,
+    groundwater_store: f64,
+    hy: HydrographBuffer,
+}
+
+impl State {
+    fn new(params: [f64; 9]) -> Self {
+        let x5 = params[4];
+        let x6 = params[5];
+        State {
+            surface_store: 500.0,
+            groundwater_store: x5 * 0.2,
+            hy: HydrographBuffer::zeros(delay_length(x6)),
+        }
+    }
 
-    check_lengths(precipitation, pet)?;
-    validate_inputs_finite(precipitation, "precipitation")?;
-    validate_inputs_finite(pet, "pet")?;
-    validate_non_negative(precipitation, "precipitation")?;
-    validate_non_negative(pet, "pet")?;
+    fn from_array(
+        params: [f64; 9],
+        state: ArrayView1<f64>,
+    ) -> Result<Self, HydroError> {
+        validate_state(state, 2 + delay_length(params[5]))?;
+        let state = state.to_vec();
+        Ok(State {
+            surface_store: state[0],
+            groundwater_store: state[1],
+            hy: HydrographBuffer::from_slice(&state[2..]),
+        })
+    }
+
+    fn to_array(&self) -> Array1<f64> {
+        [self.surface_store, self.groundwater_store]
+            .into_iter()
+            .chain(self.hy.iter())
+            .collect()
+    }
+}
 
+fn run_to_array(
+    params: [f64; 9],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+) -> Result<Array1<f64>, HydroError> {
     let mut streamflow: Vec<f64> = vec![0.0; precipitation.len()];
+    run(params, precipitation, pet, state, &mut streamflow)?;
+    Ok(Array1::from_vec(streamflow))
+}
 
-    let (mut surface_store, mut groundwater_store, dl, mut hy) =
-        init_state(x5, x6);
+fn run(
+    params: [f64; 9],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+    streamflow: &mut [f64],
+) -> Result<(), HydroError> {
+    let [x1, x2, x3, x4, x5, x6, x7, x8, x9] = params;
+
+    let State {
+        surface_store,
+        groundwater_store,
+        hy,
+    } = state;
+    let dl = delay_weights(x6);
 
-    Zip::indexed(&precipitation)
-        .and(&pet)
-        .for_each(|t, &precip_t, &pet_t| {
-            streamflow[t] = run_step(
-                &mut surface_store,
-                &mut groundwater_store,
-                &mut hy,
+    precipitation
+        .iter()
+        .zip(pet.iter())
+        .zip(streamflow.iter_mut())
+        .for_each(|((&precip_t, &pet_t), streamflow_t)| {
+            *streamflow_t = run_step(
+                surface_store,
+                groundwater_store,
+                hy,
                 &dl,
                 precip_t,
                 pet_t,
@@ -98,33 +227,27 @@ pub fn simulate(
             );
         });
 
-    let result = Array1::from_vec(streamflow);
-
-    validate_output(result.view(), "CEQUEAU simulation")?;
-
-    Ok(result)
+    validate_output(ArrayView1::from(&*streamflow), "CEQUEAU simulation")
 }
 
-fn init_state(x5: f64, x6: f64) -> (f64, f64, Array1<f64>, Array1<f64>) {
-    let surface_store = 500.0;
-    let groundwater_store = x5 * 0.2;
+fn delay_length(x6: f64) -> usize {
+    x6.ceil() as usize + 1
+}
 
-    let size = x6.ceil() as usize + 1;
-    let mut dl = Array1::zeros(size);
+fn delay_weights(x6: f64) -> HydrographWeights {
+    let size = delay_length(x6);
+    let mut dl = [0.0; MAX_HYDROGRAPH_LENGTH];
     dl[size - 2] = 1.0 / (x6 - size as f64 + 3.0);
     dl[size - 1] = 1.0 - dl[size - 2];
-
-    let hy = Array1::zeros(size);
-
-    (surface_store, groundwater_store, dl, hy)
+    dl
 }
 
 #[allow(clippy::too_many_arguments)]
 fn run_step(
     surface_store: &mut f64,
     groundwater_store: &mut f64,
-    hy: &mut Array1<f64>,
-    dl: &Array1<f64>,
+    hy: &mut HydrographBuffer,
+    dl: &HydrographWeights,
     precipitation: f64,
     pet: f64,
     x1: f64,
@@ -172,13 +295,7 @@ fn run_step(
         + surface_streamflow_3
         + groundwater_streamflow_1
         + groundwater_streamflow_2;
-    let n = hy.len();
-    for i in 0..n - 1 {
-        hy[i] = hy[i + 1] + dl[i] * total_streamflow;
-    }
-    hy[n - 1] = dl[n - 1] * total_streamflow;
-
-    hy[0].max(0.0) // simulated streamflow
+    hy.push(total_streamflow, dl).max(0.0) // simulated streamflow
 }
 
 #[cfg_attr(coverage_nightly, coverage(off))]
@@ -205,6 +322,55 @@ pub fn py_simulate<'py>(
     Ok(simulation.to_pyarray(py))
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(
+    name = "simulate_with_state",
+    signature = (params, precipitation, pet, state=None)
+)]
+pub fn py_simulate_with_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+    state: Option<PyReadonlyArray1<f64>>,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, Bound<'py, PyArray1<f64>>)> {
+    let (simulation, state) = simulate_with_state(
+        params.as_array(),
+        precipitation.as_array(),
+        pet.as_array(),
+        state.as_ref().map(|state| state.as_array()),
+    )?;
+    Ok((simulation.to_pyarray(py), state.to_pyarray(py)))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "initial_state")]
+pub fn py_initial_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    Ok(initial_state(params.as_array())?.to_pyarray(py))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "simulate_batch")]
+pub fn py_simulate_batch<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray2<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let params = params.as_array();
+    let precipitation = precipitation.as_array();
+    let pet = pet.as_array();
+    let simulations =
+        py.detach(|| simulate_batch(params, precipitation, pet))?;
+    Ok(simulations.to_pyarray(py))
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "cequeau")?;
@@ -212,5 +378,8 @@ pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     m.add("param_descriptions", param_descriptions)?;
     m.add_function(wrap_pyfunction!(py_init, &m)?)?;
     m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_batch, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_with_state, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_initial_state, &m)?)?;
     Ok(m)
 }
@@ -1,9 +1,12 @@
 use crate::hydro::utils::{
-    check_lengths, validate_inputs_finite, validate_non_negative,
-    validate_output, validate_parameter, HydroError,
+    self, validate_forcings, validate_output, validate_output_buffer,
+    validate_parameter, validate_state, HydroError, HydrographBuffer,
+    HydrographWeights, MAX_HYDROGRAPH_LENGTH,
+};
+use ndarray::{array, Array1, Array2, ArrayView1, ArrayView2, Axis};
+use numpy::{
+    PyArray1, PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray,
 };
-use ndarray::{array, Array1, Array2, ArrayView1, Axis, Zip};
-use numpy::{PyArray1, PyArray2, PyReadonlyArray1, ToPyArray};
 use pyo3::prelude::*;
 
 pub const param_names: &[&str] = &["x1", "x2", "x3", "x4"];
@@ -39,6 +42,75 @@ pub fn simulate(
     precipitation: ArrayView1<f64>,
     pet: ArrayView1<f64>,
 ) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate`, but starting from `state` if given (see
+/// `initial_state`), and also returning the state after the last time step
+/// so that a later simulation can continue from it.
+pub fn simulate_with_state(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: Option<ArrayView1<f64>>,
+) -> Result<(Array1<f64>, Array1<f64>), HydroError> {
+    let params = validate_params(params)?;
+    validate_forcings(precipitation, pet)?;
+    let mut state = match state {
+        Some(state) => State::from_array(params, state)?,
+        None => State::new(params),
+    };
+    let streamflow = run_to_array(params, precipitation, pet, &mut state)?;
+    Ok((streamflow, state.to_array()))
+}
+
+/// State at the start of a simulation: the production and routing stores,
+/// followed by the content of both unit hydrographs (ceil(x4) and
+/// ceil(2 * x4) values).
+pub fn initial_state(
+    params: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    Ok(State::new(validate_params(params)?).to_array())
+}
+
+/// Same as `simulate`, but assumes the forcings were already checked with
+/// `validate_forcings`. Only the parameters and the output are validated.
+pub fn simulate_unchecked(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array1<f64>, HydroError> {
+    let params = validate_params(params)?;
+    run_to_array(params, precipitation, pet, &mut State::new(params))
+}
+
+/// Same as `simulate_unchecked`, but writing the streamflow into `out`,
+/// which must have the length of the forcings. Nothing is allocated, so it
+/// can be called repeatedly with the same buffer.
+pub fn simulate_unchecked_into(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    out: &mut [f64],
+) -> Result<(), HydroError> {
+    let params = validate_params(params)?;
+    validate_output_buffer(out, precipitation.len())?;
+    run(params, precipitation, pet, &mut State::new(params), out)
+}
+
+pub fn simulate_batch(
+    params: ArrayView2<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<Array2<f64>, HydroError> {
+    utils::simulate_batch(params, precipitation, pet, 4, |params, out| {
+        simulate_unchecked_into(params, precipitation, pet, out)
+    })
+}
+
+fn validate_params(params: ArrayView1<f64>) -> Result<[f64; 4], HydroError> {
     let [x1, x2, x3, x4]: [f64; 4] = params
         .as_slice()
         .and_then(|s| s.try_into().ok())
@@ -48,56 +120,117 @@ pub fn simulate(
         let (name, lower, upper) = BOUNDS[i];
         validate_parameter(param_value, name, lower, upper)?;
     }
+    Ok([x1, x2, x3, x4])
+}
+
+struct State {
+    production_store: f64,
+    routing_store: f64,
+    hydrographs: (HydrographBuffer, HydrographBuffer),
+}
+
+impl State {
+    fn new(params: [f64; 4]) -> Self {
+        let [x1, _, x3, x4] = params;
+        let (n1, n2) = hydrograph_lengths(x4);
+        State {
+            production_store: x1 / 2.,
+            routing_store: x3 / 2.,
+            hydrographs: (
+                HydrographBuffer::zeros(n1),
+                HydrographBuffer::zeros(n2),
+            ),
+        }
+    }
+
+    fn from_array(
+        params: [f64; 4],
+        state: ArrayView1<f64>,
+    ) -> Result<Self, HydroError> {
+        let (n1, n2) = hydrograph_lengths(params[3]);
+        validate_state(state, 2 + n1 + n2)?;
+        let state = state.to_vec();
+        Ok(State {
+            production_store: state[0],
+            routing_store: state[1],
+            hydrographs: (
+                HydrographBuffer::from_slice(&state[2..2 + n1]),
+                HydrographBuffer::from_slice(&state[2 + n1..]),
+            ),
+        })
+    }
 
-    check_lengths(precipitation, pet)?;
-    validate_inputs_finite(precipitation, "precipitation")?;
-    validate_inputs_finite(pet, "pet")?;
-    validate_non_negative(precipitation, "precipitation")?;
-    validate_non_negative(pet, "pet")?;
+    fn to_array(&self) -> Array1<f64> {
+        [self.production_store, self.routing_store]
+            .into_iter()
+            .chain(self.hydrographs.0.iter())
+            .chain(self.hydrographs.1.iter())
+            .collect()
+    }
+}
 
+fn run_to_array(
+    params: [f64; 4],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+) -> Result<Array1<f64>, HydroError> {
     let mut streamflow: Vec<f64> = vec![0.0; precipitation.len()];
+    run(params, precipitation, pet, state, &mut streamflow)?;
+    Ok(Array1::from_vec(streamflow))
+}
 
-    let mut production_store = x1 / 2.;
-    let mut routing_store = x3 / 2.;
+fn run(
+    params: [f64; 4],
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    state: &mut State,
+    streamflow: &mut [f64],
+) -> Result<(), HydroError> {
+    let [x1, x2, x3, x4] = params;
+
+    let State {
+        production_store,
+        routing_store,
+        hydrographs,
+    } = state;
     let mut routing_precipitation: f64 = 0.0;
     let mut streamflow_: f64 = 0.0;
 
     let unit_hydrographs = create_unit_hydrographs(x4);
-    let mut hydrographs = (
-        vec![0.0; unit_hydrographs.0.len()],
-        vec![0.0; unit_hydrographs.1.len()],
-    );
-
-    Zip::indexed(&precipitation)
-        .and(&pet)
-        .for_each(|t, &precip_t, &pet_t| {
+
+    precipitation
+        .iter()
+        .zip(pet.iter())
+        .zip(streamflow.iter_mut())
+        .for_each(|((&precip_t, &pet_t), streamflow_t)| {
             update_production(
-                &mut production_store,
+                production_store,
                 &mut routing_precipitation,
                 precip_t,
                 pet_t,
                 x1,
             );
             update_routing(
-                &mut routing_store,
-                &mut hydrographs,
+                routing_store,
+                hydrographs,
                 &mut streamflow_,
                 &unit_hydrographs,
                 routing_precipitation,
                 x2,
                 x3,
             );
-            streamflow[t] = streamflow_;
+            *streamflow_t = streamflow_;
         });
 
-    let result = Array1::from_vec(streamflow);
-
-    validate_output(result.view(), "GR4J simulation")?;
+    validate_output(ArrayView1::from(&*streamflow), "GR4J simulation")
+}
 
-    Ok(result)
+fn hydrograph_lengths(x4: f64) -> (usize, usize) {
+    (x4.ceil() as usize, (2. * x4).ceil() as usize)
 }
 
-fn create_unit_hydrographs(x4: f64) -> (Vec<f64>, Vec<f64>) {
+fn create_unit_hydrographs(x4: f64) -> (HydrographWeights, HydrographWeights) {
     let s1 = |i: f64| -> f64 {
         if i == 0. {
             0.
@@ -120,12 +253,17 @@ fn create_unit_hydrographs(x4: f64) -> (Vec<f64>, Vec<f64>) {
         }
     };
 
-    let unit_hydrograph_1 = (1..=x4.ceil() as usize)
-        .map(|i| s1(i as f64) - s1(i as f64 - 1.))
-        .collect();
-    let unit_hydrograph_2 = (1..=(2. * x4).ceil() as usize)
-        .map(|i| s2(i as f64) - s2(i as f64 - 1.))
-        .collect();
+    let (n1, n2) = hydrograph_lengths(x4);
+    let mut unit_hydrograph_1 = [0.0; MAX_HYDROGRAPH_LENGTH];
+    for (i, weight) in unit_hydrograph_1[..n1].iter_mut().enumerate() {
+        let i = (i + 1) as f64;
+        *weight = s1(i) - s1(i - 1.);
+    }
+    let mut unit_hydrograph_2 = [0.0; MAX_HYDROGRAPH_LENGTH];
+    for (i, weight) in unit_hydrograph_2[..n2].iter_mut().enumerate() {
+        let i = (i + 1) as f64;
+        *weight = s2(i) - s2(i - 1.);
+    }
 
     (unit_hydrograph_1, unit_hydrograph_2)
 }
@@ -171,17 +309,19 @@ fn update_production(
 
 fn update_routing(
     store: &mut f64,
-    hydrographs: &mut (Vec<f64>, Vec<f64>),
+    hydrographs: &mut (HydrographBuffer, HydrographBuffer),
     total_flow: &mut f64,
-    unit_hydrographs: &(Vec<f64>, Vec<f64>),
+    unit_hydrographs: &(HydrographWeights, HydrographWeights),
     routing_precipitation: f64,
     x2: f64,
     x3: f64,
 ) {
-    update_hydrographs(routing_precipitation, hydrographs, unit_hydrographs);
-
-    let q9 = hydrographs.0[0];
-    let q1 = hydrographs.1[0];
+    let q9 = hydrographs
+        .0
+        .push(0.9 * routing_precipitation, &unit_hydrographs.0);
+    let q1 = hydrographs
+        .1
+        .push(0.1 * routing_precipitation, &unit_hydrographs.1);
 
     let groundwater_exchange = x2 * (*store / x3).powf(3.5);
 
@@ -195,28 +335,6 @@ fn update_routing(
     *total_flow = routed_flow + direct_flow;
 }
 
-fn update_hydrographs(
-    routing_precipitation: f64,
-    hydrographs: &mut (Vec<f64>, Vec<f64>),
-    unit_hydrographs: &(Vec<f64>, Vec<f64>),
-) {
-    let n1 = hydrographs.0.len();
-    for i in 0..n1 - 1 {
-        hydrographs.0[i] = hydrographs.0[i + 1]
-            + 0.9 * routing_precipitation * unit_hydrographs.0[i];
-    }
-    hydrographs.0[n1 - 1] =
-        0.9 * routing_precipitation * unit_hydrographs.0[n1 - 1];
-
-    let n2 = hydrographs.1.len();
-    for i in 0..n2 - 1 {
-        hydrographs.1[i] = hydrographs.1[i + 1]
-            + 0.1 * routing_precipitation * unit_hydrographs.1[i];
-    }
-    hydrographs.1[n2 - 1] =
-        0.1 * routing_precipitation * unit_hydrographs.1[n2 - 1];
-}
-
 #[cfg_attr(coverage_nightly, coverage(off))]
 #[pyfunction]
 #[pyo3(name = "init")]
@@ -241,6 +359,55 @@ pub fn py_simulate<'py>(
     Ok(simulation.to_pyarray(py))
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(
+    name = "simulate_with_state",
+    signature = (params, precipitation, pet, state=None)
+)]
+pub fn py_simulate_with_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+    state: Option<PyReadonlyArray1<f64>>,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, Bound<'py, PyArray1<f64>>)> {
+    let (simulation, state) = simulate_with_state(
+        params.as_array(),
+        precipitation.as_array(),
+        pet.as_array(),
+        state.as_ref().map(|state| state.as_array()),
+    )?;
+    Ok((simulation.to_pyarray(py), state.to_pyarray(py)))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "initial_state")]
+pub fn py_initial_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    Ok(initial_state(params.as_array())?.to_pyarray(py))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "simulate_batch")]
+pub fn py_simulate_batch<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray2<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    pet: PyReadonlyArray1<f64>,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let params = params.as_array();
+    let precipitation = precipitation.as_array();
+    let pet = pet.as_array();
+    let simulations =
+        py.detach(|| simulate_batch(params, precipitation, pet))?;
+    Ok(simulations.to_pyarray(py))
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "gr4j")?;
@@ -248,5 +415,8 @@ pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     m.add("param_descriptions", param_descriptions)?;
     m.add_function(wrap_pyfunction!(py_init, &m)?)?;
     m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_batch, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_with_state, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_initial_state, &m)?)?;
     Ok(m)
 }
@@ -5,7 +5,10 @@ pub mod gr4j;
 pub mod utils;
 use crate::utils::register_submodule;
 
-pub use utils::{HydroError, HydroInit, HydroSimulate};
+pub use utils::{
+    HydroError, HydroInit, HydroInitialState, HydroSimulate,
+    HydroSimulateInto, HydroSimulateWithState,
+};
 
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
@@ -26,3 +29,42 @@ pub fn get_model(
         _ => Err(HydroError::WrongModel(model.to_string())),
     }
 }
+
+/// Simulation function skipping the forcing validation, for callers that
+/// validated them once with `utils::validate_forcings`.
+pub fn get_unchecked_model(model: &str) -> Result<HydroSimulate, HydroError> {
+    match model {
+        "gr4j" => Ok(gr4j::simulate_unchecked),
+        "bucket" => Ok(bucket::simulate_unchecked),
+        "cequeau" => Ok(cequeau::simulate_unchecked),
+        _ => Err(HydroError::WrongModel(model.to_string())),
+    }
+}
+
+/// Same as `get_unchecked_model`, but the simulation function writes into a
+/// caller-provided buffer, which can be reused between runs.
+pub fn get_unchecked_into_model(
+    model: &str,
+) -> Result<HydroSimulateInto, HydroError> {
+    match model {
+        "gr4j" => Ok(gr4j::simulate_unchecked_into),
+        "bucket" => Ok(bucket::simulate_unchecked_into),
+        "cequeau" => Ok(cequeau::simulate_unchecked_into),
+        _ => Err(HydroError::WrongModel(model.to_string())),
+    }
+}
+
+/// Initial state and simulation function carrying the state between runs,
+/// to continue a simulation from the end of a previous one.
+pub fn get_stateful_model(
+    model: &str,
+) -> Result<(HydroInitialState, HydroSimulateWithState), HydroError> {
+    match model {
+        "gr4j" => Ok((gr4j::initial_state, gr4j::simulate_with_state)),
+        "bucket" => Ok((bucket::initial_state, bucket::simulate_with_state)),
+        "cequeau" => {
+            Ok((cequeau::initial_state, cequeau::simulate_with_state))
+        }
+        _ => Err(HydroError::WrongModel(model.to_string())),
+    }
+}
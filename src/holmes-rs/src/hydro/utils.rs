@@ -1,5 +1,6 @@
-use ndarray::{Array1, Array2, ArrayView1};
+use ndarray::{Array1, Array2, ArrayView1, ArrayView2};
 use pyo3::prelude::*;
+use rayon::prelude::*;
 use thiserror::Error;
 
 use crate::errors::{HolmesNumericalError, HolmesValidationError};
@@ -12,6 +13,101 @@ pub type HydroSimulate = fn(
     ArrayView1<f64>,
 ) -> Result<Array1<f64>, HydroError>;
 
+/// Initial state of a model for the given parameters.
+pub type HydroInitialState =
+    fn(ArrayView1<f64>) -> Result<Array1<f64>, HydroError>;
+
+/// Simulation starting from the given state, or from the initial state if
+/// None, returning the streamflow and the state after the last time step.
+pub type HydroSimulateWithState =
+    fn(
+        ArrayView1<f64>,
+        ArrayView1<f64>,
+        ArrayView1<f64>,
+        Option<ArrayView1<f64>>,
+    ) -> Result<(Array1<f64>, Array1<f64>), HydroError>;
+
+/// Same as `HydroSimulate`, but writing the streamflow into the given
+/// buffer, of the length of the forcings, instead of allocating it.
+pub type HydroSimulateInto = fn(
+    ArrayView1<f64>,
+    ArrayView1<f64>,
+    ArrayView1<f64>,
+    &mut [f64],
+) -> Result<(), HydroError>;
+
+/// Capacity of a `HydrographBuffer`, above the longest unit hydrograph
+/// allowed by the parameter bounds (2 * x4 for GR4J, x6 + 1 for CEQUEAU).
+pub const MAX_HYDROGRAPH_LENGTH: usize = 32;
+
+/// Weights of a unit hydrograph, the first `len` values being used.
+pub type HydrographWeights = [f64; MAX_HYDROGRAPH_LENGTH];
+
+/// Content of a unit hydrograph convolution, stored in a fixed-capacity ring
+/// buffer so that moving to the next time step doesn't shift the values nor
+/// allocate.
+#[derive(Debug, Clone, Copy)]
+pub struct HydrographBuffer {
+    values: [f64; MAX_HYDROGRAPH_LENGTH],
+    len: usize,
+    // position of the first value
+    head: usize,
+}
+
+impl HydrographBuffer {
+    pub fn zeros(len: usize) -> Self {
+        debug_assert!((1..=MAX_HYDROGRAPH_LENGTH).contains(&len));
+        Self {
+            values: [0.0; MAX_HYDROGRAPH_LENGTH],
+            len,
+            head: 0,
+        }
+    }
+
+    pub fn from_slice(values: &[f64]) -> Self {
+        let mut buffer = Self::zeros(values.len());
+        buffer.values[..values.len()].copy_from_slice(values);
+        buffer
+    }
+
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    /// Values from the first to the last.
+    pub fn iter(&self) -> impl Iterator<Item = f64> + '_ {
+        self.values[self.head..self.len]
+            .iter()
+            .chain(&self.values[..self.head])
+            .copied()
+    }
+
+    /// Moves to the next time step: the first value leaves the buffer, the
+    /// others move up by one and `amount * weights[i]` is added to the i-th
+    /// value. Returns the new first value.
+    pub fn push(&mut self, amount: f64, weights: &HydrographWeights) -> f64 {
+        let n = self.len;
+        // the slot of the value leaving becomes the last one
+        self.values[self.head] = 0.0;
+        self.head = if self.head + 1 == n { 0 } else { self.head + 1 };
+
+        let (wrapped, first) = self.values[..n].split_at_mut(self.head);
+        let (first_weights, wrapped_weights) =
+            weights[..n].split_at(n - self.head);
+        for (value, &weight) in first.iter_mut().zip(first_weights) {
+            *value += weight * amount;
+        }
+        for (value, &weight) in wrapped.iter_mut().zip(wrapped_weights) {
+            *value += weight * amount;
+        }
+        self.values[self.head]
+    }
+}
+
 #[derive(Error, Debug)]
 pub enum HydroError {
     #[error(
@@ -22,6 +118,10 @@ pub enum HydroError {
     ParamsMismatch(usize, usize),
     #[error("Unknown hydro model '{0}'")]
     WrongModel(String),
+    #[error("expected a state of length {0}, got {1}")]
+    StateMismatch(usize, usize),
+    #[error("expected an output buffer of length {0}, got {1}")]
+    OutputMismatch(usize, usize),
     #[error(
         "Parameter '{name}' value {value} outside bounds [{lower}, {upper}]"
     )]
@@ -59,6 +159,8 @@ impl From<HydroError> for PyErr {
             HydroError::LengthMismatch(_, _)
             | HydroError::ParamsMismatch(_, _)
             | HydroError::WrongModel(_)
+            | HydroError::StateMismatch(_, _)
+            | HydroError::OutputMismatch(_, _)
             | HydroError::ParameterOutOfBounds { .. }
             | HydroError::NegativeInput { .. }
             | HydroError::NonFiniteInput { .. }
@@ -83,6 +185,53 @@ pub fn check_lengths(
     }
 }
 
+pub fn validate_forcings(
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+) -> Result<(), HydroError> {
+    check_lengths(precipitation, pet)?;
+    validate_inputs_finite(precipitation, "precipitation")?;
+    validate_inputs_finite(pet, "pet")?;
+    validate_non_negative(precipitation, "precipitation")?;
+    validate_non_negative(pet, "pet")?;
+    Ok(())
+}
+
+/// Runs `simulate_set` on every row of `params` in parallel, validating the
+/// forcings only once. `simulate_set` writes the streamflow into its row of
+/// the output; it must validate its own parameters but can assume the
+/// forcings are valid.
+pub fn simulate_batch(
+    params: ArrayView2<f64>,
+    precipitation: ArrayView1<f64>,
+    pet: ArrayView1<f64>,
+    n_params: usize,
+    simulate_set: impl Fn(ArrayView1<f64>, &mut [f64]) -> Result<(), HydroError>
+        + Sync,
+) -> Result<Array2<f64>, HydroError> {
+    if params.ncols() != n_params {
+        return Err(HydroError::ParamsMismatch(n_params, params.ncols()));
+    }
+    validate_forcings(precipitation, pet)?;
+
+    // rows need to be contiguous for the models to read them as slices
+    let params = params.as_standard_layout();
+    let n_timesteps = precipitation.len();
+    let mut streamflow = vec![0.0; params.nrows() * n_timesteps];
+
+    streamflow
+        .par_chunks_mut(n_timesteps)
+        .enumerate()
+        .try_for_each(|(i, out)| simulate_set(params.row(i), out))?;
+
+    Array2::from_shape_vec((params.nrows(), n_timesteps), streamflow).map_err(
+        |e| HydroError::NumericalError {
+            context: "batch simulation",
+            detail: e.to_string(),
+        },
+    )
+}
+
 pub fn validate_inputs_finite(
     arr: ArrayView1<f64>,
     name: &'static str,
@@ -118,6 +267,30 @@ pub fn validate_non_negative(
     Ok(())
 }
 
+/// Checks that a state given to a model has the length expected for its
+/// parameters and only finite values.
+pub fn validate_state(
+    state: ArrayView1<f64>,
+    expected_len: usize,
+) -> Result<(), HydroError> {
+    if state.len() != expected_len {
+        return Err(HydroError::StateMismatch(expected_len, state.len()));
+    }
+    validate_inputs_finite(state, "state")
+}
+
+/// Checks that the buffer a simulation is written into has one value per
+/// time step.
+pub fn validate_output_buffer(
+    out: &[f64],
+    expected_len: usize,
+) -> Result<(), HydroError> {
+    if out.len() != expected_len {
+        return Err(HydroError::OutputMismatch(expected_len, out.len()));
+    }
+    Ok(())
+}
+
 pub fn validate_parameter(
     value: f64,
     name: &'static str,
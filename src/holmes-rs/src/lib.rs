@@ -5,6 +5,7 @@ pub mod errors;
 pub mod hydro;
 pub mod metrics;
 pub mod pet;
+pub mod projection;
 pub mod snow;
 mod utils;
 
@@ -22,6 +23,7 @@ fn holmes_rs(m: &Bound<'_, PyModule>) -> PyResult<()> {
     register_submodule(py, m, &hydro::make_module(py)?, "holmes_rs")?;
     register_submodule(py, m, &metrics::make_module(py)?, "holmes_rs")?;
     register_submodule(py, m, &pet::make_module(py)?, "holmes_rs")?;
+    register_submodule(py, m, &projection::make_module(py)?, "holmes_rs")?;
     register_submodule(py, m, &snow::make_module(py)?, "holmes_rs")?;
 
     m.add("__version__", env!("CARGO_PKG_VERSION"))?;
@@ -1,6 +1,7 @@
-use ndarray::ArrayView1;
+use ndarray::{s, ArrayView1};
 use numpy::PyReadonlyArray1;
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
 use thiserror::Error;
 
 use crate::errors::{HolmesNumericalError, HolmesValidationError};
@@ -87,36 +88,33 @@ fn validate_inputs(
         return Err(MetricsError::EmptyArrays);
     }
 
-    for (i, &val) in observations.iter().enumerate() {
-        if val.is_nan() {
-            return Err(MetricsError::NaNInInput {
-                array_name: "observations",
-                index: i,
-            });
-        }
-        if val.is_infinite() {
-            return Err(MetricsError::InfinityInInput {
-                array_name: "observations",
-                index: i,
-            });
-        }
-    }
+    validate_finite(observations, "observations")?;
+    validate_finite(simulations, "simulations")?;
 
-    for (i, &val) in simulations.iter().enumerate() {
-        if val.is_nan() {
-            return Err(MetricsError::NaNInInput {
-                array_name: "simulations",
-                index: i,
-            });
-        }
-        if val.is_infinite() {
-            return Err(MetricsError::InfinityInInput {
-                array_name: "simulations",
-                index: i,
-            });
-        }
+    Ok(())
+}
+
+fn check_finite(
+    value: f64,
+    array_name: &'static str,
+    index: usize,
+) -> Result<f64, MetricsError> {
+    if value.is_nan() {
+        Err(MetricsError::NaNInInput { array_name, index })
+    } else if value.is_infinite() {
+        Err(MetricsError::InfinityInInput { array_name, index })
+    } else {
+        Ok(value)
     }
+}
 
+fn validate_finite(
+    values: ArrayView1<f64>,
+    array_name: &'static str,
+) -> Result<(), MetricsError> {
+    for (i, &val) in values.iter().enumerate() {
+        check_finite(val, array_name, i)?;
+    }
     Ok(())
 }
 
@@ -229,6 +227,363 @@ pub fn calculate_kge(
     )
 }
 
+/// Summary statistics of a fixed observation series, computed once so that
+/// many simulations can be scored against it in a single pass each.
+#[derive(Debug, Clone)]
+pub struct ObservationStats {
+    pub n: usize,
+    pub mean: f64,
+    /// Population variance, as used by the KGE.
+    pub variance: f64,
+    /// Sum of squared deviations from the mean, the NSE denominator.
+    pub sum_squares: f64,
+}
+
+impl ObservationStats {
+    pub fn new(observations: ArrayView1<f64>) -> Result<Self, MetricsError> {
+        if observations.is_empty() {
+            return Err(MetricsError::EmptyArrays);
+        }
+        validate_finite(observations, "observations")?;
+
+        let n = observations.len();
+        let mean = observations.iter().sum::<f64>() / n as f64;
+        let mean_2 =
+            observations.iter().map(|x| x.powi(2)).sum::<f64>() / n as f64;
+        let sum_squares = observations
+            .iter()
+            .fold(0.0, |acc, &o| acc + (o - mean).powi(2));
+
+        Ok(Self {
+            n,
+            mean,
+            variance: mean_2 - mean.powi(2),
+            sum_squares,
+        })
+    }
+}
+
+/// Computes RMSE, NSE and KGE in a single pass over the simulations, using
+/// precomputed observation statistics. `transform` is applied to each
+/// simulated value on the fly, so no intermediate series is allocated. The
+/// results and errors are the same as `calculate_rmse`, `calculate_nse` and
+/// `calculate_kge` on the (transformed) series.
+pub fn calculate_rmse_nse_kge(
+    observations: ArrayView1<f64>,
+    stats: &ObservationStats,
+    simulations: ArrayView1<f64>,
+    transform: impl Fn(f64) -> f64,
+) -> Result<[f64; 3], MetricsError> {
+    check_lengths(observations, simulations)?;
+
+    let mut squared_errors = 0.0;
+    let mut simulations_sum = 0.0;
+    let mut simulations_sum_2 = 0.0;
+    let mut cross_sum = 0.0;
+    for (i, (&o, &p)) in observations.iter().zip(simulations).enumerate() {
+        let p = check_finite(transform(p), "simulations", i)?;
+        squared_errors += (o - p).powi(2);
+        simulations_sum += p;
+        simulations_sum_2 += p.powi(2);
+        cross_sum += o * p;
+    }
+
+    let n = stats.n as f64;
+
+    let rmse = (squared_errors / n).sqrt();
+    validate_result(rmse, "RMSE calculation", format!("result is {}", rmse))?;
+
+    if stats.sum_squares < TOLERANCE {
+        return Err(MetricsError::ZeroVarianceNSE);
+    }
+    let nse = 1.0 - squared_errors / stats.sum_squares;
+    validate_result(
+        nse,
+        "NSE calculation",
+        format!(
+            "numerator={}, denominator={}, result={}",
+            squared_errors, stats.sum_squares, nse
+        ),
+    )?;
+
+    if stats.variance < TOLERANCE {
+        return Err(MetricsError::ZeroVarianceKGE {
+            component: "observations",
+        });
+    }
+    let observations_std = stats.variance.sqrt();
+
+    let simulations_mean = simulations_sum / n;
+    let sim_var = simulations_sum_2 / n - simulations_mean.powi(2);
+    if sim_var < TOLERANCE {
+        return Err(MetricsError::ZeroVarianceKGE {
+            component: "simulations",
+        });
+    }
+    let simulations_std = sim_var.sqrt();
+
+    let covariance = cross_sum / n - stats.mean * simulations_mean;
+    let r = covariance / (observations_std * simulations_std);
+    let alpha = simulations_std / observations_std;
+
+    if stats.mean.abs() < TOLERANCE {
+        return Err(MetricsError::ZeroMeanKGE);
+    }
+    let beta = simulations_mean / stats.mean;
+
+    let kge = 1.0
+        - ((r - 1.).powi(2) + (alpha - 1.).powi(2) + (beta - 1.).powi(2))
+            .sqrt();
+    validate_result(
+        kge,
+        "KGE calculation",
+        format!("r={}, alpha={}, beta={}, result={}", r, alpha, beta, kge),
+    )?;
+
+    Ok([rmse, nse, kge])
+}
+
+/// RMSE, NSE and KGE of a simulation under one transformation.
+#[derive(Debug, Clone, Copy)]
+pub struct Criteria {
+    pub rmse: f64,
+    pub nse: f64,
+    pub kge: f64,
+}
+
+/// Every criterion reported for a simulation, as computed by
+/// `evaluate_all`.
+#[derive(Debug, Clone, Copy)]
+pub struct Evaluation {
+    pub none: Criteria,
+    pub sqrt: Criteria,
+    pub log: Criteria,
+    /// Ratio of the simulated to the observed mean.
+    pub mean_bias: f64,
+    /// Ratio of the simulated to the observed coefficient of variation.
+    pub deviation_bias: f64,
+    /// Pearson correlation between observations and simulations.
+    pub correlation: f64,
+}
+
+/// Sums from which all the criteria of one transformation can be derived,
+/// accumulated in two passes: the first one gives the means, and the
+/// second one the sums of squares around them, as `calculate_nse` does.
+#[derive(Default)]
+struct Moments {
+    observations_sum: f64,
+    simulations_sum: f64,
+    observations_mean: f64,
+    simulations_mean: f64,
+    observations_squares: f64,
+    simulations_squares: f64,
+    cross_products: f64,
+    squared_errors: f64,
+}
+
+impl Moments {
+    fn push_sums(&mut self, o: f64, p: f64) {
+        self.observations_sum += o;
+        self.simulations_sum += p;
+    }
+
+    fn set_means(&mut self, n: f64) {
+        self.observations_mean = self.observations_sum / n;
+        self.simulations_mean = self.simulations_sum / n;
+    }
+
+    fn push_squares(&mut self, o: f64, p: f64) {
+        let o_deviation = o - self.observations_mean;
+        let p_deviation = p - self.simulations_mean;
+        self.observations_squares += o_deviation * o_deviation;
+        self.simulations_squares += p_deviation * p_deviation;
+        self.cross_products += o_deviation * p_deviation;
+        self.squared_errors += (o - p).powi(2);
+    }
+
+    /// Means and population variances of the observations and simulations,
+    /// and their covariance.
+    fn statistics(&self, n: f64) -> (f64, f64, f64, f64, f64) {
+        (
+            self.observations_mean,
+            self.observations_squares / n,
+            self.simulations_mean,
+            self.simulations_squares / n,
+            self.cross_products / n,
+        )
+    }
+
+    /// RMSE, NSE and KGE, each NaN where it is undefined.
+    fn criteria(&self, n: f64) -> Criteria {
+        Criteria {
+            rmse: self.rmse(n).unwrap_or(f64::NAN),
+            nse: self.nse().unwrap_or(f64::NAN),
+            kge: self.kge(n).unwrap_or(f64::NAN),
+        }
+    }
+
+    fn rmse(&self, n: f64) -> Result<f64, MetricsError> {
+        let rmse = (self.squared_errors / n).sqrt();
+        validate_result(
+            rmse,
+            "RMSE calculation",
+            format!("result is {}", rmse),
+        )
+    }
+
+    fn nse(&self) -> Result<f64, MetricsError> {
+        let denominator = self.observations_squares;
+        if denominator < TOLERANCE {
+            return Err(MetricsError::ZeroVarianceNSE);
+        }
+        let nse = 1.0 - self.squared_errors / denominator;
+        validate_result(
+            nse,
+            "NSE calculation",
+            format!(
+                "numerator={}, denominator={}, result={}",
+                self.squared_errors, denominator, nse
+            ),
+        )
+    }
+
+    fn kge(&self, n: f64) -> Result<f64, MetricsError> {
+        let (
+            observations_mean,
+            obs_var,
+            simulations_mean,
+            sim_var,
+            covariance,
+        ) = self.statistics(n);
+
+        if obs_var < TOLERANCE {
+            return Err(MetricsError::ZeroVarianceKGE {
+                component: "observations",
+            });
+        }
+        let observations_std = obs_var.sqrt();
+        if sim_var < TOLERANCE {
+            return Err(MetricsError::ZeroVarianceKGE {
+                component: "simulations",
+            });
+        }
+        let simulations_std = sim_var.sqrt();
+
+        let r = covariance / (observations_std * simulations_std);
+        let alpha = simulations_std / observations_std;
+        if observations_mean.abs() < TOLERANCE {
+            return Err(MetricsError::ZeroMeanKGE);
+        }
+        let beta = simulations_mean / observations_mean;
+
+        let kge = 1.0
+            - ((r - 1.).powi(2) + (alpha - 1.).powi(2) + (beta - 1.).powi(2))
+                .sqrt();
+        validate_result(
+            kge,
+            "KGE calculation",
+            format!("r={}, alpha={}, beta={}, result={}", r, alpha, beta, kge),
+        )
+    }
+}
+
+/// Computes every reported criterion in two passes over both series,
+/// excluding the first `warmup_steps` values. RMSE, NSE and KGE are
+/// computed on the untransformed, square root and log (clipped at 1e-5)
+/// series, giving the same results as `calculate_rmse`, `calculate_nse`
+/// and `calculate_kge` up to rounding. The biases and the correlation use
+/// the untransformed series. Criteria are NaN (or infinite, for the
+/// biases) where they are undefined, such as the KGE of a constant
+/// simulation or the square root criteria of negative values, so that one
+/// undefined criterion doesn't hide the others. Only invalid inputs are
+/// errors.
+pub fn evaluate_all(
+    observations: ArrayView1<f64>,
+    simulations: ArrayView1<f64>,
+    warmup_steps: usize,
+) -> Result<Evaluation, MetricsError> {
+    check_lengths(observations, simulations)?;
+    if warmup_steps >= observations.len() {
+        return Err(MetricsError::EmptyArrays);
+    }
+    let observations = observations.slice(s![warmup_steps..]);
+    let simulations = simulations.slice(s![warmup_steps..]);
+
+    let clipped_log = |x: f64| x.max(1e-5).ln();
+
+    let mut none = Moments::default();
+    let mut sqrt = Moments::default();
+    let mut log = Moments::default();
+    let mut sqrt_defined = true;
+    for (i, (&o, &p)) in observations.iter().zip(simulations).enumerate() {
+        let o = check_finite(o, "observations", i)?;
+        let p = check_finite(p, "simulations", i)?;
+        none.push_sums(o, p);
+        sqrt.push_sums(o.sqrt(), p.sqrt());
+        log.push_sums(clipped_log(o), clipped_log(p));
+        sqrt_defined &= o >= 0. && p >= 0.;
+    }
+
+    let n = observations.len() as f64;
+    for moments in [&mut none, &mut sqrt, &mut log] {
+        moments.set_means(n);
+    }
+    for (&o, &p) in observations.iter().zip(simulations) {
+        none.push_squares(o, p);
+        sqrt.push_squares(o.sqrt(), p.sqrt());
+        log.push_squares(clipped_log(o), clipped_log(p));
+    }
+
+    let (observations_mean, obs_var, simulations_mean, sim_var, covariance) =
+        none.statistics(n);
+    let observations_std = obs_var.sqrt();
+    let simulations_std = sim_var.sqrt();
+
+    let mean_bias = simulations_mean / observations_mean;
+
+    let deviation_bias = if simulations_mean == 0. || observations_mean == 0. {
+        // the coefficient of variation is undefined for a zero mean
+        if simulations_mean != observations_mean {
+            f64::INFINITY
+        } else {
+            1.0
+        }
+    } else if obs_var < TOLERANCE {
+        if sim_var < TOLERANCE {
+            1.0
+        } else {
+            f64::INFINITY
+        }
+    } else {
+        (simulations_std / simulations_mean)
+            / (observations_std / observations_mean)
+    };
+
+    let correlation = if obs_var < TOLERANCE || sim_var < TOLERANCE {
+        f64::NAN
+    } else {
+        covariance / (observations_std * simulations_std)
+    };
+
+    let undefined = Criteria {
+        rmse: f64::NAN,
+        nse: f64::NAN,
+        kge: f64::NAN,
+    };
+    Ok(Evaluation {
+        none: none.criteria(n),
+        sqrt: if sqrt_defined {
+            sqrt.criteria(n)
+        } else {
+            undefined
+        },
+        log: log.criteria(n),
+        mean_bias,
+        deviation_bias,
+        correlation,
+    })
+}
+
 fn check_lengths(
     observations: ArrayView1<f64>,
     simulations: ArrayView1<f64>,
@@ -282,11 +637,42 @@ pub fn py_calculate_kge<'py>(
     )?)
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "evaluate_all")]
+pub fn py_evaluate_all<'py>(
+    py: Python<'py>,
+    observations: PyReadonlyArray1<'py, f64>,
+    simulations: PyReadonlyArray1<'py, f64>,
+    warmup_steps: usize,
+) -> PyResult<Bound<'py, PyDict>> {
+    let evaluation = evaluate_all(
+        observations.as_array(),
+        simulations.as_array(),
+        warmup_steps,
+    )?;
+    let dict = PyDict::new(py);
+    for (transformation, criteria) in [
+        ("none", evaluation.none),
+        ("sqrt", evaluation.sqrt),
+        ("log", evaluation.log),
+    ] {
+        dict.set_item(format!("rmse_{}", transformation), criteria.rmse)?;
+        dict.set_item(format!("nse_{}", transformation), criteria.nse)?;
+        dict.set_item(format!("kge_{}", transformation), criteria.kge)?;
+    }
+    dict.set_item("mean_bias", evaluation.mean_bias)?;
+    dict.set_item("deviation_bias", evaluation.deviation_bias)?;
+    dict.set_item("correlation", evaluation.correlation)?;
+    Ok(dict)
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "metrics")?;
     m.add_function(wrap_pyfunction!(py_calculate_rmse, &m)?)?;
     m.add_function(wrap_pyfunction!(py_calculate_nse, &m)?)?;
     m.add_function(wrap_pyfunction!(py_calculate_kge, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_evaluate_all, &m)?)?;
     Ok(m)
 }
@@ -2,10 +2,67 @@ use crate::pet::utils::{
     check_lengths, validate_day_of_year, validate_latitude, validate_output,
     validate_temperature, PetError,
 };
-use ndarray::{Array1, ArrayView1, Zip};
-use numpy::{PyArray1, PyReadonlyArray1, ToPyArray};
+use ndarray::{Array1, Array2, ArrayView1, ArrayView2, ArrayViewMut1, Zip};
+use numpy::{
+    PyArray1, PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray,
+};
 use pyo3::prelude::*;
+use rayon::prelude::*;
+use std::collections::HashMap;
 use std::f64::consts::PI;
+use std::sync::{Arc, Mutex, OnceLock};
+
+/// Extraterrestrial radiation (MJ m^-2 day^-1) for each day of year, day 1
+/// at index 0.
+pub type RadiationTable = [f64; 366];
+
+/// Number of latitudes whose radiation table is kept between calls.
+const RADIATION_CACHE_SIZE: usize = 64;
+
+static RADIATION_TABLES: OnceLock<Mutex<HashMap<u64, Arc<RadiationTable>>>> =
+    OnceLock::new();
+
+/// Computes the extraterrestrial radiation of every day of year at the given
+/// latitude, which only depends on the declination, the Earth-Sun distance
+/// and the sunset hour angle of the day.
+pub fn compute_radiation_table(latitude: f64) -> RadiationTable {
+    let gsc = 0.082; // solar constant (MJ m^-2 min^-1)
+    let lat_rad = PI * latitude / 180.; // latitude in rad
+
+    let mut table = [0.0; 366];
+    table.iter_mut().enumerate().for_each(|(i, re)| {
+        let doy = (i + 1) as f64;
+        let ds = 0.409 * (2. * PI / 365. * doy - 1.39).sin(); // solar declination (rad)
+        let dr = 1. + 0.033 * (doy * 2. * PI / 365.).cos(); // inverse relative distance Earth-Sun
+        let omega = (-lat_rad.tan() * ds.tan()).clamp(-1., 1.).acos(); // sunset hour angle (rad)
+        *re = 24. * 60. / PI
+            * gsc
+            * dr
+            * (omega * lat_rad.sin() * ds.sin()
+                + lat_rad.cos() * ds.cos() * omega.sin()); // extraterrestrial radiation (MJ m^-2 day^-1)
+    });
+    table
+}
+
+/// Returns the radiation table of the latitude, computed once and cached
+/// for the next calls with the same latitude.
+pub fn radiation_table(
+    latitude: f64,
+) -> Result<Arc<RadiationTable>, PetError> {
+    validate_latitude(latitude)?;
+    let tables = RADIATION_TABLES.get_or_init(|| Mutex::new(HashMap::new()));
+    // a panic while holding the lock can't leave a partial table in the map
+    let mut tables = tables.lock().unwrap_or_else(|e| e.into_inner());
+    if let Some(table) = tables.get(&latitude.to_bits()) {
+        return Ok(Arc::clone(table));
+    }
+    if tables.len() >= RADIATION_CACHE_SIZE {
+        tables.clear();
+    }
+    let table = Arc::new(compute_radiation_table(latitude));
+    tables.insert(latitude.to_bits(), Arc::clone(&table));
+    Ok(table)
+}
 
 pub fn simulate(
     temperature: ArrayView1<f64>,
@@ -15,29 +72,10 @@ pub fn simulate(
     check_lengths(temperature, day_of_year)?;
     validate_temperature(temperature)?;
     validate_day_of_year(day_of_year)?;
-    validate_latitude(latitude)?;
-
-    let gsc = 0.082; // solar constant (MJ m^-2 min^-1)
-    let rho = 1000.; // water density (kg/m^3)
-    let lat_rad = PI * latitude / 180.; // latitude in rad
+    let table = radiation_table(latitude)?;
 
     let mut pet: Vec<f64> = vec![0.0; temperature.len()];
-
-    Zip::indexed(&temperature).and(&day_of_year).for_each(
-        |t, &temp_t, &doy| {
-            let lambda = 2.501 - 0.002361 * temp_t; // latent heat of vaporization (MJ/kg)
-            let ds = 0.409 * (2. * PI / 365. * doy as f64 - 1.39).sin(); // solar declination (rad)
-            let dr = 1. + 0.033 * (doy as f64 * 2. * PI / 365.).cos(); // inverse relative distance Earth-Sun
-            let omega = (-lat_rad.tan() * ds.tan()).clamp(-1., 1.).acos(); // sunset hour angle (rad)
-            let re = 24. * 60. / PI
-                * gsc
-                * dr
-                * (omega * lat_rad.sin() * ds.sin()
-                    + lat_rad.cos() * ds.cos() * omega.sin()); // extraterrestrial radiation (MJ m^-2 day^-1)
-            pet[t] =
-                (re / (lambda * rho) * (temp_t + 5.) / 100. * 1000.).max(0.);
-        },
-    );
+    simulate_with_table(&table, temperature, day_of_year, &mut pet);
 
     let result = Array1::from_vec(pet);
 
@@ -46,6 +84,58 @@ pub fn simulate(
     Ok(result)
 }
 
+/// Computes the PET of every member (row) of `temperature` in parallel,
+/// sharing the validation of the days of year and the radiation table.
+pub fn simulate_batch(
+    temperature: ArrayView2<f64>,
+    day_of_year: ArrayView1<usize>,
+    latitude: f64,
+) -> Result<Array2<f64>, PetError> {
+    let (n_members, n_days) = temperature.dim();
+    if n_days != day_of_year.len() {
+        return Err(PetError::LengthMismatch(n_days, day_of_year.len()));
+    }
+    validate_day_of_year(day_of_year)?;
+    temperature
+        .rows()
+        .into_iter()
+        .try_for_each(validate_temperature)?;
+    let table = radiation_table(latitude)?;
+
+    let mut pet = vec![0.0; n_members * n_days];
+    pet.par_chunks_mut(n_days.max(1)).enumerate().try_for_each(
+        |(i, out)| -> Result<(), PetError> {
+            simulate_with_table(&table, temperature.row(i), day_of_year, out);
+            validate_output(ArrayView1::from(&*out), "Oudin PET")
+        },
+    )?;
+
+    Array2::from_shape_vec((n_members, n_days), pet).map_err(|e| {
+        PetError::NumericalError {
+            context: "Oudin PET",
+            detail: e.to_string(),
+        }
+    })
+}
+
+fn simulate_with_table(
+    table: &RadiationTable,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    pet: &mut [f64],
+) {
+    let rho = 1000.; // water density (kg/m^3)
+    Zip::from(ArrayViewMut1::from(pet))
+        .and(&temperature)
+        .and(&day_of_year)
+        .for_each(|pet_t, &temp_t, &doy| {
+            let lambda = 2.501 - 0.002361 * temp_t; // latent heat of vaporization (MJ/kg)
+            let re = table[doy - 1];
+            *pet_t =
+                (re / (lambda * rho) * (temp_t + 5.) / 100. * 1000.).max(0.);
+        });
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 #[pyfunction]
 #[pyo3(name = "simulate")]
@@ -60,9 +150,26 @@ pub fn py_simulate<'py>(
     Ok(simulation.to_pyarray(py))
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "simulate_batch")]
+pub fn py_simulate_batch<'py>(
+    py: Python<'py>,
+    temperature: PyReadonlyArray2<f64>,
+    day_of_year: PyReadonlyArray1<usize>,
+    latitude: f64,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let temperature = temperature.as_array();
+    let day_of_year = day_of_year.as_array();
+    let pet =
+        py.detach(|| simulate_batch(temperature, day_of_year, latitude))?;
+    Ok(pet.to_pyarray(py))
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "oudin")?;
     m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_batch, &m)?)?;
     Ok(m)
 }
@@ -0,0 +1,206 @@
+use ndarray::{Array2, ArrayView1, ArrayView2};
+use numpy::{PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray};
+use pyo3::prelude::*;
+use rayon::prelude::*;
+use thiserror::Error;
+
+use crate::errors::HolmesValidationError;
+use crate::hydro::utils::validate_forcings;
+use crate::hydro::{self, HydroError};
+use crate::pet::{oudin, PetError};
+use crate::snow::{self, SnowError};
+
+#[derive(Error, Debug)]
+pub enum ProjectionError {
+    #[error(
+        "precipitation and temperature must have the same shape (got {0:?} and {1:?})"
+    )]
+    ShapeMismatch([usize; 2], [usize; 2]),
+    #[error("day_of_year must have one value per day (got {0} for {1} days)")]
+    LengthMismatch(usize, usize),
+    #[error("snow model requires snow_params, elevation_layers and median_elevation")]
+    MissingSnowParams,
+    #[error(transparent)]
+    Hydro(#[from] HydroError),
+    #[error(transparent)]
+    Pet(#[from] PetError),
+    #[error(transparent)]
+    Snow(#[from] SnowError),
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+impl From<ProjectionError> for PyErr {
+    fn from(err: ProjectionError) -> PyErr {
+        match err {
+            ProjectionError::Hydro(e) => e.into(),
+            ProjectionError::Pet(e) => e.into(),
+            ProjectionError::Snow(e) => e.into(),
+            _ => HolmesValidationError::new_err(err.to_string()),
+        }
+    }
+}
+
+/// Snow model inputs shared by every member of an ensemble.
+#[derive(Clone, Copy)]
+pub struct SnowInputs<'a> {
+    pub model: &'a str,
+    pub params: ArrayView1<'a, f64>,
+    pub elevation_layers: ArrayView1<'a, f64>,
+    pub median_elevation: f64,
+}
+
+/// Runs Oudin PET, the optional snow model and the hydro model for every
+/// member (row) of `precipitation` and `temperature` in parallel, returning
+/// the streamflow as a (n_members, n_days) matrix.
+pub fn simulate(
+    hydro_model: &str,
+    hydro_params: ArrayView1<f64>,
+    snow_inputs: Option<SnowInputs>,
+    precipitation: ArrayView2<f64>,
+    temperature: ArrayView2<f64>,
+    day_of_year: ArrayView1<usize>,
+    latitude: f64,
+) -> Result<Array2<f64>, ProjectionError> {
+    if precipitation.dim() != temperature.dim() {
+        let (p_rows, p_cols) = precipitation.dim();
+        let (t_rows, t_cols) = temperature.dim();
+        return Err(ProjectionError::ShapeMismatch(
+            [p_rows, p_cols],
+            [t_rows, t_cols],
+        ));
+    }
+    let (n_members, n_days) = precipitation.dim();
+    if day_of_year.len() != n_days {
+        return Err(ProjectionError::LengthMismatch(
+            day_of_year.len(),
+            n_days,
+        ));
+    }
+
+    let hydro_simulate = hydro::get_unchecked_into_model(hydro_model)?;
+    let snow_simulate = snow_inputs
+        .map(|inputs| {
+            snow::get_model(inputs.model).map(|(_, simulate)| simulate)
+        })
+        .transpose()?;
+
+    // rows need to be contiguous to be handed to the models as views
+    let precipitation = precipitation.as_standard_layout();
+    let temperature = temperature.as_standard_layout();
+    // the radiation table is shared by every member
+    let pet =
+        oudin::simulate_batch(temperature.view(), day_of_year, latitude)?;
+    let mut streamflow = vec![0.0; n_members * n_days];
+
+    streamflow
+        .par_chunks_mut(n_days.max(1))
+        .enumerate()
+        .try_for_each(|(i, out)| -> Result<(), ProjectionError> {
+            let precipitation = precipitation.row(i);
+            let temperature = temperature.row(i);
+            let pet = pet.row(i);
+            match (snow_inputs, snow_simulate) {
+                (Some(inputs), Some(snow_simulate)) => {
+                    let effective_precipitation = snow_simulate(
+                        inputs.params,
+                        precipitation,
+                        temperature,
+                        day_of_year,
+                        inputs.elevation_layers,
+                        inputs.median_elevation,
+                    )?;
+                    validate_forcings(effective_precipitation.view(), pet)?;
+                    hydro_simulate(
+                        hydro_params,
+                        effective_precipitation.view(),
+                        pet,
+                        out,
+                    )?;
+                }
+                _ => {
+                    validate_forcings(precipitation, pet)?;
+                    hydro_simulate(hydro_params, precipitation, pet, out)?;
+                }
+            }
+            Ok(())
+        })?;
+
+    Array2::from_shape_vec((n_members, n_days), streamflow).map_err(|e| {
+        ProjectionError::Hydro(HydroError::NumericalError {
+            context: "ensemble projection",
+            detail: e.to_string(),
+        })
+    })
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(
+    name = "simulate",
+    signature = (
+        hydro_model,
+        hydro_params,
+        precipitation,
+        temperature,
+        day_of_year,
+        latitude,
+        snow_model=None,
+        snow_params=None,
+        elevation_layers=None,
+        median_elevation=None,
+    )
+)]
+#[allow(clippy::too_many_arguments)]
+pub fn py_simulate<'py>(
+    py: Python<'py>,
+    hydro_model: &str,
+    hydro_params: PyReadonlyArray1<f64>,
+    precipitation: PyReadonlyArray2<f64>,
+    temperature: PyReadonlyArray2<f64>,
+    day_of_year: PyReadonlyArray1<usize>,
+    latitude: f64,
+    snow_model: Option<&str>,
+    snow_params: Option<PyReadonlyArray1<f64>>,
+    elevation_layers: Option<PyReadonlyArray1<f64>>,
+    median_elevation: Option<f64>,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let snow_inputs = match snow_model {
+        Some(model) => Some(SnowInputs {
+            model,
+            params: snow_params
+                .as_ref()
+                .ok_or(ProjectionError::MissingSnowParams)?
+                .as_array(),
+            elevation_layers: elevation_layers
+                .as_ref()
+                .ok_or(ProjectionError::MissingSnowParams)?
+                .as_array(),
+            median_elevation: median_elevation
+                .ok_or(ProjectionError::MissingSnowParams)?,
+        }),
+        None => None,
+    };
+    let hydro_params = hydro_params.as_array();
+    let precipitation = precipitation.as_array();
+    let temperature = temperature.as_array();
+    let day_of_year = day_of_year.as_array();
+    let streamflow = py.detach(|| {
+        simulate(
+            hydro_model,
+            hydro_params,
+            snow_inputs,
+            precipitation,
+            temperature,
+            day_of_year,
+            latitude,
+        )
+    })?;
+    Ok(streamflow.to_pyarray(py))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
+    let m = PyModule::new(py, "projection")?;
+    m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    Ok(m)
+}
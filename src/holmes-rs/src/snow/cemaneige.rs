@@ -1,11 +1,13 @@
-use ndarray::{array, Array1, Array2, ArrayView1, Zip};
-use numpy::{PyArray1, PyArray2, PyReadonlyArray1, ToPyArray};
+use ndarray::{array, Array1, Array2, ArrayView1, ArrayView2};
+use numpy::{
+    PyArray1, PyArray2, PyReadonlyArray1, PyReadonlyArray2, ToPyArray,
+};
 use pyo3::prelude::*;
+use rayon::prelude::*;
 
 use crate::snow::utils::{
-    check_lengths, validate_day_of_year, validate_inputs_finite,
-    validate_non_negative, validate_output, validate_parameter,
-    validate_temperature, SnowError,
+    validate_forcings, validate_output, validate_parameter, validate_state,
+    SnowError,
 };
 
 pub const param_names: &[&str] = &["ctg", "kf", "qnbv"];
@@ -15,6 +17,13 @@ const BOUNDS: [(&str, f64, f64); 3] =
 
 const TOLERANCE: f64 = 1e-10;
 
+// precipitation gradient with elevation
+const BETA: f64 = 0.0;
+// minimum melt fraction
+const VMIN: f64 = 0.1;
+// melt temperature threshold
+const TF: f64 = 0.0;
+
 pub fn init() -> (Array1<f64>, Array2<f64>) {
     // corresponds to ctg, kf, qnbv
     let default_values = array![0.25, 3.74, 350.0];
@@ -34,6 +43,137 @@ pub fn simulate(
     elevation_layers: ArrayView1<f64>,
     median_elevation: f64,
 ) -> Result<Array1<f64>, SnowError> {
+    let params = validate_params(params)?;
+    validate_forcings(
+        precipitation,
+        temperature,
+        day_of_year,
+        elevation_layers,
+    )?;
+    run_to_array(
+        params,
+        precipitation,
+        temperature,
+        day_of_year,
+        &Layers::new(elevation_layers, median_elevation)?,
+        &mut State::new(elevation_layers.len()),
+    )
+}
+
+/// Same as `simulate`, but starting from `state` if given (see
+/// `initial_state`), and also returning the state after the last time step
+/// so that a later simulation can continue from it.
+pub fn simulate_with_state(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_layers: ArrayView1<f64>,
+    median_elevation: f64,
+    state: Option<ArrayView1<f64>>,
+) -> Result<(Array1<f64>, Array1<f64>), SnowError> {
+    let params = validate_params(params)?;
+    validate_forcings(
+        precipitation,
+        temperature,
+        day_of_year,
+        elevation_layers,
+    )?;
+    let n_layers = elevation_layers.len();
+    let mut state = match state {
+        Some(state) => State::from_array(n_layers, state)?,
+        None => State::new(n_layers),
+    };
+    let effective_precipitation = run_to_array(
+        params,
+        precipitation,
+        temperature,
+        day_of_year,
+        &Layers::new(elevation_layers, median_elevation)?,
+        &mut state,
+    )?;
+    Ok((effective_precipitation, state.to_array()))
+}
+
+/// State at the start of a simulation: the snowpack of each elevation layer,
+/// followed by the thermal state of each layer.
+pub fn initial_state(elevation_layers: ArrayView1<f64>) -> Array1<f64> {
+    State::new(elevation_layers.len()).to_array()
+}
+
+/// Same as `simulate`, but assumes the forcings were already checked with
+/// `validate_forcings`. Only the parameters and the output are validated.
+pub fn simulate_unchecked(
+    params: ArrayView1<f64>,
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_layers: ArrayView1<f64>,
+    median_elevation: f64,
+) -> Result<Array1<f64>, SnowError> {
+    run_to_array(
+        validate_params(params)?,
+        precipitation,
+        temperature,
+        day_of_year,
+        &Layers::new(elevation_layers, median_elevation)?,
+        &mut State::new(elevation_layers.len()),
+    )
+}
+
+/// Simulates every (ctg, kf, qnbv) row of `params` in parallel, returning an
+/// (n_sets, n_timesteps) array. The forcings are validated and the
+/// per-layer constants computed once for all the sets.
+pub fn simulate_batch(
+    params: ArrayView2<f64>,
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_layers: ArrayView1<f64>,
+    median_elevation: f64,
+) -> Result<Array2<f64>, SnowError> {
+    if params.ncols() != 3 {
+        return Err(SnowError::ParamsMismatch(3, params.ncols()));
+    }
+    validate_forcings(
+        precipitation,
+        temperature,
+        day_of_year,
+        elevation_layers,
+    )?;
+    let layers = Layers::new(elevation_layers, median_elevation)?;
+
+    // rows need to be contiguous to be read as slices
+    let params = params.as_standard_layout();
+    let n_timesteps = precipitation.len();
+    let mut effective_precipitation = vec![0.0; params.nrows() * n_timesteps];
+
+    effective_precipitation
+        .par_chunks_mut(n_timesteps)
+        .enumerate()
+        .try_for_each(|(i, out)| {
+            run(
+                validate_params(params.row(i))?,
+                precipitation,
+                temperature,
+                day_of_year,
+                &layers,
+                &mut State::new(layers.len()),
+                out,
+            )
+        })?;
+
+    Array2::from_shape_vec(
+        (params.nrows(), n_timesteps),
+        effective_precipitation,
+    )
+    .map_err(|e| SnowError::NumericalError {
+        context: "CemaNeige batch simulation",
+        detail: e.to_string(),
+    })
+}
+
+fn validate_params(params: ArrayView1<f64>) -> Result<[f64; 3], SnowError> {
     let [ctg, kf, qnbv]: [f64; 3] = params
         .as_slice()
         .and_then(|s| s.try_into().ok())
@@ -43,108 +183,191 @@ pub fn simulate(
         let (name, lower, upper) = BOUNDS[i];
         validate_parameter(param_value, name, lower, upper)?;
     }
+    Ok([ctg, kf, qnbv])
+}
 
-    check_lengths(precipitation, temperature, day_of_year)?;
-    validate_inputs_finite(precipitation, "precipitation")?;
-    validate_non_negative(precipitation, "precipitation")?;
-    validate_temperature(temperature)?;
-    validate_day_of_year(day_of_year)?;
-    validate_inputs_finite(elevation_layers, "elevation_layers")?;
+struct State {
+    snowpack: Vec<f64>,
+    thermal_state: Vec<f64>,
+}
 
-    let beta = 0.0;
-    let vmin = 0.1;
-    let tf = 0.0;
-    let n_layers = elevation_layers.len();
-    let g_threshold = qnbv * 0.9;
-    let n_timesteps = precipitation.len();
+impl State {
+    fn new(n_layers: usize) -> Self {
+        State {
+            snowpack: vec![0.0; n_layers],
+            thermal_state: vec![0.0; n_layers],
+        }
+    }
 
-    let elevation_offsets: Vec<f64> = elevation_layers
-        .iter()
-        .map(|&z| (z - median_elevation) / 100.0)
-        .collect();
+    fn from_array(
+        n_layers: usize,
+        state: ArrayView1<f64>,
+    ) -> Result<Self, SnowError> {
+        validate_state(state, 2 * n_layers)?;
+        let state = state.to_vec();
+        Ok(State {
+            snowpack: state[..n_layers].to_vec(),
+            thermal_state: state[n_layers..].to_vec(),
+        })
+    }
 
-    let precip_weights: Vec<f64> = elevation_layers
-        .iter()
-        .map(|&z| (beta * (z - median_elevation)).exp())
-        .collect();
-    let normalization: f64 = precip_weights.iter().sum();
-
-    if normalization.abs() < TOLERANCE {
-        return Err(SnowError::NumericalError {
-            context: "CemaNeige precipitation normalization",
-            detail: "sum of precipitation weights is zero".to_string(),
-        });
+    fn to_array(&self) -> Array1<f64> {
+        self.snowpack
+            .iter()
+            .chain(self.thermal_state.iter())
+            .copied()
+            .collect()
     }
+}
 
-    let mut effective_precipitation: Vec<f64> = vec![0.0; n_timesteps];
+/// Constants of each elevation layer, stored as one array per quantity so
+/// that the per-layer loop of a time step can be vectorized.
+struct Layers {
+    elevation_offsets: Vec<f64>,
+    precipitation_weights: Vec<f64>,
+    normalization: f64,
+}
 
-    let mut snowpack: Vec<f64> = vec![0.0; n_layers];
-    let mut thermal_state: Vec<f64> = vec![0.0; n_layers];
+impl Layers {
+    fn new(
+        elevation_layers: ArrayView1<f64>,
+        median_elevation: f64,
+    ) -> Result<Self, SnowError> {
+        let elevation_offsets = elevation_layers
+            .iter()
+            .map(|&z| (z - median_elevation) / 100.0)
+            .collect();
+        let precipitation_weights: Vec<f64> = elevation_layers
+            .iter()
+            .map(|&z| (BETA * (z - median_elevation)).exp())
+            .collect();
+        let normalization: f64 = precipitation_weights.iter().sum();
+
+        if normalization.abs() < TOLERANCE {
+            return Err(SnowError::NumericalError {
+                context: "CemaNeige precipitation normalization",
+                detail: "sum of precipitation weights is zero".to_string(),
+            });
+        }
+
+        Ok(Layers {
+            elevation_offsets,
+            precipitation_weights,
+            normalization,
+        })
+    }
 
-    let mut layer_temp: Vec<f64> = vec![0.0; n_layers];
+    fn len(&self) -> usize {
+        self.elevation_offsets.len()
+    }
+}
 
-    Zip::indexed(&precipitation)
-        .and(&temperature)
-        .and(&day_of_year)
-        .for_each(|t, &precip_t, &temp_t, &doy| {
-            let theta = TEMPERATURE_GRADIENT[(doy - 1) % 365];
+fn run_to_array(
+    params: [f64; 3],
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    layers: &Layers,
+    state: &mut State,
+) -> Result<Array1<f64>, SnowError> {
+    let mut effective_precipitation = vec![0.0; precipitation.len()];
+    run(
+        params,
+        precipitation,
+        temperature,
+        day_of_year,
+        layers,
+        state,
+        &mut effective_precipitation,
+    )?;
+    Ok(Array1::from_vec(effective_precipitation))
+}
+
+fn run(
+    params: [f64; 3],
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    layers: &Layers,
+    state: &mut State,
+    effective_precipitation: &mut [f64],
+) -> Result<(), SnowError> {
+    let [ctg, kf, qnbv] = params;
 
-            let mut total_liquid: f64 = 0.0;
-            let mut total_melt: f64 = 0.0;
+    let g_threshold = qnbv * 0.9;
+    let n_layers = layers.len();
+
+    // slicing everything to the number of layers lets the compiler drop
+    // the bounds checks of the per-layer loop
+    let State {
+        snowpack,
+        thermal_state,
+    } = state;
+    let snowpack = &mut snowpack[..n_layers];
+    let thermal_state = &mut thermal_state[..n_layers];
+    let elevation_offsets = &layers.elevation_offsets[..n_layers];
+    let precipitation_weights = &layers.precipitation_weights[..n_layers];
+    let normalization = layers.normalization;
+
+    // liquid precipitation and melt of each layer during the time step
+    let mut liquid: Vec<f64> = vec![0.0; n_layers];
+    let mut melt: Vec<f64> = vec![0.0; n_layers];
+    let liquid = &mut liquid[..n_layers];
+    let melt = &mut melt[..n_layers];
+
+    precipitation
+        .iter()
+        .zip(temperature.iter())
+        .zip(day_of_year.iter())
+        .zip(effective_precipitation.iter_mut())
+        .for_each(|(((&precip_t, &temp_t), &doy), effective_t)| {
+            let theta = TEMPERATURE_GRADIENT[(doy - 1) % 365];
 
+            // the layers are independent and the thresholds are selects
+            // rather than branches, so the loop can be vectorized
             for i in 0..n_layers {
                 let layer_temperature = elevation_offsets[i] * theta + temp_t;
-                layer_temp[i] = layer_temperature;
 
                 let layer_precip =
-                    precip_t * precip_weights[i] / normalization;
+                    precip_t * precipitation_weights[i] / normalization;
 
-                let solid_fraction = if layer_temperature > 3.0 {
-                    0.0
-                } else if layer_temperature < -1.0 {
-                    1.0
-                } else {
-                    1.0 - (layer_temperature + 1.0) / 4.0
-                };
+                // 1 below -1 °C, 0 above 3 °C and linear in between
+                let solid_fraction =
+                    (1.0 - (layer_temperature + 1.0) / 4.0).clamp(0.0, 1.0);
 
                 let p_solid = solid_fraction * layer_precip;
-                let p_liquid = layer_precip - p_solid;
-                total_liquid += p_liquid;
+                liquid[i] = layer_precip - p_solid;
 
                 snowpack[i] += p_solid;
 
                 thermal_state[i] = (thermal_state[i] * ctg
                     + layer_temperature * (1.0 - ctg))
                     .min(0.0);
-            }
-
-            for i in 0..n_layers {
-                let layer_temperature = layer_temp[i];
 
                 let potential =
-                    if thermal_state[i] >= tf && layer_temperature > 0.0 {
-                        let max_melt = (layer_temperature - tf) * kf;
-                        snowpack[i].min(max_melt)
+                    if thermal_state[i] >= TF && layer_temperature > 0.0 {
+                        snowpack[i].min((layer_temperature - TF) * kf)
                     } else {
                         0.0
                     };
 
                 let fnts = (snowpack[i] / g_threshold).min(1.0);
-                let melt_factor = fnts * (1.0 - vmin) + vmin;
+                let melt_factor = fnts * (1.0 - VMIN) + VMIN;
 
-                let snow_melt = potential * melt_factor;
-                snowpack[i] -= snow_melt;
-                total_melt += snow_melt;
+                melt[i] = potential * melt_factor;
+                snowpack[i] -= melt[i];
             }
 
-            effective_precipitation[t] = total_liquid + total_melt;
+            // summed in layer order, outside of the vectorized loop
+            let total_liquid = liquid.iter().fold(0.0, |acc, &x| acc + x);
+            let total_melt = melt.iter().fold(0.0, |acc, &x| acc + x);
+            *effective_t = total_liquid + total_melt;
         });
 
-    let result = Array1::from_vec(effective_precipitation);
-
-    validate_output(result.view(), "CemaNeige simulation")?;
-
-    Ok(result)
+    validate_output(
+        ArrayView1::from(&*effective_precipitation),
+        "CemaNeige simulation",
+    )
 }
 
 #[cfg_attr(coverage_nightly, coverage(off))]
@@ -180,12 +403,92 @@ pub fn py_simulate<'py>(
     Ok(simulation.to_pyarray(py))
 }
 
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "simulate_batch")]
+pub fn py_simulate_batch<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray2<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    temperature: PyReadonlyArray1<f64>,
+    day_of_year: PyReadonlyArray1<usize>,
+    elevation_layers: PyReadonlyArray1<f64>,
+    median_elevation: f64,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let params = params.as_array();
+    let precipitation = precipitation.as_array();
+    let temperature = temperature.as_array();
+    let day_of_year = day_of_year.as_array();
+    let elevation_layers = elevation_layers.as_array();
+    let simulations = py.detach(|| {
+        simulate_batch(
+            params,
+            precipitation,
+            temperature,
+            day_of_year,
+            elevation_layers,
+            median_elevation,
+        )
+    })?;
+    Ok(simulations.to_pyarray(py))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(
+    name = "simulate_with_state",
+    signature = (
+        params,
+        precipitation,
+        temperature,
+        day_of_year,
+        elevation_layers,
+        median_elevation,
+        state=None,
+    )
+)]
+#[allow(clippy::too_many_arguments)]
+pub fn py_simulate_with_state<'py>(
+    py: Python<'py>,
+    params: PyReadonlyArray1<f64>,
+    precipitation: PyReadonlyArray1<f64>,
+    temperature: PyReadonlyArray1<f64>,
+    day_of_year: PyReadonlyArray1<usize>,
+    elevation_layers: PyReadonlyArray1<f64>,
+    median_elevation: f64,
+    state: Option<PyReadonlyArray1<f64>>,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, Bound<'py, PyArray1<f64>>)> {
+    let (simulation, state) = simulate_with_state(
+        params.as_array(),
+        precipitation.as_array(),
+        temperature.as_array(),
+        day_of_year.as_array(),
+        elevation_layers.as_array(),
+        median_elevation,
+        state.as_ref().map(|state| state.as_array()),
+    )?;
+    Ok((simulation.to_pyarray(py), state.to_pyarray(py)))
+}
+
+#[cfg_attr(coverage_nightly, coverage(off))]
+#[pyfunction]
+#[pyo3(name = "initial_state")]
+pub fn py_initial_state<'py>(
+    py: Python<'py>,
+    elevation_layers: PyReadonlyArray1<f64>,
+) -> Bound<'py, PyArray1<f64>> {
+    initial_state(elevation_layers.as_array()).to_pyarray(py)
+}
+
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "cemaneige")?;
     m.add("param_names", param_names)?;
     m.add_function(wrap_pyfunction!(py_init, &m)?)?;
     m.add_function(wrap_pyfunction!(py_simulate, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_batch, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_simulate_with_state, &m)?)?;
+    m.add_function(wrap_pyfunction!(py_initial_state, &m)?)?;
     Ok(m)
 }
 
@@ -3,7 +3,9 @@ pub mod utils;
 use crate::utils::register_submodule;
 use pyo3::prelude::*;
 
-pub use utils::{SnowError, SnowInit, SnowSimulate};
+pub use utils::{
+    SnowError, SnowInit, SnowInitialState, SnowSimulate, SnowSimulateWithState,
+};
 
 #[cfg_attr(coverage_nightly, coverage(off))]
 pub fn make_module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
@@ -20,3 +22,25 @@ pub fn get_model(
         _ => Err(SnowError::WrongModel(model.to_string())),
     }
 }
+
+/// Simulation function skipping the forcing validation, for callers that
+/// validated them once with `utils::validate_forcings`.
+pub fn get_unchecked_model(model: &str) -> Result<SnowSimulate, SnowError> {
+    match model {
+        "cemaneige" => Ok(cemaneige::simulate_unchecked),
+        _ => Err(SnowError::WrongModel(model.to_string())),
+    }
+}
+
+/// Initial state and simulation function carrying the state between runs,
+/// to continue a simulation from the end of a previous one.
+pub fn get_stateful_model(
+    model: &str,
+) -> Result<(SnowInitialState, SnowSimulateWithState), SnowError> {
+    match model {
+        "cemaneige" => {
+            Ok((cemaneige::initial_state, cemaneige::simulate_with_state))
+        }
+        _ => Err(SnowError::WrongModel(model.to_string())),
+    }
+}
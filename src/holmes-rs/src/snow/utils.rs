@@ -15,6 +15,23 @@ pub type SnowSimulate = fn(
     f64,
 ) -> Result<Array1<f64>, SnowError>;
 
+/// Initial state of a model for the given elevation layers.
+pub type SnowInitialState = fn(ArrayView1<f64>) -> Array1<f64>;
+
+/// Simulation starting from the given state, or from the initial state if
+/// None, returning the effective precipitation and the state after the last
+/// time step.
+pub type SnowSimulateWithState =
+    fn(
+        ArrayView1<f64>,
+        ArrayView1<f64>,
+        ArrayView1<f64>,
+        ArrayView1<usize>,
+        ArrayView1<f64>,
+        f64,
+        Option<ArrayView1<f64>>,
+    ) -> Result<(Array1<f64>, Array1<f64>), SnowError>;
+
 #[derive(Error, Debug)]
 pub enum SnowError {
     #[error(
@@ -25,6 +42,8 @@ pub enum SnowError {
     ParamsMismatch(usize, usize),
     #[error("Unknown snow model '{0}'")]
     WrongModel(String),
+    #[error("expected a state of length {0}, got {1}")]
+    StateMismatch(usize, usize),
     #[error(
         "Parameter '{name}' value {value} outside bounds [{lower}, {upper}]"
     )]
@@ -73,6 +92,7 @@ impl From<SnowError> for PyErr {
             SnowError::LengthMismatch(_, _, _)
             | SnowError::ParamsMismatch(_, _)
             | SnowError::WrongModel(_)
+            | SnowError::StateMismatch(_, _)
             | SnowError::ParameterOutOfBounds { .. }
             | SnowError::NegativeInput { .. }
             | SnowError::NonFiniteInput { .. }
@@ -106,6 +126,21 @@ pub fn check_lengths(
     }
 }
 
+pub fn validate_forcings(
+    precipitation: ArrayView1<f64>,
+    temperature: ArrayView1<f64>,
+    day_of_year: ArrayView1<usize>,
+    elevation_layers: ArrayView1<f64>,
+) -> Result<(), SnowError> {
+    check_lengths(precipitation, temperature, day_of_year)?;
+    validate_inputs_finite(precipitation, "precipitation")?;
+    validate_non_negative(precipitation, "precipitation")?;
+    validate_temperature(temperature)?;
+    validate_day_of_year(day_of_year)?;
+    validate_inputs_finite(elevation_layers, "elevation_layers")?;
+    Ok(())
+}
+
 pub fn validate_inputs_finite(
     arr: ArrayView1<f64>,
     name: &'static str,
@@ -141,6 +176,18 @@ pub fn validate_non_negative(
     Ok(())
 }
 
+/// Checks that a state given to a model has the length expected for its
+/// elevation layers and only finite values.
+pub fn validate_state(
+    state: ArrayView1<f64>,
+    expected_len: usize,
+) -> Result<(), SnowError> {
+    if state.len() != expected_len {
+        return Err(SnowError::StateMismatch(expected_len, state.len()));
+    }
+    validate_inputs_finite(state, "state")
+}
+
 pub fn validate_parameter(
     value: f64,
     name: &'static str,
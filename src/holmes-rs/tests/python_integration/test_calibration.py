@@ -7,6 +7,7 @@ These tests verify that SCE-UA calibration works correctly from Python.
 import numpy as np
 import pytest
 
+from holmes_rs.calibration.islands import Islands
 from holmes_rs.calibration.sce import Sce
 from holmes_rs.hydro import gr4j
 from holmes_rs.snow import cemaneige
@@ -567,6 +568,302 @@ class TestSceConvergence:
 
         assert done  # Should have stopped due to max_evaluations
 
+    def test_parallel_is_reproducible(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+        sample_observations,
+    ):
+        """Parallel evolution should give the same result for a seed."""
+
+        def run():
+            sce = Sce(
+                hydro_model="gr4j",
+                snow_model=None,
+                objective="nse",
+                transformation="none",
+                n_complexes=4,
+                k_stop=5,
+                p_convergence_threshold=0.1,
+                geometric_range_threshold=0.001,
+                max_evaluations=500,
+                seed=42,
+                parallel=True,
+            )
+            args = (
+                sample_precipitation,
+                sample_temperature,
+                sample_pet,
+                sample_doy,
+                sample_elevation_layers,
+                1000.0,
+                sample_observations,
+                0,
+            )
+            sce.init(*args)
+            for _ in range(3):
+                _, params, _, objectives = sce.step(*args)
+            return params, objectives
+
+        params_1, objectives_1 = run()
+        params_2, objectives_2 = run()
+
+        np.testing.assert_array_equal(params_1, params_2)
+        np.testing.assert_array_equal(objectives_1, objectives_2)
+
+    def test_spin_up(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_doy,
+        sample_observations,
+    ):
+        """Warmups shorter than a year should be simulated, not spun up."""
+        sce = Sce(
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            n_complexes=2,
+            k_stop=5,
+            p_convergence_threshold=0.1,
+            geometric_range_threshold=0.001,
+            max_evaluations=200,
+            seed=42,
+            spin_up_iterations=5,
+            spin_up_tolerance=1e-3,
+        )
+        args = (
+            sample_precipitation,
+            None,
+            sample_pet,
+            sample_doy,
+            None,
+            None,
+            sample_observations,
+            30,
+        )
+        sce.init(*args)
+        _, params, simulation, objectives = sce.step(*args)
+
+        assert len(params) == 4
+        assert len(simulation) == len(sample_precipitation)
+        assert np.all(np.isfinite(simulation))
+        assert np.all(np.isfinite(objectives))
+
+
+class TestSceCheckpoint:
+    """Tests for SCE checkpoints."""
+
+    def test_resume_from_checkpoint(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_doy,
+        sample_observations,
+    ):
+        """A resumed calibration should continue like the original."""
+        sce = Sce(
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            n_complexes=2,
+            k_stop=5,
+            p_convergence_threshold=0.1,
+            geometric_range_threshold=0.001,
+            max_evaluations=500,
+            seed=42,
+        )
+        args = (
+            sample_precipitation,
+            None,
+            sample_pet,
+            sample_doy,
+            None,
+            None,
+            sample_observations,
+            0,
+        )
+        sce.init(*args)
+        sce.step(*args)
+
+        checkpoint = sce.checkpoint()
+        assert isinstance(checkpoint, bytes)
+        resumed = Sce.from_checkpoint(checkpoint)
+
+        for _ in range(2):
+            expected = sce.step(*args)
+            result = resumed.step(*args)
+            assert result[0] == expected[0]
+            for value, expected_value in zip(result[1:], expected[1:]):
+                np.testing.assert_array_equal(value, expected_value)
+
+    def test_invalid_checkpoint(self):
+        """Invalid checkpoints should raise ValueError."""
+        with pytest.raises(ValueError, match="invalid checkpoint"):
+            Sce.from_checkpoint(b"not a checkpoint")
+
+
+class TestSceCache:
+    """Tests for the SCE evaluation cache."""
+
+    def test_cache_info(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_doy,
+        sample_observations,
+    ):
+        """Duplicate evaluations should be served by the cache."""
+        sce = Sce(
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            n_complexes=2,
+            k_stop=5,
+            p_convergence_threshold=0.1,
+            geometric_range_threshold=0.001,
+            max_evaluations=500,
+            seed=42,
+            cache_size=1,
+        )
+        args = (
+            sample_precipitation,
+            None,
+            sample_pet,
+            sample_doy,
+            None,
+            None,
+            sample_observations,
+            0,
+        )
+        sce.init(*args)
+        sce.step(*args)
+
+        info = sce.cache_info()
+        assert info["hits"] >= 1
+        assert info["misses"] > 0
+        assert info["entries"] > 0
+        assert 0 < info["size"] <= 2**20
+        assert info["capacity"] == 2**20
+
+    def test_no_cache(self):
+        """Without a cache size, nothing is cached."""
+        sce = Sce(
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            n_complexes=2,
+            k_stop=5,
+            p_convergence_threshold=0.1,
+            geometric_range_threshold=0.001,
+            max_evaluations=500,
+            seed=42,
+        )
+        assert sce.cache_info() == {
+            "hits": 0,
+            "misses": 0,
+            "entries": 0,
+            "size": 0,
+            "capacity": 0,
+        }
+
+
+class TestIslands:
+    """Tests for island-model calibrations."""
+
+    def _islands(self, **kwargs):
+        return Islands(
+            **{
+                "hydro_model": "gr4j",
+                "snow_model": None,
+                "objective": "nse",
+                "transformation": "none",
+                "n_complexes": 2,
+                "k_stop": 5,
+                "p_convergence_threshold": 0.1,
+                "geometric_range_threshold": 0.001,
+                "max_evaluations": 500,
+                "seed": 42,
+                "n_islands": 3,
+                "migration_interval": 1,
+            }
+            | kwargs
+        )
+
+    def test_step_returns_global_best(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_doy,
+        sample_observations,
+    ):
+        """The step result should be the best island's."""
+        islands = self._islands()
+        args = (
+            sample_precipitation,
+            None,
+            sample_pet,
+            sample_doy,
+            None,
+            None,
+            sample_observations,
+            0,
+        )
+        islands.init(*args)
+        assert islands.island_results() == [None, None, None]
+
+        done, params, simulation, objectives = islands.step(*args)
+
+        results = islands.island_results()
+        assert len(results) == 3
+        assert objectives[1] == max(result[3][1] for result in results)
+        assert isinstance(done, bool)
+        assert params.shape == (4,)
+        assert simulation.shape == sample_precipitation.shape
+
+    def test_resume_from_checkpoint(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_doy,
+        sample_observations,
+    ):
+        """Resumed islands should continue like the original."""
+        islands = self._islands()
+        args = (
+            sample_precipitation,
+            None,
+            sample_pet,
+            sample_doy,
+            None,
+            None,
+            sample_observations,
+            0,
+        )
+        islands.init(*args)
+        islands.step(*args)
+
+        resumed = Islands.from_checkpoint(islands.checkpoint())
+
+        for _ in range(2):
+            expected = islands.step(*args)
+            result = resumed.step(*args)
+            assert result[0] == expected[0]
+            for a, b in zip(result[1:], expected[1:]):
+                np.testing.assert_array_equal(a, b)
+
+    def test_no_islands(self):
+        """At least one island should be required."""
+        with pytest.raises(ValueError, match="at least one island"):
+            self._islands(n_islands=0)
+
 
 class TestSceWithSnow:
     """Tests for SCE with snow model."""
@@ -635,6 +932,78 @@ class TestSceWithSnow:
         assert np.all(np.isfinite(params))
         assert np.all(np.isfinite(sim))
 
+    def test_fixed_params_and_snow_cache(
+        self,
+        sample_precipitation,
+        sample_pet,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+    ):
+        """Fixed parameters keep their value and snow outputs are reused."""
+        snow_defaults, _ = cemaneige.init()
+        effective_precip = cemaneige.simulate(
+            snow_defaults,
+            sample_precipitation,
+            sample_temperature,
+            sample_doy,
+            sample_elevation_layers,
+            1000.0,
+        )
+        hydro_defaults, _ = gr4j.init()
+        obs = gr4j.simulate(hydro_defaults, effective_precip, sample_pet)
+        forcings = (
+            sample_precipitation,
+            sample_temperature,
+            sample_pet,
+            sample_doy,
+            sample_elevation_layers,
+            1000.0,
+            obs,
+            0,
+        )
+
+        sce = Sce(
+            hydro_model="gr4j",
+            snow_model="cemaneige",
+            objective="kge",
+            transformation="none",
+            n_complexes=2,
+            k_stop=5,
+            p_convergence_threshold=0.1,
+            geometric_range_threshold=0.001,
+            max_evaluations=200,
+            seed=42,
+            fixed_params={2: 350.0},
+            snow_cache_size=1,
+        )
+        sce.init(*forcings)
+        for _ in range(3):
+            _, params, _, _ = sce.step(*forcings)
+            assert len(params) == 7
+            assert params[2] == 350.0
+
+        info = sce.snow_cache_info()
+        assert info["hits"] > 0
+        assert info["capacity"] == 2**20
+
+    def test_invalid_fixed_params(self):
+        """Should raise error for parameters that can't be fixed."""
+        with pytest.raises(ValueError, match="invalid fixed parameters"):
+            Sce(
+                hydro_model="gr4j",
+                snow_model="cemaneige",
+                objective="kge",
+                transformation="none",
+                n_complexes=2,
+                k_stop=5,
+                p_convergence_threshold=0.1,
+                geometric_range_threshold=0.001,
+                max_evaluations=50,
+                seed=42,
+                fixed_params={7: 1.0},
+            )
+
 
 class TestCalibrationModuleIntegration:
     """Integration tests for calibration module."""
@@ -643,6 +1012,7 @@ class TestCalibrationModuleIntegration:
         """Calibration module should have correct submodules."""
         from holmes_rs import calibration
 
+        assert hasattr(calibration, "islands")
         assert hasattr(calibration, "sce")
 
     def test_sce_class_accessible(self):
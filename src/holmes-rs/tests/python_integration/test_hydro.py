@@ -335,9 +335,7 @@ class TestCequeauSimulate:
         wrong_params = np.array([100.0, 0.5, 50.0, 3.0])  # Only 4 params
 
         with pytest.raises(HolmesValidationError, match="param"):
-            cequeau.simulate(
-                wrong_params, sample_precipitation, sample_pet
-            )
+            cequeau.simulate(wrong_params, sample_precipitation, sample_pet)
 
     def test_length_mismatch_error(self, sample_precipitation):
         """Should raise error for mismatched input lengths."""
@@ -353,9 +351,7 @@ class TestCequeauSimulate:
             [100.0, 100.0, 10.0, 5.0, 500.0, 3.0, 100.0, 100.0, 100.0]
         )
 
-        streamflow = cequeau.simulate(
-            params, sample_precipitation, sample_pet
-        )
+        streamflow = cequeau.simulate(params, sample_precipitation, sample_pet)
 
         assert len(streamflow) == len(sample_precipitation)
         assert np.all(np.isfinite(streamflow))
@@ -396,6 +392,100 @@ class TestCequeauParamDescriptions:
             assert len(desc) > 0
 
 
+class TestSimulateBatch:
+    """Tests for the batched simulate of every hydro model."""
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_matches_simulate(self, model, sample_precipitation, sample_pet):
+        """Each row should equal the single parameter set simulation."""
+        defaults, bounds = model.init()
+        params = np.stack(
+            [defaults, bounds[:, 0] + 0.25 * (bounds[:, 1] - bounds[:, 0])]
+        )
+
+        streamflow = model.simulate_batch(
+            params, sample_precipitation, sample_pet
+        )
+
+        assert streamflow.shape == (2, len(sample_precipitation))
+        for row, params_ in zip(streamflow, params):
+            np.testing.assert_array_equal(
+                row,
+                model.simulate(params_, sample_precipitation, sample_pet),
+            )
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_param_count_error(self, model, sample_precipitation, sample_pet):
+        """Should raise error for wrong parameter count."""
+        params = np.ones((2, len(model.param_names) - 1))
+
+        with pytest.raises(HolmesValidationError, match="param"):
+            model.simulate_batch(params, sample_precipitation, sample_pet)
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_length_mismatch_error(self, model, sample_precipitation):
+        """Should raise error for mismatched input lengths."""
+        defaults, _ = model.init()
+        short_pet = np.array([2.0, 2.0])
+
+        with pytest.raises(HolmesValidationError, match="length"):
+            model.simulate_batch(
+                defaults[np.newaxis, :], sample_precipitation, short_pet
+            )
+
+
+class TestSimulateWithState:
+    """Tests for the stateful simulate of every hydro model."""
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_default_state_matches_simulate(
+        self, model, sample_precipitation, sample_pet
+    ):
+        """Without a state, it should start from the initial state."""
+        defaults, _ = model.init()
+
+        streamflow, state = model.simulate_with_state(
+            defaults, sample_precipitation, sample_pet
+        )
+
+        np.testing.assert_array_equal(
+            streamflow,
+            model.simulate(defaults, sample_precipitation, sample_pet),
+        )
+        assert state.shape == model.initial_state(defaults).shape
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_continues_simulation(
+        self, model, sample_precipitation, sample_pet
+    ):
+        """Continuing from the returned state should match a single run."""
+        defaults, _ = model.init()
+
+        full, full_state = model.simulate_with_state(
+            defaults, sample_precipitation, sample_pet
+        )
+        first, state = model.simulate_with_state(
+            defaults, sample_precipitation[:60], sample_pet[:60]
+        )
+        second, final_state = model.simulate_with_state(
+            defaults, sample_precipitation[60:], sample_pet[60:], state=state
+        )
+
+        np.testing.assert_array_equal(np.concatenate([first, second]), full)
+        np.testing.assert_array_equal(final_state, full_state)
+
+    @pytest.mark.parametrize("model", [gr4j, bucket, cequeau])
+    def test_state_length_error(self, model, sample_precipitation, sample_pet):
+        """Should raise error for a state of the wrong length."""
+        defaults, _ = model.init()
+        state = np.zeros(len(model.initial_state(defaults)) + 1)
+
+        with pytest.raises(HolmesValidationError, match="state"):
+            model.simulate_with_state(
+                defaults, sample_precipitation, sample_pet, state=state
+            )
+
+
 class TestHydroModuleIntegration:
     """Integration tests for hydro module."""
 
@@ -407,9 +497,7 @@ class TestHydroModuleIntegration:
         assert hasattr(hydro, "bucket")
         assert hasattr(hydro, "cequeau")
 
-    def test_all_models_produce_output(
-        self, sample_precipitation, sample_pet
-    ):
+    def test_all_models_produce_output(self, sample_precipitation, sample_pet):
         """All models should produce valid streamflow."""
         gr4j_defaults, _ = gr4j.init()
         bucket_defaults, _ = bucket.init()
@@ -1,8 +1,8 @@
 """
 Tests for metrics module PyO3 bindings.
 
-These tests verify that calculate_rmse, calculate_nse, and calculate_kge
-work correctly when called from Python.
+These tests verify that calculate_rmse, calculate_nse, calculate_kge and
+evaluate_all work correctly when called from Python.
 """
 
 import numpy as np
@@ -154,6 +154,89 @@ class TestCalculateKge:
             metrics.calculate_kge(obs, sim)
 
 
+class TestEvaluateAll:
+    """Tests for evaluate_all function."""
+
+    def test_matches_individual_metrics(self):
+        """Each criterion should match its individual computation."""
+        np.random.seed(42)
+        obs = np.random.rand(100) + 1
+        sim = np.random.rand(100) + 1
+        warmup = 10
+
+        results = metrics.evaluate_all(obs, sim, warmup)
+
+        o, s = obs[warmup:], sim[warmup:]
+        for transformation, f in [
+            ("none", lambda x: x),
+            ("sqrt", np.sqrt),
+            ("log", lambda x: np.log(np.clip(x, 1e-5, None))),
+        ]:
+            assert_almost_equal(
+                results[f"rmse_{transformation}"],
+                metrics.calculate_rmse(f(o), f(s)),
+            )
+            assert_almost_equal(
+                results[f"nse_{transformation}"],
+                metrics.calculate_nse(f(o), f(s)),
+            )
+            assert_almost_equal(
+                results[f"kge_{transformation}"],
+                metrics.calculate_kge(f(o), f(s)),
+            )
+        assert_almost_equal(results["mean_bias"], np.mean(s) / np.mean(o))
+        assert_almost_equal(
+            results["deviation_bias"],
+            (np.std(s) / np.mean(s)) / (np.std(o) / np.mean(o)),
+        )
+        assert_almost_equal(results["correlation"], np.corrcoef(o, s)[0, 1])
+
+    def test_perfect_prediction(self):
+        """A perfect simulation should score perfectly everywhere."""
+        obs = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+
+        results = metrics.evaluate_all(obs, obs.copy(), 0)
+
+        for transformation in ("none", "sqrt", "log"):
+            assert_almost_equal(results[f"rmse_{transformation}"], 0.0)
+            assert_almost_equal(results[f"nse_{transformation}"], 1.0)
+            assert_almost_equal(results[f"kge_{transformation}"], 1.0)
+        assert_almost_equal(results["mean_bias"], 1.0)
+        assert_almost_equal(results["deviation_bias"], 1.0)
+        assert_almost_equal(results["correlation"], 1.0)
+
+    def test_flat_simulation(self):
+        """Undefined criteria of a flat simulation should be NaN."""
+        obs = np.array([1.0, 2.0, 3.0, 4.0])
+        sim = np.full(4, 2.0)
+
+        results = metrics.evaluate_all(obs, sim, 0)
+
+        for transformation in ("none", "sqrt", "log"):
+            assert np.isfinite(results[f"rmse_{transformation}"])
+            assert np.isfinite(results[f"nse_{transformation}"])
+            assert np.isnan(results[f"kge_{transformation}"])
+        assert_almost_equal(
+            results["nse_none"], metrics.calculate_nse(obs, sim)
+        )
+        assert np.isnan(results["correlation"])
+
+    def test_length_mismatch_raises(self):
+        """Should raise error for mismatched lengths."""
+        obs = np.array([1.0, 2.0, 3.0])
+        sim = np.array([1.0, 2.0])
+
+        with pytest.raises(HolmesValidationError, match="same length"):
+            metrics.evaluate_all(obs, sim, 0)
+
+    def test_warmup_covering_everything_raises(self):
+        """Should raise error when nothing is left after the warmup."""
+        obs = np.array([1.0, 2.0, 3.0])
+
+        with pytest.raises(HolmesValidationError):
+            metrics.evaluate_all(obs, obs.copy(), 3)
+
+
 class TestMetricsIntegration:
     """Integration tests for metrics module."""
 
@@ -162,6 +245,7 @@ class TestMetricsIntegration:
         assert hasattr(metrics, "calculate_rmse")
         assert hasattr(metrics, "calculate_nse")
         assert hasattr(metrics, "calculate_kge")
+        assert hasattr(metrics, "evaluate_all")
 
     def test_all_metrics_finite_output(self):
         """All metrics should produce finite output for valid input."""
@@ -145,6 +145,30 @@ class TestOudinSimulate:
             assert np.all(np.isfinite(pet))
 
 
+class TestOudinSimulateBatch:
+    """Tests for oudin.simulate_batch function."""
+
+    def test_matches_simulate(self, sample_temperature, sample_doy):
+        """Each row should match the PET of the member simulated alone."""
+        temperature = np.vstack([sample_temperature, sample_temperature + 5.0])
+
+        pet = oudin.simulate_batch(temperature, sample_doy, 45.0)
+
+        assert pet.shape == temperature.shape
+        for row, temp in zip(pet, temperature):
+            np.testing.assert_array_equal(
+                row, oudin.simulate(temp, sample_doy, 45.0)
+            )
+
+    def test_length_mismatch_error(self):
+        """Should raise error if rows don't match the days of year."""
+        temperature = np.full((2, 3), 15.0)
+        doy = np.array([1, 2], dtype=np.uint64)
+
+        with pytest.raises(HolmesValidationError, match="length"):
+            oudin.simulate_batch(temperature, doy, 45.0)
+
+
 class TestPetModuleIntegration:
     """Integration tests for PET module."""
 
@@ -158,3 +182,4 @@ class TestPetModuleIntegration:
         """Oudin module should have simulate function."""
         assert hasattr(oudin, "simulate")
         assert callable(oudin.simulate)
+        assert callable(oudin.simulate_batch)
@@ -0,0 +1,126 @@
+"""
+Tests for projection module PyO3 bindings.
+
+These tests verify that ensemble projections work correctly from Python.
+"""
+
+import numpy as np
+import pytest
+from holmes_rs import HolmesValidationError
+from holmes_rs.hydro import gr4j
+from holmes_rs.pet import oudin
+from holmes_rs.projection import simulate
+from holmes_rs.snow import cemaneige
+
+
+@pytest.fixture
+def ensemble():
+    """Generate precipitation and temperature for 4 members over 100 days."""
+    rng = np.random.default_rng(45)
+    precipitation = np.maximum(0, rng.normal(3.0, 3.0, (4, 100)))
+    temperature = 5 + 10 * np.sin(2 * np.pi * np.arange(100) / 365)
+    temperature = temperature + rng.normal(0, 2, (4, 100))
+    return precipitation, temperature
+
+
+class TestProjectionSimulate:
+    """Tests for projection.simulate function."""
+
+    def test_output_shape(self, ensemble, sample_doy):
+        """Output should have one row per member and one column per day."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+
+        streamflow = simulate(
+            "gr4j", params, precipitation, temperature, sample_doy, 45.0
+        )
+
+        assert streamflow.shape == (4, 100)
+
+    def test_matches_member_simulations(self, ensemble, sample_doy):
+        """Each row should match simulating its member on its own."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+
+        streamflow = simulate(
+            "gr4j", params, precipitation, temperature, sample_doy, 45.0
+        )
+
+        for i in range(4):
+            pet = oudin.simulate(temperature[i], sample_doy, 45.0)
+            expected = gr4j.simulate(params, precipitation[i], pet)
+            np.testing.assert_array_equal(streamflow[i], expected)
+
+    def test_with_snow_model(
+        self, ensemble, sample_doy, sample_elevation_layers
+    ):
+        """Snow model should run on each member before the hydro model."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+        snow_params = np.array([0.25, 3.74, 350.0])
+
+        streamflow = simulate(
+            "gr4j",
+            params,
+            precipitation,
+            temperature,
+            sample_doy,
+            45.0,
+            snow_model="cemaneige",
+            snow_params=snow_params,
+            elevation_layers=sample_elevation_layers,
+            median_elevation=1000.0,
+        )
+
+        pet = oudin.simulate(temperature[1], sample_doy, 45.0)
+        effective_precipitation = cemaneige.simulate(
+            snow_params,
+            precipitation[1],
+            temperature[1],
+            sample_doy,
+            sample_elevation_layers,
+            1000.0,
+        )
+        expected = gr4j.simulate(params, effective_precipitation, pet)
+        np.testing.assert_array_equal(streamflow[1], expected)
+
+    def test_missing_snow_params(self, ensemble, sample_doy):
+        """Snow model without its inputs should raise."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+
+        with pytest.raises(HolmesValidationError):
+            simulate(
+                "gr4j",
+                params,
+                precipitation,
+                temperature,
+                sample_doy,
+                45.0,
+                snow_model="cemaneige",
+            )
+
+    def test_shape_mismatch(self, ensemble, sample_doy):
+        """Precipitation and temperature of different shapes should raise."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+
+        with pytest.raises(HolmesValidationError):
+            simulate(
+                "gr4j",
+                params,
+                precipitation,
+                temperature[:2],
+                sample_doy,
+                45.0,
+            )
+
+    def test_unknown_model(self, ensemble, sample_doy):
+        """Unknown hydro model should raise."""
+        precipitation, temperature = ensemble
+        params, _ = gr4j.init()
+
+        with pytest.raises(HolmesValidationError):
+            simulate(
+                "unknown", params, precipitation, temperature, sample_doy, 45.0
+            )
@@ -253,6 +253,128 @@ class TestCemaNeigeSimulate:
         assert np.all(np.isfinite(effective_precip))
 
 
+class TestCemaNeigeSimulateBatch:
+    """Tests for cemaneige.simulate_batch function."""
+
+    def test_matches_simulate(
+        self,
+        sample_precipitation,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+    ):
+        """Each row should equal the single parameter set simulation."""
+        defaults, bounds = cemaneige.init()
+        params = np.stack(
+            [defaults, bounds[:, 0] + 0.25 * (bounds[:, 1] - bounds[:, 0])]
+        )
+        temperature = sample_temperature - 12.0
+
+        effective_precip = cemaneige.simulate_batch(
+            params,
+            sample_precipitation,
+            temperature,
+            sample_doy,
+            sample_elevation_layers,
+            1000.0,
+        )
+
+        assert effective_precip.shape == (2, len(sample_precipitation))
+        for row, params_ in zip(effective_precip, params):
+            np.testing.assert_array_equal(
+                row,
+                cemaneige.simulate(
+                    params_,
+                    sample_precipitation,
+                    temperature,
+                    sample_doy,
+                    sample_elevation_layers,
+                    1000.0,
+                ),
+            )
+
+    def test_param_count_error(
+        self,
+        sample_precipitation,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+    ):
+        """Should raise error for wrong parameter count."""
+        with pytest.raises(HolmesValidationError, match="param"):
+            cemaneige.simulate_batch(
+                np.ones((2, 2)),
+                sample_precipitation,
+                sample_temperature,
+                sample_doy,
+                sample_elevation_layers,
+                1000.0,
+            )
+
+
+class TestCemaNeigeSimulateWithState:
+    """Tests for cemaneige.simulate_with_state function."""
+
+    def test_continues_simulation(
+        self,
+        sample_precipitation,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+    ):
+        """Continuing from the returned state should match a single run."""
+        defaults, _ = cemaneige.init()
+        temperature = sample_temperature - 12.0
+
+        def run(days, state=None):
+            return cemaneige.simulate_with_state(
+                defaults,
+                sample_precipitation[days],
+                temperature[days],
+                sample_doy[days],
+                sample_elevation_layers,
+                1000.0,
+                state=state,
+            )
+
+        full, full_state = run(slice(None))
+        first, state = run(slice(None, 60))
+        second, final_state = run(slice(60, None), state)
+
+        assert len(state) == 2 * len(sample_elevation_layers)
+        np.testing.assert_array_equal(np.concatenate([first, second]), full)
+        np.testing.assert_array_equal(final_state, full_state)
+
+    def test_initial_state(self, sample_elevation_layers):
+        """The initial state should be empty for every layer."""
+        state = cemaneige.initial_state(sample_elevation_layers)
+
+        np.testing.assert_array_equal(
+            state, np.zeros(2 * len(sample_elevation_layers))
+        )
+
+    def test_state_length_error(
+        self,
+        sample_precipitation,
+        sample_temperature,
+        sample_doy,
+        sample_elevation_layers,
+    ):
+        """Should raise error for a state of the wrong length."""
+        defaults, _ = cemaneige.init()
+
+        with pytest.raises(HolmesValidationError, match="state"):
+            cemaneige.simulate_with_state(
+                defaults,
+                sample_precipitation,
+                sample_temperature,
+                sample_doy,
+                sample_elevation_layers,
+                1000.0,
+                state=np.zeros(1),
+            )
+
+
 class TestCemaNeigeParamNames:
     """Tests for cemaneige.param_names constant."""
 
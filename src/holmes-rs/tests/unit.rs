@@ -13,6 +13,9 @@ mod metrics_tests;
 #[path = "unit/pet/mod.rs"]
 mod pet;
 
+#[path = "unit/projection_tests.rs"]
+mod projection_tests;
+
 #[path = "unit/snow/mod.rs"]
 mod snow;
 
@@ -0,0 +1,412 @@
+use crate::helpers;
+use holmes_rs::calibration::islands::Islands;
+use holmes_rs::calibration::sce::Sce;
+use holmes_rs::calibration::utils::{
+    CalibrationError, Objective, Transformation,
+};
+use ndarray::Array1;
+
+struct Forcings {
+    precip: Array1<f64>,
+    pet: Array1<f64>,
+    doy: Array1<usize>,
+    obs: Array1<f64>,
+}
+
+fn forcings() -> Forcings {
+    let n = 100;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let (defaults, _) = holmes_rs::hydro::gr4j::init();
+    let obs = holmes_rs::hydro::gr4j::simulate(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+    )
+    .unwrap();
+    Forcings {
+        precip,
+        pet,
+        doy,
+        obs,
+    }
+}
+
+fn new_islands(
+    n_islands: usize,
+    migration_interval: usize,
+) -> Result<Islands, CalibrationError> {
+    Islands::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+        n_islands,
+        migration_interval,
+        1,
+    )
+}
+
+fn init(islands: &mut Islands, f: &Forcings) {
+    islands
+        .init(
+            f.precip.view(),
+            None,
+            f.pet.view(),
+            f.doy.view(),
+            None,
+            None,
+            f.obs.view(),
+            10,
+        )
+        .unwrap();
+}
+
+fn step(
+    islands: &mut Islands,
+    f: &Forcings,
+) -> (bool, Array1<f64>, Array1<f64>, Array1<f64>) {
+    islands
+        .step(
+            f.precip.view(),
+            None,
+            f.pet.view(),
+            f.doy.view(),
+            None,
+            None,
+            f.obs.view(),
+            10,
+        )
+        .unwrap()
+}
+
+// =============================================================================
+// Constructor Tests
+// =============================================================================
+
+#[test]
+fn test_islands_no_islands() {
+    assert!(matches!(
+        new_islands(0, 5),
+        Err(CalibrationError::NoIslands)
+    ));
+}
+
+#[test]
+fn test_islands_too_many_migrants() {
+    // 2 complexes of 2 * 4 + 1 points
+    let result = Islands::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+        2,
+        5,
+        18,
+    );
+    assert!(matches!(
+        result,
+        Err(CalibrationError::TooManyMigrants(18, 18))
+    ));
+}
+
+#[test]
+fn test_islands_invalid_model() {
+    let result = Islands::new(
+        "unknown",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+        2,
+        5,
+        1,
+    );
+    assert!(matches!(result, Err(CalibrationError::Hydro(_))));
+}
+
+// =============================================================================
+// Step Tests
+// =============================================================================
+
+#[test]
+fn test_islands_single_island_matches_sce() {
+    let f = forcings();
+    let mut single = new_islands(1, 1).unwrap();
+    init(&mut single, &f);
+
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+    )
+    .unwrap();
+    sce.init(
+        f.precip.view(),
+        None,
+        f.pet.view(),
+        f.doy.view(),
+        None,
+        None,
+        f.obs.view(),
+        10,
+    )
+    .unwrap();
+
+    for _ in 0..3 {
+        let expected = sce
+            .step(
+                f.precip.view(),
+                None,
+                f.pet.view(),
+                f.doy.view(),
+                None,
+                None,
+                f.obs.view(),
+                10,
+            )
+            .unwrap();
+        assert_eq!(step(&mut single, &f), expected);
+    }
+}
+
+#[test]
+fn test_islands_returns_global_best() {
+    let f = forcings();
+    let mut islands = new_islands(3, 2).unwrap();
+    init(&mut islands, &f);
+
+    for _ in 0..4 {
+        let (done, params, simulation, objectives) = step(&mut islands, &f);
+        let results = islands.island_results();
+        assert_eq!(results.len(), 3);
+        let results: Vec<_> = results.iter().flatten().collect();
+        assert_eq!(results.len(), 3);
+
+        let best_nse = results
+            .iter()
+            .map(|result| result.3[1])
+            .fold(f64::NEG_INFINITY, f64::max);
+        assert_eq!(objectives[1], best_nse);
+        assert!(results.iter().any(|result| result.1 == params
+            && result.2 == simulation
+            && result.3 == objectives));
+        assert_eq!(done, results.iter().all(|result| result.0));
+    }
+}
+
+#[test]
+fn test_islands_use_different_seeds() {
+    let f = forcings();
+    let mut islands = new_islands(2, 0).unwrap();
+    init(&mut islands, &f);
+    step(&mut islands, &f);
+
+    let results = islands.island_results();
+    assert_ne!(
+        results[0].as_ref().unwrap().1,
+        results[1].as_ref().unwrap().1
+    );
+}
+
+#[test]
+fn test_islands_reproducible() {
+    let f = forcings();
+    let run = || {
+        let mut islands = new_islands(3, 1).unwrap();
+        init(&mut islands, &f);
+        (0..4).map(|_| step(&mut islands, &f)).collect::<Vec<_>>()
+    };
+    assert_eq!(run(), run());
+}
+
+#[test]
+fn test_islands_migration_shares_best() {
+    let f = forcings();
+    let mut islands = new_islands(2, 1).unwrap();
+    init(&mut islands, &f);
+    step(&mut islands, &f);
+    let before: Vec<f64> = islands
+        .island_results()
+        .iter()
+        .map(|result| result.as_ref().unwrap().3[1])
+        .collect();
+    let best_before = before.iter().cloned().fold(f64::NEG_INFINITY, f64::max);
+
+    // after migrating, both islands hold the best point, so their next
+    // results are at least as good
+    step(&mut islands, &f);
+    for result in islands.island_results().iter().flatten() {
+        assert!(result.0 || result.3[1] >= best_before);
+    }
+}
+
+#[test]
+fn test_islands_converge() {
+    let f = forcings();
+    let mut islands = new_islands(2, 2).unwrap();
+    init(&mut islands, &f);
+
+    let mut done = false;
+    for _ in 0..200 {
+        done = step(&mut islands, &f).0;
+        if done {
+            break;
+        }
+    }
+    assert!(done);
+    assert!(islands.island_results().iter().flatten().all(|r| r.0));
+}
+
+#[test]
+fn test_islands_fixed_params() {
+    let f = forcings();
+    let mut islands = new_islands(2, 1)
+        .unwrap()
+        .with_fixed_params(&[(0, 350.0)])
+        .unwrap();
+    init(&mut islands, &f);
+
+    for _ in 0..3 {
+        let (_, params, _, _) = step(&mut islands, &f);
+        assert_eq!(params.len(), 4);
+        assert_eq!(params[0], 350.0);
+    }
+    assert!(islands
+        .island_results()
+        .iter()
+        .flatten()
+        .all(|result| result.1[0] == 350.0));
+}
+
+#[test]
+fn test_islands_fixed_params_too_many_migrants() {
+    // 2 complexes of 2 * 4 + 1 points, then of 2 * 2 + 1 points
+    let result = Islands::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+        2,
+        5,
+        14,
+    )
+    .unwrap()
+    .with_fixed_params(&[(0, 350.0), (2, 100.0)]);
+    assert!(matches!(
+        result,
+        Err(CalibrationError::TooManyMigrants(14, 10))
+    ));
+}
+
+// =============================================================================
+// Checkpoint Tests
+// =============================================================================
+
+#[test]
+fn test_islands_checkpoint_resumes_identically() {
+    let f = forcings();
+    let mut original = new_islands(3, 2).unwrap();
+    init(&mut original, &f);
+    for _ in 0..3 {
+        step(&mut original, &f);
+    }
+
+    let mut resumed =
+        Islands::from_checkpoint(&original.checkpoint()).unwrap();
+    assert_eq!(resumed.checkpoint(), original.checkpoint());
+    for _ in 0..3 {
+        assert_eq!(step(&mut resumed, &f), step(&mut original, &f));
+    }
+}
+
+#[test]
+fn test_islands_from_checkpoint_invalid() {
+    let bytes = new_islands(2, 2).unwrap().checkpoint();
+    for len in [0, 9, bytes.len() / 2, bytes.len() - 1] {
+        let result = Islands::from_checkpoint(&bytes[..len]);
+        assert!(
+            matches!(result, Err(CalibrationError::InvalidCheckpoint(_))),
+            "truncated to {len} bytes"
+        );
+    }
+
+    // checkpoints of an older format are refused, including the islands'
+    let mut older = bytes.clone();
+    older[8] = holmes_rs::calibration::checkpoint::VERSION - 1;
+    assert!(matches!(
+        Islands::from_checkpoint(&older),
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+    let island = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+    )
+    .unwrap()
+    .checkpoint();
+    let offset = bytes.len() - island.len();
+    let mut older = bytes.clone();
+    older[offset + 8] = holmes_rs::calibration::checkpoint::VERSION - 1;
+    assert!(matches!(
+        Islands::from_checkpoint(&older),
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+
+    // a single calibration isn't a set of islands
+    let sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+    )
+    .unwrap();
+    assert!(matches!(
+        Islands::from_checkpoint(&sce.checkpoint()),
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+}
@@ -1,2 +1,3 @@
+mod islands_tests;
 mod sce_tests;
 mod utils_tests;
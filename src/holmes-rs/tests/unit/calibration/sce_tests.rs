@@ -1,6 +1,10 @@
 use crate::helpers;
 use holmes_rs::calibration::sce::{sort_population, Sce};
-use holmes_rs::calibration::utils::Objective;
+use holmes_rs::calibration::utils::{
+    CalibrationError, Objective, SpinUp, SNOW_GRID_STEPS,
+};
+use holmes_rs::hydro::HydroError;
+use holmes_rs::snow::SnowError;
 use ndarray::{array, Array1, Array2};
 use proptest::prelude::*;
 use std::str::FromStr;
@@ -363,6 +367,314 @@ fn test_sce_respects_max_evaluations() {
     assert!(done, "Should stop due to max_evaluations");
 }
 
+// =============================================================================
+// Parallel Evolution Tests
+// =============================================================================
+
+fn run_parallel_steps(n_threads: usize, n_steps: usize) -> Array1<f64> {
+    let pool = rayon::ThreadPoolBuilder::new()
+        .num_threads(n_threads)
+        .build()
+        .unwrap();
+
+    let n = 100;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 99);
+
+    pool.install(|| {
+        let mut sce = Sce::new(
+            "gr4j",
+            None,
+            Objective::Nse,
+            holmes_rs::calibration::utils::Transformation::None,
+            4,
+            10,
+            0.0,
+            0.0,
+            100_000,
+            42,
+        )
+        .unwrap()
+        .with_parallel(true);
+
+        sce.init(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            0,
+        )
+        .unwrap();
+
+        let mut best_params = Array1::zeros(0);
+        for _ in 0..n_steps {
+            let (_, params, sim, objectives) = sce
+                .step(
+                    precip.view(),
+                    None,
+                    pet.view(),
+                    doy.view(),
+                    None,
+                    None,
+                    obs.view(),
+                    0,
+                )
+                .unwrap();
+            assert_eq!(params.len(), 4);
+            assert_eq!(sim.len(), n);
+            assert!(objectives.iter().all(|&o| o.is_finite()));
+            best_params = params;
+        }
+        best_params
+    })
+}
+
+#[test]
+fn test_sce_parallel_is_reproducible() {
+    let first = run_parallel_steps(2, 3);
+    let second = run_parallel_steps(2, 3);
+
+    assert_eq!(first, second, "Same seed should give the same result");
+}
+
+#[test]
+fn test_sce_parallel_independent_of_thread_count() {
+    let single = run_parallel_steps(1, 3);
+    let multi = run_parallel_steps(4, 3);
+
+    assert_eq!(
+        single, multi,
+        "Result should not depend on the number of threads"
+    );
+}
+
+#[test]
+fn test_sce_parallel_respects_max_evaluations() {
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        3,
+        10,
+        0.001,
+        1e-10,
+        50,
+        42,
+    )
+    .unwrap()
+    .with_parallel(true);
+
+    let n = 30;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 99);
+
+    sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        0,
+    )
+    .unwrap();
+
+    let mut done = false;
+    let mut iterations = 0;
+    while !done && iterations < 100 {
+        let (d, _, _, _) = sce
+            .step(
+                precip.view(),
+                None,
+                pet.view(),
+                doy.view(),
+                None,
+                None,
+                obs.view(),
+                0,
+            )
+            .unwrap();
+        done = d;
+        iterations += 1;
+    }
+
+    assert!(done, "Should stop due to max_evaluations");
+}
+
+// =============================================================================
+// Spin-Up Tests
+// =============================================================================
+
+fn run_spin_up_steps(spin_up: Option<SpinUp>, warmup_steps: usize) -> Sce {
+    let n = 800;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 99);
+
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        10,
+        0.0,
+        0.0,
+        100_000,
+        42,
+    )
+    .unwrap()
+    .with_spin_up(spin_up);
+
+    sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        warmup_steps,
+    )
+    .unwrap();
+    let (_, params, sim, objectives) = sce
+        .step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            warmup_steps,
+        )
+        .unwrap();
+    assert_eq!(params.len(), 4);
+    assert_eq!(sim.len(), n);
+    // a spun-up warmup isn't simulated
+    assert!(sim.iter().skip(warmup_steps).all(|&q| q.is_finite()));
+    assert!(objectives.iter().all(|&o| o.is_finite()));
+    sce
+}
+
+#[test]
+fn test_sce_with_spin_up() {
+    let spin_up = SpinUp {
+        tolerance: 1e-3,
+        max_iterations: 5,
+    };
+    run_spin_up_steps(Some(spin_up), 365);
+}
+
+#[test]
+fn test_sce_without_spin_up_is_unchanged() {
+    let n = 800;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 99);
+    let step = |sce: &mut Sce| {
+        sce.step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            365,
+        )
+        .unwrap()
+        .1
+    };
+
+    let mut with_none = run_spin_up_steps(None, 365);
+    let mut default = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        10,
+        0.0,
+        0.0,
+        100_000,
+        42,
+    )
+    .unwrap();
+    default
+        .init(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            365,
+        )
+        .unwrap();
+    step(&mut default);
+
+    assert_eq!(step(&mut with_none), step(&mut default));
+}
+
+#[test]
+fn test_sce_spin_up_follows_warmup_changes() {
+    let spin_up = SpinUp {
+        tolerance: 1e-3,
+        max_iterations: 5,
+    };
+    let mut sce = run_spin_up_steps(Some(spin_up), 365);
+
+    let n = 800;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 99);
+    let (_, _, sim, objectives) = sce
+        .step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            100,
+        )
+        .unwrap();
+
+    assert_eq!(sim.len(), n);
+    // a warmup shorter than a year is simulated instead of spun up
+    assert!(sim.iter().all(|&q| q.is_finite()));
+    assert!(objectives.iter().all(|&o| o.is_finite()));
+
+    let (_, _, sim, _) = sce
+        .step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            365,
+        )
+        .unwrap();
+    assert!(sim.iter().take(365).all(|q| q.is_nan()));
+}
+
 // =============================================================================
 // Objective Function Tests
 // =============================================================================
@@ -767,55 +1079,565 @@ fn test_sce_with_snow_model_calibration() {
 }
 
 // =============================================================================
-// Anti-Fragility Tests (expected to fail with current implementation)
+// Checkpoint Tests
 // =============================================================================
 
-#[test]
-#[ignore = "R4-DATA-02: sqrt transformation on negative simulated values produces NaN"]
-fn test_sce_sqrt_transform_negative() {
-    // If simulations produce negative values (which GR4J shouldn't, but other models might)
-    // sqrt transformation would produce NaN
-    let mut sce = Sce::new(
+fn checkpoint_sce(spin_up: Option<SpinUp>) -> Sce {
+    Sce::new(
         "gr4j",
-        None,
-        Objective::Nse,
+        Some("cemaneige"),
+        Objective::Kge,
         holmes_rs::calibration::utils::Transformation::Sqrt,
         2,
         5,
         0.1,
         0.0001,
-        50,
+        1000,
         42,
     )
-    .unwrap();
+    .unwrap()
+    .with_spin_up(spin_up)
+}
 
-    let n = 30;
+#[test]
+fn test_sce_checkpoint_resumes_identically() {
+    let n = 60;
     let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 5.0, 10.0, 2.0, 43);
     let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
     let doy = helpers::generate_doy(1, n);
-    // Negative observations to test sqrt transformation issue
-    let obs = Array1::from_elem(n, -1.0);
-
-    let init_result = sce.init(
+    let elevation_layers =
+        helpers::generate_elevation_layers(3, 500.0, 1500.0);
+    let (defaults, _) = holmes_rs::hydro::gr4j::init();
+    let obs = holmes_rs::hydro::gr4j::simulate(
+        defaults.view(),
         precip.view(),
-        None,
         pet.view(),
-        doy.view(),
-        None,
-        None,
-        obs.view(),
-        0,
-    );
-
-    // Should either handle gracefully or return error
-    if init_result.is_ok() {
-        let step_result = sce.step(
+    )
+    .unwrap();
+    let spin_up = SpinUp {
+        tolerance: 1e-3,
+        max_iterations: 3,
+    };
+
+    let mut original = checkpoint_sce(Some(spin_up));
+    original
+        .init(
             precip.view(),
-            None,
+            Some(temp.view()),
             pet.view(),
             doy.view(),
-            None,
-            None,
+            Some(elevation_layers.view()),
+            Some(1000.0),
+            obs.view(),
+            10,
+        )
+        .unwrap();
+    for _ in 0..2 {
+        original
+            .step(
+                precip.view(),
+                Some(temp.view()),
+                pet.view(),
+                doy.view(),
+                Some(elevation_layers.view()),
+                Some(1000.0),
+                obs.view(),
+                10,
+            )
+            .unwrap();
+    }
+
+    let mut resumed = Sce::from_checkpoint(&original.checkpoint()).unwrap();
+    assert_eq!(resumed.checkpoint(), original.checkpoint());
+
+    for _ in 0..3 {
+        let expected = original
+            .step(
+                precip.view(),
+                Some(temp.view()),
+                pet.view(),
+                doy.view(),
+                Some(elevation_layers.view()),
+                Some(1000.0),
+                obs.view(),
+                10,
+            )
+            .unwrap();
+        let result = resumed
+            .step(
+                precip.view(),
+                Some(temp.view()),
+                pet.view(),
+                doy.view(),
+                Some(elevation_layers.view()),
+                Some(1000.0),
+                obs.view(),
+                10,
+            )
+            .unwrap();
+        assert_eq!(result, expected);
+    }
+}
+
+#[test]
+fn test_sce_checkpoint_before_init() {
+    let sce = checkpoint_sce(None);
+    let resumed = Sce::from_checkpoint(&sce.checkpoint()).unwrap();
+    assert_eq!(resumed.checkpoint(), sce.checkpoint());
+}
+
+#[test]
+fn test_sce_from_checkpoint_invalid_magic() {
+    let mut bytes = checkpoint_sce(None).checkpoint();
+    bytes[0] = b'X';
+    let result = Sce::from_checkpoint(&bytes);
+    assert!(matches!(
+        result,
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+}
+
+#[test]
+fn test_sce_from_checkpoint_unsupported_version() {
+    let mut bytes = checkpoint_sce(None).checkpoint();
+    bytes[8] = holmes_rs::calibration::checkpoint::VERSION + 1;
+    let result = Sce::from_checkpoint(&bytes);
+    assert!(matches!(
+        result,
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+}
+
+#[test]
+fn test_sce_from_checkpoint_older_version() {
+    let mut bytes = checkpoint_sce(None).checkpoint();
+    bytes[8] = holmes_rs::calibration::checkpoint::VERSION - 1;
+    let result = Sce::from_checkpoint(&bytes);
+    assert!(matches!(
+        result,
+        Err(CalibrationError::InvalidCheckpoint(message))
+            if message.contains("unsupported version")
+    ));
+}
+
+#[test]
+fn test_sce_from_checkpoint_truncated() {
+    let bytes = checkpoint_sce(None).checkpoint();
+    for len in [0, 9, bytes.len() / 2, bytes.len() - 1] {
+        let result = Sce::from_checkpoint(&bytes[..len]);
+        assert!(
+            matches!(result, Err(CalibrationError::InvalidCheckpoint(_))),
+            "truncated to {len} bytes"
+        );
+    }
+}
+
+#[test]
+fn test_sce_from_checkpoint_trailing_bytes() {
+    let mut bytes = checkpoint_sce(None).checkpoint();
+    bytes.push(0);
+    let result = Sce::from_checkpoint(&bytes);
+    assert!(matches!(
+        result,
+        Err(CalibrationError::InvalidCheckpoint(_))
+    ));
+}
+
+#[test]
+fn test_sce_from_checkpoint_invalid_complexes() {
+    let bytes = checkpoint_sce(None).checkpoint();
+    // after the header, the model names, the objective and transformation
+    let offset = 9 + (8 + "gr4j".len()) + (1 + 8 + "cemaneige".len()) + 2;
+    assert_eq!(bytes[offset..offset + 8], 2u64.to_le_bytes());
+    for n_complexes in [0, 3, u64::MAX / 2] {
+        let mut bytes = bytes.clone();
+        bytes[offset..offset + 8].copy_from_slice(&n_complexes.to_le_bytes());
+        // refused before a population is allocated for them
+        assert!(
+            matches!(
+                Sce::from_checkpoint(&bytes),
+                Err(CalibrationError::InvalidCheckpoint(_))
+            ),
+            "{n_complexes} complexes"
+        );
+    }
+}
+
+// =============================================================================
+// Evaluation Cache Tests
+// =============================================================================
+
+fn run_cached_sce(
+    cache_size: usize,
+    n_steps: usize,
+) -> (Sce, Vec<(bool, Array1<f64>, Array1<f64>, Array1<f64>)>) {
+    let n = 100;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let (defaults, _) = holmes_rs::hydro::gr4j::init();
+    let obs = holmes_rs::hydro::gr4j::simulate(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+    )
+    .unwrap();
+
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+    )
+    .unwrap()
+    .with_parallel(true)
+    .with_cache(cache_size);
+    sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        10,
+    )
+    .unwrap();
+    let results = (0..n_steps)
+        .map(|_| {
+            sce.step(
+                precip.view(),
+                None,
+                pet.view(),
+                doy.view(),
+                None,
+                None,
+                obs.view(),
+                10,
+            )
+            .unwrap()
+        })
+        .collect();
+    (sce, results)
+}
+
+#[test]
+fn test_sce_cache_reuses_simulations() {
+    let (sce, _) = run_cached_sce(1 << 20, 3);
+    let info = sce.cache_info();
+    // the best simulation of each step was already evaluated
+    assert!(info.hits >= 3);
+    assert!(info.misses > 0);
+    assert_eq!(info.capacity, 1 << 20);
+}
+
+#[test]
+fn test_sce_cache_reproducible() {
+    let (_, first) = run_cached_sce(1 << 20, 3);
+    let (_, second) = run_cached_sce(1 << 20, 3);
+    assert_eq!(first, second);
+}
+
+#[test]
+fn test_sce_cache_bounded() {
+    // room for 5 simulations of 100 days of the 4 GR4J parameters
+    let entry = holmes_rs::calibration::utils::entry_bytes(
+        &[0; 4],
+        &Array1::zeros(100),
+    );
+    let (sce, _) = run_cached_sce(5 * entry, 3);
+    let info = sce.cache_info();
+    assert_eq!(info.entries, 5);
+    assert_eq!(info.size, 5 * entry);
+    assert_eq!(info.capacity, 5 * entry);
+}
+
+#[test]
+fn test_sce_without_cache() {
+    let (sce, _) = run_cached_sce(0, 1);
+    let info = sce.cache_info();
+    assert_eq!(
+        (
+            info.hits,
+            info.misses,
+            info.entries,
+            info.size,
+            info.capacity
+        ),
+        (0, 0, 0, 0, 0)
+    );
+}
+
+#[test]
+fn test_sce_checkpoint_keeps_cache_size() {
+    let sce = checkpoint_sce(None).with_cache(50);
+    let resumed = Sce::from_checkpoint(&sce.checkpoint()).unwrap();
+    assert_eq!(resumed.cache_info().capacity, 50);
+    assert_eq!(resumed.checkpoint(), sce.checkpoint());
+}
+
+// =============================================================================
+// Snow Calibration Tests
+// =============================================================================
+
+struct SnowForcings {
+    precip: Array1<f64>,
+    temp: Array1<f64>,
+    pet: Array1<f64>,
+    doy: Array1<usize>,
+    elevation_layers: Array1<f64>,
+    obs: Array1<f64>,
+}
+
+fn snow_forcings() -> SnowForcings {
+    let n = 60;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 5.0, 10.0, 2.0, 43);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let elevation_layers =
+        helpers::generate_elevation_layers(3, 500.0, 1500.0);
+    let (snow_defaults, _) = holmes_rs::snow::cemaneige::init();
+    let effective_precip = holmes_rs::snow::cemaneige::simulate(
+        snow_defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    let (hydro_defaults, _) = holmes_rs::hydro::gr4j::init();
+    let obs = holmes_rs::hydro::gr4j::simulate(
+        hydro_defaults.view(),
+        effective_precip.view(),
+        pet.view(),
+    )
+    .unwrap();
+    SnowForcings {
+        precip,
+        temp,
+        pet,
+        doy,
+        elevation_layers,
+        obs,
+    }
+}
+
+fn snow_sce(fixed: &[(usize, f64)], snow_cache_size: usize) -> Sce {
+    Sce::new(
+        "gr4j",
+        Some("cemaneige"),
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        1000,
+        42,
+    )
+    .unwrap()
+    .with_fixed_params(fixed)
+    .unwrap()
+    .with_parallel(true)
+    .with_snow_cache(snow_cache_size)
+}
+
+fn snow_init(sce: &mut Sce, f: &SnowForcings) {
+    sce.init(
+        f.precip.view(),
+        Some(f.temp.view()),
+        f.pet.view(),
+        f.doy.view(),
+        Some(f.elevation_layers.view()),
+        Some(1000.0),
+        f.obs.view(),
+        10,
+    )
+    .unwrap();
+}
+
+fn snow_step(
+    sce: &mut Sce,
+    f: &SnowForcings,
+) -> (bool, Array1<f64>, Array1<f64>, Array1<f64>) {
+    sce.step(
+        f.precip.view(),
+        Some(f.temp.view()),
+        f.pet.view(),
+        f.doy.view(),
+        Some(f.elevation_layers.view()),
+        Some(1000.0),
+        f.obs.view(),
+        10,
+    )
+    .unwrap()
+}
+
+#[test]
+fn test_sce_fixed_params_keep_their_value() {
+    let f = snow_forcings();
+    let mut sce = snow_sce(&[(2, 350.0)], 0);
+    // 2 complexes of 2 * 6 + 1 points for the 6 free parameters
+    assert_eq!(sce.population_size(), 26);
+    snow_init(&mut sce, &f);
+
+    for _ in 0..3 {
+        let (_, params, simulation, _) = snow_step(&mut sce, &f);
+        assert_eq!(params.len(), 7);
+        assert_eq!(params[2], 350.0);
+        assert!(simulation.iter().all(|x| x.is_finite()));
+    }
+    assert_eq!(sce.best_points(1).0.ncols(), 6);
+}
+
+#[test]
+fn test_sce_fixed_params_invalid() {
+    let new = || {
+        Sce::new(
+            "gr4j",
+            None,
+            Objective::Nse,
+            holmes_rs::calibration::utils::Transformation::None,
+            2,
+            5,
+            0.1,
+            0.0001,
+            1000,
+            42,
+        )
+        .unwrap()
+    };
+    for fixed in [
+        vec![(4, 1.0)],
+        vec![(1, 1.0), (1, 2.0)],
+        vec![(0, 1.0), (1, 1.0), (2, 1.0), (3, 1.0)],
+    ] {
+        assert!(
+            matches!(
+                new().with_fixed_params(&fixed),
+                Err(CalibrationError::InvalidFixedParams(_))
+            ),
+            "{fixed:?}"
+        );
+    }
+}
+
+#[test]
+fn test_sce_snow_cache_reuses_snow_output() {
+    let f = snow_forcings();
+    let mut sce = snow_sce(&[(2, 350.0)], 1 << 20);
+    snow_init(&mut sce, &f);
+    for _ in 0..3 {
+        snow_step(&mut sce, &f);
+    }
+    let info = sce.snow_cache_info();
+    // the best simulation of each step reuses the snow output of its point
+    assert!(info.hits >= 3);
+    assert!(info.misses > 0);
+    assert_eq!(info.capacity, 1 << 20);
+
+    // ctg and kf are searched on the snow grid
+    let (points, _) = sce.best_points(sce.population_size());
+    for point in points.rows() {
+        for (value, upper) in [(point[0], 1.0), (point[1], 20.0)] {
+            let index = value / (upper / SNOW_GRID_STEPS);
+            assert!((index - index.round()).abs() < 1e-6, "{value}");
+        }
+    }
+}
+
+#[test]
+fn test_sce_snow_cache_reproducible() {
+    let f = snow_forcings();
+    let run = || {
+        let mut sce = snow_sce(&[(2, 350.0)], 1 << 20);
+        snow_init(&mut sce, &f);
+        (0..3).map(|_| snow_step(&mut sce, &f)).collect::<Vec<_>>()
+    };
+    assert_eq!(run(), run());
+}
+
+#[test]
+fn test_sce_snow_cache_without_snow_model() {
+    let (sce, _) = run_cached_sce(0, 1);
+    let sce = sce.with_snow_cache(100);
+    assert_eq!(sce.snow_cache_info().capacity, 0);
+}
+
+#[test]
+fn test_sce_checkpoint_keeps_fixed_params() {
+    let f = snow_forcings();
+    let mut original = snow_sce(&[(2, 350.0)], 50);
+    snow_init(&mut original, &f);
+    snow_step(&mut original, &f);
+
+    let mut resumed = Sce::from_checkpoint(&original.checkpoint()).unwrap();
+    assert_eq!(resumed.checkpoint(), original.checkpoint());
+    assert_eq!(resumed.snow_cache_info().capacity, 50);
+    for _ in 0..2 {
+        assert_eq!(snow_step(&mut resumed, &f), snow_step(&mut original, &f));
+    }
+}
+
+// =============================================================================
+// Anti-Fragility Tests (expected to fail with current implementation)
+// =============================================================================
+
+#[test]
+#[ignore = "R4-DATA-02: sqrt transformation on negative simulated values produces NaN"]
+fn test_sce_sqrt_transform_negative() {
+    // If simulations produce negative values (which GR4J shouldn't, but other models might)
+    // sqrt transformation would produce NaN
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::Sqrt,
+        2,
+        5,
+        0.1,
+        0.0001,
+        50,
+        42,
+    )
+    .unwrap();
+
+    let n = 30;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    // Negative observations to test sqrt transformation issue
+    let obs = Array1::from_elem(n, -1.0);
+
+    let init_result = sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        0,
+    );
+
+    // Should either handle gracefully or return error
+    if init_result.is_ok() {
+        let step_result = sce.step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
             obs.view(),
             0,
         );
@@ -989,6 +1811,159 @@ fn test_step_with_mismatched_observations_length() {
     );
 }
 
+#[test]
+fn test_step_validates_forcings_of_new_length() {
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        100,
+        42,
+    )
+    .unwrap();
+
+    let n = 50;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 45);
+
+    sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        0,
+    )
+    .unwrap();
+
+    // Forcings of another length are validated again before being used
+    let mut new_precip = helpers::generate_precipitation(n + 10, 5.0, 0.3, 46);
+    new_precip[3] = -1.0;
+    let new_pet = helpers::generate_pet(n + 10, 3.0, 1.0, 47);
+    let new_doy = helpers::generate_doy(1, n + 10);
+    let new_obs = helpers::generate_precipitation(n + 10, 3.0, 0.5, 48);
+
+    let result = sce.step(
+        new_precip.view(),
+        None,
+        new_pet.view(),
+        new_doy.view(),
+        None,
+        None,
+        new_obs.view(),
+        0,
+    );
+    assert!(matches!(
+        result,
+        Err(CalibrationError::Hydro(HydroError::NegativeInput { .. }))
+    ));
+}
+
+#[test]
+fn test_step_validates_changed_forcings_of_same_length() {
+    let mut sce = Sce::new(
+        "gr4j",
+        None,
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        100,
+        42,
+    )
+    .unwrap();
+
+    let n = 50;
+    let mut precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 45);
+    let step = |sce: &mut Sce, precip: &Array1<f64>| {
+        sce.step(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+            obs.view(),
+            0,
+        )
+    };
+
+    sce.init(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        obs.view(),
+        0,
+    )
+    .unwrap();
+    assert!(step(&mut sce, &precip).is_ok());
+
+    // Forcings changed in place are validated again before being used
+    precip[3] = -1.0;
+    assert!(matches!(
+        step(&mut sce, &precip),
+        Err(CalibrationError::Hydro(HydroError::NegativeInput { .. }))
+    ));
+}
+
+#[test]
+fn test_step_without_init_validates_forcings() {
+    let mut sce = Sce::new(
+        "gr4j",
+        Some("cemaneige"),
+        Objective::Nse,
+        holmes_rs::calibration::utils::Transformation::None,
+        2,
+        5,
+        0.1,
+        0.0001,
+        100,
+        42,
+    )
+    .unwrap();
+
+    let n = 50;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 0.0, 10.0, 2.0, 43);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let mut doy = helpers::generate_doy(1, n);
+    doy[0] = 0;
+    let elevation_layers = array![1000.0];
+    let obs = helpers::generate_precipitation(n, 3.0, 0.5, 45);
+
+    let result = sce.step(
+        precip.view(),
+        Some(temp.view()),
+        pet.view(),
+        doy.view(),
+        Some(elevation_layers.view()),
+        Some(1000.0),
+        obs.view(),
+        0,
+    );
+    assert!(matches!(
+        result,
+        Err(CalibrationError::Snow(SnowError::InvalidDayOfYear { .. }))
+    ));
+}
+
 #[test]
 fn test_convergence_with_perfect_match() {
     // Test the zero mean_recent branch (line 302) by having perfect simulation match
@@ -1,10 +1,13 @@
 use crate::helpers;
 use holmes_rs::calibration::utils::{
-    CalibrationError, Objective, Transformation,
+    entry_bytes, run_simulate, CacheInfo, CalibrationError, EvaluationCache,
+    Objective, Transformation,
 };
 use holmes_rs::hydro::{self, HydroError};
 use holmes_rs::snow;
+use ndarray::Array1;
 use std::str::FromStr;
+use std::sync::Arc;
 
 // =============================================================================
 // Objective Enum Tests
@@ -150,7 +153,7 @@ fn test_compose_simulate_hydro_only() {
     use holmes_rs::calibration::utils::compose_simulate;
     use ndarray::array;
 
-    let (_, hydro_simulate) = hydro::get_model("gr4j").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
     let simulate = compose_simulate(None, hydro_simulate, 0);
 
     // Prepare test data
@@ -160,7 +163,8 @@ fn test_compose_simulate_hydro_only() {
     let doy = helpers::generate_doy(1, 50);
 
     // No snow model, so snow params are None
-    let result = simulate(
+    let result = run_simulate(
+        &simulate,
         params.view(),
         precip.view(),
         None,
@@ -182,7 +186,7 @@ fn test_compose_simulate_with_snow() {
     use ndarray::array;
 
     let (_, snow_simulate) = snow::get_model("cemaneige").unwrap();
-    let (_, hydro_simulate) = hydro::get_model("gr4j").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
     let simulate = compose_simulate(Some(snow_simulate), hydro_simulate, 3);
 
     // Combined params: 3 snow + 4 hydro = 7 total
@@ -195,7 +199,8 @@ fn test_compose_simulate_with_snow() {
     let median_elevation = 1000.0;
 
     // Snow model requires temperature, elevation_bands, and median_elevation
-    let result = simulate(
+    let result = run_simulate(
+        &simulate,
         params.view(),
         precip.view(),
         Some(temp.view()),
@@ -211,6 +216,233 @@ fn test_compose_simulate_with_snow() {
     assert!(streamflow.iter().all(|&q| q.is_finite() && q >= 0.0));
 }
 
+// =============================================================================
+// Spin-Up Tests
+// =============================================================================
+
+#[test]
+fn test_climatology_of_warmup() {
+    use holmes_rs::calibration::utils::Climatology;
+
+    let n = 730;
+    let precip = Array1::from_iter((0..n).map(|i| i as f64));
+    let pet = Array1::from_elem(n, 2.0);
+    let doy = helpers::generate_doy(1, n);
+
+    let climatology =
+        Climatology::new(precip.view(), None, pet.view(), doy.view(), 400)
+            .unwrap();
+
+    // the year ends on the day before the scored period, day 36
+    assert_eq!(climatology.day_of_year.len(), 365);
+    assert_eq!(climatology.day_of_year[0], 36);
+    assert_eq!(climatology.day_of_year[364], 35);
+    // days 1 to 35 are in both years of the warmup
+    assert_eq!(climatology.precipitation[0], 35.0);
+    assert_eq!(climatology.precipitation[364], (34.0 + 399.0) / 2.0);
+    assert!(climatology.pet.iter().all(|&p| p == 2.0));
+    assert!(climatology.temperature.is_none());
+}
+
+#[test]
+fn test_climatology_refuses_short_warmup() {
+    use holmes_rs::calibration::utils::Climatology;
+
+    let precip = helpers::generate_precipitation(400, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(400, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 400);
+    let climatology = |warmup_steps| {
+        Climatology::new(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            warmup_steps,
+        )
+    };
+
+    assert!(climatology(364).is_none());
+    assert!(climatology(401).is_none());
+    assert!(climatology(365).is_some());
+}
+
+#[test]
+fn test_compose_spin_up_simulate_continues_from_spun_up_state() {
+    use holmes_rs::calibration::utils::{
+        compose_spin_up_simulate, Climatology, SpinUp, StatefulModels,
+    };
+    use ndarray::{array, s};
+
+    let n = 1000;
+    let warmup_steps = 400;
+    let params = array![300.0, 0.5, 100.0, 2.0];
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let climatology = || {
+        Climatology::new(
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            warmup_steps,
+        )
+        .unwrap()
+    };
+
+    let models = StatefulModels::new("gr4j", None, 0).unwrap();
+    // a null tolerance runs every iteration
+    let spin_up = SpinUp {
+        tolerance: 0.0,
+        max_iterations: 3,
+    };
+    let simulate =
+        compose_spin_up_simulate(models, spin_up, climatology(), warmup_steps);
+    let simulation = run_simulate(
+        &simulate,
+        params.view(),
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+    )
+    .unwrap();
+
+    let (_, simulate_with_state) = hydro::get_stateful_model("gr4j").unwrap();
+    let climatology = climatology();
+    let mut state = None;
+    for _ in 0..3 {
+        let (_, new_state) = simulate_with_state(
+            params.view(),
+            climatology.precipitation.view(),
+            climatology.pet.view(),
+            state.as_ref().map(|s: &Array1<f64>| s.view()),
+        )
+        .unwrap();
+        state = Some(new_state);
+    }
+    let (expected, _) = simulate_with_state(
+        params.view(),
+        precip.slice(s![warmup_steps..]),
+        pet.slice(s![warmup_steps..]),
+        state.as_ref().map(|s| s.view()),
+    )
+    .unwrap();
+
+    assert_eq!(simulation.len(), n);
+    assert_eq!(simulation.slice(s![warmup_steps..]), expected);
+    // the warmup isn't simulated
+    assert!(simulation
+        .slice(s![..warmup_steps])
+        .iter()
+        .all(|q| q.is_nan()));
+}
+
+#[test]
+fn test_compose_spin_up_simulate_stops_when_converged() {
+    use holmes_rs::calibration::utils::{
+        compose_spin_up_simulate, Climatology, SpinUp, StatefulModels,
+    };
+    use ndarray::array;
+
+    let n = 800;
+    let params = array![300.0, 0.5, 100.0, 2.0];
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let run = |tolerance: f64, max_iterations: usize| {
+        let simulate = compose_spin_up_simulate(
+            StatefulModels::new("gr4j", None, 0).unwrap(),
+            SpinUp {
+                tolerance,
+                max_iterations,
+            },
+            Climatology::new(precip.view(), None, pet.view(), doy.view(), 365)
+                .unwrap(),
+            365,
+        );
+        run_simulate(
+            &simulate,
+            params.view(),
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+        )
+        .unwrap()
+    };
+
+    // with an infinite tolerance, the first year is always converged
+    assert_eq!(run(f64::INFINITY, 50), run(0.0, 1));
+    assert_ne!(run(0.0, 2), run(0.0, 1));
+}
+
+#[test]
+fn test_compose_spin_up_simulate_with_snow() {
+    use holmes_rs::calibration::utils::{
+        compose_spin_up_simulate, Climatology, SpinUp, StatefulModels,
+    };
+    use ndarray::array;
+
+    let n = 800;
+    let params = array![0.5, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0];
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 2.0, 15.0, 2.0, 43);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, n);
+    let elevation_layers = array![800.0, 1200.0];
+
+    let simulate = compose_spin_up_simulate(
+        StatefulModels::new("gr4j", Some("cemaneige"), 3).unwrap(),
+        SpinUp {
+            tolerance: 1e-3,
+            max_iterations: 5,
+        },
+        Climatology::new(
+            precip.view(),
+            Some(temp.view()),
+            pet.view(),
+            doy.view(),
+            365,
+        )
+        .unwrap(),
+        365,
+    );
+    let simulation = run_simulate(
+        &simulate,
+        params.view(),
+        precip.view(),
+        Some(temp.view()),
+        pet.view(),
+        doy.view(),
+        Some(elevation_layers.view()),
+        Some(1000.0),
+    )
+    .unwrap();
+
+    assert_eq!(simulation.len(), n);
+    assert!(simulation
+        .iter()
+        .skip(365)
+        .all(|&q| q.is_finite() && q >= 0.0));
+
+    let missing = run_simulate(
+        &simulate,
+        params.view(),
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+    );
+    assert!(matches!(missing, Err(CalibrationError::MissingSnowParams)));
+}
+
 // =============================================================================
 // Check Lengths Tests
 // =============================================================================
@@ -270,6 +502,100 @@ fn test_check_lengths_mismatch() {
     ));
 }
 
+// =============================================================================
+// Validate Forcings Tests
+// =============================================================================
+
+#[test]
+fn test_validate_forcings_valid_with_snow() {
+    use holmes_rs::calibration::utils::validate_forcings;
+    use ndarray::array;
+
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(50, 5.0, 15.0, 2.0, 43);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 50);
+    let elevation_layers = array![1000.0];
+
+    let result = validate_forcings(
+        precip.view(),
+        Some(temp.view()),
+        pet.view(),
+        doy.view(),
+        Some(elevation_layers.view()),
+        Some(1000.0),
+        true,
+    );
+    assert!(result.is_ok());
+}
+
+#[test]
+fn test_validate_forcings_missing_snow_params() {
+    use holmes_rs::calibration::utils::validate_forcings;
+
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 50);
+
+    let result = validate_forcings(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        true,
+    );
+    assert!(matches!(result, Err(CalibrationError::MissingSnowParams)));
+}
+
+#[test]
+fn test_validate_forcings_invalid_snow_forcings() {
+    use holmes_rs::calibration::utils::validate_forcings;
+    use ndarray::array;
+
+    let precip = array![5.0, 5.0];
+    let temp = array![-5.0, 500.0];
+    let pet = array![1.0, 1.0];
+    let doy = array![1_usize, 2];
+    let elevation_layers = array![1000.0];
+
+    let result = validate_forcings(
+        precip.view(),
+        Some(temp.view()),
+        pet.view(),
+        doy.view(),
+        Some(elevation_layers.view()),
+        Some(1000.0),
+        true,
+    );
+    assert!(matches!(result, Err(CalibrationError::Snow(_))));
+}
+
+#[test]
+fn test_validate_forcings_invalid_hydro_forcings() {
+    use holmes_rs::calibration::utils::validate_forcings;
+    use ndarray::array;
+
+    let precip = array![5.0, -1.0];
+    let pet = array![1.0, 1.0];
+    let doy = array![1_usize, 2];
+
+    let result = validate_forcings(
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+        false,
+    );
+    assert!(matches!(
+        result,
+        Err(CalibrationError::Hydro(HydroError::NegativeInput { .. }))
+    ));
+}
+
 // =============================================================================
 // Missing Snow Params Tests
 // =============================================================================
@@ -280,7 +606,7 @@ fn test_compose_simulate_snow_missing_temperature() {
     use ndarray::array;
 
     let (_, snow_simulate) = snow::get_model("cemaneige").unwrap();
-    let (_, hydro_simulate) = hydro::get_model("gr4j").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
     let simulate = compose_simulate(Some(snow_simulate), hydro_simulate, 3);
 
     let params = array![0.5, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0];
@@ -291,7 +617,8 @@ fn test_compose_simulate_snow_missing_temperature() {
     let median_elevation = 1000.0;
 
     // Snow model configured but temperature is None - should fail
-    let result = simulate(
+    let result = run_simulate(
+        &simulate,
         params.view(),
         precip.view(),
         None, // Missing temperature
@@ -310,7 +637,7 @@ fn test_compose_simulate_snow_missing_elevation_bands() {
     use ndarray::array;
 
     let (_, snow_simulate) = snow::get_model("cemaneige").unwrap();
-    let (_, hydro_simulate) = hydro::get_model("gr4j").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
     let simulate = compose_simulate(Some(snow_simulate), hydro_simulate, 3);
 
     let params = array![0.5, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0];
@@ -321,7 +648,8 @@ fn test_compose_simulate_snow_missing_elevation_bands() {
     let median_elevation = 1000.0;
 
     // Snow model configured but elevation_bands is None - should fail
-    let result = simulate(
+    let result = run_simulate(
+        &simulate,
         params.view(),
         precip.view(),
         Some(temp.view()),
@@ -340,7 +668,7 @@ fn test_compose_simulate_snow_missing_median_elevation() {
     use ndarray::array;
 
     let (_, snow_simulate) = snow::get_model("cemaneige").unwrap();
-    let (_, hydro_simulate) = hydro::get_model("gr4j").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
     let simulate = compose_simulate(Some(snow_simulate), hydro_simulate, 3);
 
     let params = array![0.5, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0];
@@ -351,7 +679,8 @@ fn test_compose_simulate_snow_missing_median_elevation() {
     let elevation_layers = array![1000.0];
 
     // Snow model configured but median_elevation is None - should fail
-    let result = simulate(
+    let result = run_simulate(
+        &simulate,
         params.view(),
         precip.view(),
         Some(temp.view()),
@@ -364,6 +693,349 @@ fn test_compose_simulate_snow_missing_median_elevation() {
     assert!(matches!(result, Err(CalibrationError::MissingSnowParams)));
 }
 
+// =============================================================================
+// Evaluation Cache Tests
+// =============================================================================
+
+fn evaluation_cache(capacity: usize) -> EvaluationCache {
+    use ndarray::array;
+
+    EvaluationCache::new(capacity, array![0.0, 10.0], array![1.0, 20.0])
+}
+
+#[test]
+fn test_evaluation_cache_key_quantizes_params() {
+    use ndarray::array;
+
+    let cache = evaluation_cache(10);
+
+    assert_eq!(
+        cache.key(array![0.5, 15.0].view()),
+        cache.key(array![0.5 + 1e-12, 15.0 - 1e-11].view())
+    );
+    assert_ne!(
+        cache.key(array![0.5, 15.0].view()),
+        cache.key(array![0.5 + 1e-6, 15.0].view())
+    );
+}
+
+#[test]
+fn test_evaluation_cache_snap_within_bounds() {
+    use ndarray::array;
+
+    let cache = evaluation_cache(10);
+
+    let params = array![0.25, 12.5];
+    let snapped = cache.snap(&cache.key(params.view()));
+    assert!((&snapped - &params).iter().all(|d| d.abs() < 1e-8));
+
+    let snapped = cache.snap(&[-5, i64::MAX]);
+    assert_eq!(snapped, array![0.0, 20.0]);
+}
+
+#[test]
+fn test_evaluation_cache_counts_hits_and_misses() {
+    use ndarray::array;
+
+    let cache = evaluation_cache(100);
+    let key = cache.key(array![0.5, 15.0].view());
+
+    assert!(cache.get(&key).is_none());
+    cache.insert(key.clone(), Arc::new(array![1.0, 2.0]));
+    assert_eq!(cache.get(&key).as_deref(), Some(&array![1.0, 2.0]));
+
+    assert_eq!(
+        cache.info(),
+        CacheInfo {
+            hits: 1,
+            misses: 1,
+            entries: 1,
+            size: 48,
+            capacity: 100
+        }
+    );
+}
+
+#[test]
+fn test_evaluation_cache_evicts_least_recently_used() {
+    use ndarray::array;
+
+    // room for two simulations of one value
+    let cache = evaluation_cache(2 * entry_bytes(&[0, 0], &array![0.0]));
+    let keys: Vec<Vec<i64>> = [0.1, 0.2, 0.3]
+        .iter()
+        .map(|&x| cache.key(array![x, 15.0].view()))
+        .collect();
+
+    cache.insert(keys[0].clone(), Arc::new(array![1.0]));
+    cache.insert(keys[1].clone(), Arc::new(array![2.0]));
+    // the first key becomes the most recently used
+    assert!(cache.get(&keys[0]).is_some());
+    cache.insert(keys[2].clone(), Arc::new(array![3.0]));
+
+    assert_eq!(cache.info().entries, 2);
+    assert!(cache.get(&keys[0]).is_some());
+    assert!(cache.get(&keys[1]).is_none());
+    assert!(cache.get(&keys[2]).is_some());
+}
+
+#[test]
+fn test_evaluation_cache_bounded_by_bytes() {
+    use ndarray::array;
+
+    let small = array![1.0];
+    let large = Array1::ones(20);
+    let cache = evaluation_cache(3 * entry_bytes(&[0, 0], &small));
+    let keys: Vec<Vec<i64>> = (0..6)
+        .map(|i| cache.key(array![0.1 * i as f64, 15.0].view()))
+        .collect();
+
+    for key in &keys[..3] {
+        cache.insert(key.clone(), Arc::new(small.clone()));
+    }
+    // the middle key becomes the most recently used
+    assert!(cache.get(&keys[1]).is_some());
+    // takes the room of the two least recently used simulations
+    cache.insert(keys[3].clone(), Arc::new(array![1.0, 2.0, 3.0]));
+
+    let info = cache.info();
+    assert_eq!(info.entries, 2);
+    assert!(info.size <= info.capacity);
+    assert!(cache.get(&keys[0]).is_none());
+    assert!(cache.get(&keys[2]).is_none());
+    assert!(cache.get(&keys[1]).is_some());
+    assert!(cache.get(&keys[3]).is_some());
+
+    // evicts in order of use after slots were moved
+    cache.insert(keys[4].clone(), Arc::new(small.clone()));
+    assert!(cache.get(&keys[1]).is_none());
+    assert!(cache.get(&keys[3]).is_some());
+    assert!(cache.get(&keys[4]).is_some());
+
+    // simulations larger than the capacity aren't kept
+    cache.insert(keys[5].clone(), Arc::new(large));
+    assert!(cache.get(&keys[5]).is_none());
+    assert_eq!(cache.info().entries, 2);
+}
+
+#[test]
+fn test_evaluation_cache_clear_keeps_counts() {
+    use ndarray::array;
+
+    let cache = evaluation_cache(100);
+    let key = cache.key(array![0.5, 15.0].view());
+    cache.insert(key.clone(), Arc::new(array![1.0]));
+    assert!(cache.get(&key).is_some());
+
+    cache.clear();
+
+    assert!(cache.get(&key).is_none());
+    let info = cache.info();
+    assert_eq!(
+        (info.hits, info.misses, info.entries, info.size),
+        (1, 1, 0, 0)
+    );
+}
+
+#[test]
+fn test_evaluation_cache_zero_capacity_stores_nothing() {
+    use ndarray::array;
+
+    let cache = evaluation_cache(0);
+    let key = cache.key(array![0.5, 15.0].view());
+    cache.insert(key.clone(), Arc::new(array![1.0]));
+
+    assert!(cache.get(&key).is_none());
+    assert_eq!(cache.info().size, 0);
+}
+
+#[test]
+fn test_cache_simulate_reuses_simulations() {
+    use holmes_rs::calibration::utils::{cache_simulate, compose_simulate};
+    use ndarray::array;
+    use std::sync::Arc;
+
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
+    let (_, bounds) = hydro::gr4j::init();
+    let cache = Arc::new(EvaluationCache::new(
+        1 << 20,
+        bounds.column(0).to_owned(),
+        bounds.column(1).to_owned(),
+    ));
+    let simulate = cache_simulate(
+        compose_simulate(None, hydro_simulate, 0),
+        Arc::clone(&cache),
+    );
+
+    let params = array![350.0, 0.5, 100.0, 2.0];
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 50);
+    let run = |params: &Array1<f64>| {
+        run_simulate(
+            &simulate,
+            params.view(),
+            precip.view(),
+            None,
+            pet.view(),
+            doy.view(),
+            None,
+            None,
+        )
+        .unwrap()
+    };
+
+    let first = run(&params);
+    let second = run(&(&params + 1e-12));
+    let other = run(&array![300.0, 0.5, 100.0, 2.0]);
+
+    assert_eq!(first, second);
+    assert_ne!(first, other);
+    let expected =
+        hydro::gr4j::simulate(params.view(), precip.view(), pet.view())
+            .unwrap();
+    assert!((&first - &expected).iter().all(|d| d.abs() < 1e-6));
+    let info = cache.info();
+    assert_eq!((info.hits, info.misses, info.entries), (1, 2, 2));
+}
+
+#[test]
+fn test_insert_fixed() {
+    use holmes_rs::calibration::utils::insert_fixed;
+    use ndarray::array;
+
+    let free = array![1.0, 2.0, 3.0];
+    assert_eq!(insert_fixed(free.view(), &[]), free);
+    assert_eq!(
+        insert_fixed(free.view(), &[(0, 10.0), (2, 20.0), (5, 30.0)]),
+        array![10.0, 1.0, 20.0, 2.0, 3.0, 30.0]
+    );
+}
+
+#[test]
+fn test_fix_params_inserts_fixed_values() {
+    use holmes_rs::calibration::utils::{compose_simulate, fix_params};
+    use ndarray::array;
+
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
+    let simulate =
+        fix_params(compose_simulate(None, hydro_simulate, 0), vec![(1, 0.5)]);
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 50);
+
+    let result = run_simulate(
+        &simulate,
+        array![350.0, 100.0, 2.0].view(),
+        precip.view(),
+        None,
+        pet.view(),
+        doy.view(),
+        None,
+        None,
+    )
+    .unwrap();
+
+    let expected = hydro::gr4j::simulate(
+        array![350.0, 0.5, 100.0, 2.0].view(),
+        precip.view(),
+        pet.view(),
+    )
+    .unwrap();
+    assert_eq!(result, expected);
+}
+
+#[test]
+fn test_compose_snow_cached_simulate_reuses_snow_output() {
+    use holmes_rs::calibration::utils::{
+        compose_simulate, compose_snow_cached_simulate,
+    };
+    use ndarray::array;
+
+    let (_, snow_simulate) = snow::get_model("cemaneige").unwrap();
+    let hydro_simulate = hydro::get_unchecked_into_model("gr4j").unwrap();
+    let (_, bounds) = snow::cemaneige::init();
+    let cache = Arc::new(EvaluationCache::new(
+        1 << 20,
+        bounds.column(0).to_owned(),
+        bounds.column(1).to_owned(),
+    ));
+    let cached = compose_snow_cached_simulate(
+        snow_simulate,
+        hydro_simulate,
+        3,
+        Arc::clone(&cache),
+    );
+    let uncached = compose_simulate(Some(snow_simulate), hydro_simulate, 3);
+
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(50, 5.0, 15.0, 2.0, 43);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 44);
+    let doy = helpers::generate_doy(1, 50);
+    let elevation_layers = array![1000.0];
+    let run = |simulate: &holmes_rs::calibration::utils::Simulate,
+               params: Array1<f64>| {
+        run_simulate(
+            simulate,
+            params.view(),
+            precip.view(),
+            Some(temp.view()),
+            pet.view(),
+            doy.view(),
+            Some(elevation_layers.view()),
+            Some(1000.0),
+        )
+        .unwrap()
+    };
+
+    for params in [
+        array![0.5, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0],
+        // only the hydro parameters change
+        array![0.5, 5.0, 350.0, 200.0, 1.0, 50.0, 1.5],
+        array![0.3, 5.0, 350.0, 300.0, 0.5, 100.0, 2.0],
+    ] {
+        let result = run(&cached, params.clone());
+        let expected = run(&uncached, params);
+        // the snow model runs on the snow parameters snapped to the grid
+        assert!((&result - &expected).iter().all(|d| d.abs() < 1e-9));
+    }
+    let info = cache.info();
+    assert_eq!((info.hits, info.misses, info.entries), (1, 2, 2));
+}
+
+#[test]
+fn test_prepared_observations_match_values() {
+    use holmes_rs::calibration::utils::PreparedObservations;
+    use ndarray::array;
+
+    let observations = array![1.0, 2.0, 3.0, 4.0];
+    let prepared = PreparedObservations::new(
+        observations.view(),
+        Transformation::None,
+        1,
+    )
+    .unwrap();
+    assert!(prepared.matches(observations.view(), 1));
+    assert!(!prepared.matches(observations.view(), 2));
+    // same length, other values
+    assert!(!prepared.matches(array![1.0, 2.0, 3.0, 5.0].view(), 1));
+}
+
+#[test]
+fn test_snow_grid_snaps_snow_params() {
+    use holmes_rs::calibration::utils::SnowGrid;
+    use ndarray::array;
+
+    let grid = SnowGrid::new(array![0.0, 0.0], array![1.0, 20.0]);
+    let mut params = array![0.123, 20.7, 300.0];
+    grid.snap(params.view_mut());
+    // steps of 0.01 and 0.2, within the bounds, the hydro parameter unchanged
+    assert!((params[0] - 0.12).abs() < 1e-12);
+    assert_eq!(params[1], 20.0);
+    assert_eq!(params[2], 300.0);
+    assert_eq!(grid.n_params(), 2);
+}
+
 // =============================================================================
 // Error Conversion Tests
 // =============================================================================
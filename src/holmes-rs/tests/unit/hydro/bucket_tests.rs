@@ -1,10 +1,12 @@
 use crate::helpers;
 use approx::assert_relative_eq;
 use holmes_rs::hydro::bucket::{
-    init, param_descriptions, param_names, simulate,
+    init, initial_state, param_descriptions, param_names, simulate,
+    simulate_batch, simulate_unchecked, simulate_unchecked_into,
+    simulate_with_state,
 };
 use holmes_rs::hydro::HydroError;
-use ndarray::{array, Array1};
+use ndarray::{array, Array1, Array2};
 use proptest::prelude::*;
 
 // =============================================================================
@@ -201,6 +203,257 @@ fn test_simulate_length_mismatch() {
     assert!(matches!(result, Err(HydroError::LengthMismatch(3, 2))));
 }
 
+// =============================================================================
+// Batch Simulation Tests
+// =============================================================================
+
+#[test]
+fn test_simulate_batch_matches_simulate() {
+    let (defaults, bounds) = init();
+    let n = 200;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 43);
+
+    let lower = bounds.column(0).to_owned();
+    let upper = bounds.column(1).to_owned();
+    let quarter = &lower + (&upper - &lower) * 0.25;
+    let mut params = Array2::zeros((3, 6));
+    params.row_mut(0).assign(&defaults);
+    params.row_mut(1).assign(&quarter);
+    params.row_mut(2).assign(&defaults);
+
+    let streamflow =
+        simulate_batch(params.view(), precip.view(), pet.view()).unwrap();
+
+    assert_eq!(streamflow.shape(), &[3, n]);
+    for (i, row) in params.rows().into_iter().enumerate() {
+        let expected = simulate(row, precip.view(), pet.view()).unwrap();
+        assert_eq!(streamflow.row(i), expected);
+    }
+}
+
+#[test]
+fn test_simulate_batch_column_major_params() {
+    let (defaults, _) = init();
+    let precip = helpers::generate_precipitation(50, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(50, 3.0, 1.0, 43);
+
+    let params = Array2::from_shape_fn((6, 2), |(j, _)| defaults[j]);
+    let streamflow =
+        simulate_batch(params.t(), precip.view(), pet.view()).unwrap();
+
+    let expected =
+        simulate(defaults.view(), precip.view(), pet.view()).unwrap();
+    assert_eq!(streamflow.row(0), expected);
+    assert_eq!(streamflow.row(1), expected);
+}
+
+#[test]
+fn test_simulate_batch_param_count_error() {
+    let params = Array2::<f64>::zeros((2, 5));
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let result = simulate_batch(params.view(), precip.view(), pet.view());
+    assert!(matches!(result, Err(HydroError::ParamsMismatch(6, 5))));
+}
+
+#[test]
+fn test_simulate_batch_invalid_forcings() {
+    let (defaults, _) = init();
+    let params = defaults.insert_axis(ndarray::Axis(0));
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0];
+
+    let result = simulate_batch(params.view(), precip.view(), pet.view());
+    assert!(matches!(result, Err(HydroError::LengthMismatch(3, 2))));
+}
+
+#[test]
+fn test_simulate_batch_invalid_params_row() {
+    let (defaults, bounds) = init();
+    let mut params = Array2::zeros((2, 6));
+    params.row_mut(0).assign(&defaults);
+    params.row_mut(1).assign(&defaults);
+    params[[1, 0]] = bounds[[0, 1]] + 1.0;
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let result = simulate_batch(params.view(), precip.view(), pet.view());
+    assert!(matches!(
+        result,
+        Err(HydroError::ParameterOutOfBounds { name: "x1", .. })
+    ));
+}
+
+#[test]
+fn test_simulate_unchecked_matches_simulate() {
+    let (defaults, _) = init();
+    let precip = helpers::generate_precipitation(200, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(200, 3.0, 1.0, 43);
+
+    let checked =
+        simulate(defaults.view(), precip.view(), pet.view()).unwrap();
+    let unchecked =
+        simulate_unchecked(defaults.view(), precip.view(), pet.view())
+            .unwrap();
+    assert_eq!(checked, unchecked);
+}
+
+#[test]
+fn test_simulate_unchecked_validates_params() {
+    let wrong_params = Array1::from_elem(param_names.len() + 1, 1.0);
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let result =
+        simulate_unchecked(wrong_params.view(), precip.view(), pet.view());
+    assert!(matches!(result, Err(HydroError::ParamsMismatch(_, _))));
+}
+
+#[test]
+fn test_simulate_unchecked_into_matches_simulate() {
+    let (defaults, bounds) = init();
+    let precip = helpers::generate_precipitation(200, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(200, 3.0, 1.0, 43);
+    let upper = bounds.column(1).to_owned();
+
+    // the same buffer is reused between runs
+    let mut out = vec![f64::NAN; precip.len()];
+    for params in [&defaults, &upper] {
+        simulate_unchecked_into(
+            params.view(),
+            precip.view(),
+            pet.view(),
+            &mut out,
+        )
+        .unwrap();
+        let expected =
+            simulate(params.view(), precip.view(), pet.view()).unwrap();
+        assert_eq!(Array1::from_vec(out.clone()), expected);
+    }
+}
+
+#[test]
+fn test_simulate_unchecked_into_output_length_error() {
+    let (defaults, _) = init();
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let mut out = vec![0.0; 2];
+    let result = simulate_unchecked_into(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+        &mut out,
+    );
+    assert!(matches!(result, Err(HydroError::OutputMismatch(3, 2))));
+}
+
+// =============================================================================
+// State Tests
+// =============================================================================
+
+#[test]
+fn test_initial_state_length() {
+    let (defaults, _) = init();
+    let state = initial_state(defaults.view()).unwrap();
+    assert_eq!(state.len(), 3 + defaults[3].ceil() as usize);
+}
+
+#[test]
+fn test_simulate_with_state_default_matches_simulate() {
+    let (defaults, _) = init();
+    let precip = helpers::generate_precipitation(200, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(200, 3.0, 1.0, 43);
+
+    let expected =
+        simulate(defaults.view(), precip.view(), pet.view()).unwrap();
+    let (streamflow, _) =
+        simulate_with_state(defaults.view(), precip.view(), pet.view(), None)
+            .unwrap();
+    let (from_initial, _) = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+        Some(initial_state(defaults.view()).unwrap().view()),
+    )
+    .unwrap();
+    assert_eq!(streamflow, expected);
+    assert_eq!(from_initial, expected);
+}
+
+#[test]
+fn test_simulate_with_state_continues_simulation() {
+    let (defaults, _) = init();
+    let n = 400;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let pet = helpers::generate_pet(n, 3.0, 1.0, 43);
+    let half = n / 2;
+
+    let (full, full_state) =
+        simulate_with_state(defaults.view(), precip.view(), pet.view(), None)
+            .unwrap();
+    let (first, state) = simulate_with_state(
+        defaults.view(),
+        precip.slice(ndarray::s![..half]),
+        pet.slice(ndarray::s![..half]),
+        None,
+    )
+    .unwrap();
+    let (second, final_state) = simulate_with_state(
+        defaults.view(),
+        precip.slice(ndarray::s![half..]),
+        pet.slice(ndarray::s![half..]),
+        Some(state.view()),
+    )
+    .unwrap();
+
+    assert_eq!(ndarray::concatenate![ndarray::Axis(0), first, second], full);
+    assert_eq!(final_state, full_state);
+}
+
+#[test]
+fn test_simulate_with_state_length_error() {
+    let (defaults, _) = init();
+    let state = initial_state(defaults.view()).unwrap();
+    let wrong_state = Array1::zeros(state.len() + 1);
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let result = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+        Some(wrong_state.view()),
+    );
+    assert!(matches!(
+        result,
+        Err(HydroError::StateMismatch(expected, got))
+            if expected == state.len() && got == state.len() + 1
+    ));
+}
+
+#[test]
+fn test_simulate_with_state_non_finite_error() {
+    let (defaults, _) = init();
+    let mut state = initial_state(defaults.view()).unwrap();
+    state[0] = f64::NAN;
+    let precip = array![10.0, 5.0, 0.0];
+    let pet = array![2.0, 2.0, 2.0];
+
+    let result = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        pet.view(),
+        Some(state.view()),
+    );
+    assert!(matches!(
+        result,
+        Err(HydroError::NonFiniteInput { name: "state", .. })
+    ));
+}
+
 // =============================================================================
 // Parameter Sensitivity Tests
 // =============================================================================
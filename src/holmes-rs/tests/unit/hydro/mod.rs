@@ -1,3 +1,4 @@
 mod bucket_tests;
 mod cequeau_tests;
 mod gr4j_tests;
+mod utils_tests;
@@ -0,0 +1,69 @@
+use holmes_rs::hydro::utils::{
+    HydrographBuffer, HydrographWeights, MAX_HYDROGRAPH_LENGTH,
+};
+
+// =============================================================================
+// Hydrograph Buffer Tests
+// =============================================================================
+
+fn weights(values: &[f64]) -> HydrographWeights {
+    let mut weights = [0.0; MAX_HYDROGRAPH_LENGTH];
+    weights[..values.len()].copy_from_slice(values);
+    weights
+}
+
+#[test]
+fn test_hydrograph_buffer_zeros() {
+    let buffer = HydrographBuffer::zeros(4);
+    assert_eq!(buffer.len(), 4);
+    assert_eq!(buffer.iter().collect::<Vec<_>>(), vec![0.0; 4]);
+}
+
+#[test]
+fn test_hydrograph_buffer_from_slice_order() {
+    let buffer = HydrographBuffer::from_slice(&[1.0, 2.0, 3.0]);
+    assert_eq!(buffer.iter().collect::<Vec<_>>(), vec![1.0, 2.0, 3.0]);
+}
+
+#[test]
+fn test_hydrograph_buffer_push_shifts_and_convolves() {
+    let mut buffer = HydrographBuffer::from_slice(&[1.0, 2.0, 3.0]);
+    let weights = weights(&[0.5, 0.25, 0.25]);
+
+    let first = buffer.push(4.0, &weights);
+
+    assert_eq!(first, 4.0);
+    assert_eq!(buffer.iter().collect::<Vec<_>>(), vec![4.0, 4.0, 1.0]);
+}
+
+#[test]
+fn test_hydrograph_buffer_matches_shifted_vector() {
+    let values = [0.3, 0.0, 1.2, 4.5, 0.7];
+    let weights = weights(&[0.1, 0.2, 0.3, 0.4, 0.0]);
+    let n = values.len();
+    let mut buffer = HydrographBuffer::from_slice(&values);
+    let mut shifted = values.to_vec();
+
+    // enough steps for the ring to wrap around several times
+    for step in 0..17 {
+        let amount = (step as f64 * 1.3).sin().abs() * 10.0;
+        for i in 0..n - 1 {
+            shifted[i] = shifted[i + 1] + weights[i] * amount;
+        }
+        shifted[n - 1] = weights[n - 1] * amount;
+
+        let first = buffer.push(amount, &weights);
+
+        assert_eq!(first, shifted[0]);
+        assert_eq!(buffer.iter().collect::<Vec<_>>(), shifted);
+    }
+}
+
+#[test]
+fn test_hydrograph_buffer_single_value() {
+    let mut buffer = HydrographBuffer::zeros(1);
+    let weights = weights(&[1.0]);
+
+    assert_eq!(buffer.push(2.0, &weights), 2.0);
+    assert_eq!(buffer.push(3.0, &weights), 3.0);
+}
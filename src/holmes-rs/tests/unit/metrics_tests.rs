@@ -1,7 +1,7 @@
 use approx::assert_relative_eq;
 use holmes_rs::metrics::{
-    calculate_kge, calculate_nse, calculate_rmse, validate_result,
-    MetricsError,
+    calculate_kge, calculate_nse, calculate_rmse, calculate_rmse_nse_kge,
+    evaluate_all, validate_result, MetricsError, ObservationStats,
 };
 use ndarray::array;
 use proptest::prelude::*;
@@ -122,6 +122,236 @@ fn test_length_mismatch() {
     assert!(matches!(result, Err(MetricsError::LengthMismatch(3, 2))));
 }
 
+// =============================================================================
+// Fused Metrics Tests
+// =============================================================================
+
+#[test]
+fn test_observation_stats() {
+    let obs = array![1.0, 2.0, 3.0, 4.0];
+    let stats = ObservationStats::new(obs.view()).unwrap();
+    assert_eq!(stats.n, 4);
+    assert_relative_eq!(stats.mean, 2.5, epsilon = 1e-12);
+    assert_relative_eq!(stats.variance, 1.25, epsilon = 1e-12);
+    assert_relative_eq!(stats.sum_squares, 5.0, epsilon = 1e-12);
+}
+
+#[test]
+fn test_observation_stats_invalid() {
+    let empty: ndarray::Array1<f64> = array![];
+    assert!(matches!(
+        ObservationStats::new(empty.view()),
+        Err(MetricsError::EmptyArrays)
+    ));
+    let obs = array![1.0, f64::NAN, 3.0];
+    assert!(matches!(
+        ObservationStats::new(obs.view()),
+        Err(MetricsError::NaNInInput {
+            array_name: "observations",
+            index: 1
+        })
+    ));
+}
+
+#[test]
+fn test_fused_matches_individual_metrics() {
+    let obs = array![1.0, 3.0, 2.0, 5.0, 4.0, 6.0];
+    let sim = array![1.5, 2.5, 2.0, 4.0, 4.5, 7.0];
+    let stats = ObservationStats::new(obs.view()).unwrap();
+    let [rmse, nse, kge] =
+        calculate_rmse_nse_kge(obs.view(), &stats, sim.view(), |x| x).unwrap();
+    assert_eq!(rmse, calculate_rmse(obs.view(), sim.view()).unwrap());
+    assert_eq!(nse, calculate_nse(obs.view(), sim.view()).unwrap());
+    assert_eq!(kge, calculate_kge(obs.view(), sim.view()).unwrap());
+}
+
+#[test]
+fn test_fused_applies_transform_to_simulations() {
+    let obs = array![1.0, 3.0, 2.0, 5.0, 4.0, 6.0].mapv(f64::sqrt);
+    let sim = array![1.5, 2.5, 2.0, 4.0, 4.5, 7.0];
+    let stats = ObservationStats::new(obs.view()).unwrap();
+    let [rmse, nse, kge] =
+        calculate_rmse_nse_kge(obs.view(), &stats, sim.view(), f64::sqrt)
+            .unwrap();
+    let sim = sim.mapv(f64::sqrt);
+    assert_eq!(rmse, calculate_rmse(obs.view(), sim.view()).unwrap());
+    assert_eq!(nse, calculate_nse(obs.view(), sim.view()).unwrap());
+    assert_eq!(kge, calculate_kge(obs.view(), sim.view()).unwrap());
+}
+
+#[test]
+fn test_fused_errors() {
+    let obs = array![1.0, 2.0, 3.0];
+    let stats = ObservationStats::new(obs.view()).unwrap();
+
+    let sim = array![1.0, 2.0];
+    assert!(matches!(
+        calculate_rmse_nse_kge(obs.view(), &stats, sim.view(), |x| x),
+        Err(MetricsError::LengthMismatch(3, 2))
+    ));
+
+    // the transform can produce invalid values from valid inputs
+    let sim = array![1.0, -2.0, 3.0];
+    assert!(matches!(
+        calculate_rmse_nse_kge(obs.view(), &stats, sim.view(), f64::sqrt),
+        Err(MetricsError::NaNInInput {
+            array_name: "simulations",
+            index: 1
+        })
+    ));
+
+    let sim = array![2.0, 2.0, 2.0];
+    assert!(matches!(
+        calculate_rmse_nse_kge(obs.view(), &stats, sim.view(), |x| x),
+        Err(MetricsError::ZeroVarianceKGE {
+            component: "simulations"
+        })
+    ));
+}
+
+// =============================================================================
+// Evaluate All Tests
+// =============================================================================
+
+#[test]
+fn test_evaluate_all_matches_individual_metrics() {
+    let obs = array![9.0, 9.0, 1.0, 3.0, 2.0, 5.0, 4.0, 6.0];
+    let sim = array![0.0, 0.0, 1.5, 2.5, 2.0, 4.0, 4.5, 7.0];
+    let evaluation = evaluate_all(obs.view(), sim.view(), 2).unwrap();
+
+    let obs = obs.slice(ndarray::s![2..]);
+    let sim = sim.slice(ndarray::s![2..]);
+    let log = |x: f64| x.max(1e-5).ln();
+    for (criteria, o, s) in [
+        (evaluation.none, obs.to_owned(), sim.to_owned()),
+        (evaluation.sqrt, obs.mapv(f64::sqrt), sim.mapv(f64::sqrt)),
+        (evaluation.log, obs.mapv(log), sim.mapv(log)),
+    ] {
+        assert_relative_eq!(
+            criteria.rmse,
+            calculate_rmse(o.view(), s.view()).unwrap(),
+            epsilon = 1e-10
+        );
+        assert_relative_eq!(
+            criteria.nse,
+            calculate_nse(o.view(), s.view()).unwrap(),
+            epsilon = 1e-10
+        );
+        assert_relative_eq!(
+            criteria.kge,
+            calculate_kge(o.view(), s.view()).unwrap(),
+            epsilon = 1e-10
+        );
+    }
+
+    let obs_mean = obs.mean().unwrap();
+    let sim_mean = sim.mean().unwrap();
+    let obs_std = obs.std(0.);
+    let sim_std = sim.std(0.);
+    let covariance = (&obs - obs_mean).dot(&(&sim - sim_mean)) / 6.0;
+    assert_relative_eq!(
+        evaluation.mean_bias,
+        sim_mean / obs_mean,
+        epsilon = 1e-10
+    );
+    assert_relative_eq!(
+        evaluation.deviation_bias,
+        (sim_std / sim_mean) / (obs_std / obs_mean),
+        epsilon = 1e-10
+    );
+    assert_relative_eq!(
+        evaluation.correlation,
+        covariance / (obs_std * sim_std),
+        epsilon = 1e-10
+    );
+}
+
+#[test]
+fn test_evaluate_all_perfect_prediction() {
+    let obs = array![1.0, 2.0, 3.0, 4.0, 5.0];
+    let evaluation = evaluate_all(obs.view(), obs.view(), 0).unwrap();
+    for criteria in [evaluation.none, evaluation.sqrt, evaluation.log] {
+        assert_relative_eq!(criteria.rmse, 0.0, epsilon = 1e-10);
+        assert_relative_eq!(criteria.nse, 1.0, epsilon = 1e-10);
+        assert_relative_eq!(criteria.kge, 1.0, epsilon = 1e-10);
+    }
+    assert_relative_eq!(evaluation.mean_bias, 1.0, epsilon = 1e-10);
+    assert_relative_eq!(evaluation.deviation_bias, 1.0, epsilon = 1e-10);
+    assert_relative_eq!(evaluation.correlation, 1.0, epsilon = 1e-10);
+}
+
+#[test]
+fn test_evaluate_all_errors() {
+    let obs = array![1.0, 2.0, 3.0];
+
+    let sim = array![1.0, 2.0];
+    assert!(matches!(
+        evaluate_all(obs.view(), sim.view(), 0),
+        Err(MetricsError::LengthMismatch(3, 2))
+    ));
+
+    assert!(matches!(
+        evaluate_all(obs.view(), obs.view(), 3),
+        Err(MetricsError::EmptyArrays)
+    ));
+
+    // indices are relative to the end of the warmup
+    let sim = array![f64::NAN, 2.0, f64::INFINITY];
+    assert!(matches!(
+        evaluate_all(obs.view(), sim.view(), 1),
+        Err(MetricsError::InfinityInInput {
+            array_name: "simulations",
+            index: 1
+        })
+    ));
+}
+
+#[test]
+fn test_evaluate_all_flat_simulation() {
+    let obs = array![1.0, 2.0, 3.0, 4.0];
+    let sim = array![2.0, 2.0, 2.0, 2.0];
+    let evaluation = evaluate_all(obs.view(), sim.view(), 0).unwrap();
+    for criteria in [evaluation.none, evaluation.sqrt, evaluation.log] {
+        assert!(criteria.rmse.is_finite());
+        assert!(criteria.nse.is_finite());
+        assert!(criteria.kge.is_nan());
+    }
+    assert_relative_eq!(
+        evaluation.none.nse,
+        calculate_nse(obs.view(), sim.view()).unwrap(),
+        epsilon = 1e-10
+    );
+    assert_relative_eq!(evaluation.mean_bias, 0.8, epsilon = 1e-10);
+    assert_eq!(evaluation.deviation_bias, 0.0);
+    assert!(evaluation.correlation.is_nan());
+}
+
+#[test]
+fn test_evaluate_all_undefined_criteria() {
+    let obs = array![1.0, 2.0, 3.0];
+
+    // constant observations
+    let constant = array![2.0, 2.0, 2.0];
+    let evaluation = evaluate_all(constant.view(), obs.view(), 0).unwrap();
+    for criteria in [evaluation.none, evaluation.sqrt, evaluation.log] {
+        assert!(criteria.rmse.is_finite());
+        assert!(criteria.nse.is_nan());
+        assert!(criteria.kge.is_nan());
+    }
+
+    // negative values only leave the square root criteria undefined
+    let sim = array![1.0, -2.0, 3.0];
+    let evaluation = evaluate_all(obs.view(), sim.view(), 0).unwrap();
+    assert!(evaluation.sqrt.rmse.is_nan());
+    assert!(evaluation.sqrt.nse.is_nan());
+    assert!(evaluation.sqrt.kge.is_nan());
+    for criteria in [evaluation.none, evaluation.log] {
+        assert!(criteria.rmse.is_finite());
+        assert!(criteria.nse.is_finite());
+        assert!(criteria.kge.is_finite());
+    }
+}
+
 // =============================================================================
 // Property Tests
 // =============================================================================
@@ -183,6 +413,30 @@ proptest! {
         prop_assert!((kge - 1.0).abs() < 1e-10);
     }
 
+    #[test]
+    fn prop_fused_matches_individual_metrics(
+        obs in prop::collection::vec(1.0f64..100.0, 3..50),
+        sim in prop::collection::vec(1.0f64..100.0, 3..50)
+    ) {
+        let len = obs.len().min(sim.len());
+        let obs_arr = ndarray::Array1::from_vec(obs[..len].to_vec());
+        let sim_arr = ndarray::Array1::from_vec(sim[..len].to_vec());
+        let stats = ObservationStats::new(obs_arr.view()).unwrap();
+        let fused = calculate_rmse_nse_kge(
+            obs_arr.view(), &stats, sim_arr.view(), |x| x,
+        );
+        let rmse = calculate_rmse(obs_arr.view(), sim_arr.view());
+        let nse = calculate_nse(obs_arr.view(), sim_arr.view());
+        let kge = calculate_kge(obs_arr.view(), sim_arr.view());
+        if let (Ok([f_rmse, f_nse, f_kge]), Ok(rmse), Ok(nse), Ok(kge)) =
+            (fused, rmse, nse, kge)
+        {
+            prop_assert!((f_rmse - rmse).abs() < 1e-10);
+            prop_assert!((f_nse - nse).abs() < 1e-10);
+            prop_assert!((f_kge - kge).abs() < 1e-10);
+        }
+    }
+
     #[test]
     fn prop_kge_upper_bound(
         obs in prop::collection::vec(1.0f64..100.0, 3..50),
@@ -1,12 +1,16 @@
 use crate::helpers;
-use holmes_rs::pet::oudin::simulate;
+use holmes_rs::pet::oudin::{
+    compute_radiation_table, radiation_table, simulate, simulate_batch,
+};
 use holmes_rs::pet::utils::{
     validate_day_of_year, validate_latitude, validate_output,
     validate_temperature,
 };
 use holmes_rs::pet::PetError;
-use ndarray::{array, Array1};
+use ndarray::{array, Array1, Array2};
 use proptest::prelude::*;
+use std::f64::consts::PI;
+use std::sync::Arc;
 
 // =============================================================================
 // Basic Functionality Tests
@@ -329,6 +333,90 @@ fn test_oudin_southern_hemisphere() {
     assert!(pet_winter[0].is_finite() && pet_winter[0] >= 0.0);
 }
 
+// =============================================================================
+// Radiation Table Tests
+// =============================================================================
+
+#[test]
+fn test_radiation_table_matches_formula() {
+    let latitude = 46.5;
+    let lat_rad = PI * latitude / 180.;
+    let table = compute_radiation_table(latitude);
+
+    for doy in [1_usize, 100, 180, 365, 366] {
+        let ds = 0.409 * (2. * PI / 365. * doy as f64 - 1.39).sin();
+        let dr = 1. + 0.033 * (doy as f64 * 2. * PI / 365.).cos();
+        let omega = (-lat_rad.tan() * ds.tan()).clamp(-1., 1.).acos();
+        let re = 24. * 60. / PI
+            * 0.082
+            * dr
+            * (omega * lat_rad.sin() * ds.sin()
+                + lat_rad.cos() * ds.cos() * omega.sin());
+        assert_eq!(table[doy - 1], re, "day {}", doy);
+    }
+}
+
+#[test]
+fn test_radiation_table_cached() {
+    let first = radiation_table(12.25).unwrap();
+    let second = radiation_table(12.25).unwrap();
+    let other = radiation_table(-12.25).unwrap();
+
+    assert!(Arc::ptr_eq(&first, &second));
+    assert!(!Arc::ptr_eq(&first, &other));
+    assert_eq!(*first, compute_radiation_table(12.25));
+}
+
+#[test]
+fn test_radiation_table_invalid_latitude() {
+    assert!(matches!(
+        radiation_table(91.0),
+        Err(PetError::LatitudeOutOfRange { .. })
+    ));
+}
+
+// =============================================================================
+// Batch Tests
+// =============================================================================
+
+#[test]
+fn test_oudin_batch_matches_simulate() {
+    let doy = helpers::generate_doy(1, 730);
+    let temperature = Array2::from_shape_fn((3, 730), |(i, t)| {
+        10.0 * i as f64 + 15.0 * (t as f64 / 58.0).sin()
+    });
+
+    let pet = simulate_batch(temperature.view(), doy.view(), 45.0).unwrap();
+
+    assert_eq!(pet.dim(), (3, 730));
+    for (row, temp) in pet.rows().into_iter().zip(temperature.rows()) {
+        assert_eq!(row, simulate(temp, doy.view(), 45.0).unwrap());
+    }
+}
+
+#[test]
+fn test_oudin_batch_length_mismatch() {
+    let temperature = Array2::from_elem((2, 10), 10.0);
+    let doy = helpers::generate_doy(1, 9);
+
+    assert!(matches!(
+        simulate_batch(temperature.view(), doy.view(), 45.0),
+        Err(PetError::LengthMismatch(10, 9))
+    ));
+}
+
+#[test]
+fn test_oudin_batch_invalid_temperature() {
+    let mut temperature = Array2::from_elem((2, 10), 10.0);
+    temperature[[1, 4]] = f64::NAN;
+    let doy = helpers::generate_doy(1, 10);
+
+    assert!(matches!(
+        simulate_batch(temperature.view(), doy.view(), 45.0),
+        Err(PetError::NonFiniteInput { index: 4, .. })
+    ));
+}
+
 // =============================================================================
 // Property Tests
 // =============================================================================
@@ -0,0 +1,293 @@
+use crate::helpers;
+use holmes_rs::hydro::{bucket, gr4j};
+use holmes_rs::pet::oudin;
+use holmes_rs::projection::{simulate, ProjectionError, SnowInputs};
+use holmes_rs::snow::cemaneige;
+use ndarray::{array, Array1, Array2, Axis};
+
+fn ensemble(n_members: usize, n_days: usize) -> (Array2<f64>, Array2<f64>) {
+    let mut precipitation = Array2::zeros((n_members, n_days));
+    let mut temperature = Array2::zeros((n_members, n_days));
+    for i in 0..n_members {
+        precipitation
+            .row_mut(i)
+            .assign(&helpers::generate_precipitation(
+                n_days, 4.0, 0.4, i as u64,
+            ));
+        temperature
+            .row_mut(i)
+            .assign(&helpers::generate_temperature(
+                n_days,
+                5.0,
+                15.0,
+                3.0,
+                100 + i as u64,
+            ));
+    }
+    (precipitation, temperature)
+}
+
+// =============================================================================
+// Ensemble Simulation Tests
+// =============================================================================
+
+#[test]
+fn test_projection_matches_member_simulations() {
+    let (precipitation, temperature) = ensemble(5, 400);
+    let day_of_year = helpers::generate_doy(1, 400);
+    let (params, _) = gr4j::init();
+
+    let streamflow = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    )
+    .unwrap();
+
+    assert_eq!(streamflow.dim(), (5, 400));
+    for (i, row) in streamflow.axis_iter(Axis(0)).enumerate() {
+        let pet =
+            oudin::simulate(temperature.row(i), day_of_year.view(), 45.0)
+                .unwrap();
+        let expected =
+            gr4j::simulate(params.view(), precipitation.row(i), pet.view())
+                .unwrap();
+        assert_eq!(row, expected);
+    }
+}
+
+#[test]
+fn test_projection_with_snow_matches_member_simulations() {
+    let (precipitation, temperature) = ensemble(3, 400);
+    let day_of_year = helpers::generate_doy(1, 400);
+    let (params, _) = bucket::init();
+    let snow_params = array![0.25, 3.74, 350.0];
+    let elevation_layers = array![300.0, 500.0, 700.0];
+    let snow_inputs = SnowInputs {
+        model: "cemaneige",
+        params: snow_params.view(),
+        elevation_layers: elevation_layers.view(),
+        median_elevation: 500.0,
+    };
+
+    let streamflow = simulate(
+        "bucket",
+        params.view(),
+        Some(snow_inputs),
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    )
+    .unwrap();
+
+    for (i, row) in streamflow.axis_iter(Axis(0)).enumerate() {
+        let pet =
+            oudin::simulate(temperature.row(i), day_of_year.view(), 45.0)
+                .unwrap();
+        let effective_precipitation = cemaneige::simulate(
+            snow_params.view(),
+            precipitation.row(i),
+            temperature.row(i),
+            day_of_year.view(),
+            elevation_layers.view(),
+            500.0,
+        )
+        .unwrap();
+        let expected = bucket::simulate(
+            params.view(),
+            effective_precipitation.view(),
+            pet.view(),
+        )
+        .unwrap();
+        assert_eq!(row, expected);
+    }
+}
+
+#[test]
+fn test_projection_fortran_layout() {
+    let (precipitation, temperature) = ensemble(4, 100);
+    let day_of_year = helpers::generate_doy(1, 100);
+    let (params, _) = gr4j::init();
+
+    let expected = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    )
+    .unwrap();
+    let streamflow = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.t().as_standard_layout().t(),
+        temperature.t().as_standard_layout().t(),
+        day_of_year.view(),
+        45.0,
+    )
+    .unwrap();
+
+    assert_eq!(streamflow, expected);
+}
+
+#[test]
+fn test_projection_no_members() {
+    let precipitation = Array2::<f64>::zeros((0, 10));
+    let day_of_year = helpers::generate_doy(1, 10);
+    let (params, _) = gr4j::init();
+
+    let streamflow = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        precipitation.view(),
+        day_of_year.view(),
+        45.0,
+    )
+    .unwrap();
+
+    assert_eq!(streamflow.dim(), (0, 10));
+}
+
+// =============================================================================
+// Error Tests
+// =============================================================================
+
+#[test]
+fn test_projection_shape_mismatch() {
+    let (precipitation, _) = ensemble(3, 100);
+    let (_, temperature) = ensemble(2, 100);
+    let day_of_year = helpers::generate_doy(1, 100);
+    let (params, _) = gr4j::init();
+
+    let result = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    );
+
+    assert!(matches!(
+        result,
+        Err(ProjectionError::ShapeMismatch([3, 100], [2, 100]))
+    ));
+}
+
+#[test]
+fn test_projection_day_of_year_mismatch() {
+    let (precipitation, temperature) = ensemble(2, 100);
+    let day_of_year = helpers::generate_doy(1, 99);
+    let (params, _) = gr4j::init();
+
+    let result = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    );
+
+    assert!(matches!(
+        result,
+        Err(ProjectionError::LengthMismatch(99, 100))
+    ));
+}
+
+#[test]
+fn test_projection_unknown_hydro_model() {
+    let (precipitation, temperature) = ensemble(2, 100);
+    let day_of_year = helpers::generate_doy(1, 100);
+    let params = Array1::from_elem(4, 1.0);
+
+    let result = simulate(
+        "unknown",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    );
+
+    assert!(matches!(result, Err(ProjectionError::Hydro(_))));
+}
+
+#[test]
+fn test_projection_unknown_snow_model() {
+    let (precipitation, temperature) = ensemble(2, 100);
+    let day_of_year = helpers::generate_doy(1, 100);
+    let (params, _) = gr4j::init();
+    let snow_params = array![0.25, 3.74, 350.0];
+    let elevation_layers = array![500.0];
+    let snow_inputs = SnowInputs {
+        model: "unknown",
+        params: snow_params.view(),
+        elevation_layers: elevation_layers.view(),
+        median_elevation: 500.0,
+    };
+
+    let result = simulate(
+        "gr4j",
+        params.view(),
+        Some(snow_inputs),
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    );
+
+    assert!(matches!(result, Err(ProjectionError::Snow(_))));
+}
+
+#[test]
+fn test_projection_invalid_member_forcings() {
+    let (mut precipitation, temperature) = ensemble(3, 100);
+    precipitation[[2, 10]] = -1.0;
+    let day_of_year = helpers::generate_doy(1, 100);
+    let (params, _) = gr4j::init();
+
+    let result = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        45.0,
+    );
+
+    assert!(matches!(result, Err(ProjectionError::Hydro(_))));
+}
+
+#[test]
+fn test_projection_invalid_latitude() {
+    let (precipitation, temperature) = ensemble(2, 100);
+    let day_of_year = helpers::generate_doy(1, 100);
+    let (params, _) = gr4j::init();
+
+    let result = simulate(
+        "gr4j",
+        params.view(),
+        None,
+        precipitation.view(),
+        temperature.view(),
+        day_of_year.view(),
+        120.0,
+    );
+
+    assert!(matches!(result, Err(ProjectionError::Pet(_))));
+}
@@ -1,11 +1,15 @@
 use crate::helpers;
 use approx::assert_relative_eq;
-use holmes_rs::snow::cemaneige::{init, param_names, simulate};
+use holmes_rs::snow::cemaneige::{
+    init, initial_state, param_names, simulate, simulate_batch,
+    simulate_unchecked, simulate_with_state,
+};
 use holmes_rs::snow::utils::{
-    validate_day_of_year, validate_output, validate_temperature,
+    validate_day_of_year, validate_forcings, validate_output,
+    validate_temperature,
 };
 use holmes_rs::snow::SnowError;
-use ndarray::{array, Array1};
+use ndarray::{array, Array1, Array2, Axis};
 use proptest::prelude::*;
 
 // =============================================================================
@@ -253,6 +257,186 @@ fn test_simulate_output_length() {
     }
 }
 
+#[test]
+fn test_simulate_unchecked_matches_simulate() {
+    let (defaults, _) = init();
+    let n = 365;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 0.0, 15.0, 2.0, 43);
+    let doy = helpers::generate_doy(1, n);
+    let elevation_layers =
+        helpers::generate_elevation_layers(5, 500.0, 1500.0);
+
+    let checked = simulate(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    let unchecked = simulate_unchecked(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    assert_eq!(checked, unchecked);
+}
+
+#[test]
+fn test_simulate_unchecked_validates_params() {
+    let params = array![0.25, 3.74];
+    let precip = array![10.0, 5.0];
+    let temp = array![-5.0, 2.0];
+    let doy = array![1_usize, 2];
+    let elevation_layers = array![1000.0];
+
+    let result = simulate_unchecked(
+        params.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    );
+    assert!(matches!(result, Err(SnowError::ParamsMismatch(3, 2))));
+}
+
+// =============================================================================
+// Batch Simulation Tests
+// =============================================================================
+
+#[test]
+fn test_simulate_batch_matches_simulate() {
+    let n = 365;
+    let precip = helpers::generate_precipitation(n, 5.0, 0.3, 42);
+    let temp = helpers::generate_temperature(n, 0.0, 15.0, 2.0, 43);
+    let doy = helpers::generate_doy(1, n);
+    let elevation_layers =
+        helpers::generate_elevation_layers(10, 500.0, 1500.0);
+    let params =
+        array![[0.25, 3.74, 350.0], [0.0, 0.0, 50.0], [1.0, 20.0, 800.0]];
+
+    let simulations = simulate_batch(
+        params.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+
+    assert_eq!(simulations.dim(), (3, n));
+    for (row, params) in simulations.rows().into_iter().zip(params.rows()) {
+        let expected = simulate(
+            params,
+            precip.view(),
+            temp.view(),
+            doy.view(),
+            elevation_layers.view(),
+            1000.0,
+        )
+        .unwrap();
+        assert_eq!(row, expected);
+    }
+}
+
+#[test]
+fn test_simulate_batch_column_major_params() {
+    let precip = array![10.0, 5.0, 0.0, 8.0];
+    let temp = array![-5.0, -2.0, 3.0, 6.0];
+    let doy = array![1_usize, 2, 3, 4];
+    let elevation_layers = array![800.0, 1000.0, 1200.0];
+    let params = array![[0.25, 0.5], [3.74, 8.0], [350.0, 200.0]];
+
+    let from_transposed = simulate_batch(
+        params.t(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    let from_standard = simulate_batch(
+        params.t().as_standard_layout().view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    assert_eq!(from_transposed, from_standard);
+}
+
+#[test]
+fn test_simulate_batch_param_count_error() {
+    let params = Array2::from_elem((2, 2), 0.5);
+    let precip = array![10.0, 5.0];
+    let temp = array![-5.0, 2.0];
+    let doy = array![1_usize, 2];
+    let elevation_layers = array![1000.0];
+
+    let result = simulate_batch(
+        params.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    );
+    assert!(matches!(result, Err(SnowError::ParamsMismatch(3, 2))));
+}
+
+#[test]
+fn test_simulate_batch_invalid_forcings() {
+    let (defaults, _) = init();
+    let params = defaults.insert_axis(Axis(0));
+    let precip = array![10.0, -5.0];
+    let temp = array![-5.0, 2.0];
+    let doy = array![1_usize, 2];
+    let elevation_layers = array![1000.0];
+
+    let result = simulate_batch(
+        params.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    );
+    assert!(matches!(result, Err(SnowError::NegativeInput { .. })));
+}
+
+#[test]
+fn test_simulate_batch_invalid_params_row() {
+    let params = array![[0.25, 3.74, 350.0], [0.25, 3.74, 10.0]];
+    let precip = array![10.0, 5.0];
+    let temp = array![-5.0, 2.0];
+    let doy = array![1_usize, 2];
+    let elevation_layers = array![1000.0];
+
+    let result = simulate_batch(
+        params.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    );
+    assert!(matches!(
+        result,
+        Err(SnowError::ParameterOutOfBounds { name: "qnbv", .. })
+    ));
+}
+
 // =============================================================================
 // Error Handling Tests
 // =============================================================================
@@ -670,6 +854,130 @@ fn test_cemaneige_param_qnbv_too_low() {
     );
 }
 
+// =============================================================================
+// State Tests
+// =============================================================================
+
+fn state_forcings(
+    n: usize,
+) -> (Array1<f64>, Array1<f64>, Array1<usize>, Array1<f64>) {
+    (
+        helpers::generate_precipitation(n, 5.0, 0.4, 42),
+        helpers::generate_temperature(n, 2.0, 12.0, 3.0, 43),
+        helpers::generate_doy(1, n),
+        helpers::generate_elevation_layers(5, 500.0, 1500.0),
+    )
+}
+
+#[test]
+fn test_initial_state_length() {
+    let elevation_layers =
+        helpers::generate_elevation_layers(5, 500.0, 1500.0);
+    let state = initial_state(elevation_layers.view());
+    assert_eq!(state.len(), 10);
+    assert!(state.iter().all(|&s| s == 0.0));
+}
+
+#[test]
+fn test_simulate_with_state_default_matches_simulate() {
+    let (defaults, _) = init();
+    let (precip, temp, doy, elevation_layers) = state_forcings(200);
+
+    let expected = simulate(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+    )
+    .unwrap();
+    let (effective_precip, _) = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+        None,
+    )
+    .unwrap();
+    assert_eq!(effective_precip, expected);
+}
+
+#[test]
+fn test_simulate_with_state_continues_simulation() {
+    let (defaults, _) = init();
+    let n = 730;
+    let half = 400;
+    let (precip, temp, doy, elevation_layers) = state_forcings(n);
+    let run = |range: std::ops::Range<usize>, state: Option<&Array1<f64>>| {
+        simulate_with_state(
+            defaults.view(),
+            precip.slice(ndarray::s![range.clone()]),
+            temp.slice(ndarray::s![range.clone()]),
+            doy.slice(ndarray::s![range]),
+            elevation_layers.view(),
+            1000.0,
+            state.map(|s| s.view()),
+        )
+        .unwrap()
+    };
+
+    let (full, full_state) = run(0..n, None);
+    let (first, state) = run(0..half, None);
+    let (second, final_state) = run(half..n, Some(&state));
+
+    // the snowpack of the first half is carried over
+    assert!(state.iter().take(5).any(|&s| s > 0.0));
+    assert_eq!(ndarray::concatenate![ndarray::Axis(0), first, second], full);
+    assert_eq!(final_state, full_state);
+}
+
+#[test]
+fn test_simulate_with_state_length_error() {
+    let (defaults, _) = init();
+    let (precip, temp, doy, elevation_layers) = state_forcings(10);
+    let state = Array1::zeros(5);
+
+    let result = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+        Some(state.view()),
+    );
+    assert!(matches!(result, Err(SnowError::StateMismatch(10, 5))));
+}
+
+#[test]
+fn test_simulate_with_state_non_finite_error() {
+    let (defaults, _) = init();
+    let (precip, temp, doy, elevation_layers) = state_forcings(10);
+    let mut state = initial_state(elevation_layers.view());
+    state[7] = f64::INFINITY;
+
+    let result = simulate_with_state(
+        defaults.view(),
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+        1000.0,
+        Some(state.view()),
+    );
+    assert!(matches!(
+        result,
+        Err(SnowError::NonFiniteInput {
+            name: "state",
+            index: 7,
+            ..
+        })
+    ));
+}
+
 // =============================================================================
 // Property Tests
 // =============================================================================
@@ -1199,3 +1507,22 @@ fn test_validate_temperature_valid() {
     let result = validate_temperature(temp.view());
     assert!(result.is_ok(), "Should accept valid temperatures");
 }
+
+#[test]
+fn test_validate_forcings_invalid_day_of_year() {
+    let precip = array![10.0, 5.0];
+    let temp = array![-5.0, 2.0];
+    let doy = array![0_usize, 1];
+    let elevation_layers = array![1000.0];
+
+    let result = validate_forcings(
+        precip.view(),
+        temp.view(),
+        doy.view(),
+        elevation_layers.view(),
+    );
+    assert!(matches!(
+        result,
+        Err(SnowError::InvalidDayOfYear { index: 0, value: 0 })
+    ));
+}
@@ -1,13 +1,18 @@
 import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
 from typing import Any, get_args
 
 import numpy as np
 import numpy.typing as npt
 import polars as pl
-from holmes import data
+from holmes import config, data
 from holmes.exceptions import HolmesDataError
 from holmes.logging import logger
 from holmes.models import calibration, evaluate, hydro, snow
+from holmes.utils.paths import cache_dir
 from holmes.utils.print import format_list
 from holmes.utils.websocket import (
     cleanup_websocket,
@@ -17,6 +22,10 @@ from holmes.utils.websocket import (
 from starlette.routing import BaseRoute, WebSocketRoute
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
+# checkpoints of the calibrations running in this process, which can't be
+# shared by two calibrations
+_running_checkpoints: set[Path] = set()
+
 ##########
 # public #
 ##########
@@ -58,7 +67,7 @@ async def _handle_message(ws: WebSocket, msg: dict[str, Any]) -> None:
             await _handle_manual_calibration_message(ws, msg.get("data", {}))
         case "calibration_start":
             stop_event = asyncio.Event()
-            setattr(ws.state, "stop_event", stop_event)
+            ws.state.stop_event = stop_event
             # P1-ERR-06: Use monitored task for error handling
             create_monitored_task(
                 _handle_calibration_start_message(
@@ -67,9 +76,19 @@ async def _handle_message(ws: WebSocket, msg: dict[str, Any]) -> None:
                 ws,
                 task_name="calibration",
             )
+        case "calibration_resume":
+            stop_event = asyncio.Event()
+            ws.state.stop_event = stop_event
+            create_monitored_task(
+                _handle_calibration_start_message(
+                    ws, msg.get("data", {}), stop_event, resume=True
+                ),
+                ws,
+                task_name="calibration",
+            )
         case "calibration_stop":
             if hasattr(ws.state, "stop_event"):
-                getattr(ws.state, "stop_event").set()
+                ws.state.stop_event.set()
         case _:
             await send(ws, "error", f"Unknown message type {msg_type}.")
 
@@ -154,8 +173,11 @@ async def _handle_manual_calibration_message(
         return
 
     try:
-        _data, warmup_steps = data.read_data(
-            msg_data["catchment"], msg_data["start"], msg_data["end"]
+        forcings = data.read_forcings(
+            msg_data["catchment"],
+            msg_data["start"],
+            msg_data["end"],
+            with_snow=msg_data["snowModel"] is not None,
         )
     except HolmesDataError as exc:
         await send(ws, "error", str(exc))
@@ -164,52 +186,30 @@ async def _handle_manual_calibration_message(
     hydro_simulate = hydro.get_model(msg_data["hydroModel"])
     hydro_params = np.array(msg_data["hydroParams"]).astype(np.float64)
 
-    precipitation = _data["precipitation"].to_numpy()
-    pet = _data["pet"].to_numpy()
-    day_of_year = (
-        _data.select((pl.col("date").dt.ordinal_day() - 1).mod(365) + 1)[
-            "date"
-        ]
-        .to_numpy()
-        .astype(np.uintp)
-    )
-
-    observations = _data["streamflow"].to_numpy()
+    precipitation = forcings.precipitation
+    pet = forcings.pet
+    observations = forcings.observations
+    warmup_steps = forcings.warmup_steps
 
     if msg_data["snowModel"] is not None:
-        try:
-            metadata = data.read_cemaneige_info(msg_data["catchment"])
-        except HolmesDataError as exc:
-            await send(ws, "error", str(exc))
-            return
-
-        try:
-            temperature = _data["temperature"].to_numpy()
-        except pl.exceptions.ColumnNotFoundError:
-            await send(
-                ws,
-                "error",
-                f"The {msg_data['catchment']} catchment doesn't have any temperature data.",
-            )
-            return
-        elevation_layers = np.array(metadata["altitude_layers"])
-        median_elevation = metadata["median_altitude"]
+        # guaranteed by `with_snow`
+        assert forcings.cemaneige is not None
+        assert forcings.temperature is not None
+        metadata = forcings.cemaneige
         snow_simulate = snow.get_model(msg_data["snowModel"])
         snow_params = np.array([0.25, 3.74, metadata["qnbv"]])
         precipitation = snow_simulate(
             snow_params,
             precipitation,
-            temperature,
-            day_of_year,
-            elevation_layers,
-            median_elevation,
+            forcings.temperature,
+            forcings.day_of_year,
+            np.array(metadata["altitude_layers"]),
+            metadata["median_altitude"],
         )
 
     streamflow = hydro_simulate(hydro_params, precipitation, pet)
 
-    _data = _data.select("date").with_columns(
-        pl.Series("streamflow", streamflow)
-    )
+    _data = pl.DataFrame({"date": forcings.dates, "streamflow": streamflow})
 
     observations_evaluated = observations[warmup_steps:]
     streamflow_evaluated = streamflow[warmup_steps:]
@@ -234,9 +234,18 @@ async def _handle_manual_calibration_message(
 
 
 async def _handle_calibration_start_message(
-    ws: WebSocket, msg_data: dict[str, Any], stop_event: asyncio.Event
+    ws: WebSocket,
+    msg_data: dict[str, Any],
+    stop_event: asyncio.Event,
+    *,
+    resume: bool = False,
 ) -> None:
-    """Handle automatic calibration - run SCE-UA optimization."""
+    """
+    Handle automatic calibration - run SCE-UA optimization. With `resume`,
+    the calibration stopped with the same data by the same client continues
+    from its checkpoint. A calibration already running with the same
+    checkpoint, such as from another window of the client, is refused.
+    """
     needed_keys = [
         "catchment",
         "start",
@@ -256,85 +265,250 @@ async def _handle_calibration_start_message(
         )
         return
 
+    _remove_old_checkpoints()
+    checkpoint = _get_checkpoint_path(msg_data)
+    if checkpoint in _running_checkpoints:
+        await send(ws, "error", "This calibration is already running.")
+        return
+    if resume and not checkpoint.exists():
+        await send(ws, "error", "There is no calibration to resume.")
+        return
+
+    _running_checkpoints.add(checkpoint)
     try:
-        _data, warmup_steps = data.read_data(
-            msg_data["catchment"], msg_data["start"], msg_data["end"]
+        await _run_calibration(
+            ws, msg_data, stop_event, checkpoint, resume=resume
+        )
+    finally:
+        _running_checkpoints.discard(checkpoint)
+
+
+async def _run_calibration(
+    ws: WebSocket,
+    msg_data: dict[str, Any],
+    stop_event: asyncio.Event,
+    checkpoint: Path,
+    *,
+    resume: bool,
+) -> None:
+    """Run a calibration whose checkpoint is reserved for it."""
+    try:
+        forcings = data.read_forcings(
+            msg_data["catchment"],
+            msg_data["start"],
+            msg_data["end"],
+            with_snow=msg_data["snowModel"] is not None,
         )
     except HolmesDataError as exc:
         await send(ws, "error", str(exc))
         return
 
-    precipitation = _data["precipitation"].to_numpy()
-    pet = _data["pet"].to_numpy()
-    day_of_year = (
-        _data.select((pl.col("date").dt.ordinal_day() - 1).mod(365) + 1)[
-            "date"
-        ]
-        .to_numpy()
-        .astype(np.uintp)
-    )
-
-    observations = _data["streamflow"].to_numpy()
-
     if msg_data["snowModel"] is not None:
-        try:
-            metadata = data.read_cemaneige_info(msg_data["catchment"])
-        except HolmesDataError as exc:
-            await send(ws, "error", str(exc))
-            return
-        try:
-            temperature = _data["temperature"].to_numpy()
-        except pl.exceptions.ColumnNotFoundError:
-            await send(
-                ws,
-                "error",
-                f"The {msg_data['catchment']} catchment doesn't have any temperature data.",
-            )
-            return
-        elevation_layers = np.array(metadata["altitude_layers"])
-        median_elevation = metadata["median_altitude"]
-        qnbv = metadata["qnbv"]
+        # guaranteed by `with_snow`
+        assert forcings.cemaneige is not None
+        temperature = forcings.temperature
+        elevation_layers = np.array(forcings.cemaneige["altitude_layers"])
+        median_elevation = forcings.cemaneige["median_altitude"]
+        qnbv = forcings.cemaneige["qnbv"]
     else:
         temperature = None
         elevation_layers = None
         median_elevation = None
         qnbv = None
 
-    async def callback(
-        done: bool,
-        params: npt.NDArray[np.float64],
-        simulation: npt.NDArray[np.float64],
-        results: dict[str, float],
-    ) -> None:
-        await send(
-            ws,
-            "result",
-            {
-                "done": done,
-                "simulation": _data.select("date").with_columns(
-                    pl.Series("streamflow", simulation)
-                ),
-                "params": params,
-                "objective": results[msg_data["objective"]],
-            },
-        )
+    progress = _ProgressThrottle(
+        ws,
+        forcings.dates,
+        msg_data["objective"],
+        update_rate=config.CALIBRATION_UPDATE_RATE,
+        simulation_rate=config.CALIBRATION_SIMULATION_RATE,
+        snow_params=(
+            None
+            if msg_data["snowModel"] is None
+            else snow.get_param_names(msg_data["snowModel"])
+        ),
+    )
 
     await calibration.calibrate(
-        precipitation,
+        forcings.precipitation,
         temperature,
-        pet,
-        observations,
-        day_of_year,
+        forcings.pet,
+        forcings.observations,
+        forcings.day_of_year,
         elevation_layers,
         median_elevation,
         qnbv,
-        warmup_steps,
+        forcings.warmup_steps,
         msg_data["hydroModel"],
         msg_data["snowModel"],
         msg_data["objective"],
         msg_data["transformation"],
         msg_data["algorithm"],
         msg_data["algorithmParams"],
-        callback=callback,
+        callback=progress,
         stop_event=stop_event,
+        checkpoint=checkpoint,
+        resume=resume,
     )
+    # stopped calibrations still end with a `done` result
+    await progress.finish()
+
+
+###########
+# private #
+###########
+
+
+def _get_checkpoint_path(msg_data: dict[str, Any]) -> Path:
+    """
+    Checkpoint of a calibration, named by a hash of the client's `clientId`,
+    so that clients don't overwrite or remove each other's checkpoints, and
+    of everything determining the calibration's course: the catchment and
+    the version of its data, the period, the models, the objective and the
+    algorithm with its parameters.
+    """
+    key = [
+        msg_data[key]
+        for key in (
+            "catchment",
+            "start",
+            "end",
+            "hydroModel",
+            "snowModel",
+            "objective",
+            "transformation",
+            "algorithm",
+        )
+    ] + [
+        sorted(msg_data["algorithmParams"].items()),
+        msg_data.get("clientId"),
+        # a calibration can't be resumed on modified data
+        data.get_catchment_data_version(msg_data["catchment"]),
+    ]
+    hash_ = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+    return cache_dir / "checkpoints" / f"{hash_}.ckpt"
+
+
+def _remove_old_checkpoints() -> None:
+    """
+    Removes the checkpoints, and leftover temporary files, that weren't
+    written for `CALIBRATION_CHECKPOINT_MAX_AGE` days, such as those of
+    calibrations never resumed or of data modified since, except for the
+    calibrations running in this process.
+    """
+    max_age = config.CALIBRATION_CHECKPOINT_MAX_AGE * 24 * 3600
+    now = time.time()
+    for path in (cache_dir / "checkpoints").glob("*"):
+        if path in _running_checkpoints:
+            continue
+        try:
+            if now - path.stat().st_mtime > max_age:
+                path.unlink()
+        except FileNotFoundError:
+            # removed meanwhile, such as by another process
+            pass
+        except OSError as exc:
+            logger.warning(f"Failed to remove old checkpoint {path}: {exc}")
+
+
+class _ProgressThrottle:
+    """
+    Calibration callback limiting the result messages sent to the client.
+
+    A step is sent only if its objective improves on the last sent one and at
+    most `update_rate` times per second. The simulated streamflow is included
+    at most `simulation_rate` times per second, the other messages only
+    carrying the parameters and objective. The final step is always sent with
+    its simulation and `done` set.
+
+    With the names of `snow_params`, the calibrated parameters start with
+    those of the snow model, which are sent apart as `snowParams`.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        dates: pl.Series,
+        objective: str,
+        *,
+        update_rate: int,
+        simulation_rate: int,
+        snow_params: list[str] | None = None,
+    ) -> None:
+        self._ws = ws
+        self._snow_params = snow_params or []
+        self._dates = dates
+        self._objective = objective
+        self._update_interval = 1 / update_rate
+        self._simulation_interval = 1 / simulation_rate
+        self._last_update = -float("inf")
+        self._last_simulation = -float("inf")
+        self._sent_objective: float | None = None
+        self._latest: (
+            tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], float]
+            | None
+        ) = None
+        self._finished = False
+
+    async def __call__(
+        self,
+        done: bool,
+        params: npt.NDArray[np.float64],
+        simulation: npt.NDArray[np.float64],
+        results: dict[str, Any],
+    ) -> None:
+        objective = results[self._objective]
+        self._latest = (params, simulation, objective)
+        if done:
+            await self.finish()
+            return
+        if self._finished or not self._improves(objective):
+            return
+
+        now = time.monotonic()
+        if now - self._last_update < self._update_interval:
+            return
+        with_simulation = (
+            now - self._last_simulation >= self._simulation_interval
+        )
+        await self._send(False, with_simulation)
+        self._last_update = now
+        if with_simulation:
+            self._last_simulation = now
+
+    async def finish(self) -> None:
+        """Send the latest step as the final result, if not already sent."""
+        if self._finished or self._latest is None:
+            return
+        self._finished = True
+        await self._send(True, True)
+
+    def _improves(self, objective: float) -> bool:
+        if self._sent_objective is None:
+            return True
+        # nothing compares to NaN, so any finite objective improves on it
+        if np.isnan(self._sent_objective):
+            return not np.isnan(objective)
+        if self._objective == "rmse":
+            return objective < self._sent_objective
+        return objective > self._sent_objective
+
+    async def _send(self, done: bool, with_simulation: bool) -> None:
+        assert self._latest is not None
+        params, simulation, objective = self._latest
+        n_snow_params = len(self._snow_params)
+        result: dict[str, Any] = {
+            "done": done,
+            "params": params[n_snow_params:],
+            "objective": objective,
+        }
+        if self._snow_params:
+            result["snowParams"] = dict(
+                zip(self._snow_params, params[:n_snow_params].tolist())
+            )
+        if with_simulation:
+            result["simulation"] = pl.DataFrame(
+                {"date": self._dates, "streamflow": simulation}
+            )
+        await send(self._ws, "result", result)
+        self._sent_objective = objective
@@ -1,19 +1,36 @@
-from datetime import date
-from typing import Any, Callable
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
 
 import numpy as np
 import numpy.typing as npt
 import polars as pl
-from holmes import data
-from holmes.exceptions import HolmesDataError
+from holmes import config, data
+from holmes.exceptions import (
+    HolmesDataError,
+    HolmesNumericalError,
+    HolmesValidationError,
+)
 from holmes.logging import logger
-from holmes.models import hydro, snow
+from holmes.models import indicators, snow
+from holmes.utils.paths import cache_dir
 from holmes.utils.print import format_list
 from holmes.utils.websocket import cleanup_websocket, send
-from holmes_rs.pet import oudin
-from starlette.routing import BaseRoute, WebSocketRoute
+from holmes_rs import projection as ensemble
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import BaseRoute, Route, WebSocketRoute
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
+# results of recent projections, keyed by `_get_cache_key`
+_projection_cache: OrderedDict[str, tuple[pl.DataFrame, pl.DataFrame]] = (
+    OrderedDict()
+)
+_projection_cache_info = {"hits": 0, "disk_hits": 0, "misses": 0}
+
 ##########
 # public #
 ##########
@@ -22,9 +39,40 @@ from starlette.websockets import WebSocket, WebSocketDisconnect
 def get_routes() -> list[BaseRoute]:
     return [
         WebSocketRoute("/", endpoint=_websocket_handler),
+        Route("/cache", endpoint=_get_cache_info, methods=["GET"]),
     ]
 
 
+def get_projection_cache_info() -> dict[str, int | float]:
+    """
+    Get statistics of the projection results cache.
+
+    Returns
+    -------
+    dict[str, int | float]
+        Number of hits (including those read from disk), hits read from disk
+        and misses since the last clear, their hit rate, and the number of
+        entries kept in memory and its maximum
+    """
+    hits = _projection_cache_info["hits"]
+    requests = hits + _projection_cache_info["misses"]
+    return {
+        **_projection_cache_info,
+        "hit_rate": hits / requests if requests else 0.0,
+        "entries": len(_projection_cache),
+        "max_entries": config.PROJECTION_CACHE_SIZE,
+    }
+
+
+def clear_projection_cache() -> None:
+    """
+    Empty the in-memory projection results cache and reset its statistics.
+    Results cached on disk are kept.
+    """
+    _projection_cache.clear()
+    _projection_cache_info.update(hits=0, disk_hits=0, misses=0)
+
+
 ##########
 # routes #
 ##########
@@ -65,18 +113,12 @@ async def _handle_message(ws: WebSocket, msg: dict[str, Any]) -> None:
 async def _handle_config_message(ws: WebSocket, msg_data: str) -> None:
     """Handle config request - return available projection configurations."""
     try:
-        config = (
-            data.read_projection_data(msg_data)
-            .select("model", "horizon", "scenario")
-            .unique()
-            .sort("model", "horizon", "scenario")
-            .collect()
-        )
+        configs = data.read_projection_configs(msg_data)
     except HolmesDataError as exc:
         await send(ws, "error", str(exc))
         return
 
-    await send(ws, "config", config)
+    await send(ws, "config", configs)
 
 
 async def _handle_projection_message(
@@ -97,13 +139,24 @@ async def _handle_projection_message(
 
     catchment = msg_data["calibration"]["catchment"]
 
+    key = _get_cache_key(msg_data)
+    cached = _read_cached_projection(key)
+    if cached is not None:
+        results, projection = cached
+        await send(
+            ws,
+            "projection",
+            {"projection": projection, "results": results},
+        )
+        return
+
     try:
         _data = (
-            data.read_projection_data(catchment)
-            .filter(
-                pl.col("model") == msg_data["config"]["model"],
-                pl.col("horizon") == msg_data["config"]["horizon"],
-                pl.col("scenario") == msg_data["config"]["scenario"],
+            data.read_projection_data(
+                catchment,
+                model=msg_data["config"]["model"],
+                horizon=msg_data["config"]["horizon"],
+                scenario=msg_data["config"]["scenario"],
             )
             .sort("member")
             .collect()
@@ -117,40 +170,64 @@ async def _handle_projection_message(
     latitude = metadata["latitude"]
 
     # Only set up snow parameters when snow model is used
-    if msg_data["calibration"]["snowModel"] is not None:
-        elevation_layers = np.array(metadata["altitude_layers"])
-        median_elevation = metadata["median_altitude"]
-        qnbv = metadata["qnbv"]
-        snow_simulate = snow.get_model(msg_data["calibration"]["snowModel"])
-        snow_params = np.array([0.25, 3.74, qnbv])
+    snow_model = msg_data["calibration"]["snowModel"]
+    if snow_model is not None:
+        # calibrated snow parameters, or the defaults for calibrations
+        # without them, with the catchment's `qnbv`
+        snow_params = (
+            {"ctg": 0.25, "kf": 3.74}
+            | msg_data["calibration"].get("snowParams", {})
+            | {"qnbv": metadata["qnbv"]}
+        )
+        snow_inputs = {
+            "snow_model": snow_model,
+            "snow_params": np.array(
+                [
+                    snow_params[name]
+                    for name in snow.get_param_names(snow_model)
+                ]
+            ),
+            "elevation_layers": np.array(metadata["altitude_layers"]),
+            "median_elevation": metadata["median_altitude"],
+        }
     else:
-        elevation_layers = None
-        median_elevation = None
-        snow_simulate = None
-        snow_params = None
+        snow_inputs = {}
 
-    hydro_simulate = hydro.get_model(msg_data["calibration"]["hydroModel"])
     hydro_params = np.array(
         list(msg_data["calibration"]["hydroParams"].values())
     )
 
-    projection = pl.concat(
-        [
-            _run_projection(
-                member_data,
-                elevation_layers,
-                median_elevation,
-                latitude,
-                hydro_simulate,
-                snow_simulate,
-                hydro_params,
-                snow_params,
-            ).with_columns(pl.lit(member_data[0, "member"]).alias("member"))
-            for member_data in _data.partition_by("member")
-        ]
+    try:
+        members, dates, precipitation, temperature = _stack_members(_data)
+    except HolmesDataError as exc:
+        await send(ws, "error", str(exc))
+        return
+
+    day_of_year = (
+        ((dates.dt.ordinal_day() - 1) % 365 + 1).to_numpy().astype(np.uintp)
+    )
+
+    # all members run in parallel in a single call
+    try:
+        streamflow = ensemble.simulate(
+            msg_data["calibration"]["hydroModel"],
+            hydro_params,
+            precipitation,
+            temperature,
+            day_of_year,
+            latitude,
+            **snow_inputs,
+        )
+    except (HolmesNumericalError, HolmesValidationError) as exc:
+        logger.error(f"Projection simulation failed: {exc}")
+        await send(ws, "error", str(exc))
+        return
+
+    # indicators and day of year climatology are computed in a single query
+    results, projection = indicators.compute_indicators(
+        dates, members, streamflow
     )
-    results = _evaluate_projection(projection)
-    projection = _aggregate_projections(projection)
+    _cache_projection(key, results, projection)
 
     await send(
         ws,
@@ -159,138 +236,166 @@ async def _handle_projection_message(
     )
 
 
+async def _get_cache_info(_: Request) -> Response:
+    return JSONResponse(get_projection_cache_info())
+
+
 ###########
 # private #
 ###########
 
 
-def _run_projection(
-    _data: pl.DataFrame,
-    elevation_layers: npt.NDArray[np.float64] | None,
-    median_elevation: float | None,
-    latitude: float,
-    hydro_simulate: Callable[
-        [
-            npt.NDArray[np.float64],
-            npt.NDArray[np.float64],
-            npt.NDArray[np.float64],
-        ],
-        npt.NDArray[np.float64],
-    ],
-    snow_simulate: (
-        Callable[
-            [
-                npt.NDArray[np.float64],
-                npt.NDArray[np.float64],
-                npt.NDArray[np.float64],
-                npt.NDArray[np.uintp],
-                npt.NDArray[np.float64],
-                float,
-            ],
-            npt.NDArray[np.float64],
-        ]
-        | None
-    ),
-    hydro_params: npt.NDArray[np.float64],
-    snow_params: npt.NDArray[np.float64] | None,
-) -> pl.DataFrame:
-    precipitation = _data["precipitation"].to_numpy()
-    temperature = _data["temperature"].to_numpy()
-    day_of_year = (
-        _data.select((pl.col("date").dt.ordinal_day() - 1).mod(365) + 1)[
-            "date"
-        ]
-        .to_numpy()
-        .astype(np.uintp)
-    )
-
-    pet = oudin.simulate(temperature, day_of_year, latitude)
-
-    if snow_simulate is not None:
-        # These values are guaranteed to be non-None when snow_simulate is set
-        assert snow_params is not None
-        assert elevation_layers is not None
-        assert median_elevation is not None
-        precipitation = snow_simulate(
-            snow_params,
-            precipitation,
-            temperature,
-            day_of_year,
-            elevation_layers,
-            median_elevation,
-        )
+def _get_cache_key(msg_data: dict[str, Any]) -> str:
+    """
+    Hash of everything determining a projection's results: the catchment and
+    the version of its projections, the models and their parameters, and the
+    climate model, horizon and scenario.
+    """
+    calibration = msg_data["calibration"]
+    catchment = calibration["catchment"]
+    key = [
+        catchment,
+        data.get_projection_data_version(catchment),
+        calibration["hydroModel"],
+        calibration["snowModel"],
+        # parameters are given to the model in this order
+        [float(value) for value in calibration["hydroParams"].values()],
+        (
+            None
+            if "snowParams" not in calibration
+            else [float(value) for value in calibration["snowParams"].values()]
+        ),
+        msg_data["config"]["model"],
+        msg_data["config"]["horizon"],
+        msg_data["config"]["scenario"],
+    ]
+    return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+
+def _read_cached_projection(
+    key: str,
+) -> tuple[pl.DataFrame, pl.DataFrame] | None:
+    """
+    Reads the cached indicators and climatology of a projection from memory
+    or, if enabled, from disk, counting the hit or miss.
+    """
+    cached = _projection_cache.get(key)
+    if cached is not None:
+        _projection_cache.move_to_end(key)
+        _projection_cache_info["hits"] += 1
+        return cached
+
+    if config.PROJECTION_CACHE_ON_DISK:
+        results_path, projection_path = _get_disk_cache_paths(key)
+        if results_path.exists() and projection_path.exists():
+            try:
+                cached = (
+                    pl.read_ipc(results_path, memory_map=False),
+                    pl.read_ipc(projection_path, memory_map=False),
+                )
+            except (OSError, pl.exceptions.ComputeError) as exc:
+                logger.warning(f"Failed to read cached projection: {exc}")
+            else:
+                _projection_cache_info["hits"] += 1
+                _projection_cache_info["disk_hits"] += 1
+                _cache_in_memory(key, cached)
+                return cached
+
+    _projection_cache_info["misses"] += 1
+    return None
+
+
+def _cache_projection(
+    key: str, results: pl.DataFrame, projection: pl.DataFrame
+) -> None:
+    """
+    Caches a projection's indicators and climatology in memory and, if
+    enabled, on disk. Failing to write to disk is logged but not raised.
+    """
+    _cache_in_memory(key, (results, projection))
+    if not config.PROJECTION_CACHE_ON_DISK:
+        return
 
-    return _data.select("date").with_columns(
-        pl.Series(
-            "streamflow", hydro_simulate(hydro_params, precipitation, pet)
-        )
+    for frame, path in zip((results, projection), _get_disk_cache_paths(key)):
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            frame.write_ipc(tmp_path)
+            # atomic so that concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"Failed to cache projection on disk: {exc}")
+            return
+
+
+def _cache_in_memory(
+    key: str, cached: tuple[pl.DataFrame, pl.DataFrame]
+) -> None:
+    """
+    Adds an entry to the in-memory cache, evicting the least recently used
+    entries beyond `PROJECTION_CACHE_SIZE`.
+    """
+    _projection_cache[key] = cached
+    _projection_cache.move_to_end(key)
+    while len(_projection_cache) > config.PROJECTION_CACHE_SIZE:
+        _projection_cache.popitem(last=False)
+
+
+def _get_disk_cache_paths(key: str) -> tuple[Path, Path]:
+    directory = cache_dir / "projections"
+    return (
+        directory / f"{key}.results.arrow",
+        directory / f"{key}.projection.arrow",
     )
 
 
-def _aggregate_projections(_data: pl.DataFrame) -> pl.DataFrame:
-    _data = (
-        _data.with_columns(
-            ((pl.col("date").dt.ordinal_day() - 1).mod(365) + 1).alias(
-                "day_of_year"
-            )
-        )
-        .drop("date")
-        .group_by("member", "day_of_year")
-        .agg(pl.col("streamflow").mean())
-    )
-    return (
-        _data.pivot(index="day_of_year", on="member", values="streamflow")
-        .join(
-            _data.group_by("day_of_year").agg(
-                pl.col("streamflow").median().alias("median")
-            ),
-            on="day_of_year",
+def _stack_members(
+    _data: pl.DataFrame,
+) -> tuple[
+    pl.Series, pl.Series, npt.NDArray[np.float64], npt.NDArray[np.float64]
+]:
+    """
+    Stack the forcings of every member into (n_members, n_days) arrays.
+
+    Parameters
+    ----------
+    _data : pl.DataFrame
+        Projection data with `date`, `member`, `precipitation` and
+        `temperature` columns
+
+    Returns
+    -------
+    members : pl.Series
+        Sorted members, one per row of the arrays
+    dates : pl.Series
+        Sorted dates, one per column of the arrays
+    precipitation : npt.NDArray[np.float64]
+        Precipitation of each member
+    temperature : npt.NDArray[np.float64]
+        Temperature of each member
+
+    Raises
+    ------
+    HolmesDataError
+        If the members don't cover the same dates
+    """
+    members = _data["member"].unique().sort()
+    columns = [str(member) for member in members]
+
+    stacked = []
+    for variable in ("precipitation", "temperature"):
+        wide = _data.pivot(on="member", index="date", values=variable).sort(
+            "date"
         )
-        .with_columns(
-            pl.lit(date(2021, 1, 1)).alias("date")
-            + pl.duration(days=pl.col("day_of_year") - 1)
+        if wide.null_count().sum_horizontal().item() > 0:
+            raise HolmesDataError(
+                "The projection members don't cover the same dates."
+            )
+        stacked.append(
+            np.ascontiguousarray(
+                wide.select(columns).to_numpy().T, dtype=np.float64
+            )
         )
-        .drop("day_of_year")
-        .sort("date")
-    )
 
-
-def _evaluate_projection(_data: pl.DataFrame) -> pl.DataFrame:
-    winter_min = (
-        _data.filter(pl.col("date").dt.month().is_between(1, 3))
-        .group_by("member", pl.col("date").dt.year())
-        .agg(pl.col("streamflow").min())
-        .group_by("member")
-        .agg(pl.col("streamflow").median().alias("winter_min"))
-    )
-    summer_min = (
-        _data.filter(pl.col("date").dt.month().is_between(5, 10))
-        .group_by("member", pl.col("date").dt.year())
-        .agg(pl.col("streamflow").min())
-        .group_by("member")
-        .agg(pl.col("streamflow").median().alias("summer_min"))
-    )
-    spring_max = (
-        _data.filter(pl.col("date").dt.month().is_between(3, 6))
-        .group_by("member", pl.col("date").dt.year())
-        .agg(pl.col("streamflow").max())
-        .group_by("member")
-        .agg(pl.col("streamflow").median().alias("spring_max"))
-    )
-    autumn_max = (
-        _data.filter(pl.col("date").dt.month().is_between(9, 12))
-        .group_by("member", pl.col("date").dt.year())
-        .agg(pl.col("streamflow").max())
-        .group_by("member")
-        .agg(pl.col("streamflow").median().alias("autumn_max"))
-    )
-    mean = _data.group_by("member").agg(
-        pl.col("streamflow").mean().alias("mean")
-    )
-    return (
-        winter_min.join(summer_min, on="member")
-        .join(spring_max, on="member")
-        .join(autumn_max, on="member")
-        .join(mean, on="member")
-        .sort("member")
-    )
+    return members, wide["date"], stacked[0], stacked[1]
@@ -7,9 +7,9 @@ from holmes import data
 from holmes.exceptions import HolmesDataError
 from holmes.logging import logger
 from holmes.models import hydro, snow
-from holmes.models.utils import evaluate
 from holmes.utils.print import format_list
 from holmes.utils.websocket import cleanup_websocket, send
+from holmes_rs.metrics import evaluate_all
 from starlette.routing import BaseRoute, WebSocketRoute
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
@@ -138,73 +138,50 @@ async def _handle_simulation_message(
     start = msg_data["config"]["start"]
     end = msg_data["config"]["end"]
 
-    try:
-        _data, warmup_steps = data.read_data(catchment, start, end)
-    except HolmesDataError as exc:
-        await send(ws, "error", str(exc))
-        return
-
     # Check if any calibration uses a snow model
     uses_snow = any(
         calibration["snowModel"] is not None
         for calibration in msg_data["calibration"]
     )
 
+    try:
+        forcings = data.read_forcings(
+            catchment, start, end, with_snow=uses_snow
+        )
+    except HolmesDataError as exc:
+        await send(ws, "error", str(exc))
+        return
+
     if uses_snow:
-        try:
-            metadata = data.read_cemaneige_info(catchment)
-        except HolmesDataError as exc:
-            await send(ws, "error", str(exc))
-            return
-        try:
-            temperature = _data["temperature"].to_numpy()
-        except pl.exceptions.ColumnNotFoundError:
-            await send(
-                ws,
-                "error",
-                f"The {catchment} catchment doesn't have any temperature data.",
-            )
-            return
-        elevation_layers = np.array(metadata["altitude_layers"])
-        median_elevation = metadata["median_altitude"]
-        qnbv = metadata["qnbv"]
+        # guaranteed by `with_snow`
+        assert forcings.cemaneige is not None
+        temperature = forcings.temperature
+        elevation_layers = np.array(forcings.cemaneige["altitude_layers"])
+        median_elevation = forcings.cemaneige["median_altitude"]
+        qnbv = forcings.cemaneige["qnbv"]
     else:
         temperature = None
         elevation_layers = None
         median_elevation = None
         qnbv = None
 
-    precipitation = _data["precipitation"].to_numpy()
-    pet = _data["pet"].to_numpy()
-    day_of_year = (
-        _data.select((pl.col("date").dt.ordinal_day() - 1).mod(365) + 1)[
-            "date"
-        ]
-        .to_numpy()
-        .astype(np.uintp)
+    observations = forcings.observations
+    warmup_steps = forcings.warmup_steps
+
+    simulations = _run_simulations(
+        forcings.precipitation,
+        temperature,
+        forcings.pet,
+        forcings.day_of_year,
+        elevation_layers,
+        median_elevation,
+        qnbv,
+        observations,
+        msg_data["calibration"],
+        warmup_steps,
     )
 
-    observations = _data["streamflow"].to_numpy()
-
-    simulations = [
-        _run_simulation(
-            precipitation,
-            temperature,
-            pet,
-            day_of_year,
-            elevation_layers,
-            median_elevation,
-            qnbv,
-            observations,
-            calibration["hydroModel"],
-            calibration["snowModel"],
-            calibration["hydroParams"],
-            warmup_steps,
-        )
-        for calibration in msg_data["calibration"]
-    ]
-
-    simulation = _data.select("date").with_columns(
+    simulation = pl.DataFrame({"date": forcings.dates}).with_columns(
         *[
             pl.Series(f"simulation_{i+1}", simulation)
             for i, (simulation, _) in enumerate(simulations)
@@ -220,38 +197,10 @@ async def _handle_simulation_message(
             pl.mean_horizontal(pl.exclude("date")).alias("multimodel")
         )
         streamflow = simulation["multimodel"].to_numpy()
-        observations_evaluated = observations[warmup_steps:]
-        streamflow_evaluated = streamflow[warmup_steps:]
         results.append(
             {
                 "name": "multimodel",
-                "nse_none": evaluate(
-                    observations_evaluated, streamflow_evaluated, "nse", "none"
-                ),
-                "nse_sqrt": evaluate(
-                    observations_evaluated, streamflow_evaluated, "nse", "sqrt"
-                ),
-                "nse_log": evaluate(
-                    observations_evaluated, streamflow_evaluated, "nse", "log"
-                ),
-                "mean_bias": evaluate(
-                    observations_evaluated,
-                    streamflow_evaluated,
-                    "mean_bias",
-                    "none",
-                ),
-                "deviation_bias": evaluate(
-                    observations_evaluated,
-                    streamflow_evaluated,
-                    "deviation_bias",
-                    "none",
-                ),
-                "correlation": evaluate(
-                    observations_evaluated,
-                    streamflow_evaluated,
-                    "correlation",
-                    "none",
-                ),
+                **evaluate_all(observations, streamflow, warmup_steps),
             }
         )
 
@@ -270,7 +219,7 @@ async def _handle_simulation_message(
 ###########
 
 
-def _run_simulation(
+def _run_simulations(
     precipitation: npt.NDArray[np.float64],
     temperature: npt.NDArray[np.float64] | None,
     pet: npt.NDArray[np.float64],
@@ -279,59 +228,79 @@ def _run_simulation(
     median_elevation: float | None,
     qnbv: float | None,
     observations: npt.NDArray[np.float64],
-    hydro_model: str,
-    snow_model: str | None,
-    hydro_params: dict[str, float],
+    calibrations: list[dict[str, Any]],
     warmup_steps: int,
-) -> tuple[npt.NDArray[np.float64], dict[str, float]]:
-
-    hydro_simulate = hydro.get_model(cast(hydro.HydroModel, hydro_model))
-    hydro_params_ = np.array(list(hydro_params.values()))
-
-    if snow_model is not None:
-        # These values are guaranteed to be non-None when snow_model is set
-        assert temperature is not None
-        assert elevation_layers is not None
-        assert median_elevation is not None
-        assert qnbv is not None
-        snow_simulate = snow.get_model(cast(snow.SnowModel, snow_model))
-        snow_params = np.array([0.25, 3.74, qnbv])
-        precipitation = snow_simulate(
-            snow_params,
-            precipitation,
-            temperature,
-            day_of_year,
-            elevation_layers,
-            median_elevation,
+) -> list[tuple[npt.NDArray[np.float64], dict[str, float]]]:
+    """
+    Run every calibration, in the order given.
+
+    Calibrations sharing the same hydro and snow models and snow parameters
+    are simulated in a single batched call, so the snow model runs once per
+    group and the forcings are only validated once. Calibrations without
+    calibrated snow parameters use the default ones with the catchment's
+    `qnbv`.
+    """
+    groups: dict[
+        tuple[str, str | None, tuple[float, ...] | None], list[int]
+    ] = {}
+    for i, calibration in enumerate(calibrations):
+        snow_params = calibration.get("snowParams")
+        key = (
+            calibration["hydroModel"],
+            calibration["snowModel"],
+            None if snow_params is None else tuple(snow_params.values()),
         )
+        groups.setdefault(key, []).append(i)
+
+    simulations: list[
+        tuple[npt.NDArray[np.float64], dict[str, float]] | None
+    ] = [None] * len(calibrations)
+
+    for (
+        hydro_model,
+        snow_model,
+        calibrated_snow_params,
+    ), indices in groups.items():
+        hydro_simulate = hydro.get_batch_model(
+            cast(hydro.HydroModel, hydro_model)
+        )
+        hydro_params = np.array(
+            [list(calibrations[i]["hydroParams"].values()) for i in indices],
+            dtype=np.float64,
+        )
+
+        if snow_model is not None:
+            # These values are guaranteed to be non-None when snow_model is set
+            assert temperature is not None
+            assert elevation_layers is not None
+            assert median_elevation is not None
+            assert qnbv is not None
+            snow_simulate = snow.get_model(cast(snow.SnowModel, snow_model))
+            snow_params = np.array(
+                (
+                    [0.25, 3.74, qnbv]
+                    if calibrated_snow_params is None
+                    else calibrated_snow_params
+                ),
+                dtype=np.float64,
+            )
+            hydro_precipitation = snow_simulate(
+                snow_params,
+                precipitation,
+                temperature,
+                day_of_year,
+                elevation_layers,
+                median_elevation,
+            )
+        else:
+            hydro_precipitation = precipitation
+
+        streamflows = hydro_simulate(hydro_params, hydro_precipitation, pet)
+
+        for i, streamflow in zip(indices, streamflows):
+            simulations[i] = (
+                streamflow,
+                evaluate_all(observations, streamflow, warmup_steps),
+            )
 
-    streamflow = hydro_simulate(hydro_params_, precipitation, pet)
-
-    observations_evaluated = observations[warmup_steps:]
-    streamflow_evaluated = streamflow[warmup_steps:]
-
-    results = {
-        "nse_none": evaluate(
-            observations_evaluated, streamflow_evaluated, "nse", "none"
-        ),
-        "nse_sqrt": evaluate(
-            observations_evaluated, streamflow_evaluated, "nse", "sqrt"
-        ),
-        "nse_log": evaluate(
-            observations_evaluated, streamflow_evaluated, "nse", "log"
-        ),
-        "mean_bias": evaluate(
-            observations_evaluated, streamflow_evaluated, "mean_bias", "none"
-        ),
-        "deviation_bias": evaluate(
-            observations_evaluated,
-            streamflow_evaluated,
-            "deviation_bias",
-            "none",
-        ),
-        "correlation": evaluate(
-            observations_evaluated, streamflow_evaluated, "correlation", "none"
-        ),
-    }
-
-    return streamflow, results
+    return [simulation for simulation in simulations if simulation is not None]
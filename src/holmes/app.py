@@ -8,7 +8,8 @@ from pathlib import Path
 import uvicorn
 from starlette.applications import Starlette
 
-from . import api, config
+from . import api, batch, config
+from .exceptions import HolmesConfigError
 from .logging import init_logging, logger
 
 ##########
@@ -38,10 +39,39 @@ def run_server() -> None:
         action="version",
         version=f"%(prog)s {importlib.metadata.version('holmes-hydro')}",
     )
-    parser.parse_args()
+    subparsers = parser.add_subparsers(dest="command")
+    calibrate_parser = subparsers.add_parser(
+        "calibrate",
+        help="calibrate the combinations of a manifest without the server",
+    )
+    calibrate_parser.add_argument(
+        "manifest", type=Path, help="TOML manifest of the calibrations"
+    )
+    calibrate_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("calibrations.parquet"),
+        help="Parquet file of the results (default: calibrations.parquet)",
+    )
+    calibrate_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes (default: number of cores)",
+    )
+    args = parser.parse_args()
 
     init_logging()
 
+    if args.command == "calibrate":
+        try:
+            batch.run_batch(args.manifest, args.output, workers=args.workers)
+        except HolmesConfigError as exc:
+            parser.exit(1, f"{exc}\n")
+        return
+
     url = f"http://{config.HOST}:{config.PORT}"
     logger.info(
         f"Starting app in {'debug' if config.DEBUG else 'production'} mode "
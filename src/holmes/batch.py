@@ -0,0 +1,378 @@
+"""
+Headless batch calibration.
+
+A manifest lists catchments and model combinations. Every combination is
+calibrated in a process pool with `models.calibration.calibrate` and the
+calibrated parameters and objectives are written to a Parquet table.
+
+Manifests are TOML files:
+
+```toml
+catchments = ["Au Saumon", "Baskatong"]
+hydro_models = ["gr4j", "bucket"]
+snow_models = ["none", "cemaneige"]
+objectives = ["nse", "kge"]
+transformations = ["none", "sqrt"]
+# optional, defaults to each catchment's available period
+start = "2000-01-01"
+end = "2010-12-31"
+algorithm = "sce"
+
+# optional, defaults to the algorithm's defaults
+[algorithm_params]
+n_complexes = 10
+```
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, get_args
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+
+from holmes import data
+from holmes.exceptions import HolmesConfigError, HolmesDataError, HolmesError
+from holmes.logging import logger
+from holmes.models import calibration, hydro, snow
+
+#########
+# types #
+#########
+
+
+class CalibrationJob(NamedTuple):
+    """One calibration of a batch."""
+
+    catchment: str
+    hydro_model: hydro.HydroModel
+    snow_model: snow.SnowModel | None
+    objective: calibration.Objective
+    transformation: calibration.Transformation
+    # None for the catchment's first or last available date
+    start: str | None
+    end: str | None
+    algorithm: calibration.Algorithm
+    algorithm_params: dict[str, Any]
+
+
+RESULTS_SCHEMA = {
+    "catchment": pl.String,
+    "hydro_model": pl.String,
+    "snow_model": pl.String,
+    "objective": pl.String,
+    "transformation": pl.String,
+    "start": pl.String,
+    "end": pl.String,
+    "param_names": pl.List(pl.String),
+    "params": pl.List(pl.Float64),
+    "rmse": pl.Float64,
+    "nse": pl.Float64,
+    "kge": pl.Float64,
+    "duration": pl.Float64,
+    "error": pl.String,
+}
+
+##########
+# public #
+##########
+
+
+def read_manifest(path: Path) -> list[CalibrationJob]:
+    """
+    Read a batch calibration manifest (see the module documentation).
+
+    Returns
+    -------
+    list[CalibrationJob]
+        One job for each combination of catchment, hydro model, snow model,
+        objective and transformation
+
+    Raises
+    ------
+    HolmesConfigError
+        If the manifest can't be read or has invalid values
+    """
+    try:
+        manifest = tomllib.loads(path.read_text())
+    except (OSError, tomllib.TOMLDecodeError) as exc:
+        raise HolmesConfigError(
+            f"Failed to read the manifest {path}: {exc}"
+        ) from exc
+
+    catchments = _read_list(manifest, "catchments", None, None)
+    hydro_models = _read_list(
+        manifest, "hydro_models", get_args(hydro.HydroModel), None
+    )
+    snow_models = [
+        None if model == "none" else model
+        for model in _read_list(
+            manifest,
+            "snow_models",
+            ("none", *get_args(snow.SnowModel)),
+            ["none"],
+        )
+    ]
+    objectives = _read_list(
+        manifest, "objectives", get_args(calibration.Objective), ["nse"]
+    )
+    transformations = _read_list(
+        manifest,
+        "transformations",
+        get_args(calibration.Transformation),
+        ["none"],
+    )
+
+    algorithm = manifest.get("algorithm", "sce")
+    if algorithm not in get_args(calibration.Algorithm):
+        raise HolmesConfigError(f"Unknown calibration algorithm {algorithm}.")
+    defaults = {
+        param["name"]: param["default"]
+        for param in calibration.get_config(algorithm)
+    }
+    algorithm_params = manifest.get("algorithm_params", {})
+    unknown = set(algorithm_params) - set(defaults)
+    if unknown:
+        raise HolmesConfigError(
+            f"Unknown {algorithm} parameters: {', '.join(sorted(unknown))}."
+        )
+
+    return [
+        CalibrationJob(
+            catchment,
+            hydro_model,
+            snow_model,
+            objective,
+            transformation,
+            manifest.get("start"),
+            manifest.get("end"),
+            algorithm,
+            defaults | algorithm_params,
+        )
+        for catchment, hydro_model, snow_model, objective, transformation in (
+            itertools.product(
+                catchments,
+                hydro_models,
+                snow_models,
+                objectives,
+                transformations,
+            )
+        )
+    ]
+
+
+def run_jobs(
+    jobs: list[CalibrationJob], *, workers: int | None = None
+) -> pl.DataFrame:
+    """
+    Run calibrations in a process pool.
+
+    Each process runs one calibration at a time with a single SCE-UA thread
+    (unless `RAYON_NUM_THREADS` is set), so the pool size sets the number of
+    cores used.
+
+    Parameters
+    ----------
+    jobs : list[CalibrationJob]
+        Calibrations to run
+    workers : int | None
+        Number of processes, the number of cores by default
+
+    Returns
+    -------
+    pl.DataFrame
+        One row per job, in order, following `RESULTS_SCHEMA`. Failed jobs
+        have their `error` set instead of parameters and objectives.
+    """
+    # spawned, as forking a process running the rust thread pools can
+    # deadlock
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as executor:
+        rows = list(executor.map(run_job, jobs))
+    return pl.DataFrame(rows, schema=RESULTS_SCHEMA)
+
+
+def run_job(job: CalibrationJob) -> dict[str, Any]:
+    """
+    Run a calibration, returning its results row (see `RESULTS_SCHEMA`).
+    Data and model errors are reported in the `error` column.
+    """
+    start_time = time.perf_counter()
+    start, end = job.start, job.end
+    params: npt.NDArray[np.float64] | None = None
+    objectives: dict[str, float] = {}
+    error = None
+
+    async def callback(
+        done: bool,
+        params_: npt.NDArray[np.float64],
+        simulation: npt.NDArray[np.float64],
+        results: dict[str, float],
+    ) -> None:
+        objectives.update(results)
+
+    try:
+        if start is None or end is None:
+            period = _get_period(job.catchment)
+            start, end = start or period[0], end or period[1]
+        forcings = data.read_forcings(
+            job.catchment,
+            start,
+            end,
+            with_snow=job.snow_model is not None,
+        )
+        if job.snow_model is not None:
+            # guaranteed by `with_snow`
+            assert forcings.cemaneige is not None
+            temperature = forcings.temperature
+            elevation_layers = np.array(forcings.cemaneige["altitude_layers"])
+            median_elevation = forcings.cemaneige["median_altitude"]
+            qnbv = forcings.cemaneige["qnbv"]
+        else:
+            temperature = None
+            elevation_layers = None
+            median_elevation = None
+            qnbv = None
+        params = asyncio.run(
+            calibration.calibrate(
+                forcings.precipitation,
+                temperature,
+                forcings.pet,
+                forcings.observations,
+                forcings.day_of_year,
+                elevation_layers,
+                median_elevation,
+                qnbv,
+                forcings.warmup_steps,
+                job.hydro_model,
+                job.snow_model,
+                job.objective,
+                job.transformation,
+                job.algorithm,
+                job.algorithm_params,
+                callback=callback,
+            )
+        )
+    except (HolmesError, HolmesDataError) as exc:
+        error = str(exc)
+        logger.error(f"Calibration of {_describe(job)} failed: {exc}")
+    except Exception as exc:  # pragma: no cover  # noqa: BLE001
+        # reported like the errors above, so that one failing job doesn't
+        # abort the whole batch
+        error = f"Unexpected error: {exc}"
+        logger.exception(f"Unexpected error calibrating {_describe(job)}")
+    else:
+        logger.info(f"Calibrated {_describe(job)}")
+
+    return {
+        "catchment": job.catchment,
+        "hydro_model": job.hydro_model,
+        "snow_model": job.snow_model,
+        "objective": job.objective,
+        "transformation": job.transformation,
+        "start": start,
+        "end": end,
+        "param_names": (
+            None
+            if params is None
+            else (
+                []
+                if job.snow_model is None
+                else snow.get_param_names(job.snow_model)
+            )
+            + [param["name"] for param in hydro.get_config(job.hydro_model)]
+        ),
+        "params": None if params is None else params.tolist(),
+        "rmse": objectives.get("rmse"),
+        "nse": objectives.get("nse"),
+        "kge": objectives.get("kge"),
+        "duration": time.perf_counter() - start_time,
+        "error": error,
+    }
+
+
+def run_batch(
+    manifest: Path, output: Path, *, workers: int | None = None
+) -> pl.DataFrame:
+    """
+    Run the calibrations of a manifest and write their results to a Parquet
+    file.
+
+    Raises
+    ------
+    HolmesConfigError
+        If the manifest can't be read or has invalid values
+    """
+    jobs = read_manifest(manifest)
+    logger.info(f"Running {len(jobs)} calibrations from {manifest}")
+    results = run_jobs(jobs, workers=workers)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    results.write_parquet(output)
+    n_failed = results["error"].is_not_null().sum()
+    logger.info(
+        f"Wrote the results of {len(jobs)} calibrations to {output}"
+        + (f" ({n_failed} failed)" if n_failed else "")
+    )
+    return results
+
+
+###########
+# private #
+###########
+
+
+def _read_list(
+    manifest: dict[str, Any],
+    key: str,
+    options: tuple[str, ...] | None,
+    default: list[str] | None,
+) -> list[Any]:
+    values = manifest.get(key, default)
+    if values is None:
+        raise HolmesConfigError(f"The manifest must provide `{key}`.")
+    if (
+        not isinstance(values, list)
+        or not values
+        or not all(isinstance(value, str) for value in values)
+    ):
+        raise HolmesConfigError(
+            f"`{key}` must be a non-empty list of strings."
+        )
+    if options is not None:
+        unknown = [value for value in values if value not in options]
+        if unknown:
+            raise HolmesConfigError(
+                f"Unknown `{key}`: {', '.join(unknown)}. Valid options: "
+                f"{', '.join(options)}."
+            )
+    return values
+
+
+def _get_period(catchment: str) -> tuple[str, str]:
+    for name, _, period in data.get_available_catchments():
+        if name == catchment:
+            return period
+    raise HolmesDataError(f"The catchment {catchment} doesn't exist.")
+
+
+def _describe(job: CalibrationJob) -> str:
+    return (
+        f"{job.catchment} with {job.hydro_model}"
+        + (f" and {job.snow_model}" if job.snow_model else "")
+        + f" ({job.objective}, {job.transformation})"
+    )
+
+
+def _init_worker() -> None:
+    # the processes already use every core
+    os.environ.setdefault("RAYON_NUM_THREADS", "1")
@@ -10,7 +10,11 @@ import warnings
 from starlette.config import Config
 
 from holmes.exceptions import HolmesConfigError
-from holmes.validation import validate_host, validate_port
+from holmes.validation import (
+    validate_host,
+    validate_port,
+    validate_positive_int,
+)
 
 with warnings.catch_warnings():
     warnings.filterwarnings(
@@ -34,3 +38,80 @@ try:
     HOST = validate_host(_host)
 except ValueError as exc:
     raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate MAX_CONCURRENT_CALIBRATIONS
+_max_concurrent_calibrations = config(
+    "MAX_CONCURRENT_CALIBRATIONS", cast=int, default=2
+)
+try:
+    MAX_CONCURRENT_CALIBRATIONS = validate_positive_int(
+        _max_concurrent_calibrations, "MAX_CONCURRENT_CALIBRATIONS"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate FORCINGS_CACHE_SIZE (in MB)
+_forcings_cache_size = config("FORCINGS_CACHE_SIZE", cast=int, default=256)
+try:
+    FORCINGS_CACHE_SIZE = validate_positive_int(
+        _forcings_cache_size, "FORCINGS_CACHE_SIZE"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate CALIBRATION_UPDATE_RATE (progress messages per second)
+_calibration_update_rate = config(
+    "CALIBRATION_UPDATE_RATE", cast=int, default=10
+)
+try:
+    CALIBRATION_UPDATE_RATE = validate_positive_int(
+        _calibration_update_rate, "CALIBRATION_UPDATE_RATE"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate CALIBRATION_SIMULATION_RATE (full series per second)
+_calibration_simulation_rate = config(
+    "CALIBRATION_SIMULATION_RATE", cast=int, default=2
+)
+try:
+    CALIBRATION_SIMULATION_RATE = validate_positive_int(
+        _calibration_simulation_rate, "CALIBRATION_SIMULATION_RATE"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate CALIBRATION_CHECKPOINT_INTERVAL (in seconds)
+_calibration_checkpoint_interval = config(
+    "CALIBRATION_CHECKPOINT_INTERVAL", cast=int, default=60
+)
+try:
+    CALIBRATION_CHECKPOINT_INTERVAL = validate_positive_int(
+        _calibration_checkpoint_interval, "CALIBRATION_CHECKPOINT_INTERVAL"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate CALIBRATION_CHECKPOINT_MAX_AGE (in days)
+_calibration_checkpoint_max_age = config(
+    "CALIBRATION_CHECKPOINT_MAX_AGE", cast=int, default=7
+)
+try:
+    CALIBRATION_CHECKPOINT_MAX_AGE = validate_positive_int(
+        _calibration_checkpoint_max_age, "CALIBRATION_CHECKPOINT_MAX_AGE"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+# Load and validate PROJECTION_CACHE_SIZE (number of projection results)
+_projection_cache_size = config("PROJECTION_CACHE_SIZE", cast=int, default=32)
+try:
+    PROJECTION_CACHE_SIZE = validate_positive_int(
+        _projection_cache_size, "PROJECTION_CACHE_SIZE"
+    )
+except ValueError as exc:
+    raise HolmesConfigError(str(exc)) from exc
+
+PROJECTION_CACHE_ON_DISK = config(
+    "PROJECTION_CACHE_ON_DISK", cast=bool, default=False
+)
@@ -6,15 +6,26 @@ CemaNeige snow model configuration, and climate projection data.
 """
 
 import csv
+import glob
 import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from datetime import timedelta
 from functools import lru_cache
-from typing import Any
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import unquote
 
 import numpy as np
+import numpy.typing as npt
 import polars as pl
+from holmes import config
 from holmes.exceptions import HolmesDataError
-from holmes.utils.paths import data_dir
+from holmes.utils.paths import cache_dir, data_dir
 from holmes.validation import validate_catchment_exists, validate_date_range
 
 logger = logging.getLogger("holmes")
@@ -28,6 +39,58 @@ OBSERVATION_OPTIONAL_COLUMNS = {"T"}
 # Required keys in CemaNeige info files
 CEMANEIGE_REQUIRED_KEYS = {"AltiBand", "QNBV", "Z50", "Lat"}
 
+# Columns partitioning the converted projection data, in directory order
+PROJECTION_PARTITIONS = ("model", "horizon", "scenario")
+
+# File in the converted projection data holding the hash of their source
+PROJECTION_SOURCE_HASH_FILE = "_source.sha256"
+
+#########
+# types #
+#########
+
+
+class Forcings(NamedTuple):
+    """
+    Model inputs for a catchment and period, as returned by `read_forcings`.
+
+    The arrays are contiguous and read-only since they are shared between
+    requests through the forcings cache.
+    """
+
+    dates: pl.Series
+    precipitation: npt.NDArray[np.float64]
+    pet: npt.NDArray[np.float64]
+    # None if the catchment doesn't have temperature data
+    temperature: npt.NDArray[np.float64] | None
+    observations: npt.NDArray[np.float64]
+    day_of_year: npt.NDArray[np.uintp]
+    warmup_steps: int
+    # output of `read_cemaneige_info`, only loaded when requested
+    cemaneige: dict[str, Any] | None
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [
+            self.precipitation,
+            self.pet,
+            self.temperature,
+            self.observations,
+            self.day_of_year,
+        ]
+        return int(self.dates.estimated_size()) + sum(
+            array.nbytes for array in arrays if array is not None
+        )
+
+
+# catchment, period, warmup length, and size and modification time of the
+# observation and CemaNeige info files, or None if they are missing
+_ForcingsKey = tuple[str, str, str, int, str]
+
+_forcings_cache: OrderedDict[_ForcingsKey, Forcings] = OrderedDict()
+_forcings_cache_lock = threading.Lock()
+_forcings_cache_info = {"hits": 0, "misses": 0, "size": 0}
+
 
 ##########
 # public #
@@ -105,6 +168,107 @@ def read_data(
     return data_, warmup_steps
 
 
+def read_forcings(
+    catchment: str,
+    start: str,
+    end: str,
+    *,
+    warmup_length: int = 3,
+    with_snow: bool = False,
+) -> Forcings:
+    """
+    Read the model inputs for a catchment within a date range.
+
+    Results are kept in an in-process LRU cache keyed by catchment, period,
+    warmup length and the size and modification time of the catchment's
+    files, bounded by the `FORCINGS_CACHE_SIZE` setting, so repeated requests
+    for the same period don't rebuild the arrays and modified files are read
+    again.
+
+    Parameters
+    ----------
+    catchment : str
+        Catchment name
+    start : str
+        Start date in "%Y-%m-%d" format
+    end : str
+        End date in "%Y-%m-%d" format
+    warmup_length : int
+        Number of years for warmup period (default 3)
+    with_snow : bool
+        If the CemaNeige metadata should be loaded and the temperature is
+        required (default False)
+
+    Returns
+    -------
+    Forcings
+        Read-only arrays for the period including the warmup, the number of
+        warmup steps and, if `with_snow`, the CemaNeige metadata
+
+    Raises
+    ------
+    HolmesDataError
+        If the data can't be read, or if `with_snow` and the CemaNeige
+        metadata or the temperature are missing
+    """
+    key = (
+        catchment,
+        start,
+        end,
+        warmup_length,
+        get_catchment_data_version(catchment),
+    )
+    with _forcings_cache_lock:
+        forcings = _forcings_cache.get(key)
+        if forcings is None:
+            _forcings_cache_info["misses"] += 1
+        else:
+            _forcings_cache.move_to_end(key)
+            _forcings_cache_info["hits"] += 1
+
+    if forcings is None:
+        forcings = _prepare_forcings(
+            catchment, start, end, warmup_length=warmup_length
+        )
+        _cache_forcings(key, forcings)
+
+    if with_snow and forcings.cemaneige is None:
+        cemaneige = read_cemaneige_info(catchment)
+        if forcings.temperature is None:
+            raise HolmesDataError(
+                f"The {catchment} catchment doesn't have any temperature data."
+            )
+        forcings = forcings._replace(cemaneige=cemaneige)
+        _cache_forcings(key, forcings)
+
+    return forcings
+
+
+def get_forcings_cache_info() -> dict[str, int]:
+    """
+    Get statistics of the forcings cache.
+
+    Returns
+    -------
+    dict[str, int]
+        Number of hits and misses since the last clear, number of cached
+        entries and their size in bytes, and the maximum size in bytes
+    """
+    with _forcings_cache_lock:
+        return {
+            **_forcings_cache_info,
+            "entries": len(_forcings_cache),
+            "max_size": config.FORCINGS_CACHE_SIZE * 2**20,
+        }
+
+
+def clear_forcings_cache() -> None:
+    """Empty the forcings cache and reset its statistics."""
+    with _forcings_cache_lock:
+        _forcings_cache.clear()
+        _forcings_cache_info.update(hits=0, misses=0, size=0)
+
+
 @lru_cache(maxsize=1)
 def get_available_catchments() -> (
     tuple[tuple[str, bool, tuple[str, str]], ...]
@@ -144,6 +308,11 @@ def read_catchment_data(catchment: str) -> pl.LazyFrame:
     """
     Read raw catchment observation data as a lazy frame.
 
+    The parsed data is cached as an Arrow IPC file in the cache directory the
+    first time it is read, and later reads memory-map that file instead of
+    parsing the CSV. The cache is invalidated when the CSV's size or
+    modification time changes.
+
     Parameters
     ----------
     catchment : str
@@ -165,6 +334,10 @@ def read_catchment_data(catchment: str) -> pl.LazyFrame:
     if not path.exists():
         raise HolmesDataError(f"Data file not found: {path}")
 
+    cached = _read_cached_observations(path)
+    if cached is not None:
+        return cached
+
     try:
         df = pl.scan_csv(path)
     except pl.exceptions.ComputeError as exc:
@@ -198,7 +371,18 @@ def read_catchment_data(catchment: str) -> pl.LazyFrame:
             f"Snow modeling may not be available for this catchment."
         )
 
-    return df.with_columns(pl.col("Date").str.strptime(pl.Date, "%Y-%m-%d"))
+    try:
+        data_ = df.with_columns(
+            pl.col("Date").str.strptime(pl.Date, "%Y-%m-%d")
+        ).collect()
+    except pl.exceptions.ComputeError as exc:
+        raise HolmesDataError(
+            f"Failed to parse CSV file '{path}': {exc}"
+        ) from exc
+
+    _write_cached_observations(path, data_)
+
+    return data_.lazy()
 
 
 def read_cemaneige_info(catchment: str) -> dict[str, Any]:
@@ -287,14 +471,30 @@ def read_cemaneige_info(catchment: str) -> dict[str, Any]:
     }
 
 
-def read_projection_data(catchment: str) -> pl.LazyFrame:
+def read_projection_data(
+    catchment: str,
+    *,
+    model: str | None = None,
+    horizon: str | None = None,
+    scenario: str | None = None,
+) -> pl.LazyFrame:
     """
     Read climate projection data for a catchment.
 
+    If the catchment's projections were converted with
+    `convert_projection_data`, only the files of the partitions matching the
+    given model, horizon and scenario are read. Otherwise the csv is scanned.
+
     Parameters
     ----------
     catchment : str
         Catchment name
+    model : str | None
+        Only keep this climate model
+    horizon : str | None
+        Only keep this horizon
+    scenario : str | None
+        Only keep this scenario
 
     Returns
     -------
@@ -306,6 +506,26 @@ def read_projection_data(catchment: str) -> pl.LazyFrame:
     HolmesDataError
         If file not found or malformed
     """
+    filters = [
+        pl.col(column) == value
+        for column, value in zip(
+            PROJECTION_PARTITIONS, (model, horizon, scenario)
+        )
+        if value is not None
+    ]
+
+    store = _get_projection_store_path(catchment)
+    if store.is_dir():
+        # filters on the hive columns prune the partitions before any read
+        data_ = pl.scan_parquet(
+            store / "**" / "*.parquet",
+            hive_partitioning=True,
+            hive_schema={
+                column: pl.String for column in PROJECTION_PARTITIONS
+            },
+        )
+        return data_.filter(*filters) if filters else data_
+
     path = data_dir / f"{catchment}_Projections.csv"
 
     # Eagerly check file existence since scan_csv is lazy
@@ -313,7 +533,7 @@ def read_projection_data(catchment: str) -> pl.LazyFrame:
         raise HolmesDataError(f"Projection data file not found: {path}")
 
     try:
-        return pl.scan_csv(path).with_columns(
+        data_ = pl.scan_csv(path).with_columns(
             pl.col("date").str.strptime(pl.Date, "%Y-%m-%d")
         )
     except PermissionError as exc:
@@ -324,6 +544,247 @@ def read_projection_data(catchment: str) -> pl.LazyFrame:
         raise HolmesDataError(
             f"Failed to parse projection CSV file '{path}': {exc}"
         ) from exc
+    return data_.filter(*filters) if filters else data_
+
+
+def read_projection_configs(catchment: str) -> pl.DataFrame:
+    """
+    List the model, horizon and scenario combinations available in the
+    projection data of a catchment.
+
+    For converted projections, the combinations come from the partition
+    directories without reading any file.
+
+    Parameters
+    ----------
+    catchment : str
+        Catchment name
+
+    Returns
+    -------
+    pl.DataFrame
+        Sorted unique `model`, `horizon` and `scenario` combinations
+
+    Raises
+    ------
+    HolmesDataError
+        If file not found or malformed
+    """
+    store = _get_projection_store_path(catchment)
+    if store.is_dir():
+        partitions = [
+            [
+                unquote(part.name.split("=", 1)[1])
+                for part in (path.parent.parent, path.parent, path)
+            ]
+            for path in store.glob("model=*/horizon=*/scenario=*")
+            if path.is_dir()
+        ]
+        configs = pl.DataFrame(
+            partitions,
+            schema={column: pl.String for column in PROJECTION_PARTITIONS},
+            orient="row",
+        )
+    else:
+        try:
+            configs = (
+                read_projection_data(catchment)
+                .select(*PROJECTION_PARTITIONS)
+                .unique()
+                .collect()
+            )
+        except pl.exceptions.ComputeError as exc:
+            raise HolmesDataError(
+                f"Failed to parse projection data of '{catchment}': {exc}"
+            ) from exc
+    return configs.sort(*PROJECTION_PARTITIONS)
+
+
+def convert_projection_data(
+    catchment: str, *, source_hash: str | None = None
+) -> Path:
+    """
+    Convert the projection csv of a catchment into Parquet files partitioned
+    by model, horizon and scenario (hive layout), next to the csv, replacing
+    any previous conversion. The csv is streamed, so it is never fully loaded
+    in memory. The conversion must be run again when the csv changes.
+
+    Parameters
+    ----------
+    catchment : str
+        Catchment name
+    source_hash : str | None
+        Hash of the csv, stored with the partitions (see
+        `read_projection_source_hash`)
+
+    Returns
+    -------
+    Path
+        Directory of the partitioned projections
+
+    Raises
+    ------
+    HolmesDataError
+        If the csv is not found or malformed
+    """
+    path = data_dir / f"{catchment}_Projections.csv"
+    if not path.exists():
+        raise HolmesDataError(f"Projection data file not found: {path}")
+
+    store = _get_projection_store_path(catchment)
+    with _replace_directory(store, source_hash) as tmp_store:
+        try:
+            pl.scan_csv(path).with_columns(
+                pl.col("date").str.strptime(pl.Date, "%Y-%m-%d"),
+                pl.col(*PROJECTION_PARTITIONS).cast(pl.String),
+            ).sink_parquet(
+                pl.PartitionByKey(tmp_store, by=list(PROJECTION_PARTITIONS))
+            )
+        except pl.exceptions.ComputeError as exc:
+            raise HolmesDataError(
+                f"Failed to parse projection CSV file '{path}': {exc}"
+            ) from exc
+
+    logger.info(f"Converted the projections of {catchment} to {store}.")
+    return store
+
+
+def write_projection_partitions(
+    directory: Path,
+    blocks: Iterable[pl.DataFrame],
+    *,
+    source_hash: str | None = None,
+) -> Path:
+    """
+    Write projection data as Parquet files partitioned by model, horizon and
+    scenario (hive layout), replacing the content of `directory` once every
+    block is written.
+
+    Each block is written as soon as it is produced, so a generator keeps a
+    single block in memory at once.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory of the partitions, `<Catchment>_Projections` in the data
+        directory to be read by `read_projection_data`
+    blocks : Iterable[pl.DataFrame]
+        Projection data with the columns of the projection csv. Blocks can
+        hold several partitions, but a partition can't be split between
+        blocks.
+    source_hash : str | None
+        Hash of the data's source, stored with the partitions (see
+        `read_projection_source_hash`)
+
+    Returns
+    -------
+    Path
+        `directory`
+
+    Raises
+    ------
+    HolmesDataError
+        If a partition is split between blocks
+    """
+    written: set[tuple[str, ...]] = set()
+    with _replace_directory(directory, source_hash) as tmp_directory:
+        for block in blocks:
+            block = block.with_columns(
+                pl.col(*PROJECTION_PARTITIONS).cast(pl.String)
+            )
+            partitions = set(
+                block.select(*PROJECTION_PARTITIONS).unique().rows()
+            )
+            if partitions & written:
+                raise HolmesDataError(
+                    "Projection partitions can't be split between blocks: "
+                    + ", ".join(
+                        "/".join(partition)
+                        for partition in sorted(partitions & written)
+                    )
+                )
+            written |= partitions
+            block.sort("member", "date").write_parquet(
+                tmp_directory, partition_by=list(PROJECTION_PARTITIONS)
+            )
+    return directory
+
+
+def read_projection_source_hash(directory: Path) -> str | None:
+    """
+    Read the hash of the source the partitioned projections in `directory`
+    were converted from.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory of the partitions
+
+    Returns
+    -------
+    str | None
+        Hash given at conversion, or None if there was none or the directory
+        doesn't exist
+    """
+    path = directory / PROJECTION_SOURCE_HASH_FILE
+    if not path.exists():
+        return None
+    return path.read_text().strip()
+
+
+def get_projection_data_version(catchment: str) -> str | None:
+    """
+    Get an identifier of the current version of a catchment's projections,
+    which changes whenever they are converted again or the csv is modified.
+
+    Parameters
+    ----------
+    catchment : str
+        Catchment name
+
+    Returns
+    -------
+    str | None
+        Version of the partitioned projections, or of the csv if they weren't
+        converted, or None if the catchment doesn't have projections
+    """
+    store = _get_projection_store_path(catchment)
+    if store.is_dir():
+        source_hash = read_projection_source_hash(store)
+        # conversions replace the whole directory
+        return source_hash or f"store.{store.stat().st_mtime_ns}"
+
+    path = data_dir / f"{catchment}_Projections.csv"
+    if not path.is_file():
+        return None
+    stat = path.stat()
+    return f"csv.{stat.st_size}.{stat.st_mtime_ns}"
+
+
+def get_catchment_data_version(catchment: str) -> str:
+    """
+    Get an identifier of the current version of the files `read_forcings`
+    reads for a catchment, which changes whenever one of them is modified.
+
+    Parameters
+    ----------
+    catchment : str
+        Catchment name
+
+    Returns
+    -------
+    str
+        Size and modification time of the catchment's observations and
+        CemaNeige metadata
+    """
+    versions = [
+        _get_file_version(data_dir / f"{catchment}_{name}.csv")
+        for name in ("Observations", "CemaNeigeInfo")
+    ]
+    return "/".join(
+        "missing" if version is None else f"{version[0]}.{version[1]}"
+        for version in versions
+    )
 
 
 ###########
@@ -356,18 +817,162 @@ def _get_available_period(catchment: str) -> tuple[str, str]:
     if not path.exists():
         raise HolmesDataError(f"Data file not found: '{path}'")
 
+    cached = _read_cached_observations(path)
+    df = cached if cached is not None else pl.scan_csv(path)
+
     try:
-        min_max = (
-            pl.scan_csv(path)
-            .select(
-                pl.col("Date").min().alias("min"),
-                pl.col("Date").max().alias("max"),
-            )
-            .collect()
-        )
+        min_max = df.select(
+            # dates are typed in the cache but still strings in the csv
+            pl.col("Date").min().cast(pl.String).alias("min"),
+            pl.col("Date").max().cast(pl.String).alias("max"),
+        ).collect()
     except pl.exceptions.ComputeError as exc:
         raise HolmesDataError(
             f"Failed to read date range from '{path}': {exc}"
         ) from exc
 
     return min_max[0, 0], min_max[0, 1]
+
+
+def _prepare_forcings(
+    catchment: str, start: str, end: str, *, warmup_length: int
+) -> Forcings:
+    data_, warmup_steps = read_data(
+        catchment, start, end, warmup_length=warmup_length
+    )
+    return Forcings(
+        dates=data_["date"],
+        precipitation=_as_readonly_array(data_["precipitation"], np.float64),
+        pet=_as_readonly_array(data_["pet"], np.float64),
+        temperature=(
+            _as_readonly_array(data_["temperature"], np.float64)
+            if "temperature" in data_.columns
+            else None
+        ),
+        observations=_as_readonly_array(data_["streamflow"], np.float64),
+        day_of_year=_as_readonly_array(
+            (data_["date"].dt.ordinal_day() - 1) % 365 + 1, np.uintp
+        ),
+        warmup_steps=warmup_steps,
+        cemaneige=None,
+    )
+
+
+def _as_readonly_array(
+    series: pl.Series, dtype: type[np.generic]
+) -> npt.NDArray[Any]:
+    array = np.ascontiguousarray(series.to_numpy(), dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+def _get_file_version(path: Path) -> tuple[int, int] | None:
+    """
+    Gets the size and modification time of a file, which change whenever it
+    is modified, or None if it doesn't exist.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _cache_forcings(key: _ForcingsKey, forcings: Forcings) -> None:
+    """
+    Adds or replaces an entry of the forcings cache, evicting the least
+    recently used entries until it fits within its maximum size. Entries
+    larger than the whole cache aren't kept.
+    """
+    max_size = config.FORCINGS_CACHE_SIZE * 2**20
+    size = forcings.nbytes
+    with _forcings_cache_lock:
+        previous = _forcings_cache.pop(key, None)
+        if previous is not None:
+            _forcings_cache_info["size"] -= previous.nbytes
+        if size > max_size:
+            return
+        _forcings_cache[key] = forcings
+        _forcings_cache_info["size"] += size
+        while _forcings_cache_info["size"] > max_size:
+            _, evicted = _forcings_cache.popitem(last=False)
+            _forcings_cache_info["size"] -= evicted.nbytes
+
+
+def _get_projection_store_path(catchment: str) -> Path:
+    return data_dir / f"{catchment}_Projections"
+
+
+@contextmanager
+def _replace_directory(
+    directory: Path, source_hash: str | None
+) -> Iterator[Path]:
+    """
+    Yields an empty temporary directory which replaces `directory`, with the
+    source hash written in it, if the block exits without error.
+    """
+    tmp_directory = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+    old_directory = directory.with_name(f".{directory.name}.{os.getpid()}.old")
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    try:
+        tmp_directory.mkdir(parents=True)
+        yield tmp_directory
+        if source_hash is not None:
+            (tmp_directory / PROJECTION_SOURCE_HASH_FILE).write_text(
+                source_hash
+            )
+        if directory.exists():
+            directory.rename(old_directory)
+        tmp_directory.rename(directory)
+    finally:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        shutil.rmtree(old_directory, ignore_errors=True)
+
+
+def _get_cache_path(path: Path) -> Path:
+    """
+    Gets the path of the cached copy of the given observation file, which
+    depends on the file's size and modification time so that changing the
+    file invalidates its cache.
+    """
+    stat = path.stat()
+    return cache_dir / f"{path.stem}.{stat.st_size}.{stat.st_mtime_ns}.arrow"
+
+
+def _read_cached_observations(path: Path) -> pl.LazyFrame | None:
+    """
+    Reads the cached copy of the given observation file, memory-mapped.
+
+    Returns
+    -------
+    pl.LazyFrame | None
+        Lazy frame with the parsed observations, or None if there is no
+        cached copy for the current version of the file
+    """
+    cache_path = _get_cache_path(path)
+    if not cache_path.exists():
+        return None
+    return pl.scan_ipc(cache_path, memory_map=True)
+
+
+def _write_cached_observations(path: Path, data_: pl.DataFrame) -> None:
+    """
+    Caches the parsed observations of the given file, removing the copies of
+    its previous versions. Failing to write the cache is logged but not
+    raised, since the data can still be read from the csv.
+    """
+    cache_path = _get_cache_path(path)
+    tmp_path = cache_path.with_suffix(
+        f".{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in cache_dir.glob(f"{glob.escape(path.stem)}.*.arrow"):
+            stale.unlink(missing_ok=True)
+        data_.write_ipc(tmp_path, compression="uncompressed")
+        # atomic so that concurrent readers never see a partial file
+        os.replace(tmp_path, cache_path)
+    except OSError as exc:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        logger.warning(f"Failed to cache observations of '{path}': {exc}")
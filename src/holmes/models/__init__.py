@@ -1,9 +1,10 @@
-from . import calibration, hydro, snow
+from . import calibration, hydro, indicators, snow
 from .utils import evaluate
 
 __all__ = [
     "calibration",
     "evaluate",
     "hydro",
+    "indicators",
     "snow",
 ]
@@ -7,15 +7,31 @@ the calibration process using snow and hydro models.
 
 import asyncio
 import logging
-from typing import Any, Awaitable, Callable, Literal, assert_never
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Literal,
+    TypeVar,
+    assert_never,
+    cast,
+)
 
 import numpy as np
 import numpy.typing as npt
+from holmes import config
 from holmes.exceptions import (
     HolmesError,
     HolmesNumericalError,
     HolmesValidationError,
 )
+from holmes_rs.calibration.islands import Islands
 from holmes_rs.calibration.sce import Sce
 
 from . import snow
@@ -31,6 +47,24 @@ Objective = Literal["rmse", "nse", "kge"]
 Transformation = Literal["log", "sqrt", "none"]
 Algorithm = Literal["sce"]
 
+T = TypeVar("T")
+
+###########
+# workers #
+###########
+
+# The SCE-UA init and steps release the GIL, so they run in worker threads
+# to keep the event loop (and every other websocket) responsive.
+_executor = ThreadPoolExecutor(
+    max_workers=config.MAX_CONCURRENT_CALIBRATIONS,
+    thread_name_prefix="holmes-calibration",
+)
+# Created lazily for each event loop, as a semaphore can only be used by the
+# loop it was first used in (the batch command runs a loop per calibration)
+_calibration_slots: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
 ##########
 # public #
 ##########
@@ -78,6 +112,48 @@ def get_config(
                     "default": 5000,
                     "integer": True,
                 },
+                {
+                    "name": "spin_up_iterations",
+                    "min": 0,
+                    "max": None,
+                    "default": 0,
+                    "integer": True,
+                },
+                {
+                    "name": "spin_up_tolerance",
+                    "min": 0,
+                    "max": None,
+                    "default": 0.001,
+                    "integer": False,
+                },
+                {
+                    "name": "cache_size",
+                    "min": 0,
+                    "max": None,
+                    "default": 0,
+                    "integer": True,
+                },
+                {
+                    "name": "snow_cache_size",
+                    "min": 0,
+                    "max": None,
+                    "default": 0,
+                    "integer": True,
+                },
+                {
+                    "name": "n_islands",
+                    "min": 1,
+                    "max": None,
+                    "default": 1,
+                    "integer": True,
+                },
+                {
+                    "name": "migration_interval",
+                    "min": 0,
+                    "max": None,
+                    "default": 5,
+                    "integer": True,
+                },
             ]
         case _:  # pragma: no cover
             assert_never(model)
@@ -106,17 +182,55 @@ async def calibrate(
                 bool,
                 npt.NDArray[np.float64],
                 npt.NDArray[np.float64],
-                dict[str, float],
+                dict[str, Any],
             ],
             Awaitable[None],
         ]
         | None
     ) = None,
     stop_event: asyncio.Event | None = None,
+    checkpoint: Path | None = None,
+    resume: bool = False,
 ) -> npt.NDArray[np.float64]:
+    """
+    Calibrate the hydro model on the forcings, calling `callback` after each
+    step until convergence or `stop_event` is set.
+
+    With a `snow_model`, its parameters are calibrated jointly with the hydro
+    model's, except `qnbv`, which stays at the catchment's value. The
+    parameters passed to `callback` and returned are then those of the snow
+    model followed by those of the hydro model. With a `snow_cache_size` in
+    `params`, in MB, the snow parameters are searched on a grid of a
+    hundredth of their range and candidates sharing them reuse the snow
+    model's output, the results passed to `callback` then including the
+    `snow_cache_hit_rate`.
+
+    If `checkpoint` is given, the calibration state is written to it every
+    `CALIBRATION_CHECKPOINT_INTERVAL` seconds and when the calibration is
+    stopped or cancelled, and removed once it converges. With `resume`, the
+    calibration continues from the checkpoint instead of starting over, the
+    other arguments having to be those of the checkpointed calibration.
+
+    With a `cache_size` in `params`, in MB, the results passed to `callback`
+    also include the `cache_hit_rate` of the evaluation cache.
+
+    With `n_islands` above 1 in `params`, as many SCE-UA populations with
+    different seeds evolve in parallel, sharing their best point every
+    `migration_interval` steps, and `callback` receives the best result of
+    all islands, its results including under `islands` the last result of
+    each island (see `_island_results`).
+
+    Raises
+    ------
+    HolmesError
+        If snow parameters are missing or there is no checkpoint to resume
+        from
+    """
     seed = 123
     max_iter = 100_000
 
+    # the calibrated snow parameters keep the catchment's qnbv
+    fixed_params: dict[int, float] | None = None
     if snow_model is not None:
         if (
             temperature is None
@@ -125,108 +239,309 @@ async def calibrate(
             or qnbv is None
         ):
             raise HolmesError("There are missing snow parameters.")
-        try:
-            snow_simulate = snow.get_model(snow_model)
-            snow_params = np.array([0.25, 3.74, qnbv])
-            precipitation = snow_simulate(
-                snow_params,
-                precipitation,
-                temperature,
-                day_of_year,
-                elevation_layers,
-                median_elevation,
-            )
-        except (HolmesNumericalError, HolmesValidationError) as exc:
-            logger.error(f"Snow simulation failed during calibration: {exc}")
-            raise
-        except Exception as exc:  # pragma: no cover
-            logger.exception(
-                "Unexpected error in snow simulation during calibration"
-            )
-            raise HolmesError(f"Snow simulation failed: {exc}") from exc
+        fixed_params = {snow.get_param_names(snow_model).index("qnbv"): qnbv}
 
-    match algorithm:
-        case "sce":
-            try:
-                calibration = Sce(
-                    hydro_model,
-                    None,
-                    objective,
-                    transformation,
-                    seed=seed,
-                    n_complexes=params["n_complexes"],
-                    k_stop=params["k_stop"],
-                    p_convergence_threshold=params["p_convergence_threshold"],
-                    geometric_range_threshold=params[
-                        "geometric_range_threshold"
-                    ],
-                    max_evaluations=params["max_evaluations"],
-                )
-            except (HolmesNumericalError, HolmesValidationError) as exc:
-                logger.error(f"Failed to initialize SCE-UA: {exc}")
-                raise
-            except Exception as exc:  # pragma: no cover
-                logger.exception("Unexpected error initializing SCE-UA")
-                raise HolmesError(
-                    f"SCE-UA initialization failed: {exc}"
-                ) from exc
-
-            try:
-                calibration.init(
-                    precipitation,
-                    temperature,
-                    pet,
-                    day_of_year,
-                    elevation_layers,
-                    median_elevation,
-                    observations,
-                    warmup_steps,
-                )
-            except (HolmesNumericalError, HolmesValidationError) as exc:
-                logger.error(f"Failed to initialize SCE-UA with data: {exc}")
-                raise
-            except Exception as exc:  # pragma: no cover
-                logger.exception(
-                    "Unexpected error during SCE-UA data initialization"
-                )
-                raise HolmesError(
-                    f"SCE-UA data initialization failed: {exc}"
-                ) from exc
-
-            for _ in range(max_iter):
-                try:
-                    done, params_, simulation, objectives = calibration.step(
+    loop = asyncio.get_running_loop()
+
+    # Calibrations beyond the cap wait here for a free slot
+    async with _get_calibration_slots(loop):
+        match algorithm:
+            case "sce":
+                calibration: Sce | Islands
+                if resume:
+                    if checkpoint is None or not checkpoint.exists():
+                        raise HolmesError(
+                            "There is no checkpoint to resume the calibration"
+                            " from."
+                        )
+                    try:
+                        data = checkpoint.read_bytes()
+                        if params.get("n_islands", 1) > 1:
+                            calibration = Islands.from_checkpoint(data)
+                        else:
+                            calibration = Sce.from_checkpoint(data)
+                    except (OSError, ValueError) as exc:
+                        logger.error(
+                            f"Failed to read SCE-UA checkpoint: {exc}"
+                        )
+                        raise HolmesError(
+                            f"The calibration checkpoint is invalid: {exc}"
+                        ) from exc
+                else:
+                    calibration = await _init_sce(
+                        loop,
                         precipitation,
                         temperature,
                         pet,
+                        observations,
                         day_of_year,
                         elevation_layers,
                         median_elevation,
-                        observations,
                         warmup_steps,
+                        hydro_model,
+                        snow_model,
+                        fixed_params,
+                        objective,
+                        transformation,
+                        params,
+                        seed,
                     )
-                except (HolmesNumericalError, HolmesValidationError) as exc:
-                    logger.error(f"SCE-UA step failed: {exc}")
+
+                last_checkpoint = time.monotonic()
+                try:
+                    for _ in range(max_iter):
+                        try:
+                            done, params_, simulation, objectives = (
+                                await _run_in_executor(
+                                    loop,
+                                    partial(
+                                        calibration.step,
+                                        precipitation,
+                                        temperature,
+                                        pet,
+                                        day_of_year,
+                                        elevation_layers,
+                                        median_elevation,
+                                        observations,
+                                        warmup_steps,
+                                    ),
+                                )
+                            )
+                        except (
+                            HolmesNumericalError,
+                            HolmesValidationError,
+                        ) as exc:
+                            logger.error(f"SCE-UA step failed: {exc}")
+                            raise
+                        except Exception as exc:  # pragma: no cover
+                            logger.exception(
+                                "Unexpected error during SCE-UA step"
+                            )
+                            raise HolmesError(
+                                f"SCE-UA step failed: {exc}"
+                            ) from exc
+
+                        if checkpoint is not None:
+                            now = time.monotonic()
+                            if (
+                                now - last_checkpoint
+                                >= config.CALIBRATION_CHECKPOINT_INTERVAL
+                            ):
+                                _write_checkpoint(checkpoint, calibration)
+                                last_checkpoint = now
+
+                        results: dict[str, Any] = {
+                            "rmse": objectives[0],
+                            "nse": objectives[1],
+                            "kge": objectives[2],
+                        }
+                        cache_info = calibration.cache_info()
+                        if cache_info["capacity"] > 0:
+                            results["cache_hit_rate"] = _hit_rate(cache_info)
+                        snow_cache_info = calibration.snow_cache_info()
+                        if snow_cache_info["capacity"] > 0:
+                            results["snow_cache_hit_rate"] = _hit_rate(
+                                snow_cache_info
+                            )
+                        if params.get("n_islands", 1) > 1:
+                            results["islands"] = _island_results(
+                                cast(Islands, calibration)
+                            )
+                        if callback is not None:
+                            await callback(done, params_, simulation, results)
+                        if done:
+                            if checkpoint is not None:
+                                checkpoint.unlink(missing_ok=True)
+                            break
+                        if stop_event is not None and stop_event.is_set():
+                            if checkpoint is not None:
+                                _write_checkpoint(checkpoint, calibration)
+                            break
+                except asyncio.CancelledError:
+                    # the calibration is idle, a running step having been
+                    # waited for
+                    if checkpoint is not None:
+                        _write_checkpoint(checkpoint, calibration)
                     raise
-                except Exception as exc:  # pragma: no cover
-                    logger.exception("Unexpected error during SCE-UA step")
-                    raise HolmesError(f"SCE-UA step failed: {exc}") from exc
-
-                results = {
-                    "rmse": objectives[0],
-                    "nse": objectives[1],
-                    "kge": objectives[2],
-                }
-                if callback is not None:
-                    await callback(done, params_, simulation, results)
-                # Yield control to allow I/O processing (e.g., receiving stop message)
-                await asyncio.sleep(0.001)
-                if stop_event is not None and stop_event.is_set():
-                    break
-                if done:
-                    break
-
-            return np.array(params_)
 
-        case _:  # pragma: no cover
-            assert_never(algorithm)  # type: ignore
+                return np.array(params_)
+
+            case _:  # pragma: no cover
+                assert_never(algorithm)  # type: ignore
+
+
+###########
+# private #
+###########
+
+
+async def _init_sce(
+    loop: asyncio.AbstractEventLoop,
+    precipitation: npt.NDArray[np.float64],
+    temperature: npt.NDArray[np.float64] | None,
+    pet: npt.NDArray[np.float64],
+    observations: npt.NDArray[np.float64],
+    day_of_year: npt.NDArray[np.uintp],
+    elevation_layers: npt.NDArray[np.float64] | None,
+    median_elevation: float | None,
+    warmup_steps: int,
+    hydro_model: str,
+    snow_model: SnowModel | None,
+    fixed_params: dict[int, float] | None,
+    objective: Objective,
+    transformation: Transformation,
+    params: dict[str, Any],
+    seed: int,
+) -> Sce | Islands:
+    """
+    Create a new SCE-UA calibration, or islands of them with `n_islands`
+    above 1, and evaluate the first population.
+    """
+    settings = {
+        "n_complexes": params["n_complexes"],
+        "k_stop": params["k_stop"],
+        "p_convergence_threshold": params["p_convergence_threshold"],
+        "geometric_range_threshold": params["geometric_range_threshold"],
+        "max_evaluations": params["max_evaluations"],
+        "spin_up_iterations": params.get("spin_up_iterations", 0),
+        "spin_up_tolerance": params.get("spin_up_tolerance", 0.001),
+        "cache_size": params.get("cache_size", 0),
+        "snow_cache_size": params.get("snow_cache_size", 0),
+    }
+    n_islands = params.get("n_islands", 1)
+    calibration: Sce | Islands
+    try:
+        if n_islands > 1:
+            # the islands run in parallel, each evolving its complexes
+            # sequentially
+            calibration = Islands(
+                hydro_model,
+                snow_model,
+                objective,
+                transformation,
+                seed=seed,
+                n_islands=n_islands,
+                migration_interval=params.get("migration_interval", 5),
+                fixed_params=fixed_params,
+                **settings,
+            )
+        else:
+            calibration = Sce(
+                hydro_model,
+                snow_model,
+                objective,
+                transformation,
+                seed=seed,
+                parallel=True,
+                fixed_params=fixed_params,
+                **settings,
+            )
+    except (HolmesNumericalError, HolmesValidationError) as exc:
+        logger.error(f"Failed to initialize SCE-UA: {exc}")
+        raise
+    except Exception as exc:  # pragma: no cover
+        logger.exception("Unexpected error initializing SCE-UA")
+        raise HolmesError(f"SCE-UA initialization failed: {exc}") from exc
+
+    try:
+        await _run_in_executor(
+            loop,
+            partial(
+                calibration.init,
+                precipitation,
+                temperature,
+                pet,
+                day_of_year,
+                elevation_layers,
+                median_elevation,
+                observations,
+                warmup_steps,
+            ),
+        )
+    except (HolmesNumericalError, HolmesValidationError) as exc:
+        logger.error(f"Failed to initialize SCE-UA with data: {exc}")
+        raise
+    except Exception as exc:  # pragma: no cover
+        logger.exception("Unexpected error during SCE-UA data initialization")
+        raise HolmesError(f"SCE-UA data initialization failed: {exc}") from exc
+
+    return calibration
+
+
+def _get_calibration_slots(
+    loop: asyncio.AbstractEventLoop,
+) -> asyncio.Semaphore:
+    slots = _calibration_slots.get(loop)
+    if slots is None:
+        slots = asyncio.Semaphore(config.MAX_CONCURRENT_CALIBRATIONS)
+        _calibration_slots[loop] = slots
+    return slots
+
+
+async def _run_in_executor(
+    loop: asyncio.AbstractEventLoop, func: Callable[[], T]
+) -> T:
+    """
+    Runs `func` in a calibration worker thread. The thread can't be
+    interrupted, so a cancelled task waits for `func` to finish before
+    propagating the cancellation, however many times it is cancelled,
+    keeping its calibration slot until then and leaving the calibration
+    idle.
+    """
+    future = loop.run_in_executor(_executor, func)
+    cancelled = False
+    while not future.done():
+        try:
+            # unlike awaiting the future, waiting doesn't cancel it
+            await asyncio.wait([future])
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        # its result or error doesn't matter anymore
+        if not future.cancelled():
+            future.exception()
+        raise asyncio.CancelledError
+    return future.result()
+
+
+def _island_results(calibration: Islands) -> list[dict[str, Any] | None]:
+    """
+    Whether each island converged, with the objectives of its best point, or
+    None for islands that haven't stepped yet.
+    """
+    return [
+        (
+            None
+            if result is None
+            else {
+                "done": result[0],
+                "rmse": result[3][0],
+                "nse": result[3][1],
+                "kge": result[3][2],
+            }
+        )
+        for result in calibration.island_results()
+    ]
+
+
+def _hit_rate(cache_info: dict[str, int]) -> float:
+    n_lookups = cache_info["hits"] + cache_info["misses"]
+    return cache_info["hits"] / n_lookups if n_lookups else 0.0
+
+
+def _write_checkpoint(path: Path, calibration: Sce | Islands) -> None:
+    """
+    Writes a calibration checkpoint atomically. Failing to serialize or write
+    it is logged but not raised, so the calibration goes on, or its
+    cancellation propagates.
+    """
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        state = calibration.checkpoint()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(state)
+        # atomic so that a crash never leaves a partial checkpoint
+        os.replace(tmp_path, path)
+    except (OSError, RuntimeError, ValueError) as exc:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Failed to write calibration checkpoint: {exc}")
@@ -135,3 +135,59 @@ def get_model(
             raise HolmesError(f"Simulation failed: {exc}") from exc
 
     return wrapped_simulate
+
+
+def get_batch_model(
+    model: HydroModel,
+) -> Callable[
+    [
+        npt.NDArray[np.float64],
+        npt.NDArray[np.float64],
+        npt.NDArray[np.float64],
+    ],
+    npt.NDArray[np.float64],
+]:
+    """
+    Get a wrapped batched model simulation function.
+
+    The returned function simulates several parameter sets at once, in
+    parallel, validating the forcings a single time.
+
+    Parameters
+    ----------
+    model : HydroModel
+        Model name (see HydroModel for valid options)
+
+    Returns
+    -------
+    Callable
+        Simulation function that takes (params, precipitation, pet), with
+        params of shape (n_sets, n_params), and returns streamflow of shape
+        (n_sets, n_timesteps)
+    """
+    match model:
+        case "gr4j":
+            simulate_fn = gr4j.simulate_batch
+        case "bucket":
+            simulate_fn = bucket.simulate_batch
+        case "cequeau":
+            simulate_fn = cequeau.simulate_batch
+        case _:  # pragma: no cover
+            assert_never(model)  # type: ignore
+
+    def wrapped_simulate(
+        params: npt.NDArray[np.float64],
+        precipitation: npt.NDArray[np.float64],
+        pet: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        """Wrapped batched simulation function with error handling."""
+        try:
+            return simulate_fn(params, precipitation, pet)
+        except (HolmesNumericalError, HolmesValidationError) as exc:
+            logger.error(f"Batch simulation failed for {model}: {exc}")
+            raise
+        except Exception as exc:  # pragma: no cover
+            logger.exception(f"Unexpected error in {model} batch simulation")
+            raise HolmesError(f"Simulation failed: {exc}") from exc
+
+    return wrapped_simulate
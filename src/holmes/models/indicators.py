@@ -0,0 +1,240 @@
+"""
+Hydrological indicators of climate projections.
+
+Indicators are polars aggregations of a member's streamflow, registered with
+`register_indicator`. `compute_indicators` evaluates every registered
+indicator for every member, along with the day of year climatology, in a
+single query over the (n_members, n_days) streamflow matrix.
+"""
+
+from collections.abc import Callable
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+import polars as pl
+
+#########
+# types #
+#########
+
+
+class Indicator(NamedTuple):
+    """
+    Indicator computed for each member.
+
+    `aggregate` receives the member's streamflow column and must return a
+    single value. For annual indicators, it is applied to each year of the
+    projection and the indicator is the median over the years. Otherwise it
+    is applied to the whole projection. The `date` column can be used to
+    select a season, for example with `season(1, 3)`.
+    """
+
+    name: str
+    aggregate: Callable[[pl.Expr], pl.Expr]
+    annual: bool
+
+
+###########
+# helpers #
+###########
+
+
+def season(first_month: int, last_month: int) -> pl.Expr:
+    """Mask selecting the days between two months, inclusively."""
+    return pl.col("date").dt.month().is_between(first_month, last_month)
+
+
+############
+# registry #
+############
+
+_indicators: dict[str, Indicator] = {}
+
+##########
+# public #
+##########
+
+
+def register_indicator(
+    name: str,
+    aggregate: Callable[[pl.Expr], pl.Expr],
+    *,
+    annual: bool = False,
+) -> None:
+    """
+    Register an indicator computed by `compute_indicators`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the indicator's column in the results
+    aggregate : Callable[[pl.Expr], pl.Expr]
+        Aggregation of a member's streamflow column to a single value
+    annual : bool
+        If the aggregation is applied to each year, the indicator then being
+        the median over the years
+
+    Raises
+    ------
+    ValueError
+        If an indicator with the same name is already registered or the name
+        is reserved
+
+    Examples
+    --------
+    >>> register_indicator("q95", lambda q: q.quantile(0.95))
+    >>> register_indicator(
+    ...     "low_flow_7d", lambda q: q.rolling_mean(7).min(), annual=True
+    ... )
+    """
+    if name == "member":
+        raise ValueError("The indicator name `member` is reserved.")
+    if name in _indicators:
+        raise ValueError(f"The indicator {name} is already registered.")
+    _indicators[name] = Indicator(name, aggregate, annual)
+
+
+def unregister_indicator(name: str) -> None:
+    """
+    Remove a registered indicator.
+
+    Raises
+    ------
+    ValueError
+        If no indicator with this name is registered
+    """
+    if name not in _indicators:
+        raise ValueError(f"The indicator {name} isn't registered.")
+    del _indicators[name]
+
+
+def get_indicators() -> list[str]:
+    """Names of the registered indicators, in registration order."""
+    return list(_indicators)
+
+
+def compute_indicators(
+    dates: pl.Series,
+    members: pl.Series,
+    streamflow: npt.NDArray[np.float64],
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Compute the registered indicators and the day of year climatology of
+    each member in a single query.
+
+    Parameters
+    ----------
+    dates : pl.Series
+        Date of each column of `streamflow`
+    members : pl.Series
+        Member of each row of `streamflow`
+    streamflow : npt.NDArray[np.float64]
+        Simulated streamflow of shape (n_members, n_days)
+
+    Returns
+    -------
+    indicators : pl.DataFrame
+        One row per member, with the `member` column and one column per
+        registered indicator
+    climatology : pl.DataFrame
+        Mean streamflow of each member (one column per member) and median
+        over the members (`median`) for each day of year, dated in 2021. The
+        29th of February and the 31st of December of leap years are counted
+        with the first of January.
+    """
+    columns = [str(member) for member in members]
+    # one column per member so every aggregation runs over all members at
+    # once
+    wide = pl.DataFrame(
+        {"date": dates}
+        | {column: values for column, values in zip(columns, streamflow)}
+    ).lazy()
+
+    indicators = list(_indicators.values())
+    annual = [indicator for indicator in indicators if indicator.annual]
+    whole = [indicator for indicator in indicators if not indicator.annual]
+
+    queries = [
+        wide.group_by(pl.col("date").dt.year().alias("year"))
+        .agg(
+            indicator.aggregate(pl.col(column)).alias(
+                _alias(indicator.name, column)
+            )
+            for indicator in annual
+            for column in columns
+        )
+        .select(pl.exclude("year").median()),
+        wide.select(
+            indicator.aggregate(pl.col(column)).alias(
+                _alias(indicator.name, column)
+            )
+            for indicator in whole
+            for column in columns
+        ),
+        wide.group_by(
+            ((pl.col("date").dt.ordinal_day() - 1) % 365 + 1).alias(
+                "day_of_year"
+            )
+        )
+        .agg(pl.col(columns).mean())
+        .with_columns(
+            pl.concat_list(columns).list.median().alias("median"),
+            (
+                pl.lit(date(2021, 1, 1))
+                + pl.duration(days=pl.col("day_of_year") - 1)
+            ).alias("date"),
+        )
+        .drop("day_of_year")
+        .sort("date"),
+    ]
+    annual_values, whole_values, climatology = pl.collect_all(queries)
+
+    values = annual_values.hstack(whole_values)
+    indicators_ = pl.DataFrame(
+        {"member": members}
+        | {
+            indicator.name: [
+                (
+                    values[_alias(indicator.name, column)].item()
+                    if _alias(indicator.name, column) in values.columns
+                    else None
+                )
+                for column in columns
+            ]
+            for indicator in indicators
+        },
+        schema_overrides={
+            indicator.name: pl.Float64 for indicator in indicators
+        },
+    )
+    return indicators_, climatology
+
+
+###########
+# private #
+###########
+
+
+def _alias(name: str, column: str) -> str:
+    return f"{name}|{column}"
+
+
+##############
+# indicators #
+##############
+
+register_indicator(
+    "winter_min", lambda q: q.filter(season(1, 3)).min(), annual=True
+)
+register_indicator(
+    "summer_min", lambda q: q.filter(season(5, 10)).min(), annual=True
+)
+register_indicator(
+    "spring_max", lambda q: q.filter(season(3, 6)).max(), annual=True
+)
+register_indicator(
+    "autumn_max", lambda q: q.filter(season(9, 12)).max(), annual=True
+)
+register_indicator("mean", lambda q: q.mean())
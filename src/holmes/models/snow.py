@@ -31,6 +31,28 @@ SnowModel = Literal["cemaneige"]
 ##########
 
 
+def get_param_names(model: SnowModel) -> list[str]:
+    """
+    Get the names of a snow model's parameters, in the order the model
+    takes them.
+
+    Parameters
+    ----------
+    model : SnowModel
+        Model name (see SnowModel for valid options)
+
+    Returns
+    -------
+    list[str]
+        Parameter names
+    """
+    match model:
+        case "cemaneige":
+            return list(cemaneige.param_names)
+        case _:  # pragma: no cover
+            assert_never(model)
+
+
 def get_model(
     model: SnowModel,
 ) -> Callable[
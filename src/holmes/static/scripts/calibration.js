@@ -3,6 +3,10 @@ import {
   connect,
   incrementReconnectAttempt,
   isCircuitBreakerOpen,
+  parseMessage,
+  dayToDate,
+  formatDay,
+  frameToRows,
 } from "./utils/ws.js";
 import { colours, toTitle, formatNumber } from "./utils/misc.js";
 
@@ -17,6 +21,7 @@ export function initModel(canSave) {
     loading: false,
     ws: null,
     running: false,
+    clientId: getClientId(canSave),
     availableConfig: null,
     config: {
       hydroModel: canSave
@@ -55,6 +60,22 @@ export function initModel(canSave) {
   };
 }
 
+function getClientId(canSave) {
+  // keeps the calibration checkpoints of this browser apart from others'
+  let clientId = canSave
+    ? window.localStorage.getItem("holmes--calibration--client")
+    : null;
+  if (clientId === null) {
+    clientId = [...crypto.getRandomValues(new Uint8Array(16))]
+      .map((byte) => byte.toString(16).padStart(2, "0"))
+      .join("");
+    if (canSave) {
+      window.localStorage.setItem("holmes--calibration--client", clientId);
+    }
+  }
+  return clientId;
+}
+
 export const initialMsg = [
   {
     type: "CalibrationMsg",
@@ -72,7 +93,9 @@ export async function update(model, msg, dispatch, createNotification) {
   let configValid;
   switch (msg.type) {
     case "Connect":
-      connect(WS_URL, handleMessage, dispatch, createNotification);
+      connect(WS_URL, handleMessage, dispatch, createNotification, {
+        binary: true,
+      });
       return { ...model, loading: true };
     case "Connected":
       if (model.availableConfig === null) {
@@ -225,6 +248,7 @@ export async function update(model, msg, dispatch, createNotification) {
       }
       return { ...model, loading: true };
     case "StartCalibration":
+    case "ResumeCalibration":
       config = model.config;
       config.algorithmParams = Object.fromEntries(
         [
@@ -240,8 +264,12 @@ export async function update(model, msg, dispatch, createNotification) {
       if (model.ws?.readyState === WebSocket.OPEN && configValid) {
         model.ws.send(
           JSON.stringify({
-            type: "calibration_start",
-            data: config,
+            // resuming continues the stopped calibration with this config
+            type:
+              msg.type === "ResumeCalibration"
+                ? "calibration_resume"
+                : "calibration_start",
+            data: { ...config, clientId: model.clientId },
           }),
         );
       } else {
@@ -262,14 +290,17 @@ export async function update(model, msg, dispatch, createNotification) {
         ...model,
         loading: !msg.data.done,
         running: model.running && !msg.data.done,
-        simulation: msg.data.simulation,
-        results:
-          model.results === null
-            ? [{ params: msg.data.params, objective: msg.data.objective }]
-            : [
-                ...model.results,
-                { params: msg.data.params, objective: msg.data.objective },
-              ],
+        // progress messages between full ones only carry params and objective
+        simulation: msg.data.simulation ?? model.simulation,
+        results: [
+          ...(model.results ?? []),
+          {
+            params: msg.data.params,
+            // calibrated snow parameters, when a snow model is used
+            snowParams: msg.data.snowParams ?? null,
+            objective: msg.data.objective,
+          },
+        ],
       };
     case "ExportParams":
       downloadParams(model, createNotification);
@@ -289,7 +320,7 @@ function createDispatch(dispatch) {
 function handleMessage(event, dispatch, createNotification) {
   let msg;
   try {
-    msg = JSON.parse(event.data);
+    msg = parseMessage(event);
   } catch (e) {
     console.error("Failed to parse WebSocket message:", e);
     createNotification("Received invalid message from server", true);
@@ -349,14 +380,13 @@ function downloadParams(model, createNotification) {
     const paramNames = model.availableConfig.hydroModel
       .filter((h) => h.name == model.config.hydroModel)[0]
       .params.map((p) => p.name);
+    const result = model.results[model.results.length - 1];
     const data = {
       ...model.config,
       hydroParams: Object.fromEntries(
-        paramNames.map((p, i) => [
-          p,
-          model.results[model.results.length - 1].params[i],
-        ]),
+        paramNames.map((p, i) => [p, result.params[i]]),
       ),
+      ...(result.snowParams ? { snowParams: result.snowParams } : {}),
     };
 
     const filename = `${model.config.catchment.toLowerCase().replace(" ", "_")}_${model.config.hydroModel}_params.json`;
@@ -407,10 +437,11 @@ function downloadData(model, createNotification) {
     URL.revokeObjectURL(url);
     createNotification(`Downloaded calibration results to ${filename}.`);
 
+    const simulation = frameToRows(model.simulation);
     const streamflowData = [
       ["date", "observation", "simulation"].join(","),
-      ...model.observations.map(
-        (o, i) => `${o.date},${o.streamflow},${model.simulation[i].streamflow}`,
+      ...frameToRows(model.observations).map(
+        (o, i) => `${o.date},${o.streamflow},${simulation[i].streamflow}`,
       ),
     ].join("\n");
 
@@ -725,6 +756,23 @@ function initAutomaticCalibrationSettingsView(dispatch) {
           },
         ],
       ),
+      create(
+        "input",
+        {
+          id: "calibration__automatic__resume",
+          type: "button",
+          value: "Resume calibration",
+        },
+        [],
+        [
+          {
+            event: "click",
+            fct: () => {
+              dispatch({ type: "ResumeCalibration" });
+            },
+          },
+        ],
+      ),
       create(
         "input",
         {
@@ -1053,6 +1101,9 @@ function automaticCalibrationSettingsView(model) {
       document
         .getElementById("calibration__automatic__start")
         .setAttribute("hidden", true);
+      document
+        .getElementById("calibration__automatic__resume")
+        .setAttribute("hidden", true);
       document
         .getElementById("calibration__automatic__stop")
         .removeAttribute("hidden");
@@ -1060,6 +1111,9 @@ function automaticCalibrationSettingsView(model) {
       document
         .getElementById("calibration__automatic__start")
         .removeAttribute("hidden");
+      document
+        .getElementById("calibration__automatic__resume")
+        .removeAttribute("hidden");
       document
         .getElementById("calibration__automatic__stop")
         .setAttribute("hidden", true);
@@ -1167,9 +1221,11 @@ function streamflowView(model) {
       .attr("width", boundaries.r - boundaries.l)
       .attr("height", boundaries.b - boundaries.t);
 
-    const observations = model.observations;
+    const observations = model.observations.columns.streamflow;
+    const dates = Array.from(model.observations.columns.date, dayToDate);
+    const simulation = model.simulation?.columns.streamflow ?? null;
 
-    const xDomain = d3.extent(observations, (d) => new Date(d.date));
+    const xDomain = d3.extent(dates);
 
     const xScale = d3
       .scaleTime()
@@ -1177,12 +1233,17 @@ function streamflowView(model) {
       .range([boundaries.l, boundaries.r]);
     const yScale = d3
       .scaleLinear()
-      .domain([
-        d3.min(observations, (d) => d.streamflow),
-        d3.max(observations, (d) => d.streamflow),
-      ])
+      .domain([d3.min(observations), d3.max(observations)])
       .range([boundaries.b, boundaries.t]);
 
+    // lines are drawn from the columns, indexed like the dates
+    const line = () =>
+      d3
+        .line()
+        .defined((d) => !isNaN(d))
+        .x((_, i) => xScale(dates[i]))
+        .y((d) => yScale(d));
+
     // grid
     svg
       .selectAll(".grid-vertical")
@@ -1243,16 +1304,15 @@ function streamflowView(model) {
       .attr("clip-path", `url(#${clipId})`);
 
     // warmup
-    if (observations[0].date !== model.config.start) {
+    if (formatDay(model.observations.columns.date[0]) !== model.config.start) {
       chartGroup
         .append("rect")
         .attr("class", "warmup-rect")
-        .attr("x", xScale(new Date(observations[0].date)))
+        .attr("x", xScale(dates[0]))
         .attr("y", yScale.range()[1])
         .attr(
           "width",
-          xScale(new Date(model.config.start)) -
-            xScale(new Date(observations[0].date)),
+          xScale(new Date(model.config.start)) - xScale(dates[0]),
         )
         .attr("height", yScale.range()[0] - yScale.range()[1])
         .attr("fill", "currentColor")
@@ -1274,27 +1334,15 @@ function streamflowView(model) {
       .append("path")
       .attr("class", `observation-line ${colours[0]}`)
       .datum(observations)
-      .attr(
-        "d",
-        d3
-          .line()
-          .x((d) => xScale(new Date(d.date)))
-          .y((d) => yScale(d.streamflow)),
-      );
+      .attr("d", line());
 
     // simulation
-    if (model.simulation !== null) {
+    if (simulation !== null) {
       chartGroup
         .append("path")
         .attr("class", `simulation-line ${colours[2]}`)
-        .datum(model.simulation)
-        .attr(
-          "d",
-          d3
-            .line()
-            .x((d) => xScale(new Date(d.date)))
-            .y((d) => yScale(d.streamflow)),
-        );
+        .datum(simulation)
+        .attr("d", line());
     }
 
     // zoom
@@ -1357,14 +1405,9 @@ function streamflowView(model) {
           (exit) => exit.remove(),
         );
 
-      const line = d3
-        .line()
-        .x((d) => xScale(new Date(d.date)))
-        .y((d) => yScale(d.streamflow));
-
-      svg.select(".observation-line").transition(t).attr("d", line);
+      svg.select(".observation-line").transition(t).attr("d", line());
 
-      svg.select(".simulation-line").transition(t).attr("d", line);
+      svg.select(".simulation-line").transition(t).attr("d", line());
 
       const warmupEndDate = new Date(model.config.start);
       const currentXMin = xScale.domain()[0];
@@ -1373,21 +1416,12 @@ function streamflowView(model) {
       svg
         .select(".warmup-rect")
         .transition(t)
-        .attr("x", xScale(new Date(observations[0].date)))
-        .attr(
-          "width",
-          Math.max(
-            0,
-            xScale(warmupEndDate) - xScale(new Date(observations[0].date)),
-          ),
-        );
+        .attr("x", xScale(dates[0]))
+        .attr("width", Math.max(0, xScale(warmupEndDate) - xScale(dates[0])));
 
       // Only show warmup text if warmup period is visible
       // Position text at the left edge of visible area or start of warmup rect
-      const warmupTextX = Math.max(
-        xScale.range()[0],
-        xScale(new Date(observations[0].date)),
-      );
+      const warmupTextX = Math.max(xScale.range()[0], xScale(dates[0]));
       svg
         .select(".warmup-text")
         .transition(t)
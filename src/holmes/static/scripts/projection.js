@@ -3,6 +3,9 @@ import {
   connect,
   incrementReconnectAttempt,
   isCircuitBreakerOpen,
+  parseMessage,
+  dayToDate,
+  frameToRows,
 } from "./utils/ws.js";
 import { round, colours, formatNumber, setEqual } from "./utils/misc.js";
 
@@ -64,7 +67,12 @@ function verifyCalibration(calibration) {
     "snowModel",
     "hydroParams",
   ];
-  if (!setEqual(new Set(Object.keys(calibration)), new Set(keys))) {
+  // calibrations with a snow model also hold its calibrated parameters
+  const withSnowParams = [...keys, "snowParams"];
+  if (
+    !setEqual(new Set(Object.keys(calibration)), new Set(keys)) &&
+    !setEqual(new Set(Object.keys(calibration)), new Set(withSnowParams))
+  ) {
     return [false, "This isn't a valid calibrated parameter file."];
   } else {
     return [true, ""];
@@ -80,7 +88,9 @@ export async function update(model, msg, dispatch, createNotification) {
   let calibration;
   switch (msg.type) {
     case "Connect":
-      connect(WS_URL, handleMessage, dispatch, createNotification);
+      connect(WS_URL, handleMessage, dispatch, createNotification, {
+        binary: true,
+      });
       return { ...model, loading: true };
     case "Connected":
       if (model.availableConfig === null) {
@@ -263,7 +273,8 @@ export async function update(model, msg, dispatch, createNotification) {
       return {
         ...model,
         projection: msg.data.projection,
-        results: msg.data.results,
+        // one row per member, small enough to keep as rows
+        results: frameToRows(msg.data.results),
         loading: false,
         running: false,
       };
@@ -282,7 +293,7 @@ function createDispatch(dispatch) {
 function handleMessage(event, dispatch, createNotification) {
   let msg;
   try {
-    msg = JSON.parse(event.data);
+    msg = parseMessage(event);
   } catch (e) {
     console.error("Failed to parse WebSocket message:", e);
     createNotification("Received invalid message from server", true);
@@ -310,7 +321,7 @@ function downloadData(model, createNotification) {
     model.projection !== null &&
     model.results !== null
   ) {
-    const _data = model.projection.map((p) => ({
+    const _data = frameToRows(model.projection).map((p) => ({
       ...p,
       model: model.config.model,
       horizon: model.config.horizon,
@@ -649,18 +660,13 @@ function projectionView(model) {
       .attr("width", boundaries.r - boundaries.l)
       .attr("height", boundaries.b - boundaries.t);
 
-    const projection = model.projection;
-    const fields = Object.keys(model.projection[0]).filter(
-      (f) => f !== "median" && f !== "date",
-    );
-    const yMin = d3.min(projection, (d) =>
-      Math.min(d.median, ...fields.map((f) => d[f])),
-    );
-    const yMax = d3.max(projection, (d) =>
-      Math.max(d.median, ...fields.map((f) => d[f])),
-    );
+    const { date, median, ...columns } = model.projection.columns;
+    const dates = Array.from(date, dayToDate);
+    const members = Object.values(columns);
+    const yMin = Math.min(d3.min(median), ...members.map((m) => d3.min(m)));
+    const yMax = Math.max(d3.max(median), ...members.map((m) => d3.max(m)));
 
-    const xDomain = d3.extent(projection, (d) => new Date(d.date));
+    const xDomain = d3.extent(dates);
     const xScale = d3
       .scaleTime()
       .domain(xDomain)
@@ -670,6 +676,14 @@ function projectionView(model) {
       .domain([yMin, yMax])
       .range([boundaries.b, boundaries.t]);
 
+    // lines are drawn from the columns, indexed like the dates
+    const line = () =>
+      d3
+        .line()
+        .defined((d) => !isNaN(d))
+        .x((_, i) => xScale(dates[i]))
+        .y((d) => yScale(d));
+
     // Grid group for vertical lines (updated on zoom)
     const gridGroup = svg.append("g").attr("class", "grid-group");
     gridGroup
@@ -738,18 +752,12 @@ function projectionView(model) {
       .attr("clip-path", "url(#projection-clip)");
 
     // projections
-    fields.forEach((f, i) => {
+    members.forEach((m, i) => {
       chartGroup
         .append("path")
         .attr("class", `${colours[2]} member-line-${i}`)
-        .datum(projection)
-        .attr(
-          "d",
-          d3
-            .line()
-            .x((d) => xScale(new Date(d.date)))
-            .y((d) => yScale(d[f])),
-        );
+        .datum(m)
+        .attr("d", line());
     });
 
     // median
@@ -759,14 +767,8 @@ function projectionView(model) {
         "class",
         `${colours[2]} projection__results__projection__median median-line`,
       )
-      .datum(projection)
-      .attr(
-        "d",
-        d3
-          .line()
-          .x((d) => xScale(new Date(d.date)))
-          .y((d) => yScale(d.median)),
-      );
+      .datum(median)
+      .attr("d", line());
 
     // legend (outside clipped group)
     const legendData = [
@@ -856,30 +858,15 @@ function projectionView(model) {
         .attr("y2", yScale.range()[1]);
 
       // Update member lines
-      fields.forEach((f, i) => {
+      members.forEach((_, i) => {
         chartGroup
           .select(`.member-line-${i}`)
           .transition(t)
-          .attr(
-            "d",
-            d3
-              .line()
-              .x((d) => xScale(new Date(d.date)))
-              .y((d) => yScale(d[f])),
-          );
+          .attr("d", line());
       });
 
       // Update median line
-      chartGroup
-        .select(".median-line")
-        .transition(t)
-        .attr(
-          "d",
-          d3
-            .line()
-            .x((d) => xScale(new Date(d.date)))
-            .y((d) => yScale(d.median)),
-        );
+      chartGroup.select(".median-line").transition(t).attr("d", line());
     }
   }
 }
@@ -906,17 +893,28 @@ function resultsView(model) {
       autumn_max: "Autumn max",
       mean: "Mean",
     };
+    // indicators registered on the server are shown under their field name
+    const fieldName = (f) => fieldToName[f] ?? f;
+    const fields = Object.keys(model.results[0] ?? {}).filter(
+      (f) => f !== "member",
+    );
 
     const results = model.results
       .map(({ member, ...r }) => r)
-      .flatMap((r) => Object.entries(r));
+      .flatMap((r) => Object.entries(r))
+      .filter(([_, v]) => v !== null);
 
     const yMin = Math.floor(Math.min(...results.map(([_, v]) => v)));
     const yMax = Math.ceil(Math.max(...results.map(([_, v]) => v)));
 
     const xScale = d3
       .scaleBand()
-      .domain(Object.values(fieldToName))
+      .domain(
+        [
+          ...Object.keys(fieldToName).filter((f) => fields.includes(f)),
+          ...fields.filter((f) => !(f in fieldToName)),
+        ].map(fieldName),
+      )
       .range([boundaries.l, boundaries.r]);
     const yScale = d3
       .scaleLinear()
@@ -983,7 +981,7 @@ function resultsView(model) {
       .attr(
         "cx",
         ([f, _], i) =>
-          xScale(fieldToName[f]) + xScale.bandwidth() / 2 + jitter(i),
+          xScale(fieldName(f)) + xScale.bandwidth() / 2 + jitter(i),
       )
       .attr("cy", ([_, v]) => yScale(v))
       .attr("r", 2);
@@ -3,6 +3,10 @@ import {
   connect,
   incrementReconnectAttempt,
   isCircuitBreakerOpen,
+  parseMessage,
+  dayToDate,
+  formatDay,
+  frameToRows,
 } from "./utils/ws.js";
 import { formatNumber, colours, round, setEqual } from "./utils/misc.js";
 
@@ -65,7 +69,12 @@ function verifyCalibration(model, calibration) {
     "snowModel",
     "hydroParams",
   ];
-  if (!setEqual(new Set(Object.keys(calibration)), new Set(keys))) {
+  // calibrations with a snow model also hold its calibrated parameters
+  const withSnowParams = [...keys, "snowParams"];
+  if (
+    !setEqual(new Set(Object.keys(calibration)), new Set(keys)) &&
+    !setEqual(new Set(Object.keys(calibration)), new Set(withSnowParams))
+  ) {
     return [false, "This isn't a valid calibrated parameter file."];
   } else if (model.calibration.length === 0) {
     return [true, ""];
@@ -78,10 +87,10 @@ function verifyCalibration(model, calibration) {
           Object.entries(c).some(([field, value]) =>
             field === "id"
               ? false
-              : field !== "hydroParams"
+              : field !== "hydroParams" && field !== "snowParams"
                 ? value !== calibration[field]
                 : Object.values(value).some(
-                    (p, i) => p !== Object.values(calibration.hydroParams)[i],
+                    (p, i) => p !== Object.values(calibration[field] ?? {})[i],
                   ),
           ),
         ),
@@ -100,7 +109,9 @@ export async function update(model, msg, dispatch, createNotification) {
   let calibration;
   switch (msg.type) {
     case "Connect":
-      connect(WS_URL, handleMessage, dispatch, createNotification);
+      connect(WS_URL, handleMessage, dispatch, createNotification, {
+        binary: true,
+      });
       return { ...model, loading: true };
     case "Connected":
       if (model.availableConfig === null) {
@@ -360,7 +371,7 @@ function createDispatch(dispatch) {
 function handleMessage(event, dispatch, createNotification) {
   let msg;
   try {
-    msg = JSON.parse(event.data);
+    msg = parseMessage(event);
   } catch (e) {
     console.error("Failed to parse WebSocket message:", e);
     createNotification("Received invalid message from server", true);
@@ -414,11 +425,11 @@ function downloadData(model, createNotification) {
     URL.revokeObjectURL(url);
     createNotification(`Downloaded simulation results to ${filename}.`);
 
+    const observations = frameToRows(model.observations);
     const streamflowData = [
-      [...Object.keys(model.simulation[0]), "observation"].join(","),
-      ...model.simulation.map(
-        (s, i) =>
-          Object.values(s).join(",") + `,${model.observations[i].streamflow}`,
+      [...Object.keys(model.simulation.columns), "observation"].join(","),
+      ...frameToRows(model.simulation).map(
+        (s, i) => Object.values(s).join(",") + `,${observations[i].streamflow}`,
       ),
     ].join("\n");
 
@@ -901,29 +912,22 @@ function streamflowView(model) {
       .attr("width", boundaries.r - boundaries.l)
       .attr("height", boundaries.b - boundaries.t);
 
-    const observations = model.observations;
-    const [yMin, yMax] =
-      model.simulation === null
-        ? [
-            d3.min(observations, (d) => d.streamflow),
-            d3.max(observations, (d) => d.streamflow),
-          ]
-        : [
-            Math.min(
-              d3.min(observations, (d) => d.streamflow),
-              ...Object.keys(model.simulation[0])
-                .slice(1)
-                .map((s) => d3.min(model.simulation, (d) => d[s])),
-            ),
-            Math.max(
-              d3.max(observations, (d) => d.streamflow),
-              ...Object.keys(model.simulation[0])
-                .slice(1)
-                .map((s) => d3.max(model.simulation, (d) => d[s])),
-            ),
-          ];
+    const observations = model.observations.columns.streamflow;
+    const dates = Array.from(model.observations.columns.date, dayToDate);
+    const simulations =
+      model.simulation !== null
+        ? Object.entries(model.simulation.columns).slice(1)
+        : [];
+    const yMin = Math.min(
+      d3.min(observations),
+      ...simulations.map(([_, s]) => d3.min(s)),
+    );
+    const yMax = Math.max(
+      d3.max(observations),
+      ...simulations.map(([_, s]) => d3.max(s)),
+    );
 
-    const xDomain = d3.extent(observations, (d) => new Date(d.date));
+    const xDomain = d3.extent(dates);
     const xScale = d3
       .scaleTime()
       .domain(xDomain)
@@ -933,6 +937,14 @@ function streamflowView(model) {
       .domain([yMin, yMax])
       .range([boundaries.b, boundaries.t]);
 
+    // lines are drawn from the columns, indexed like the dates
+    const line = () =>
+      d3
+        .line()
+        .defined((d) => !isNaN(d))
+        .x((_, i) => xScale(dates[i]))
+        .y((d) => yScale(d));
+
     // Grid group for vertical lines (updated on zoom)
     const gridGroup = svg.append("g").attr("class", "grid-group");
     gridGroup
@@ -994,15 +1006,14 @@ function streamflowView(model) {
       .attr("clip-path", "url(#simulation-clip)");
 
     // warmup
-    if (observations[0].date !== model.config.start) {
+    if (formatDay(model.observations.columns.date[0]) !== model.config.start) {
       chartGroup
         .append("rect")
-        .attr("x", xScale(new Date(observations[0].date)))
+        .attr("x", xScale(dates[0]))
         .attr("y", yScale.range()[1])
         .attr(
           "width",
-          xScale(new Date(model.config.start)) -
-            xScale(new Date(observations[0].date)),
+          xScale(new Date(model.config.start)) - xScale(dates[0]),
         )
         .attr("height", yScale.range()[0] - yScale.range()[1])
         .attr("fill", "currentColor")
@@ -1024,31 +1035,15 @@ function streamflowView(model) {
       .append("path")
       .attr("class", `${colours[0]} observation-line`)
       .datum(observations)
-      .attr(
-        "d",
-        d3
-          .line()
-          .x((d) => xScale(new Date(d.date)))
-          .y((d) => yScale(d.streamflow)),
-      );
+      .attr("d", line());
 
     // simulation
-    const simulationKeys =
-      model.simulation !== null
-        ? Object.keys(model.simulation[0]).slice(1)
-        : [];
-    simulationKeys.forEach((s, i) => {
+    simulations.forEach(([_, s], i) => {
       chartGroup
         .append("path")
         .attr("class", `${colours[i + 2]} simulation-line-${i}`)
-        .datum(model.simulation)
-        .attr(
-          "d",
-          d3
-            .line()
-            .x((d) => xScale(new Date(d.date)))
-            .y((d) => yScale(d[s])),
-        );
+        .datum(s)
+        .attr("d", line());
     });
 
     // Brush zoom
@@ -1100,29 +1095,14 @@ function streamflowView(model) {
         .attr("y2", yScale.range()[1]);
 
       // Update observation line
-      chartGroup
-        .select(".observation-line")
-        .transition(t)
-        .attr(
-          "d",
-          d3
-            .line()
-            .x((d) => xScale(new Date(d.date)))
-            .y((d) => yScale(d.streamflow)),
-        );
+      chartGroup.select(".observation-line").transition(t).attr("d", line());
 
       // Update simulation lines
-      simulationKeys.forEach((s, i) => {
+      simulations.forEach((_, i) => {
         chartGroup
           .select(`.simulation-line-${i}`)
           .transition(t)
-          .attr(
-            "d",
-            d3
-              .line()
-              .x((d) => xScale(new Date(d.date)))
-              .y((d) => yScale(d[s])),
-          );
+          .attr("d", line());
       });
     }
   }
@@ -1142,7 +1122,7 @@ function legendView(model) {
   }
 
   if (model.simulation !== null) {
-    Object.keys(model.simulation[0])
+    Object.keys(model.simulation.columns)
       .slice(1)
       .forEach((s, i) => {
         legend.appendChild(
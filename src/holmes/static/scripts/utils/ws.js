@@ -51,11 +51,19 @@ export function isCircuitBreakerOpen(url) {
   return state.attempts >= WS_CONFIG.maxRetries;
 }
 
-export function connect(url, handleMessage, dispatch, globalDispatch) {
+export function connect(
+  url,
+  handleMessage,
+  dispatch,
+  globalDispatch,
+  { binary = false } = {},
+) {
   const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-  const fullUrl = `${protocol}//${window.location.host}/${url}`;
+  const query = binary ? "?binary=true" : "";
+  const fullUrl = `${protocol}//${window.location.host}/${url}${query}`;
 
   const ws = new WebSocket(fullUrl);
+  ws.binaryType = "arraybuffer";
 
   // Connection timeout
   const connectionTimeout = setTimeout(() => {
@@ -88,3 +96,128 @@ export function connect(url, handleMessage, dispatch, globalDispatch) {
     });
   };
 }
+
+/**
+ * Parse a message received as either JSON text or a binary frame. Data
+ * frames of binary messages are decoded with `decodeBinaryMessage`.
+ */
+export function parseMessage(event) {
+  if (event.data instanceof ArrayBuffer) {
+    return decodeBinaryMessage(event.data);
+  } else {
+    return JSON.parse(event.data);
+  }
+}
+
+/**
+ * Decode a binary frame (see `encode_binary` in `holmes/api/utils.py`) into
+ * `{ type, data }`, where each data frame becomes
+ * `{ length, columns: { <name>: <values> } }` with float64 columns as
+ * Float64Array, date columns as Int32Array of days since 1970-01-01 and
+ * other columns, including dates with missing values as YYYY-MM-DD strings
+ * or null, as plain arrays. The typed arrays are views on the buffer
+ * and assume a little-endian platform.
+ */
+export function decodeBinaryMessage(buffer) {
+  const headerLength = new DataView(buffer).getUint32(0, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)),
+  );
+  const bodyStart = 4 + headerLength + ((8 - ((4 + headerLength) % 8)) % 8);
+  return {
+    type: header.type,
+    data: decodeFrames(header.data, (frame) =>
+      decodeFrame(frame, buffer, bodyStart),
+    ),
+  };
+}
+
+/**
+ * Convert a decoded data frame to a list of rows, with dates as YYYY-MM-DD
+ * strings and NaN and missing dates as null.
+ */
+export function frameToRows(frame) {
+  const names = Object.keys(frame.columns);
+  const dates = new Set(
+    names.filter((name) => frame.columns[name] instanceof Int32Array),
+  );
+  return Array.from({ length: frame.length }, (_, i) =>
+    Object.fromEntries(
+      names.map((name) => {
+        const value = frame.columns[name][i];
+        if (dates.has(name)) {
+          return [name, formatDay(value)];
+        } else if (typeof value === "number" && isNaN(value)) {
+          return [name, null];
+        } else {
+          return [name, value];
+        }
+      }),
+    ),
+  );
+}
+
+/**
+ * Convert a value of a date column, in days since 1970-01-01 or as a
+ * YYYY-MM-DD string for columns with missing values, to a Date, or null
+ * for a missing date.
+ */
+export function dayToDate(day) {
+  if (day === null || day === undefined) {
+    return null;
+  } else if (typeof day === "string") {
+    return new Date(day);
+  } else {
+    return new Date(day * 86400000);
+  }
+}
+
+/**
+ * Format a value of a date column as a YYYY-MM-DD string, or null for a
+ * missing date.
+ */
+export function formatDay(day) {
+  const date = dayToDate(day);
+  return date === null ? null : date.toISOString().slice(0, 10);
+}
+
+function decodeFrames(value, decode) {
+  if (Array.isArray(value)) {
+    return value.map((v) => decodeFrames(v, decode));
+  } else if (value !== null && typeof value === "object") {
+    if ("__frame__" in value) {
+      return decode(value.__frame__);
+    }
+    return Object.fromEntries(
+      Object.entries(value).map(([k, v]) => [k, decodeFrames(v, decode)]),
+    );
+  } else {
+    return value;
+  }
+}
+
+function decodeFrame(frame, buffer, bodyStart) {
+  const columns = {};
+  frame.columns.forEach((column) => {
+    switch (column.dtype) {
+      case "float64":
+        columns[column.name] = new Float64Array(
+          buffer,
+          bodyStart + column.offset,
+          frame.length,
+        );
+        break;
+      case "date32":
+        columns[column.name] = new Int32Array(
+          buffer,
+          bodyStart + column.offset,
+          frame.length,
+        );
+        break;
+      default:
+        columns[column.name] = column.values;
+        break;
+    }
+  });
+  return { length: frame.length, columns: columns };
+}
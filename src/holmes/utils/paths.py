@@ -2,4 +2,5 @@ from pathlib import Path
 
 root_dir = Path(__file__).parent / ".."
 data_dir = root_dir / "data"
+cache_dir = data_dir / ".cache"
 static_dir = root_dir / "static"
@@ -4,10 +4,14 @@ from typing import Any
 
 from starlette.websockets import WebSocket, WebSocketState
 
-from holmes.api.utils import convert_for_json
+from holmes.api.utils import convert_for_json, encode_binary
 
 logger = logging.getLogger("holmes")
 
+# Messages carrying time series, sent as binary frames to clients that
+# connected with `?binary=true`
+BINARY_EVENTS = {"result", "simulation", "observations", "projection"}
+
 
 async def safe_send(ws: WebSocket, event: str, data: Any) -> bool:
     """
@@ -20,7 +24,8 @@ async def safe_send(ws: WebSocket, event: str, data: Any) -> bool:
     event : str
         Event type for the message
     data : Any
-        Data to send (will be converted to JSON-safe format)
+        Data to send (will be converted to JSON-safe format, or encoded with
+        `encode_binary` if the client opted into binary frames)
 
     Returns
     -------
@@ -32,7 +37,10 @@ async def safe_send(ws: WebSocket, event: str, data: Any) -> bool:
         return False
 
     try:
-        await ws.send_json({"type": event, "data": convert_for_json(data)})
+        if event in BINARY_EVENTS and _accepts_binary(ws):
+            await ws.send_bytes(encode_binary(event, data))
+        else:
+            await ws.send_json({"type": event, "data": convert_for_json(data)})
         return True
     except RuntimeError as exc:
         # Connection closed during send
@@ -90,3 +98,12 @@ async def cleanup_websocket(ws: WebSocket) -> None:
         delattr(ws.state, "stop_event")
 
     logger.debug("WebSocket cleanup completed")
+
+
+###########
+# private #
+###########
+
+
+def _accepts_binary(ws: WebSocket) -> bool:
+    return ws.query_params.get("binary", "").lower() in ("1", "true")
@@ -21,6 +21,7 @@ __all__ = [
     "validate_catchment_exists",
     "validate_port",
     "validate_host",
+    "validate_positive_int",
     "validate_array_no_nan",
     "validate_array_length",
     "validate_parameter_bounds",
@@ -189,6 +190,32 @@ def validate_host(host: str) -> str:
     )
 
 
+def validate_positive_int(value: int, name: str) -> int:
+    """
+    Validate that an integer setting is at least 1.
+
+    Parameters
+    ----------
+    value : int
+        Value to validate
+    name : str
+        Name of the setting for error messages
+
+    Returns
+    -------
+    int
+        The validated value
+
+    Raises
+    ------
+    ValueError
+        If value is smaller than 1
+    """
+    if value < 1:
+        raise ValueError(f"{name} {value} is invalid. Must be at least 1")
+    return value
+
+
 def validate_array_no_nan(arr: npt.NDArray[np.floating], name: str) -> None:
     """
     Validate that an array contains no NaN or infinity values.
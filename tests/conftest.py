@@ -7,6 +7,7 @@ import pytest
 from starlette.testclient import TestClient
 
 from holmes import data
+from holmes.api import calibration, projection
 from holmes.app import create_app
 from holmes.models import hydro
 
@@ -16,6 +17,29 @@ SNOW_CATCHMENTS = ["Au Saumon", "Baskatong"]
 HYDRO_MODELS = ["gr4j", "bucket"]
 
 
+@pytest.fixture(autouse=True)
+def clear_forcings_cache():
+    """Don't share prepared forcings between tests, which may mock them."""
+    data.clear_forcings_cache()
+    yield
+    data.clear_forcings_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_projection_cache():
+    """Don't share projection results between tests, which may mock them."""
+    projection.clear_projection_cache()
+    yield
+    projection.clear_projection_cache()
+
+
+@pytest.fixture(autouse=True)
+def calibration_checkpoints(tmp_path, monkeypatch):
+    """Write the checkpoints of stopped calibrations to a temporary folder."""
+    monkeypatch.setattr(calibration, "cache_dir", tmp_path)
+    return tmp_path / "checkpoints"
+
+
 @pytest.fixture
 def app():
     """Create a test application instance."""
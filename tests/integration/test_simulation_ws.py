@@ -1,5 +1,8 @@
 """Integration tests for simulation WebSocket handler."""
 
+import json
+import struct
+
 import pytest
 from starlette.testclient import TestClient
 
@@ -43,6 +46,32 @@ class TestSimulationWebSocket:
             assert isinstance(response["data"], list)
             assert len(response["data"]) > 0
 
+    def test_observations_message_binary(self, client):
+        """Clients opting into binary frames receive columns as bytes."""
+        with client.websocket_connect("/simulation/?binary=true") as ws:
+            ws.send_json(
+                {
+                    "type": "observations",
+                    "data": {
+                        "catchment": "Au Saumon",
+                        "start": "2000-01-01",
+                        "end": "2001-12-31",
+                    },
+                }
+            )
+            frame = ws.receive_bytes()
+            header_length = struct.unpack("<I", frame[:4])[0]
+            header = json.loads(frame[4 : 4 + header_length])
+            assert header["type"] == "observations"
+            columns = header["data"]["__frame__"]["columns"]
+            assert [c["name"] for c in columns] == ["date", "streamflow"]
+            assert [c["dtype"] for c in columns] == ["date32", "float64"]
+            assert header["data"]["__frame__"]["length"] > 0
+
+            # non time series messages are still JSON
+            ws.send_json({"type": "config", "data": "Au Saumon"})
+            assert ws.receive_json()["type"] == "config"
+
     def test_simulation_run(self, client):
         """Run simulation returns results."""
         with client.websocket_connect("/simulation/") as ws:
@@ -1,10 +1,19 @@
 """Unit tests for holmes.api.calibration module."""
 
-from unittest.mock import patch
+import os
+import time
+from datetime import date
+from unittest.mock import AsyncMock, patch
 
+import numpy as np
 import polars as pl
+import pytest
 from starlette.testclient import TestClient
+from starlette.websockets import WebSocketState
 
+from holmes import data
+from holmes.api import calibration as calibration_api
+from holmes.api.calibration import _get_checkpoint_path, _ProgressThrottle
 from holmes.app import create_app
 from holmes.exceptions import HolmesDataError
 
@@ -207,6 +216,170 @@ class TestCalibrationWebSocket:
             response = ws.receive_json()
             assert response["type"] == "result"
 
+    def test_websocket_calibration_resume(self, calibration_checkpoints):
+        """Calibration resume continues from the calibration's checkpoint."""
+        msg_data = {
+            "catchment": "Au Saumon",
+            "start": "2000-01-01",
+            "end": "2000-06-30",
+            "hydroModel": "gr4j",
+            "snowModel": None,
+            "objective": "nse",
+            "transformation": "none",
+            "algorithm": "sce",
+            "algorithmParams": {
+                "n_complexes": 2,
+                "k_stop": 3,
+                "p_convergence_threshold": 0.1,
+                "geometric_range_threshold": 0.001,
+                "max_evaluations": 50,
+            },
+        }
+        checkpoint = _get_checkpoint_path(msg_data)
+        checkpoint.parent.mkdir(parents=True)
+        checkpoint.write_bytes(b"state")
+        assert checkpoint.parent == calibration_checkpoints
+
+        client = TestClient(create_app())
+        with (
+            patch(
+                "holmes.api.calibration.calibration.calibrate",
+                new_callable=AsyncMock,
+            ) as calibrate,
+            client.websocket_connect("/calibration/") as ws,
+        ):
+            ws.send_json({"type": "calibration_resume", "data": msg_data})
+            ws.send_json({"type": "config"})
+            assert ws.receive_json()["type"] == "config"
+
+        assert calibrate.call_args.kwargs["checkpoint"] == checkpoint
+        assert calibrate.call_args.kwargs["resume"] is True
+
+    def test_websocket_calibration_resume_without_checkpoint(self):
+        """Resuming a calibration without checkpoint returns an error."""
+        client = TestClient(create_app())
+        with client.websocket_connect("/calibration/") as ws:
+            ws.send_json(
+                {
+                    "type": "calibration_resume",
+                    "data": {
+                        "catchment": "Au Saumon",
+                        "start": "2000-01-01",
+                        "end": "2000-06-30",
+                        "hydroModel": "gr4j",
+                        "snowModel": None,
+                        "objective": "nse",
+                        "transformation": "none",
+                        "algorithm": "sce",
+                        "algorithmParams": {"n_complexes": 2},
+                    },
+                }
+            )
+            response = ws.receive_json()
+            assert response["type"] == "error"
+            assert "no calibration to resume" in response["data"]
+
+    def test_checkpoint_path_depends_on_request(self):
+        """Calibrations with different settings have different checkpoints."""
+        msg_data = {
+            "catchment": "Au Saumon",
+            "start": "2000-01-01",
+            "end": "2000-06-30",
+            "hydroModel": "gr4j",
+            "snowModel": None,
+            "objective": "nse",
+            "transformation": "none",
+            "algorithm": "sce",
+            "algorithmParams": {"n_complexes": 2, "k_stop": 3},
+        }
+        path = _get_checkpoint_path(msg_data)
+
+        assert path == _get_checkpoint_path(
+            msg_data | {"algorithmParams": {"k_stop": 3, "n_complexes": 2}}
+        )
+        assert path != _get_checkpoint_path(msg_data | {"objective": "kge"})
+        assert path != _get_checkpoint_path(
+            msg_data | {"algorithmParams": {"n_complexes": 3, "k_stop": 3}}
+        )
+        # clients don't share their checkpoints
+        client_path = _get_checkpoint_path(msg_data | {"clientId": "a"})
+        assert client_path != path
+        assert client_path != _get_checkpoint_path(
+            msg_data | {"clientId": "b"}
+        )
+
+    def test_checkpoint_path_depends_on_data(self, tmp_path, monkeypatch):
+        """Modifying the catchment's data changes its checkpoints."""
+        monkeypatch.setattr(data, "data_dir", tmp_path)
+        path = tmp_path / "Test_Observations.csv"
+        path.write_text("Date,P,E0,Qo\n2000-01-01,1.0,2.0,3.0\n")
+        msg_data = {
+            "catchment": "Test",
+            "start": "2000-01-01",
+            "end": "2000-01-01",
+            "hydroModel": "gr4j",
+            "snowModel": None,
+            "objective": "nse",
+            "transformation": "none",
+            "algorithm": "sce",
+            "algorithmParams": {"n_complexes": 2},
+        }
+        checkpoint = _get_checkpoint_path(msg_data)
+        assert checkpoint == _get_checkpoint_path(msg_data)
+
+        path.write_text("Date,P,E0,Qo\n2000-01-01,10.0,2.0,3.0\n")
+        assert checkpoint != _get_checkpoint_path(msg_data)
+
+    def test_old_checkpoints_removed(self, calibration_checkpoints):
+        """Checkpoints not written for the maximum age are removed, except
+        for running calibrations."""
+        calibration_checkpoints.mkdir()
+        old, running, recent = (
+            calibration_checkpoints / f"{name}.ckpt"
+            for name in ("old", "running", "recent")
+        )
+        leftover = calibration_checkpoints / "old.123.tmp"
+        week_ago = time.time() - 8 * 24 * 3600
+        for path in (old, running, recent, leftover):
+            path.write_bytes(b"state")
+            if path != recent:
+                os.utime(path, (week_ago, week_ago))
+
+        with patch.object(calibration_api, "_running_checkpoints", {running}):
+            calibration_api._remove_old_checkpoints()
+
+        assert sorted(calibration_checkpoints.iterdir()) == [recent, running]
+
+    def test_websocket_calibration_already_running(self):
+        """A calibration sharing a running calibration's checkpoint is
+        refused."""
+        msg_data = {
+            "catchment": "Au Saumon",
+            "start": "2000-01-01",
+            "end": "2000-06-30",
+            "hydroModel": "gr4j",
+            "snowModel": None,
+            "objective": "nse",
+            "transformation": "none",
+            "algorithm": "sce",
+            "algorithmParams": {"n_complexes": 2},
+            "clientId": "a",
+        }
+        checkpoint = _get_checkpoint_path(msg_data)
+
+        client = TestClient(create_app())
+        with (
+            patch.object(
+                calibration_api, "_running_checkpoints", {checkpoint}
+            ),
+            client.websocket_connect("/calibration/") as ws,
+        ):
+            ws.send_json({"type": "calibration_start", "data": msg_data})
+            response = ws.receive_json()
+
+        assert response["type"] == "error"
+        assert "already running" in response["data"]
+
     def test_websocket_calibration_stop_without_start(self):
         """Calibration stop without prior start is handled gracefully."""
         client = TestClient(create_app())
@@ -547,3 +720,150 @@ class TestCalibrationDataErrors:
             response = ws.receive_json()
             assert response["type"] == "result"
             assert "simulation" in response["data"]
+
+
+class TestProgressThrottle:
+    """Tests for the calibration progress policy."""
+
+    def _create_throttle(self, objective="nse"):
+        ws = AsyncMock()
+        ws.client_state = WebSocketState.CONNECTED
+        ws.query_params = {}
+        dates = pl.Series("date", [date(2000, 1, 1), date(2000, 1, 2)])
+        throttle = _ProgressThrottle(
+            ws, dates, objective, update_rate=10, simulation_rate=2
+        )
+        return ws, throttle
+
+    def _sent(self, ws):
+        return [call.args[0]["data"] for call in ws.send_json.call_args_list]
+
+    async def _step(self, throttle, objective, done=False, now=0.0):
+        with patch("holmes.api.calibration.time.monotonic", return_value=now):
+            await throttle(
+                done,
+                np.array([objective]),
+                np.array([1.0, 2.0]),
+                {"rmse": objective, "nse": objective, "kge": objective},
+            )
+
+    @pytest.mark.asyncio
+    async def test_first_step_sent_with_simulation(self):
+        """The first step is sent in full."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.5)
+        sent = self._sent(ws)
+        assert len(sent) == 1
+        assert sent[0]["done"] is False
+        assert sent[0]["objective"] == 0.5
+        assert [row["streamflow"] for row in sent[0]["simulation"]] == [
+            1.0,
+            2.0,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_only_improvements_sent(self):
+        """Steps not improving the objective are skipped."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.5, now=0.0)
+        await self._step(throttle, 0.5, now=1.0)
+        await self._step(throttle, 0.4, now=2.0)
+        await self._step(throttle, 0.6, now=3.0)
+        assert [r["objective"] for r in self._sent(ws)] == [0.5, 0.6]
+
+    @pytest.mark.asyncio
+    async def test_rmse_improves_downwards(self):
+        """A lower RMSE is an improvement."""
+        ws, throttle = self._create_throttle("rmse")
+        await self._step(throttle, 2.0, now=0.0)
+        await self._step(throttle, 3.0, now=1.0)
+        await self._step(throttle, 1.0, now=2.0)
+        assert [r["objective"] for r in self._sent(ws)] == [2.0, 1.0]
+
+    @pytest.mark.asyncio
+    async def test_finite_objective_improves_on_nan(self):
+        """A finite objective is sent after a NaN one, but not another NaN."""
+        for objective in ["nse", "rmse"]:
+            ws, throttle = self._create_throttle(objective)
+            await self._step(throttle, float("nan"), now=0.0)
+            await self._step(throttle, float("nan"), now=1.0)
+            await self._step(throttle, 0.5, now=2.0)
+            assert [r["objective"] for r in self._sent(ws)] == [None, 0.5]
+
+    @pytest.mark.asyncio
+    async def test_update_rate_limited(self):
+        """Improvements closer than the update interval are coalesced."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.1, now=0.0)
+        await self._step(throttle, 0.2, now=0.05)
+        await self._step(throttle, 0.3, now=0.08)
+        await self._step(throttle, 0.3, now=0.1)
+        assert [r["objective"] for r in self._sent(ws)] == [0.1, 0.3]
+
+    @pytest.mark.asyncio
+    async def test_simulation_rate_limited(self):
+        """Messages between full ones only carry params and objective."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.1, now=0.0)
+        await self._step(throttle, 0.2, now=0.1)
+        await self._step(throttle, 0.3, now=0.5)
+        sent = self._sent(ws)
+        assert ["simulation" in r for r in sent] == [True, False, True]
+        assert sent[1]["params"] == [0.2]
+
+    @pytest.mark.asyncio
+    async def test_done_always_sent(self):
+        """The final step is sent in full even without improvement."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.5, now=0.0)
+        await self._step(throttle, 0.4, done=True, now=0.01)
+        sent = self._sent(ws)
+        assert len(sent) == 2
+        assert sent[-1]["done"] is True
+        assert sent[-1]["objective"] == 0.4
+        assert "simulation" in sent[-1]
+
+    @pytest.mark.asyncio
+    async def test_finish_after_stop(self):
+        """Finishing a stopped calibration sends the latest step once."""
+        ws, throttle = self._create_throttle()
+        await self._step(throttle, 0.5, now=0.0)
+        await self._step(throttle, 0.6, now=0.01)
+        await throttle.finish()
+        await throttle.finish()
+        sent = self._sent(ws)
+        assert len(sent) == 2
+        assert sent[-1]["done"] is True
+        assert sent[-1]["objective"] == 0.6
+
+    @pytest.mark.asyncio
+    async def test_snow_params_sent_apart(self):
+        """The calibrated snow parameters are split from the hydro ones."""
+        ws = AsyncMock()
+        ws.client_state = WebSocketState.CONNECTED
+        ws.query_params = {}
+        dates = pl.Series("date", [date(2000, 1, 1), date(2000, 1, 2)])
+        throttle = _ProgressThrottle(
+            ws,
+            dates,
+            "nse",
+            update_rate=10,
+            simulation_rate=2,
+            snow_params=["ctg", "kf", "qnbv"],
+        )
+        await throttle(
+            True,
+            np.array([0.5, 4.0, 350.0, 300.0, 0.5, 100.0, 2.0]),
+            np.array([1.0, 2.0]),
+            {"rmse": 1.0, "nse": 0.5, "kge": 0.5},
+        )
+        sent = self._sent(ws)
+        assert sent[0]["params"] == [300.0, 0.5, 100.0, 2.0]
+        assert sent[0]["snowParams"] == {"ctg": 0.5, "kf": 4.0, "qnbv": 350.0}
+
+    @pytest.mark.asyncio
+    async def test_finish_without_steps(self):
+        """Finishing before any step sends nothing."""
+        ws, throttle = self._create_throttle()
+        await throttle.finish()
+        ws.send_json.assert_not_called()
@@ -1,28 +1,83 @@
 """Unit tests for holmes.api.projection module."""
 
 from datetime import date
+from unittest.mock import patch
 
+import numpy as np
 import polars as pl
+import pytest
 from starlette.testclient import TestClient
 
-from holmes.api.projection import _aggregate_projections, _evaluate_projection
+from holmes.api import projection
+from holmes.api.projection import _stack_members
 from holmes.app import create_app
+from holmes.exceptions import HolmesDataError
+
+
+def _synthetic_projection(members: list[int], n_days: int) -> pl.DataFrame:
+    """Projection data with random forcings for the given members."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(
+        date(2040, 1, 1),
+        date(2040, 1, 1) + pl.duration(days=n_days - 1),
+        eager=True,
+    )
+    return pl.concat(
+        [
+            pl.DataFrame(
+                {
+                    "date": dates,
+                    "precipitation": np.maximum(
+                        0, rng.normal(3.0, 3.0, n_days)
+                    ),
+                    "temperature": rng.normal(5.0, 10.0, n_days),
+                    "member": member,
+                    "scenario": "RCP45",
+                    "model": "CSI",
+                    "horizon": "2050",
+                }
+            )
+            for member in members
+        ]
+    )
+
+
+def _projection_message(x1: float = 100.0) -> dict:
+    """Projection request of GR4J without snow model."""
+    return {
+        "type": "projection",
+        "data": {
+            "config": {
+                "model": "CSI",
+                "horizon": "2050",
+                "scenario": "RCP45",
+            },
+            "calibration": {
+                "catchment": "Au Saumon",
+                "hydroModel": "gr4j",
+                "snowModel": None,
+                "hydroParams": {"x1": x1, "x2": 0.0, "x3": 50.0, "x4": 2.0},
+            },
+        },
+    }
 
 
 class TestProjectionWebSocket:
     """Tests for projection WebSocket handler."""
 
     def test_get_routes(self):
-        """get_routes returns WebSocket routes."""
-        from starlette.routing import WebSocketRoute
+        """get_routes returns the WebSocket and cache statistics routes."""
+        from starlette.routing import Route, WebSocketRoute
 
         from holmes.api.projection import get_routes
 
         routes = get_routes()
-        assert len(routes) == 1
+        assert len(routes) == 2
         route = routes[0]
         assert isinstance(route, WebSocketRoute)
         assert route.path == "/"
+        assert isinstance(routes[1], Route)
+        assert routes[1].path == "/cache"
 
     def test_websocket_config_message(self):
         """Config message returns available projections."""
@@ -126,6 +181,90 @@ class TestProjectionWebSocket:
                 assert "projection" in response["data"]
                 assert "results" in response["data"]
 
+    def test_websocket_projection_members(self):
+        """Every member is simulated and evaluated."""
+        projection_data = _synthetic_projection([3, 1, 2], 730)
+        client = TestClient(create_app())
+        with (
+            patch(
+                "holmes.api.projection.data.read_projection_data",
+                return_value=projection_data.lazy(),
+            ),
+            client.websocket_connect("/projection/") as ws,
+        ):
+            ws.send_json(
+                {
+                    "type": "projection",
+                    "data": {
+                        "config": {
+                            "model": "CSI",
+                            "horizon": "2050",
+                            "scenario": "RCP45",
+                        },
+                        "calibration": {
+                            "catchment": "Au Saumon",
+                            "hydroModel": "gr4j",
+                            "snowModel": "cemaneige",
+                            "hydroParams": {
+                                "x1": 100.0,
+                                "x2": 0.0,
+                                "x3": 50.0,
+                                "x4": 2.0,
+                            },
+                        },
+                    },
+                }
+            )
+            response = ws.receive_json()
+        assert response["type"] == "projection"
+        results = response["data"]["results"]
+        assert [r["member"] for r in results] == [1, 2, 3]
+        assert all(r["mean"] > 0 for r in results)
+        assert len(response["data"]["projection"]) == 365
+        assert {"1", "2", "3", "median"} <= set(
+            response["data"]["projection"][0]
+        )
+
+    def test_websocket_projection_members_different_dates(self):
+        """Members not covering the same dates return an error."""
+        projection_data = _synthetic_projection([1, 2], 30).filter(
+            ~((pl.col("member") == 2) & (pl.col("date") == date(2040, 1, 5)))
+        )
+        client = TestClient(create_app())
+        with (
+            patch(
+                "holmes.api.projection.data.read_projection_data",
+                return_value=projection_data.lazy(),
+            ),
+            client.websocket_connect("/projection/") as ws,
+        ):
+            ws.send_json(
+                {
+                    "type": "projection",
+                    "data": {
+                        "config": {
+                            "model": "CSI",
+                            "horizon": "2050",
+                            "scenario": "RCP45",
+                        },
+                        "calibration": {
+                            "catchment": "Au Saumon",
+                            "hydroModel": "gr4j",
+                            "snowModel": None,
+                            "hydroParams": {
+                                "x1": 100.0,
+                                "x2": 0.0,
+                                "x3": 50.0,
+                                "x4": 2.0,
+                            },
+                        },
+                    },
+                }
+            )
+            response = ws.receive_json()
+        assert response["type"] == "error"
+        assert "same dates" in response["data"]
+
     def test_websocket_projection_missing_params(self):
         """Projection without required params returns error."""
         client = TestClient(create_app())
@@ -198,169 +337,168 @@ class TestProjectionDataErrors:
 class TestProjectionHelpers:
     """Tests for projection helper functions."""
 
-    def test_aggregate_projections(self):
-        """_aggregate_projections aggregates by day of year with median."""
-        # Create test DataFrame with multiple members and dates spanning 2 years
-        data = pl.DataFrame(
-            {
-                "date": [
-                    date(2020, 1, 1),
-                    date(2020, 1, 2),
-                    date(2021, 1, 1),
-                    date(2021, 1, 2),
-                    date(2020, 1, 1),
-                    date(2020, 1, 2),
-                    date(2021, 1, 1),
-                    date(2021, 1, 2),
-                ],
-                "streamflow": [10.0, 20.0, 12.0, 22.0, 14.0, 24.0, 16.0, 26.0],
-                "member": ["m1", "m1", "m1", "m1", "m2", "m2", "m2", "m2"],
-            }
+    def test_stack_members(self):
+        """_stack_members returns one row per member, sorted."""
+        data = _synthetic_projection([2, 1], 10)
+
+        members, dates, precipitation, temperature = _stack_members(
+            data.sample(fraction=1.0, shuffle=True, seed=0)
         )
 
-        result = _aggregate_projections(data)
-
-        # Should have one row per unique day_of_year
-        assert len(result) == 2
-        # Should have columns for each member plus median and date
-        assert "m1" in result.columns
-        assert "m2" in result.columns
-        assert "median" in result.columns
-        assert "date" in result.columns
-        # Date column should start from 2021-01-01 (synthetic year)
-        assert result["date"].to_list()[0] == date(2021, 1, 1)
-        # Values should be averaged across years for each member
-        # m1 day 1: (10 + 12) / 2 = 11
-        # m2 day 1: (14 + 16) / 2 = 15
-        m1_day1 = result.filter(pl.col("date") == date(2021, 1, 1))["m1"][0]
-        m2_day1 = result.filter(pl.col("date") == date(2021, 1, 1))["m2"][0]
-        assert m1_day1 == 11.0
-        assert m2_day1 == 15.0
-        # Median should be median of member values
-        median_day1 = result.filter(pl.col("date") == date(2021, 1, 1))[
-            "median"
-        ][0]
-        assert median_day1 == 13.0  # median of [11, 15]
-
-    def test_aggregate_projections_handles_leap_years(self):
-        """Day 366 is mapped to day 1 for leap years via (ordinal-1) mod 365 + 1."""
-        # The formula (ordinal_day - 1) mod 365 + 1 maps:
-        # - Day 366 (Dec 31 in leap year) → (366-1) mod 365 + 1 = 0 + 1 = 1
-        # - Day 365 (Dec 31 in non-leap year) → (365-1) mod 365 + 1 = 364 + 1 = 365
-        data = pl.DataFrame(
-            {
-                "date": [
-                    date(2020, 12, 31),  # Day 366 → maps to day 1
-                    date(2020, 1, 1),  # Day 1 → maps to day 1
-                ],
-                "streamflow": [100.0, 80.0],
-                "member": ["m1", "m1"],
-            }
+        assert members.to_list() == [1, 2]
+        assert dates.to_list() == data["date"][:10].to_list()
+        assert precipitation.shape == (2, 10)
+        assert temperature.shape == (2, 10)
+        assert precipitation.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(
+            precipitation[0],
+            data.filter(pl.col("member") == 1)["precipitation"].to_numpy(),
+        )
+        np.testing.assert_array_equal(
+            temperature[1],
+            data.filter(pl.col("member") == 2)["temperature"].to_numpy(),
         )
 
-        result = _aggregate_projections(data)
-
-        # Both should be grouped to day 1
-        assert len(result) == 1
-        # Average of 100 and 80
-        assert result["m1"][0] == 90.0
-
-    def test_evaluate_projection(self):
-        """_evaluate_projection computes seasonal metrics."""
-        # Create test DataFrame spanning multiple years with varied seasonal values
-        dates = []
-        streamflows = []
-        members = []
-
-        # Generate data for 2 years, 2 members
-        for year in [2020, 2021]:
-            for month in range(1, 13):
-                for member in ["m1", "m2"]:
-                    d = date(year, month, 15)
-                    dates.append(d)
-                    members.append(member)
-                    # Base streamflow varies by season
-                    if month in [1, 2, 3]:  # Winter
-                        base = 5.0
-                    elif month in [
-                        3,
-                        4,
-                        5,
-                        6,
-                    ]:  # Spring (overlaps with winter end)
-                        base = 50.0 if month != 3 else 20.0
-                    elif month in [
-                        5,
-                        6,
-                        7,
-                        8,
-                        9,
-                        10,
-                    ]:  # Summer (overlaps with spring)
-                        base = 2.0 if month not in [5, 6] else 15.0
-                    else:  # Autumn (9, 10, 11, 12)
-                        base = 30.0
-                    # Add member variation
-                    if member == "m2":
-                        base *= 1.1
-                    streamflows.append(base)
-
-        data = pl.DataFrame(
-            {"date": dates, "streamflow": streamflows, "member": members}
+    def test_stack_members_different_dates(self):
+        """_stack_members raises if members don't cover the same dates."""
+        data = _synthetic_projection([1, 2], 10).filter(
+            ~((pl.col("member") == 1) & (pl.col("date") == date(2040, 1, 1)))
         )
 
-        result = _evaluate_projection(data)
-
-        # Should have one row per member
-        assert len(result) == 2
-        # Should have all metric columns
-        assert "winter_min" in result.columns
-        assert "summer_min" in result.columns
-        assert "spring_max" in result.columns
-        assert "autumn_max" in result.columns
-        assert "mean" in result.columns
-        assert "member" in result.columns
-
-    def test_evaluate_projection_seasonal_boundaries(self):
-        """Verify correct month boundaries for each season."""
-        # Create minimal data to verify each season is correctly filtered
-        # Winter: months 1-3, Summer: months 5-10, Spring: months 3-6, Autumn: months 9-12
-        dates = []
-        streamflows = []
-        members = []
-
-        # Create specific values for each month to verify filtering
-        month_values = {
-            1: 10,  # Winter only
-            2: 11,  # Winter only
-            3: 12,  # Winter + Spring
-            4: 100,  # Spring only
-            5: 1,  # Spring + Summer
-            6: 2,  # Spring + Summer
-            7: 3,  # Summer only
-            8: 4,  # Summer only
-            9: 50,  # Summer + Autumn
-            10: 5,  # Summer + Autumn
-            11: 60,  # Autumn only
-            12: 70,  # Autumn only
-        }
+        with pytest.raises(HolmesDataError, match="same dates"):
+            _stack_members(data)
 
-        for month, value in month_values.items():
-            dates.append(date(2020, month, 15))
-            streamflows.append(float(value))
-            members.append("test")
 
-        data = pl.DataFrame(
-            {"date": dates, "streamflow": streamflows, "member": members}
-        )
+class TestProjectionCache:
+    """Tests for the projection results cache."""
+
+    @pytest.fixture(autouse=True)
+    def projection_data(self):
+        with patch(
+            "holmes.api.projection.data.read_projection_data",
+            return_value=_synthetic_projection([1, 2], 400).lazy(),
+        ):
+            yield
+
+    def _run(self, ws, x1: float = 100.0) -> dict:
+        ws.send_json(_projection_message(x1))
+        response = ws.receive_json()
+        assert response["type"] == "projection"
+        return response["data"]
 
-        result = _evaluate_projection(data)
+    def test_repeated_projection_is_cached(self):
+        """The same request returns the cached results without simulating."""
+        client = TestClient(create_app())
+        with (
+            patch(
+                "holmes.api.projection.ensemble.simulate",
+                wraps=projection.ensemble.simulate,
+            ) as simulate,
+            client.websocket_connect("/projection/") as ws,
+        ):
+            first = self._run(ws)
+            second = self._run(ws)
+
+        assert simulate.call_count == 1
+        assert first == second
+        info = projection.get_projection_cache_info()
+        assert info["hits"] == 1
+        assert info["misses"] == 1
+        assert info["hit_rate"] == 0.5
+        assert info["entries"] == 1
+
+    def test_different_params_miss(self):
+        """Changing a parameter runs the projection again."""
+        client = TestClient(create_app())
+        with client.websocket_connect("/projection/") as ws:
+            first = self._run(ws, x1=100.0)
+            second = self._run(ws, x1=200.0)
+
+        assert first["results"] != second["results"]
+        assert projection.get_projection_cache_info()["misses"] == 2
+
+    def test_calibrated_snow_params(self):
+        """Calibrated snow parameters are simulated and keyed, with the
+        catchment's `qnbv`."""
+        messages = []
+        for kf in (6.0, 8.0):
+            message = _projection_message()
+            message["data"]["calibration"] |= {
+                "snowModel": "cemaneige",
+                "snowParams": {"ctg": 0.5, "kf": kf, "qnbv": 1.0},
+            }
+            messages.append(message)
+        qnbv = projection.data.read_cemaneige_info("Au Saumon")["qnbv"]
+
+        client = TestClient(create_app())
+        with (
+            patch(
+                "holmes.api.projection.ensemble.simulate",
+                wraps=projection.ensemble.simulate,
+            ) as simulate,
+            client.websocket_connect("/projection/") as ws,
+        ):
+            for message in messages:
+                ws.send_json(message)
+                assert ws.receive_json()["type"] == "projection"
+
+        assert simulate.call_count == 2
+        for call, kf in zip(simulate.call_args_list, (6.0, 8.0)):
+            np.testing.assert_array_equal(
+                call.kwargs["snow_params"], [0.5, kf, qnbv]
+            )
 
-        # Winter min (months 1-3): min of 10, 11, 12 = 10
-        assert result["winter_min"][0] == 10.0
-        # Summer min (months 5-10): min of 1, 2, 3, 4, 50, 5 = 1
-        assert result["summer_min"][0] == 1.0
-        # Spring max (months 3-6): max of 12, 100, 1, 2 = 100
-        assert result["spring_max"][0] == 100.0
-        # Autumn max (months 9-12): max of 50, 5, 60, 70 = 70
-        assert result["autumn_max"][0] == 70.0
+    def test_least_recently_used_evicted(self, monkeypatch):
+        """Entries beyond PROJECTION_CACHE_SIZE are evicted in LRU order."""
+        monkeypatch.setattr(projection.config, "PROJECTION_CACHE_SIZE", 2)
+        client = TestClient(create_app())
+        with client.websocket_connect("/projection/") as ws:
+            self._run(ws, x1=100.0)
+            self._run(ws, x1=200.0)
+            self._run(ws, x1=100.0)
+            self._run(ws, x1=300.0)
+            self._run(ws, x1=100.0)
+            self._run(ws, x1=200.0)
+
+        info = projection.get_projection_cache_info()
+        assert info["entries"] == 2
+        assert info["hits"] == 2
+        assert info["misses"] == 4
+
+    def test_disk_cache(self, monkeypatch, tmp_path):
+        """Results cached on disk are reused after clearing the memory."""
+        monkeypatch.setattr(
+            projection.config, "PROJECTION_CACHE_ON_DISK", True
+        )
+        monkeypatch.setattr(projection, "cache_dir", tmp_path)
+        client = TestClient(create_app())
+        with client.websocket_connect("/projection/") as ws:
+            first = self._run(ws)
+            assert len(list((tmp_path / "projections").glob("*.arrow"))) == 2
+            projection.clear_projection_cache()
+            with patch("holmes.api.projection.ensemble.simulate") as simulate:
+                second = self._run(ws)
+
+        simulate.assert_not_called()
+        assert first == second
+        info = projection.get_projection_cache_info()
+        assert info["disk_hits"] == 1
+        assert info["entries"] == 1
+
+    def test_cache_info_route(self):
+        """The cache statistics are served as JSON."""
+        client = TestClient(create_app())
+        with client.websocket_connect("/projection/") as ws:
+            self._run(ws)
+
+        response = client.get("/projection/cache")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 1,
+            "hit_rate": 0.0,
+            "entries": 1,
+            "max_entries": projection.config.PROJECTION_CACHE_SIZE,
+        }
@@ -2,6 +2,7 @@
 
 from unittest.mock import patch
 
+import numpy as np
 import polars as pl
 from starlette.testclient import TestClient
 
@@ -442,3 +443,169 @@ class TestSimulationDataErrors:
                 response = ws.receive_json()
                 assert response["type"] == "error"
                 assert "cemaneige" in response["data"].lower()
+
+
+class TestRunSimulations:
+    """Tests for the batched simulation of several calibrations."""
+
+    def test_grouped_calibrations_keep_order(self):
+        """Calibrations batched by model come back in the request order."""
+        from holmes.api.simulation import _run_simulations
+        from holmes.models import hydro
+
+        rng = np.random.default_rng(42)
+        n = 365
+        precipitation = rng.uniform(0, 20, n)
+        pet = rng.uniform(0, 5, n)
+        observations = rng.uniform(1, 10, n)
+        gr4j_params = [
+            {"x1": 100.0, "x2": 0.0, "x3": 50.0, "x4": 2.0},
+            {"x1": 300.0, "x2": 0.5, "x3": 100.0, "x4": 2.5},
+        ]
+        bucket_params = {
+            "x1": 100.0,
+            "x2": 0.5,
+            "x3": 100.0,
+            "x4": 6.0,
+            "x5": 0.5,
+            "x6": 200.0,
+        }
+        calibrations = [
+            {"hydroModel": "gr4j", "snowModel": None, "hydroParams": p}
+            for p in gr4j_params
+        ]
+        calibrations.insert(
+            1,
+            {
+                "hydroModel": "bucket",
+                "snowModel": None,
+                "hydroParams": bucket_params,
+            },
+        )
+
+        simulations = _run_simulations(
+            precipitation,
+            None,
+            pet,
+            np.arange(1, n + 1, dtype=np.uintp),
+            None,
+            None,
+            None,
+            observations,
+            calibrations,
+            30,
+        )
+
+        assert len(simulations) == 3
+        for (streamflow, results), calibration in zip(
+            simulations, calibrations
+        ):
+            expected = hydro.get_model(calibration["hydroModel"])(
+                np.array(list(calibration["hydroParams"].values())),
+                precipitation,
+                pet,
+            )
+            np.testing.assert_array_equal(streamflow, expected)
+            assert "nse_none" in results
+            assert "kge_log" in results
+
+    def test_calibrated_snow_params(self):
+        """Calibrations with snow parameters run the snow model with them."""
+        from holmes.api.simulation import _run_simulations
+        from holmes.models import hydro, snow
+
+        rng = np.random.default_rng(42)
+        n = 365
+        precipitation = rng.uniform(0, 20, n)
+        temperature = rng.uniform(-15, 20, n)
+        pet = rng.uniform(0, 5, n)
+        day_of_year = np.arange(1, n + 1, dtype=np.uintp)
+        elevation_layers = np.array([500.0, 1000.0, 1500.0])
+        observations = rng.uniform(1, 10, n)
+        hydro_params = {"x1": 300.0, "x2": 0.5, "x3": 100.0, "x4": 2.5}
+        snow_params = {"ctg": 0.5, "kf": 6.0, "qnbv": 350.0}
+        calibrations = [
+            {
+                "hydroModel": "gr4j",
+                "snowModel": "cemaneige",
+                "hydroParams": hydro_params,
+            },
+            {
+                "hydroModel": "gr4j",
+                "snowModel": "cemaneige",
+                "hydroParams": hydro_params,
+                "snowParams": snow_params,
+            },
+        ]
+
+        simulations = _run_simulations(
+            precipitation,
+            temperature,
+            pet,
+            day_of_year,
+            elevation_layers,
+            1000.0,
+            350.0,
+            observations,
+            calibrations,
+            30,
+        )
+
+        for (streamflow, _), params in zip(
+            simulations, [[0.25, 3.74, 350.0], list(snow_params.values())]
+        ):
+            effective_precipitation = snow.get_model("cemaneige")(
+                np.array(params),
+                precipitation,
+                temperature,
+                day_of_year,
+                elevation_layers,
+                1000.0,
+            )
+            expected = hydro.get_model("gr4j")(
+                np.array(list(hydro_params.values())),
+                effective_precipitation,
+                pet,
+            )
+            np.testing.assert_array_equal(streamflow, expected)
+
+    def test_flat_simulation(self):
+        """A flat simulation reports its undefined criteria as NaN."""
+        from holmes.api.simulation import _run_simulations
+
+        rng = np.random.default_rng(42)
+        n = 365
+        observations = rng.uniform(1, 10, n)
+
+        with patch(
+            "holmes.api.simulation.hydro.get_batch_model",
+            return_value=lambda params, *_: np.full((len(params), n), 2.0),
+        ):
+            simulations = _run_simulations(
+                rng.uniform(0, 20, n),
+                None,
+                rng.uniform(0, 5, n),
+                np.arange(1, n + 1, dtype=np.uintp),
+                None,
+                None,
+                None,
+                observations,
+                [
+                    {
+                        "hydroModel": "gr4j",
+                        "snowModel": None,
+                        "hydroParams": {
+                            "x1": 300.0,
+                            "x2": 0.5,
+                            "x3": 100.0,
+                            "x4": 2.5,
+                        },
+                    }
+                ],
+                30,
+            )
+
+        [(_, results)] = simulations
+        assert np.isfinite(results["nse_none"])
+        assert np.isnan(results["kge_none"])
+        assert np.isnan(results["correlation"])
@@ -1,5 +1,7 @@
 """Unit tests for holmes.api.utils module."""
 
+import json
+import struct
 from datetime import date, datetime
 from unittest.mock import AsyncMock
 
@@ -15,6 +17,7 @@ from starlette.websockets import WebSocket
 from holmes.api.utils import (
     JSONResponse,
     convert_for_json,
+    encode_binary,
     get_headers,
     get_json_params,
     get_path_params,
@@ -60,6 +63,11 @@ class TestConvertForJson:
         result = convert_for_json(float("nan"))
         assert result is None
 
+    def test_convert_for_json_float_inf(self):
+        """Infinity to null conversion."""
+        assert convert_for_json(float("inf")) is None
+        assert convert_for_json(float("-inf")) is None
+
     def test_convert_for_json_inf(self):
         """Infinity values in DataFrame are converted to None."""
         df = pl.DataFrame({"a": [1.0, float("inf"), 3.0]})
@@ -151,6 +159,103 @@ class TestConvertForJson:
         assert result[2]["a"] == 3.0
 
 
+def decode_binary(frame: bytes) -> dict:
+    """Decode a binary frame, with data frames as dicts of numpy arrays."""
+    header_length = struct.unpack("<I", frame[:4])[0]
+    header = json.loads(frame[4 : 4 + header_length])
+    body = 4 + header_length + (-(4 + header_length) % 8)
+    assert body % 8 == 0
+
+    def decode(value):
+        if isinstance(value, list):
+            return [decode(v) for v in value]
+        if isinstance(value, dict) and "__frame__" in value:
+            frame_ = value["__frame__"]
+            columns = {}
+            for column in frame_["columns"]:
+                if column["dtype"] == "json":
+                    columns[column["name"]] = column["values"]
+                    continue
+                assert column["offset"] % 8 == 0
+                columns[column["name"]] = np.frombuffer(
+                    frame,
+                    dtype="<f8" if column["dtype"] == "float64" else "<i4",
+                    count=frame_["length"],
+                    offset=body + column["offset"],
+                )
+            return columns
+        if isinstance(value, dict):
+            return {k: decode(v) for k, v in value.items()}
+        return value
+
+    return {"type": header["type"], "data": decode(header["data"])}
+
+
+class TestEncodeBinary:
+    """Tests for encode_binary function."""
+
+    def test_dataframe_columns(self):
+        """Dates become epoch days and numbers float64 buffers."""
+        df = pl.DataFrame(
+            {
+                "date": [date(1970, 1, 2), date(2000, 1, 1), date(1960, 1, 1)],
+                "streamflow": [1.5, 2.5, 3.5],
+                "count": [1, 2, 3],
+            }
+        )
+        result = decode_binary(encode_binary("observations", df))
+        assert result["type"] == "observations"
+        np.testing.assert_array_equal(
+            result["data"]["date"], [1, 10957, -3653]
+        )
+        np.testing.assert_array_equal(
+            result["data"]["streamflow"], [1.5, 2.5, 3.5]
+        )
+        np.testing.assert_array_equal(result["data"]["count"], [1.0, 2.0, 3.0])
+
+    def test_missing_and_infinite_values_are_nan(self):
+        """Nulls and infinities are sent as NaN, like null in JSON."""
+        df = pl.DataFrame({"value": [1.0, None, float("inf"), float("nan")]})
+        result = decode_binary(encode_binary("result", df))
+        assert result["data"]["value"][0] == 1.0
+        assert np.isnan(result["data"]["value"][1:]).all()
+
+    def test_dates_with_nulls_inline(self):
+        """Date columns with missing values are given inline as in JSON."""
+        df = pl.DataFrame({"date": [date(2000, 1, 1), None]})
+        result = decode_binary(encode_binary("result", df))
+        assert result["data"]["date"] == ["2000-01-01", None]
+
+    def test_non_numeric_columns_inline(self):
+        """Other columns are given inline as in JSON."""
+        df = pl.DataFrame({"name": ["a", "b"], "value": [1.0, 2.0]})
+        result = decode_binary(encode_binary("projection", df))
+        assert result["data"]["name"] == ["a", "b"]
+
+    def test_nested_data(self):
+        """Data frames nested in other data are encoded, the rest as JSON."""
+        df = pl.DataFrame({"date": [date(2000, 1, 1)], "q": [1.0]})
+        result = decode_binary(
+            encode_binary(
+                "simulation",
+                {
+                    "simulation": df,
+                    "results": [{"name": "a", "nse": float("nan")}],
+                    "other": [df, df],
+                },
+            )
+        )
+        assert result["data"]["results"] == [{"name": "a", "nse": None}]
+        assert len(result["data"]["other"]) == 2
+        np.testing.assert_array_equal(result["data"]["other"][1]["q"], [1.0])
+
+    def test_empty_dataframe(self):
+        """Empty data frames have empty columns."""
+        df = pl.DataFrame({"q": []}, schema={"q": pl.Float64})
+        result = decode_binary(encode_binary("result", df))
+        assert len(result["data"]["q"]) == 0
+
+
 class TestHypothesis:
     """Property-based tests for convert_for_json."""
 
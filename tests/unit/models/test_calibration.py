@@ -1,6 +1,7 @@
 """Unit tests for holmes.models.calibration module."""
 
 import asyncio
+import threading
 from unittest.mock import patch
 
 import numpy as np
@@ -38,6 +39,12 @@ class TestGetConfig:
             "p_convergence_threshold",
             "geometric_range_threshold",
             "max_evaluations",
+            "spin_up_iterations",
+            "spin_up_tolerance",
+            "cache_size",
+            "snow_cache_size",
+            "n_islands",
+            "migration_interval",
         ]
         assert names == expected
 
@@ -45,7 +52,16 @@ class TestGetConfig:
         """SCE config correctly marks integer parameters."""
         config = calibration.get_config("sce")
         for param in config:
-            if param["name"] in ["n_complexes", "k_stop", "max_evaluations"]:
+            if param["name"] in [
+                "n_complexes",
+                "k_stop",
+                "max_evaluations",
+                "spin_up_iterations",
+                "cache_size",
+                "snow_cache_size",
+                "n_islands",
+                "migration_interval",
+            ]:
                 assert param["integer"] is True
             else:
                 assert param["integer"] is False
@@ -133,6 +149,65 @@ class TestCalibrate:
             params=sce_params,
         )
         assert isinstance(result, np.ndarray)
+        # ctg, kf and qnbv, kept at the catchment's value, then x1 to x4
+        assert len(result) == 7
+        assert result[2] == sample_data["qnbv"]
+
+    @pytest.mark.asyncio
+    async def test_calibrate_snow_params(self, sample_data, sce_params):
+        """The snow model is calibrated by SCE-UA with a snow cache."""
+        all_results = []
+
+        async def callback(done, params, simulation, results):
+            all_results.append(results)
+
+        with patch("holmes.models.calibration.Sce") as sce:
+            sce.return_value.step.return_value = (
+                True,
+                np.ones(7),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+            sce.return_value.cache_info.return_value = {
+                "hits": 0,
+                "misses": 0,
+                "size": 0,
+                "capacity": 0,
+            }
+            sce.return_value.snow_cache_info.return_value = {
+                "hits": 1,
+                "misses": 3,
+                "size": 3,
+                "capacity": 100,
+            }
+            await calibration.calibrate(
+                sample_data["precipitation"],
+                sample_data["temperature"],
+                sample_data["pet"],
+                sample_data["observations"],
+                sample_data["day_of_year"],
+                sample_data["elevation_layers"],
+                sample_data["median_elevation"],
+                sample_data["qnbv"],
+                sample_data["warmup_steps"],
+                hydro_model="gr4j",
+                snow_model="cemaneige",
+                objective="nse",
+                transformation="none",
+                algorithm="sce",
+                params={**sce_params, "snow_cache_size": 100},
+                callback=callback,
+            )
+
+        assert sce.call_args.args[:2] == ("gr4j", "cemaneige")
+        assert sce.call_args.kwargs["fixed_params"] == {2: sample_data["qnbv"]}
+        assert sce.call_args.kwargs["snow_cache_size"] == 100
+        # the forcings aren't transformed by the snow model beforehand
+        init_args = sce.return_value.init.call_args.args
+        np.testing.assert_array_equal(
+            init_args[0], sample_data["precipitation"]
+        )
+        assert all_results[0]["snow_cache_hit_rate"] == 0.25
 
     @pytest.mark.asyncio
     async def test_calibrate_stop_event(self, sample_data):
@@ -229,6 +304,578 @@ class TestCalibrate:
             assert "nse" in call["results"]
             assert "kge" in call["results"]
 
+    @pytest.mark.asyncio
+    async def test_calibrate_step_in_worker_thread(
+        self, sample_data, sce_params
+    ):
+        """The blocking SCE step is executed outside the event loop thread."""
+        step_threads = []
+        original_step = calibration.Sce.step
+
+        def step(self, *args):
+            step_threads.append(threading.current_thread().name)
+            return original_step(self, *args)
+
+        with patch("holmes_rs.calibration.sce.Sce.step", step):
+            await calibration.calibrate(
+                sample_data["precipitation"],
+                sample_data["temperature"],
+                sample_data["pet"],
+                sample_data["observations"],
+                sample_data["day_of_year"],
+                sample_data["elevation_layers"],
+                sample_data["median_elevation"],
+                sample_data["qnbv"],
+                sample_data["warmup_steps"],
+                hydro_model="gr4j",
+                snow_model=None,
+                objective="nse",
+                transformation="none",
+                algorithm="sce",
+                params=sce_params,
+            )
+        assert step_threads
+        assert all(
+            name.startswith("holmes-calibration") for name in step_threads
+        )
+
+    @pytest.mark.asyncio
+    async def test_calibrate_spin_up_params(self, sample_data, sce_params):
+        """The spin-up settings are passed to SCE-UA, disabled by default."""
+        with patch("holmes.models.calibration.Sce") as sce:
+            sce.return_value.step.return_value = (
+                True,
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+            sce.return_value.cache_info.return_value = {
+                "hits": 0,
+                "misses": 0,
+                "size": 0,
+                "capacity": 0,
+            }
+            sce.return_value.snow_cache_info.return_value = {
+                "hits": 0,
+                "misses": 0,
+                "size": 0,
+                "capacity": 0,
+            }
+            for params, iterations, tolerance in [
+                (sce_params, 0, 0.001),
+                (
+                    sce_params
+                    | {"spin_up_iterations": 3, "spin_up_tolerance": 0.01},
+                    3,
+                    0.01,
+                ),
+            ]:
+                await calibration.calibrate(
+                    sample_data["precipitation"],
+                    sample_data["temperature"],
+                    sample_data["pet"],
+                    sample_data["observations"],
+                    sample_data["day_of_year"],
+                    sample_data["elevation_layers"],
+                    sample_data["median_elevation"],
+                    sample_data["qnbv"],
+                    sample_data["warmup_steps"],
+                    hydro_model="gr4j",
+                    snow_model=None,
+                    objective="nse",
+                    transformation="none",
+                    algorithm="sce",
+                    params=params,
+                )
+                assert sce.call_args.kwargs["spin_up_iterations"] == iterations
+                assert sce.call_args.kwargs["spin_up_tolerance"] == tolerance
+
+    @pytest.mark.asyncio
+    async def test_calibrate_cache_hit_rate(self, sample_data, sce_params):
+        """With a cache, its hit rate is reported with the objectives."""
+        all_results = []
+
+        async def callback(done, params, simulation, results):
+            all_results.append(results)
+
+        with patch("holmes.models.calibration.Sce") as sce:
+            sce.return_value.step.return_value = (
+                True,
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+            for params, cache_info in [
+                (
+                    sce_params,
+                    {"hits": 0, "misses": 0, "size": 0, "capacity": 0},
+                ),
+                (
+                    sce_params | {"cache_size": 10},
+                    {"hits": 3, "misses": 1, "size": 1, "capacity": 10},
+                ),
+            ]:
+                sce.return_value.cache_info.return_value = cache_info
+                sce.return_value.snow_cache_info.return_value = {
+                    "hits": 0,
+                    "misses": 0,
+                    "size": 0,
+                    "capacity": 0,
+                }
+                await calibration.calibrate(
+                    sample_data["precipitation"],
+                    sample_data["temperature"],
+                    sample_data["pet"],
+                    sample_data["observations"],
+                    sample_data["day_of_year"],
+                    sample_data["elevation_layers"],
+                    sample_data["median_elevation"],
+                    sample_data["qnbv"],
+                    sample_data["warmup_steps"],
+                    hydro_model="gr4j",
+                    snow_model=None,
+                    objective="nse",
+                    transformation="none",
+                    algorithm="sce",
+                    params=params,
+                    callback=callback,
+                )
+                assert sce.call_args.kwargs["cache_size"] == params.get(
+                    "cache_size", 0
+                )
+
+        assert "cache_hit_rate" not in all_results[0]
+        assert all_results[1]["cache_hit_rate"] == 0.75
+
+    @pytest.mark.asyncio
+    async def test_calibrate_islands(self, sample_data, sce_params):
+        """Several islands run the calibration with the same settings."""
+        all_results = []
+
+        async def callback(done, params, simulation, results):
+            all_results.append(results)
+
+        with (
+            patch("holmes.models.calibration.Sce") as sce,
+            patch("holmes.models.calibration.Islands") as islands,
+        ):
+            islands.return_value.step.return_value = (
+                True,
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+            islands.return_value.cache_info.return_value = {
+                "hits": 0,
+                "misses": 0,
+                "size": 0,
+                "capacity": 0,
+            }
+            islands.return_value.snow_cache_info.return_value = {
+                "hits": 0,
+                "misses": 0,
+                "size": 0,
+                "capacity": 0,
+            }
+            islands.return_value.island_results.return_value = [
+                (True, np.ones(4), np.ones(1), np.array([1.0, 0.5, 0.25])),
+                None,
+            ]
+            result = await calibration.calibrate(
+                sample_data["precipitation"],
+                sample_data["temperature"],
+                sample_data["pet"],
+                sample_data["observations"],
+                sample_data["day_of_year"],
+                sample_data["elevation_layers"],
+                sample_data["median_elevation"],
+                sample_data["qnbv"],
+                sample_data["warmup_steps"],
+                hydro_model="gr4j",
+                snow_model=None,
+                objective="nse",
+                transformation="none",
+                algorithm="sce",
+                params=sce_params | {"n_islands": 3, "migration_interval": 2},
+                callback=callback,
+            )
+
+        sce.assert_not_called()
+        kwargs = islands.call_args.kwargs
+        assert kwargs["n_islands"] == 3
+        assert kwargs["migration_interval"] == 2
+        assert kwargs["n_complexes"] == sce_params["n_complexes"]
+        islands.return_value.init.assert_called_once()
+        np.testing.assert_array_equal(result, np.ones(4))
+        assert all_results[0]["islands"] == [
+            {"done": True, "rmse": 1.0, "nse": 0.5, "kge": 0.25},
+            None,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_calibrate_islands_converge(self, sample_data, sce_params):
+        """Island calibrations return the best parameters found."""
+        results = []
+
+        async def callback(done, params, simulation, results_):
+            results.append(results_)
+
+        result = await calibration.calibrate(
+            sample_data["precipitation"],
+            sample_data["temperature"],
+            sample_data["pet"],
+            sample_data["observations"],
+            sample_data["day_of_year"],
+            sample_data["elevation_layers"],
+            sample_data["median_elevation"],
+            sample_data["qnbv"],
+            sample_data["warmup_steps"],
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            algorithm="sce",
+            params=sce_params | {"n_islands": 2, "migration_interval": 1},
+            callback=callback,
+        )
+
+        assert result.shape == (4,)
+        assert results
+        assert all(np.isfinite(r["nse"]) for r in results)
+        # every island steps from the first step on
+        assert all(len(r["islands"]) == 2 for r in results)
+        assert all(
+            np.isfinite(island["nse"])
+            for r in results
+            for island in r["islands"]
+        )
+
+
+class TestCalibrateCheckpoint:
+    """Tests for checkpointing and resuming calibrations."""
+
+    @pytest.fixture
+    def sample_data(self):
+        """Small synthetic forcings, the models being mocked."""
+        n = 30
+        return {
+            "precipitation": np.ones(n),
+            "temperature": None,
+            "pet": np.ones(n),
+            "observations": np.ones(n),
+            "day_of_year": np.arange(1, n + 1, dtype=np.uintp),
+            "elevation_layers": None,
+            "median_elevation": None,
+            "qnbv": None,
+            "warmup_steps": 0,
+        }
+
+    @pytest.fixture
+    def sce(self, sample_data):
+        """Mocked SCE-UA converging on the third step."""
+        with patch("holmes.models.calibration.Sce") as sce:
+            step = (
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+            for instance in (
+                sce.return_value,
+                sce.from_checkpoint.return_value,
+            ):
+                instance.step.side_effect = [
+                    (False, *step),
+                    (False, *step),
+                    (True, *step),
+                ]
+                instance.checkpoint.return_value = b"state"
+                instance.cache_info.return_value = {
+                    "hits": 0,
+                    "misses": 0,
+                    "size": 0,
+                    "capacity": 0,
+                }
+                instance.snow_cache_info.return_value = {
+                    "hits": 0,
+                    "misses": 0,
+                    "size": 0,
+                    "capacity": 0,
+                }
+            yield sce
+
+    async def _calibrate(self, sample_data, **kwargs):
+        return await calibration.calibrate(
+            *sample_data.values(),
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            algorithm="sce",
+            params={
+                "n_complexes": 2,
+                "k_stop": 2,
+                "p_convergence_threshold": 0.1,
+                "geometric_range_threshold": 0.001,
+                "max_evaluations": 50,
+            },
+            **kwargs,
+        )
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_written_on_stop(
+        self, sample_data, sce, tmp_path
+    ):
+        """Stopped calibrations leave a checkpoint."""
+        checkpoint = tmp_path / "checkpoints" / "calibration.ckpt"
+        stop_event = asyncio.Event()
+        stop_event.set()
+
+        await self._calibrate(
+            sample_data, stop_event=stop_event, checkpoint=checkpoint
+        )
+
+        assert checkpoint.read_bytes() == b"state"
+        assert not list(checkpoint.parent.glob("*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_written_periodically(
+        self, sample_data, sce, tmp_path
+    ):
+        """Checkpoints are written every checkpoint interval."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        written = []
+
+        with (
+            patch.object(
+                calibration.config, "CALIBRATION_CHECKPOINT_INTERVAL", 1
+            ),
+            patch.object(calibration, "time") as time,
+            patch.object(
+                calibration,
+                "_write_checkpoint",
+                side_effect=lambda path, sce_: written.append(
+                    (path, sce_.checkpoint())
+                ),
+            ),
+        ):
+            time.monotonic.side_effect = [0, 1, 1.5, 2]
+            await self._calibrate(sample_data, checkpoint=checkpoint)
+
+        # at 1 and 2 seconds, but not at 1.5
+        assert written == [(checkpoint, b"state"), (checkpoint, b"state")]
+        # and only serialized then
+        assert sce.return_value.checkpoint.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_removed_when_done(
+        self, sample_data, sce, tmp_path
+    ):
+        """The checkpoint of a converged calibration is removed."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        checkpoint.write_bytes(b"old state")
+
+        await self._calibrate(sample_data, checkpoint=checkpoint)
+
+        assert not checkpoint.exists()
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_written_on_cancel(
+        self, sample_data, sce, tmp_path
+    ):
+        """Cancelled calibrations checkpoint their last step."""
+        checkpoint = tmp_path / "calibration.ckpt"
+
+        async def callback(done, params, simulation, results):
+            raise asyncio.CancelledError
+
+        with pytest.raises(asyncio.CancelledError):
+            await self._calibrate(
+                sample_data, callback=callback, checkpoint=checkpoint
+            )
+
+        assert checkpoint.read_bytes() == b"state"
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_failure_on_cancel(
+        self, sample_data, sce, tmp_path
+    ):
+        """Failing to checkpoint doesn't replace the cancellation."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        sce.return_value.checkpoint.side_effect = RuntimeError(
+            "Already mutably borrowed"
+        )
+
+        async def callback(done, params, simulation, results):
+            raise asyncio.CancelledError
+
+        with pytest.raises(asyncio.CancelledError):
+            await self._calibrate(
+                sample_data, callback=callback, checkpoint=checkpoint
+            )
+
+        assert not checkpoint.exists()
+
+    @pytest.mark.asyncio
+    async def test_cancel_waits_for_running_step(self, sample_data, sce):
+        """A cancelled calibration keeps its slot until its step is done."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def step(*args):
+            started.set()
+            release.wait(5)
+            return (
+                False,
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+
+        sce.return_value.step.side_effect = step
+        loop = asyncio.get_running_loop()
+        slots = calibration._get_calibration_slots(loop)
+
+        task = asyncio.create_task(self._calibrate(sample_data))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        assert (
+            slots._value == calibration.config.MAX_CONCURRENT_CALIBRATIONS - 1
+        )
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert slots._value == calibration.config.MAX_CONCURRENT_CALIBRATIONS
+        assert sce.return_value.step.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_twice_waits_for_running_step(
+        self, sample_data, sce, tmp_path
+    ):
+        """Cancelling again, as on a cleanup timeout, still waits."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        started = threading.Event()
+        release = threading.Event()
+        running = threading.Event()
+
+        def step(*args):
+            running.set()
+            started.set()
+            release.wait(5)
+            running.clear()
+            return (
+                False,
+                np.ones(4),
+                np.ones(len(sample_data["precipitation"])),
+                np.ones(3),
+            )
+
+        def save():
+            assert not running.is_set()
+            return b"state"
+
+        sce.return_value.step.side_effect = step
+        sce.return_value.checkpoint.side_effect = save
+        loop = asyncio.get_running_loop()
+        slots = calibration._get_calibration_slots(loop)
+
+        task = asyncio.create_task(
+            self._calibrate(sample_data, checkpoint=checkpoint)
+        )
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        assert (
+            slots._value == calibration.config.MAX_CONCURRENT_CALIBRATIONS - 1
+        )
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert slots._value == calibration.config.MAX_CONCURRENT_CALIBRATIONS
+        assert checkpoint.read_bytes() == b"state"
+
+    def test_calibration_slots_per_event_loop(self):
+        """Each event loop gets its own calibration slots."""
+
+        async def get_slots():
+            loop = asyncio.get_running_loop()
+            slots = calibration._get_calibration_slots(loop)
+            assert calibration._get_calibration_slots(loop) is slots
+            return slots
+
+        assert asyncio.run(get_slots()) is not asyncio.run(get_slots())
+
+    @pytest.mark.asyncio
+    async def test_resume(self, sample_data, sce, tmp_path):
+        """Resumed calibrations continue from the checkpoint."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        checkpoint.write_bytes(b"saved state")
+
+        await self._calibrate(sample_data, checkpoint=checkpoint, resume=True)
+
+        sce.from_checkpoint.assert_called_once_with(b"saved state")
+        sce.assert_not_called()
+        sce.from_checkpoint.return_value.init.assert_not_called()
+        assert sce.from_checkpoint.return_value.step.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_resume_islands(self, sample_data, sce, tmp_path):
+        """Island calibrations resume from an islands checkpoint."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        checkpoint.write_bytes(b"saved state")
+
+        with patch("holmes.models.calibration.Islands") as islands:
+            islands.from_checkpoint.return_value = sce.return_value
+            await calibration.calibrate(
+                *sample_data.values(),
+                hydro_model="gr4j",
+                snow_model=None,
+                objective="nse",
+                transformation="none",
+                algorithm="sce",
+                params={
+                    "n_complexes": 2,
+                    "k_stop": 2,
+                    "p_convergence_threshold": 0.1,
+                    "geometric_range_threshold": 0.001,
+                    "max_evaluations": 50,
+                    "n_islands": 2,
+                },
+                checkpoint=checkpoint,
+                resume=True,
+            )
+
+        islands.from_checkpoint.assert_called_once_with(b"saved state")
+        sce.from_checkpoint.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_resume_without_checkpoint(self, sample_data, sce, tmp_path):
+        """Resuming without a checkpoint raises HolmesError."""
+        with pytest.raises(HolmesError, match="no checkpoint"):
+            await self._calibrate(
+                sample_data,
+                checkpoint=tmp_path / "calibration.ckpt",
+                resume=True,
+            )
+
+    @pytest.mark.asyncio
+    async def test_resume_invalid_checkpoint(self, sample_data, sce, tmp_path):
+        """Invalid checkpoints raise HolmesError."""
+        checkpoint = tmp_path / "calibration.ckpt"
+        checkpoint.write_bytes(b"invalid")
+        sce.from_checkpoint.side_effect = ValueError("invalid checkpoint")
+
+        with pytest.raises(HolmesError, match="checkpoint is invalid"):
+            await self._calibrate(
+                sample_data, checkpoint=checkpoint, resume=True
+            )
+
 
 class TestCalibrateErrorHandling:
     """Tests for error handling during calibration."""
@@ -270,34 +917,28 @@ class TestCalibrateErrorHandling:
         }
 
     @pytest.mark.asyncio
-    async def test_snow_simulation_numerical_error(
+    async def test_snow_forcings_validation_error(
         self, sample_data, sce_params
     ):
-        """Calibration handles snow simulation HolmesNumericalError."""
-        with patch(
-            "holmes.models.snow.get_model",
-            return_value=lambda *args: (_ for _ in ()).throw(
-                HolmesNumericalError("Snow numerical error")
-            ),
-        ):
-            with pytest.raises(HolmesNumericalError):
-                await calibration.calibrate(
-                    sample_data["precipitation"],
-                    sample_data["temperature"],
-                    sample_data["pet"],
-                    sample_data["observations"],
-                    sample_data["day_of_year"],
-                    sample_data["elevation_layers"],
-                    sample_data["median_elevation"],
-                    sample_data["qnbv"],
-                    sample_data["warmup_steps"],
-                    hydro_model="gr4j",
-                    snow_model="cemaneige",
-                    objective="nse",
-                    transformation="none",
-                    algorithm="sce",
-                    params=sce_params,
-                )
+        """Invalid snow forcings fail the calibration's initialization."""
+        with pytest.raises(HolmesError, match="elevation_layers"):
+            await calibration.calibrate(
+                sample_data["precipitation"],
+                sample_data["temperature"],
+                sample_data["pet"],
+                sample_data["observations"],
+                sample_data["day_of_year"],
+                np.array([]),
+                sample_data["median_elevation"],
+                sample_data["qnbv"],
+                sample_data["warmup_steps"],
+                hydro_model="gr4j",
+                snow_model="cemaneige",
+                objective="nse",
+                transformation="none",
+                algorithm="sce",
+                params=sce_params,
+            )
 
     @pytest.mark.asyncio
     async def test_sce_init_numerical_error(self, sample_data, sce_params):
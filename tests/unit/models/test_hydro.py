@@ -147,6 +147,45 @@ class TestGetModel:
         assert np.all(result >= 0)
 
 
+class TestGetBatchModel:
+    """Tests for get_batch_model function."""
+
+    @pytest.mark.parametrize("model", ["gr4j", "bucket", "cequeau"])
+    def test_batch_matches_single(self, model):
+        """Each batched row equals the single parameter set simulation."""
+        simulate = hydro.get_model(model)
+        simulate_batch = hydro.get_batch_model(model)
+        config = hydro.get_config(model)
+        defaults = np.array([p["default"] for p in config])
+        lower = np.array([p["min"] for p in config])
+        params = np.stack([defaults, (defaults + lower) / 2])
+        n = 365
+        precipitation = np.random.uniform(0, 20, n)
+        pet = np.random.uniform(0, 5, n)
+
+        result = simulate_batch(params, precipitation, pet)
+
+        assert result.shape == (2, n)
+        for row, params_ in zip(result, params):
+            np.testing.assert_array_equal(
+                row, simulate(params_, precipitation, pet)
+            )
+
+    def test_batch_validation_error(self):
+        """Batched simulate handles HolmesValidationError from Rust."""
+        with patch(
+            "holmes.models.hydro.gr4j.simulate_batch",
+            side_effect=HolmesValidationError("Validation error"),
+        ):
+            simulate_batch = hydro.get_batch_model("gr4j")
+            with pytest.raises(HolmesValidationError):
+                simulate_batch(
+                    np.array([[100.0, 0.0, 50.0, 2.0]]),
+                    np.array([10.0, 20.0, 15.0]),
+                    np.array([2.0, 3.0, 2.5]),
+                )
+
+
 class TestHypothesis:
     """Property-based tests for hydro models."""
 
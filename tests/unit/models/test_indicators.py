@@ -0,0 +1,258 @@
+"""Unit tests for holmes.models.indicators module."""
+
+from datetime import date
+
+import numpy as np
+import polars as pl
+import pytest
+
+from holmes.models import indicators
+
+
+def _compute(data: pl.DataFrame) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Compute indicators of long `date`, `member`, `streamflow` data."""
+    wide = data.pivot(on="member", index="date", values="streamflow").sort(
+        "date"
+    )
+    members = data["member"].unique().sort()
+    streamflow = (
+        wide.select(str(member) for member in members)
+        .to_numpy()
+        .T.astype(np.float64)
+    )
+    return indicators.compute_indicators(wide["date"], members, streamflow)
+
+
+@pytest.fixture
+def registered():
+    """Remove the indicators registered during a test."""
+    names = indicators.get_indicators()
+    yield
+    for name in indicators.get_indicators():
+        if name not in names:
+            indicators.unregister_indicator(name)
+
+
+class TestRegistry:
+    """Tests for the indicator registry."""
+
+    def test_default_indicators(self):
+        """The seasonal extremes and the mean are registered by default."""
+        assert indicators.get_indicators() == [
+            "winter_min",
+            "summer_min",
+            "spring_max",
+            "autumn_max",
+            "mean",
+        ]
+
+    def test_register_indicator(self, registered):
+        """Registered indicators are computed for each member."""
+        indicators.register_indicator("q95", lambda q: q.quantile(0.95))
+        indicators.register_indicator(
+            "low_flow_7d", lambda q: q.rolling_mean(7).min(), annual=True
+        )
+        dates = pl.date_range(date(2020, 1, 1), date(2021, 12, 31), eager=True)
+        streamflow = np.vstack(
+            [np.arange(len(dates), dtype=np.float64), np.ones(len(dates))]
+        )
+
+        results, _ = indicators.compute_indicators(
+            dates, pl.Series("member", [1, 2]), streamflow
+        )
+
+        assert results.columns[-2:] == ["q95", "low_flow_7d"]
+        assert results["q95"].to_list() == [
+            pl.Series(streamflow[0]).quantile(0.95),
+            1.0,
+        ]
+        # member 1: lowest weekly mean is the first week of each year
+        assert results["low_flow_7d"].to_list() == [(3.0 + 369.0) / 2, 1.0]
+
+    def test_register_indicator_twice(self, registered):
+        """An indicator name can only be registered once."""
+        with pytest.raises(ValueError, match="already registered"):
+            indicators.register_indicator("mean", lambda q: q.mean())
+
+    def test_register_indicator_reserved_name(self):
+        """The member column can't be overwritten."""
+        with pytest.raises(ValueError, match="reserved"):
+            indicators.register_indicator("member", lambda q: q.mean())
+
+    def test_unregister_indicator(self, registered):
+        """Unregistered indicators are no longer computed."""
+        indicators.register_indicator("max", lambda q: q.max())
+        indicators.unregister_indicator("max")
+
+        results, _ = _compute(
+            pl.DataFrame(
+                {
+                    "date": [date(2020, 1, 1)],
+                    "streamflow": [1.0],
+                    "member": ["m1"],
+                }
+            )
+        )
+
+        assert "max" not in results.columns
+
+    def test_unregister_unknown_indicator(self):
+        """Unregistering an unknown indicator raises."""
+        with pytest.raises(ValueError, match="isn't registered"):
+            indicators.unregister_indicator("unknown")
+
+
+class TestComputeIndicators:
+    """Tests for compute_indicators."""
+
+    def test_climatology(self):
+        """The climatology aggregates by day of year with median."""
+        # Create test DataFrame with multiple members and dates spanning 2 years
+        data = pl.DataFrame(
+            {
+                "date": [
+                    date(2020, 1, 1),
+                    date(2020, 1, 2),
+                    date(2021, 1, 1),
+                    date(2021, 1, 2),
+                    date(2020, 1, 1),
+                    date(2020, 1, 2),
+                    date(2021, 1, 1),
+                    date(2021, 1, 2),
+                ],
+                "streamflow": [10.0, 20.0, 12.0, 22.0, 14.0, 24.0, 16.0, 26.0],
+                "member": ["m1", "m1", "m1", "m1", "m2", "m2", "m2", "m2"],
+            }
+        )
+
+        _, result = _compute(data)
+
+        # Should have one row per unique day_of_year
+        assert len(result) == 2
+        # Should have columns for each member plus median and date
+        assert "m1" in result.columns
+        assert "m2" in result.columns
+        assert "median" in result.columns
+        assert "date" in result.columns
+        # Date column should start from 2021-01-01 (synthetic year)
+        assert result["date"].to_list()[0] == date(2021, 1, 1)
+        # Values should be averaged across years for each member
+        # m1 day 1: (10 + 12) / 2 = 11
+        # m2 day 1: (14 + 16) / 2 = 15
+        m1_day1 = result.filter(pl.col("date") == date(2021, 1, 1))["m1"][0]
+        m2_day1 = result.filter(pl.col("date") == date(2021, 1, 1))["m2"][0]
+        assert m1_day1 == 11.0
+        assert m2_day1 == 15.0
+        # Median should be median of member values
+        median_day1 = result.filter(pl.col("date") == date(2021, 1, 1))[
+            "median"
+        ][0]
+        assert median_day1 == 13.0  # median of [11, 15]
+
+    def test_climatology_handles_leap_years(self):
+        """Day 366 is mapped to day 1 for leap years via (ordinal-1) mod 365 + 1."""
+        data = pl.DataFrame(
+            {
+                "date": [
+                    date(2020, 12, 31),  # Day 366 → maps to day 1
+                    date(2020, 1, 1),  # Day 1 → maps to day 1
+                ],
+                "streamflow": [100.0, 80.0],
+                "member": ["m1", "m1"],
+            }
+        )
+
+        _, result = _compute(data)
+
+        # Both should be grouped to day 1
+        assert len(result) == 1
+        # Average of 100 and 80
+        assert result["m1"][0] == 90.0
+
+    def test_indicators(self):
+        """Computes the seasonal metrics for each member."""
+        data = pl.DataFrame(
+            [
+                {
+                    "date": date(year, month, 15),
+                    "streamflow": float(month)
+                    * (1.1 if member == "m2" else 1),
+                    "member": member,
+                }
+                for year in [2020, 2021]
+                for month in range(1, 13)
+                for member in ["m2", "m1"]
+            ]
+        )
+
+        result, _ = _compute(data)
+
+        assert result.columns == [
+            "member",
+            "winter_min",
+            "summer_min",
+            "spring_max",
+            "autumn_max",
+            "mean",
+        ]
+        assert result["member"].to_list() == ["m1", "m2"]
+        assert result.row(0) == ("m1", 1.0, 5.0, 6.0, 12.0, 6.5)
+        assert result.row(1) == pytest.approx(
+            ("m2", 1.1, 5.5, 6.6, 13.2, 7.15)
+        )
+
+    def test_indicators_seasonal_boundaries(self):
+        """Verify correct month boundaries for each season."""
+        # Winter: months 1-3, Summer: months 5-10, Spring: months 3-6, Autumn: months 9-12
+        month_values = {
+            1: 10,  # Winter only
+            2: 11,  # Winter only
+            3: 12,  # Winter + Spring
+            4: 100,  # Spring only
+            5: 1,  # Spring + Summer
+            6: 2,  # Spring + Summer
+            7: 3,  # Summer only
+            8: 4,  # Summer only
+            9: 50,  # Summer + Autumn
+            10: 5,  # Summer + Autumn
+            11: 60,  # Autumn only
+            12: 70,  # Autumn only
+        }
+        data = pl.DataFrame(
+            {
+                "date": [date(2020, month, 15) for month in month_values],
+                "streamflow": [float(v) for v in month_values.values()],
+                "member": "test",
+            }
+        )
+
+        result, _ = _compute(data)
+
+        # Winter min (months 1-3): min of 10, 11, 12 = 10
+        assert result["winter_min"][0] == 10.0
+        # Summer min (months 5-10): min of 1, 2, 3, 4, 50, 5 = 1
+        assert result["summer_min"][0] == 1.0
+        # Spring max (months 3-6): max of 12, 100, 1, 2 = 100
+        assert result["spring_max"][0] == 100.0
+        # Autumn max (months 9-12): max of 50, 5, 60, 70 = 70
+        assert result["autumn_max"][0] == 70.0
+
+    def test_annual_indicators_median_over_years(self):
+        """Annual indicators are the median over the years with data."""
+        data = pl.DataFrame(
+            {
+                "date": [
+                    date(2020, 2, 1),
+                    date(2021, 2, 1),
+                    date(2022, 2, 1),
+                    date(2023, 7, 1),
+                ],
+                "streamflow": [1.0, 5.0, 3.0, 100.0],
+                "member": "m1",
+            }
+        )
+
+        result, _ = _compute(data)
+
+        # 2023 has no winter day and is ignored
+        assert result["winter_min"][0] == 3.0
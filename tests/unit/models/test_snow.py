@@ -74,6 +74,14 @@ class TestGetModel:
         assert not np.allclose(result_cold, result_warm)
 
 
+class TestGetParamNames:
+    """Tests for get_param_names function."""
+
+    def test_cemaneige_param_names(self):
+        """Returns CemaNeige parameter names in the model's order."""
+        assert snow.get_param_names("cemaneige") == ["ctg", "kf", "qnbv"]
+
+
 class TestHypothesis:
     """Property-based tests for snow model."""
 
@@ -1,11 +1,14 @@
 """Unit tests for holmes.app module."""
 
 import os
+from pathlib import Path
 from unittest.mock import patch
 
+import pytest
 from starlette.applications import Starlette
 
 from holmes.app import create_app
+from holmes.exceptions import HolmesConfigError
 
 
 class TestCreateApp:
@@ -110,3 +113,42 @@ class TestRunServer:
         call_kwargs = mock_uvicorn_run.call_args[1]
         assert call_kwargs["log_level"] == "info"
         assert call_kwargs["reload"] is False
+
+    @patch("holmes.app.uvicorn.run")
+    @patch("holmes.app.batch.run_batch")
+    @patch("holmes.app.init_logging")
+    def test_run_server_calibrate(
+        self, mock_init_logging, mock_run_batch, mock_uvicorn_run
+    ):
+        """The calibrate subcommand runs the manifest without the server."""
+        from holmes.app import run_server
+
+        with patch(
+            "sys.argv",
+            ["holmes", "calibrate", "manifest.toml", "-o", "out.parquet"],
+        ):
+            run_server()
+
+        mock_run_batch.assert_called_once_with(
+            Path("manifest.toml"), Path("out.parquet"), workers=None
+        )
+        mock_uvicorn_run.assert_not_called()
+
+    @patch("holmes.app.batch.run_batch")
+    @patch("holmes.app.init_logging")
+    def test_run_server_calibrate_invalid_manifest(
+        self, mock_init_logging, mock_run_batch, capsys
+    ):
+        """Invalid manifests exit with an error message."""
+        from holmes.app import run_server
+
+        mock_run_batch.side_effect = HolmesConfigError("invalid manifest")
+
+        with (
+            patch("sys.argv", ["holmes", "calibrate", "manifest.toml"]),
+            pytest.raises(SystemExit) as exc,
+        ):
+            run_server()
+
+        assert exc.value.code == 1
+        assert "invalid manifest" in capsys.readouterr().err
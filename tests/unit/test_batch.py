@@ -0,0 +1,227 @@
+"""Unit tests for holmes.batch module."""
+
+import polars as pl
+import pytest
+
+from holmes import batch
+from holmes.exceptions import HolmesConfigError
+from holmes.models import calibration
+
+SCE_PARAMS = """
+[algorithm_params]
+n_complexes = 2
+k_stop = 2
+max_evaluations = 50
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """Write a manifest, returning its path."""
+
+    def write(content: str):
+        path = tmp_path / "manifest.toml"
+        path.write_text(content)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def job():
+    """Small calibration job."""
+    return batch.CalibrationJob(
+        catchment="Au Saumon",
+        hydro_model="gr4j",
+        snow_model=None,
+        objective="nse",
+        transformation="none",
+        start="2000-01-01",
+        end="2000-12-31",
+        algorithm="sce",
+        algorithm_params={
+            param["name"]: param["default"]
+            for param in calibration.get_config("sce")
+        }
+        | {"n_complexes": 2, "k_stop": 2, "max_evaluations": 50},
+    )
+
+
+class TestReadManifest:
+    """Tests for read_manifest."""
+
+    def test_combinations(self, manifest):
+        """One job is created for each combination."""
+        jobs = batch.read_manifest(manifest("""
+                catchments = ["Au Saumon", "Leaf"]
+                hydro_models = ["gr4j", "bucket"]
+                snow_models = ["none", "cemaneige"]
+                objectives = ["nse", "kge"]
+                transformations = ["none", "sqrt", "log"]
+                start = "2000-01-01"
+                end = "2001-12-31"
+                """))
+
+        assert len(jobs) == 2 * 2 * 2 * 2 * 3
+        assert jobs[0] == batch.CalibrationJob(
+            catchment="Au Saumon",
+            hydro_model="gr4j",
+            snow_model=None,
+            objective="nse",
+            transformation="none",
+            start="2000-01-01",
+            end="2001-12-31",
+            algorithm="sce",
+            algorithm_params={
+                param["name"]: param["default"]
+                for param in calibration.get_config("sce")
+            },
+        )
+        assert {job.snow_model for job in jobs} == {None, "cemaneige"}
+
+    def test_defaults(self, manifest):
+        """Only the catchments and hydro models are required."""
+        jobs = batch.read_manifest(
+            manifest(
+                'catchments = ["Leaf"]\nhydro_models = ["gr4j"]\n' + SCE_PARAMS
+            )
+        )
+
+        assert len(jobs) == 1
+        assert jobs[0].snow_model is None
+        assert jobs[0].objective == "nse"
+        assert jobs[0].transformation == "none"
+        assert jobs[0].start is None
+        assert jobs[0].end is None
+        assert jobs[0].algorithm_params["n_complexes"] == 2
+        assert jobs[0].algorithm_params["p_convergence_threshold"] == 0.1
+
+    @pytest.mark.parametrize(
+        "content, match",
+        [
+            ('hydro_models = ["gr4j"]', "must provide `catchments`"),
+            ('catchments = ["Leaf"]', "must provide `hydro_models`"),
+            (
+                'catchments = ["Leaf"]\nhydro_models = ["unknown"]',
+                "Unknown `hydro_models`: unknown",
+            ),
+            (
+                'catchments = ["Leaf"]\nhydro_models = []',
+                "non-empty list",
+            ),
+            (
+                'catchments = "Leaf"\nhydro_models = ["gr4j"]',
+                "non-empty list",
+            ),
+            (
+                (
+                    'catchments = ["Leaf"]\nhydro_models = ["gr4j"]\n'
+                    'algorithm = "unknown"'
+                ),
+                "Unknown calibration algorithm",
+            ),
+            (
+                (
+                    'catchments = ["Leaf"]\nhydro_models = ["gr4j"]\n'
+                    "[algorithm_params]\nunknown = 1"
+                ),
+                "Unknown sce parameters: unknown",
+            ),
+            ("catchments = [", "Failed to read the manifest"),
+        ],
+    )
+    def test_invalid(self, manifest, content, match):
+        """Invalid manifests raise HolmesConfigError."""
+        with pytest.raises(HolmesConfigError, match=match):
+            batch.read_manifest(manifest(content))
+
+    def test_missing_file(self, tmp_path):
+        """Missing manifests raise HolmesConfigError."""
+        with pytest.raises(HolmesConfigError, match="Failed to read"):
+            batch.read_manifest(tmp_path / "missing.toml")
+
+
+class TestRunJob:
+    """Tests for run_job."""
+
+    def test_calibration(self, job):
+        """The calibrated parameters and objectives are returned."""
+        row = batch.run_job(job)
+
+        assert row["error"] is None
+        assert row["param_names"] == ["x1", "x2", "x3", "x4"]
+        assert len(row["params"]) == 4
+        assert -float("inf") < row["nse"] <= 1
+        assert row["rmse"] >= 0
+        assert row["duration"] > 0
+
+    def test_calibration_with_snow(self, job):
+        """The snow model's parameters come before the hydro model's."""
+        row = batch.run_job(job._replace(snow_model="cemaneige"))
+
+        assert row["error"] is None
+        assert row["param_names"] == [
+            "ctg",
+            "kf",
+            "qnbv",
+            "x1",
+            "x2",
+            "x3",
+            "x4",
+        ]
+        assert len(row["params"]) == 7
+
+    def test_default_period(self, job):
+        """Without dates, the catchment's whole period is calibrated."""
+        row = batch.run_job(
+            job._replace(catchment="Leaf", start=None, end=None)
+        )
+
+        assert row["error"] is None
+        assert (row["start"], row["end"]) == next(
+            period
+            for name, _, period in batch.data.get_available_catchments()
+            if name == "Leaf"
+        )
+
+    def test_error(self, job):
+        """Errors are reported instead of raised."""
+        row = batch.run_job(job._replace(catchment="Unknown"))
+
+        assert "Unknown" in row["error"]
+        assert row["params"] is None
+        assert row["nse"] is None
+
+
+class TestRunBatch:
+    """Tests for run_jobs and run_batch."""
+
+    def test_run_batch(self, manifest, tmp_path):
+        """Results of every job are written to Parquet, in order."""
+        output = tmp_path / "results" / "calibrations.parquet"
+
+        results = batch.run_batch(
+            manifest("""
+                catchments = ["Au Saumon", "Unknown"]
+                hydro_models = ["gr4j", "bucket"]
+                start = "2000-01-01"
+                end = "2000-12-31"
+                """ + SCE_PARAMS),
+            output,
+            workers=2,
+        )
+
+        assert pl.read_parquet(output).equals(results)
+        assert results.schema == pl.Schema(batch.RESULTS_SCHEMA)
+        assert results.select("catchment", "hydro_model").rows() == [
+            ("Au Saumon", "gr4j"),
+            ("Au Saumon", "bucket"),
+            ("Unknown", "gr4j"),
+            ("Unknown", "bucket"),
+        ]
+        assert results["error"].is_null().to_list() == [
+            True,
+            True,
+            False,
+            False,
+        ]
@@ -55,6 +55,24 @@ class TestConfigValidation:
             del sys.modules["holmes.config"]
         importlib.import_module("holmes.config")
 
+    def test_invalid_max_concurrent_calibrations_raises_config_error(self):
+        """Invalid MAX_CONCURRENT_CALIBRATIONS should raise on module load."""
+        if "holmes.config" in sys.modules:
+            del sys.modules["holmes.config"]
+
+        with patch(
+            "holmes.validation.validate_positive_int",
+            side_effect=ValueError("MAX_CONCURRENT_CALIBRATIONS 0 is invalid"),
+        ):
+            with pytest.raises(HolmesConfigError) as exc_info:
+                importlib.import_module("holmes.config")
+
+            assert "MAX_CONCURRENT_CALIBRATIONS" in str(exc_info.value)
+
+        if "holmes.config" in sys.modules:
+            del sys.modules["holmes.config"]
+        importlib.import_module("holmes.config")
+
     def test_config_loads_with_valid_defaults(self):
         """Config should load successfully with valid defaults."""
         from holmes import config
@@ -65,3 +83,11 @@ class TestConfigValidation:
         assert hasattr(config, "HOST")
         assert isinstance(config.PORT, int)
         assert isinstance(config.HOST, str)
+        assert config.MAX_CONCURRENT_CALIBRATIONS >= 1
+        assert config.FORCINGS_CACHE_SIZE >= 1
+        assert config.CALIBRATION_UPDATE_RATE >= 1
+        assert config.CALIBRATION_SIMULATION_RATE >= 1
+        assert config.CALIBRATION_CHECKPOINT_INTERVAL >= 1
+        assert config.CALIBRATION_CHECKPOINT_MAX_AGE >= 1
+        assert config.PROJECTION_CACHE_SIZE >= 1
+        assert isinstance(config.PROJECTION_CACHE_ON_DISK, bool)
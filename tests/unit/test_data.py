@@ -4,14 +4,23 @@ import csv
 from datetime import datetime, timedelta
 from unittest.mock import mock_open, patch
 
+import numpy as np
 import polars as pl
 import pytest
 
-from holmes import data
+from holmes import data, validation
 from holmes.exceptions import HolmesDataError
 from holmes.utils.paths import data_dir
 
 
+@pytest.fixture(autouse=True)
+def empty_cache(tmp_path, monkeypatch):
+    """Start every test with an empty observation cache."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(data, "cache_dir", cache_dir)
+    return cache_dir
+
+
 class TestReadData:
     """Tests for read_data function."""
 
@@ -83,6 +92,160 @@ class TestReadData:
             data.read_data("NonExistent", "2000-01-01", "2005-12-31")
 
 
+class TestReadForcings:
+    """Tests for read_forcings function and its cache."""
+
+    def test_read_forcings_matches_read_data(self):
+        """Arrays hold the same values as the data frame."""
+        df, warmup_steps = data.read_data(
+            "Au Saumon", "2000-01-01", "2005-12-31"
+        )
+        forcings = data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        assert forcings.warmup_steps == warmup_steps
+        assert forcings.dates.equals(df["date"])
+        assert (forcings.precipitation == df["precipitation"].to_numpy()).all()
+        assert (forcings.observations == df["streamflow"].to_numpy()).all()
+        assert forcings.day_of_year.dtype == np.uintp
+        assert forcings.day_of_year[0] == 1
+        assert forcings.cemaneige is None
+
+    def test_arrays_are_read_only(self):
+        """Cached arrays can't be modified by callers."""
+        forcings = data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        for array in (
+            forcings.precipitation,
+            forcings.pet,
+            forcings.temperature,
+            forcings.observations,
+            forcings.day_of_year,
+        ):
+            assert array is not None
+            assert array.flags.c_contiguous
+            assert not array.flags.writeable
+
+    def test_hits_and_misses(self):
+        """Repeated reads of the same period are served from the cache."""
+        first = data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        second = data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        data.read_forcings(
+            "Au Saumon", "2000-01-01", "2005-12-31", warmup_length=1
+        )
+        assert second.precipitation is first.precipitation
+        info = data.get_forcings_cache_info()
+        assert info["hits"] == 1
+        assert info["misses"] == 2
+        assert info["entries"] == 2
+        assert (
+            info["size"]
+            == first.nbytes
+            + data.read_forcings(
+                "Au Saumon", "2000-01-01", "2005-12-31", warmup_length=1
+            ).nbytes
+        )
+
+    def test_with_snow_loads_cemaneige(self):
+        """CemaNeige metadata is loaded and kept once requested."""
+        data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        forcings = data.read_forcings(
+            "Au Saumon", "2000-01-01", "2005-12-31", with_snow=True
+        )
+        assert forcings.cemaneige == data.read_cemaneige_info("Au Saumon") | {
+            "altitude_layers": forcings.cemaneige["altitude_layers"]
+        }
+        cached = data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        assert cached.cemaneige is forcings.cemaneige
+
+    def test_with_snow_missing_cemaneige(self):
+        """Requesting snow for a catchment without CemaNeige info raises."""
+        with pytest.raises(HolmesDataError, match="CemaNeige"):
+            data.read_forcings(
+                "Leaf", "1970-01-01", "1975-12-31", with_snow=True
+            )
+
+    def test_with_snow_missing_temperature(self):
+        """Requesting snow for a catchment without temperature raises."""
+        df, warmup_steps = data.read_data(
+            "Au Saumon", "2000-01-01", "2005-12-31"
+        )
+        with patch.object(
+            data,
+            "read_data",
+            return_value=(df.drop("temperature"), warmup_steps),
+        ):
+            forcings = data.read_forcings(
+                "Au Saumon", "2000-01-01", "2005-12-31"
+            )
+            assert forcings.temperature is None
+            with pytest.raises(HolmesDataError, match="temperature"):
+                data.read_forcings(
+                    "Au Saumon", "2000-01-01", "2005-12-31", with_snow=True
+                )
+
+    def test_errors_are_not_cached(self):
+        """Failed reads raise every time."""
+        for _ in range(2):
+            with pytest.raises(HolmesDataError):
+                data.read_forcings("NonExistent", "2000-01-01", "2005-12-31")
+        assert data.get_forcings_cache_info()["entries"] == 0
+
+    def test_invalidated_by_modification(self, tmp_path, monkeypatch):
+        """Changing the observation file invalidates its cached forcings."""
+        monkeypatch.setattr(data, "data_dir", tmp_path)
+        monkeypatch.setattr(data, "cache_dir", tmp_path / "cache")
+        monkeypatch.setattr(validation, "data_dir", tmp_path)
+        path = tmp_path / "Test_Observations.csv"
+        path.write_text(
+            "Date,P,E0,Qo\n2000-01-01,1.0,2.0,3.0\n2000-01-02,1.0,2.0,3.0\n"
+        )
+        forcings = data.read_forcings(
+            "Test", "2000-01-01", "2000-01-02", warmup_length=0
+        )
+        assert forcings.precipitation[0] == 1.0
+
+        path.write_text(
+            "Date,P,E0,Qo\n2000-01-01,10.0,2.0,3.0\n2000-01-02,1.0,2.0,3.0\n"
+        )
+        forcings = data.read_forcings(
+            "Test", "2000-01-01", "2000-01-02", warmup_length=0
+        )
+        assert forcings.precipitation[0] == 10.0
+        assert data.get_forcings_cache_info()["misses"] == 2
+
+    def test_least_recently_used_evicted(self, monkeypatch):
+        """Entries are evicted in LRU order to stay within the size."""
+        monkeypatch.setattr(data.config, "FORCINGS_CACHE_SIZE", 1)
+        periods = {
+            "Au Saumon": ("1980-01-01", "2003-12-31"),
+            "Leaf": ("1960-01-01", "1987-12-31"),
+            "Baskatong": ("1985-01-01", "2017-12-31"),
+        }
+        first = data.read_forcings("Au Saumon", *periods["Au Saumon"])
+        second = data.read_forcings("Leaf", *periods["Leaf"])
+        assert first.nbytes + second.nbytes < 2**20
+        data.read_forcings("Au Saumon", *periods["Au Saumon"])
+        data.read_forcings("Baskatong", *periods["Baskatong"])
+
+        info = data.get_forcings_cache_info()
+        assert info["size"] <= info["max_size"]
+        assert info["entries"] == 2
+        data.read_forcings("Au Saumon", *periods["Au Saumon"])
+        assert data.get_forcings_cache_info()["hits"] == 2
+        data.read_forcings("Leaf", *periods["Leaf"])
+        assert data.get_forcings_cache_info()["misses"] == 4
+
+    def test_clear(self):
+        """Clearing empties the cache and resets its statistics."""
+        data.read_forcings("Au Saumon", "2000-01-01", "2005-12-31")
+        data.clear_forcings_cache()
+        assert data.get_forcings_cache_info() == {
+            "hits": 0,
+            "misses": 0,
+            "size": 0,
+            "entries": 0,
+            "max_size": data.config.FORCINGS_CACHE_SIZE * 2**20,
+        }
+
+
 class TestGetAvailableCatchments:
     """Tests for get_available_catchments function."""
 
@@ -157,6 +320,54 @@ class TestReadCatchmentData:
         assert result["Date"].dtype == pl.Date
 
 
+class TestObservationCache:
+    """Tests for the cache of parsed observation files."""
+
+    def test_first_read_writes_cache(self, empty_cache):
+        """Reading a catchment caches it as an Arrow IPC file."""
+        data.read_catchment_data("Au Saumon")
+        assert (
+            len(list(empty_cache.glob("Au Saumon_Observations.*.arrow"))) == 1
+        )
+
+    def test_cache_hit_skips_csv(self):
+        """Later reads use the cache instead of parsing the csv."""
+        expected = data.read_catchment_data("Au Saumon").collect()
+        with patch("polars.scan_csv", side_effect=AssertionError):
+            result = data.read_catchment_data("Au Saumon").collect()
+            min_date, max_date = data._get_available_period("Au Saumon")
+        assert result.equals(expected)
+        assert result["Date"].dtype == pl.Date
+        assert min_date == str(expected["Date"].min())
+        assert max_date == str(expected["Date"].max())
+
+    def test_cache_invalidated_by_modification(self, tmp_path, monkeypatch):
+        """Changing the csv invalidates and replaces its cache."""
+        monkeypatch.setattr(data, "data_dir", tmp_path)
+        path = tmp_path / "Test_Observations.csv"
+        path.write_text("Date,P,E0,Qo\n2000-01-01,1.0,2.0,3.0\n")
+        assert data.read_catchment_data("Test").collect()["P"][0] == 1.0
+
+        path.write_text(
+            "Date,P,E0,Qo\n2000-01-01,10.0,2.0,3.0\n2000-01-02,1.0,2.0,3.0\n"
+        )
+        assert data.read_catchment_data("Test").collect()["P"][0] == 10.0
+        assert len(list(data.cache_dir.glob("Test_Observations.*"))) == 1
+
+    def test_cache_write_failure_falls_back_to_csv(self, empty_cache):
+        """An unwritable cache doesn't prevent reading the data."""
+        empty_cache.parent.mkdir(parents=True, exist_ok=True)
+        empty_cache.write_text("not a directory")
+        result = data.read_catchment_data("Au Saumon").collect()
+        assert result["Date"].dtype == pl.Date
+        assert (
+            data._read_cached_observations(
+                data_dir / "Au Saumon_Observations.csv"
+            )
+            is None
+        )
+
+
 class TestReadProjectionData:
     """Tests for read_projection_data function."""
 
@@ -168,6 +379,198 @@ class TestReadProjectionData:
             assert isinstance(result, pl.LazyFrame)
 
 
+@pytest.fixture
+def projection_dir(tmp_path, monkeypatch):
+    """Data directory with a small projection csv for the `Test` catchment."""
+    monkeypatch.setattr(data, "data_dir", tmp_path)
+    rows = [
+        {
+            "date": f"2050-01-0{day}",
+            "precipitation": float(day),
+            "temperature": -float(day),
+            "member": member,
+            "scenario": scenario,
+            "model": model,
+            "horizon": horizon,
+        }
+        for model, horizon, scenario in [
+            ("CSI", "REF", "REF"),
+            ("CSI", "2050", "RCP4.5"),
+            ("CRCM 5/A", "2050", "RCP8.5"),
+        ]
+        for member in (2, 1)
+        for day in (1, 2, 3)
+    ]
+    pl.DataFrame(rows).write_csv(tmp_path / "Test_Projections.csv")
+    return tmp_path
+
+
+class TestProjectionStore:
+    """Tests for the partitioned projection data."""
+
+    def test_convert_projection_data(self, projection_dir):
+        """Conversion writes one partition per model, horizon and scenario."""
+        store = data.convert_projection_data("Test")
+
+        assert store == projection_dir / "Test_Projections"
+        partitions = sorted(
+            str(path.relative_to(store))
+            for path in store.glob("model=*/horizon=*/scenario=*")
+        )
+        assert len(partitions) == 3
+        assert "model=CSI/horizon=REF/scenario=REF" in partitions
+        assert not list(projection_dir.glob(".*"))
+
+    def test_read_converted_matches_csv(self, projection_dir):
+        """Converted data has the same rows as the csv."""
+        from_csv = (
+            data.read_projection_data(
+                "Test", model="CSI", horizon="2050", scenario="RCP4.5"
+            )
+            .sort("member", "date")
+            .collect()
+        )
+        data.convert_projection_data("Test")
+        from_store = (
+            data.read_projection_data(
+                "Test", model="CSI", horizon="2050", scenario="RCP4.5"
+            )
+            .sort("member", "date")
+            .collect()
+        )
+
+        assert len(from_store) == 6
+        assert from_store.select(from_csv.columns).equals(
+            from_csv.with_columns(pl.col("horizon").cast(pl.String))
+        )
+
+    def test_read_only_requested_partition(self, projection_dir):
+        """Files of other partitions are never read."""
+        store = data.convert_projection_data("Test")
+        for path in store.glob("model=CSI/horizon=REF/**/*.parquet"):
+            path.write_bytes(b"not parquet")
+
+        result = data.read_projection_data(
+            "Test", model="CRCM 5/A", horizon="2050", scenario="RCP8.5"
+        ).collect()
+
+        assert len(result) == 6
+        assert result["model"].unique().to_list() == ["CRCM 5/A"]
+        assert result["temperature"].max() == -1.0
+
+    def test_read_projection_configs_from_partitions(self, projection_dir):
+        """Configs are listed from the partition directories."""
+        store = data.convert_projection_data("Test")
+        for path in store.glob("**/*.parquet"):
+            path.unlink()
+
+        configs = data.read_projection_configs("Test")
+
+        assert configs.rows() == [
+            ("CRCM 5/A", "2050", "RCP8.5"),
+            ("CSI", "2050", "RCP4.5"),
+            ("CSI", "REF", "REF"),
+        ]
+
+    def test_read_projection_configs_from_csv(self, projection_dir):
+        """Without conversion, configs are read from the csv."""
+        configs = data.read_projection_configs("Test")
+
+        assert configs.rows() == [
+            ("CRCM 5/A", "2050", "RCP8.5"),
+            ("CSI", "2050", "RCP4.5"),
+            ("CSI", "REF", "REF"),
+        ]
+
+    def test_convert_replaces_previous_conversion(self, projection_dir):
+        """Converting again replaces the previous partitions."""
+        data.convert_projection_data("Test")
+        pl.read_csv(projection_dir / "Test_Projections.csv").filter(
+            pl.col("model") == "CSI"
+        ).write_csv(projection_dir / "Test_Projections.csv")
+
+        data.convert_projection_data("Test")
+
+        assert data.read_projection_configs("Test")["model"].to_list() == [
+            "CSI",
+            "CSI",
+        ]
+        assert not list(projection_dir.glob(".*"))
+
+    def test_convert_stores_source_hash(self, projection_dir):
+        """The source hash given at conversion can be read back."""
+        store = projection_dir / "Test_Projections"
+        assert data.read_projection_source_hash(store) is None
+
+        data.convert_projection_data("Test", source_hash="abc")
+
+        assert data.read_projection_source_hash(store) == "abc"
+        assert len(data.read_projection_data("Test").collect()) == 18
+
+    def test_write_projection_partitions(self, projection_dir):
+        """Blocks are written one after the other into partitions."""
+        csv = pl.read_csv(
+            projection_dir / "Test_Projections.csv", try_parse_dates=True
+        )
+        produced = []
+
+        def blocks():
+            for (model,), block in csv.group_by("model", maintain_order=True):
+                produced.append(model)
+                yield block
+
+        store = data.write_projection_partitions(
+            projection_dir / "Test_Projections", blocks(), source_hash="abc"
+        )
+
+        assert produced == ["CSI", "CRCM 5/A"]
+        assert data.read_projection_source_hash(store) == "abc"
+        assert len(data.read_projection_configs("Test")) == 3
+        result = data.read_projection_data(
+            "Test", model="CSI", horizon="REF", scenario="REF"
+        ).collect()
+        assert result["member"].to_list() == [1, 1, 1, 2, 2, 2]
+
+    def test_write_projection_partitions_split(self, projection_dir):
+        """A partition split between blocks raises without replacing data."""
+        csv = pl.read_csv(
+            projection_dir / "Test_Projections.csv", try_parse_dates=True
+        )
+        store = data.write_projection_partitions(
+            projection_dir / "Test_Projections", [csv], source_hash="abc"
+        )
+
+        with pytest.raises(HolmesDataError, match="split between blocks"):
+            data.write_projection_partitions(
+                store,
+                [csv.filter(pl.col("member") == 1), csv],
+                source_hash="def",
+            )
+
+        assert data.read_projection_source_hash(store) == "abc"
+        assert len(data.read_projection_data("Test").collect()) == 18
+        assert not list(projection_dir.glob(".*"))
+
+    def test_convert_missing_csv(self, projection_dir):
+        """Converting a catchment without projections raises."""
+        with pytest.raises(HolmesDataError, match="not found"):
+            data.convert_projection_data("Missing")
+
+    def test_get_projection_data_version(self, projection_dir):
+        """The version changes when the projections are converted again."""
+        assert data.get_projection_data_version("Missing") is None
+        csv_version = data.get_projection_data_version("Test")
+        assert csv_version.startswith("csv.")
+
+        data.convert_projection_data("Test", source_hash="abc")
+        assert data.get_projection_data_version("Test") == "abc"
+
+        data.convert_projection_data("Test")
+        store_version = data.get_projection_data_version("Test")
+        assert store_version.startswith("store.")
+        assert store_version not in (csv_version, "abc")
+
+
 class TestGetAvailablePeriod:
     """Tests for _get_available_period function."""
 
@@ -14,6 +14,7 @@ from holmes.validation import (
     validate_host,
     validate_parameter_bounds,
     validate_port,
+    validate_positive_int,
     validate_ws_message_keys,
 )
 
@@ -150,6 +151,22 @@ class TestValidatePort:
         assert "invalid" in str(exc_info.value).lower()
 
 
+class TestValidatePositiveInt:
+    """Tests for validate_positive_int function."""
+
+    def test_valid_values(self):
+        """Values of at least 1 should be returned."""
+        assert validate_positive_int(1, "N") == 1
+        assert validate_positive_int(8, "N") == 8
+
+    def test_zero(self):
+        """Zero should raise ValueError naming the setting."""
+        with pytest.raises(ValueError) as exc_info:
+            validate_positive_int(0, "N_WORKERS")
+        assert "N_WORKERS" in str(exc_info.value)
+        assert "at least 1" in str(exc_info.value)
+
+
 class TestValidateHost:
     """Tests for validate_host function."""
 
@@ -50,6 +50,45 @@ class TestSafeSend:
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_send_binary_when_requested(self):
+        """Time series messages are sent as bytes to clients opting in."""
+        ws = AsyncMock()
+        ws.client_state = WebSocketState.CONNECTED
+        ws.query_params = {"binary": "true"}
+
+        result = await safe_send(ws, "observations", {"key": "value"})
+
+        assert result is True
+        ws.send_bytes.assert_called_once()
+        ws.send_json.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_json_for_other_events(self):
+        """Other messages stay JSON even when binary is requested."""
+        ws = AsyncMock()
+        ws.client_state = WebSocketState.CONNECTED
+        ws.query_params = {"binary": "true"}
+
+        result = await safe_send(ws, "error", "message")
+
+        assert result is True
+        ws.send_json.assert_called_once()
+        ws.send_bytes.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_json_without_opt_in(self):
+        """Time series messages are JSON by default."""
+        ws = AsyncMock()
+        ws.client_state = WebSocketState.CONNECTED
+        ws.query_params = {}
+
+        result = await safe_send(ws, "simulation", {"key": "value"})
+
+        assert result is True
+        ws.send_json.assert_called_once()
+        ws.send_bytes.assert_not_called()
+
     def test_send_alias(self):
         """send is an alias for safe_send."""
         assert send is safe_send